@@ -329,12 +329,16 @@ class APIView(views.APIView):
         return (getattr(request, 'version', None), getattr(request, 'versioning_scheme', None))
 
     def dispatch(self, request, *args, **kwargs):
+        from awx.main.signals import batch_activity_stream
+
         if self.versioning_class is not None:
             scheme = self.versioning_class()
             request.version, request.versioning_scheme = (scheme.determine_version(request, *args, **kwargs), scheme)
             if 'version' in kwargs:
                 kwargs.pop('version')
-        return super(APIView, self).dispatch(request, *args, **kwargs)
+        # activity stream entries of the request are written together at the end of it
+        with batch_activity_stream():
+            return super(APIView, self).dispatch(request, *args, **kwargs)
 
     def check_permissions(self, request):
         if request.method not in ('GET', 'OPTIONS', 'HEAD'):
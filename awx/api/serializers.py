@@ -1635,6 +1635,11 @@ class ProjectUpdateDetailSerializer(ProjectUpdateSerializer):
         fields = ('*', 'host_status_counts', 'playbook_counts')
 
     def get_playbook_counts(self, obj):
+        # the live summary until the saved one counted all events of the job
+        summary = obj.get_event_summary(hosts=False)
+        if summary is not None:
+            return {'play_count': summary['play_count'], 'task_count': summary['task_count']}
+
         task_count = obj.get_event_queryset().filter(event='playbook_on_task_start').count()
         play_count = obj.get_event_queryset().filter(event='playbook_on_play_start').count()
 
@@ -3505,6 +3510,7 @@ class JobSerializer(UnifiedJobSerializer, JobOptionsSerializer):
             dict(
                 job_events=self.reverse('api:job_job_events_list', kwargs={'pk': obj.pk}),  # TODO: consider adding job_created
                 job_host_summaries=self.reverse('api:job_job_host_summaries_list', kwargs={'pk': obj.pk}),
+                event_summary=self.reverse('api:job_event_summary', kwargs={'pk': obj.pk}),
                 activity_stream=self.reverse('api:job_activity_stream_list', kwargs={'pk': obj.pk}),
                 notifications=self.reverse('api:job_notifications_list', kwargs={'pk': obj.pk}),
                 labels=self.reverse('api:job_label_list', kwargs={'pk': obj.pk}),
@@ -3568,6 +3574,11 @@ class JobDetailSerializer(JobSerializer):
         fields = ('*', 'host_status_counts', 'playbook_counts', 'custom_virtualenv')
 
     def get_playbook_counts(self, obj):
+        # the live summary until the saved one counted all events of the job
+        summary = obj.get_event_summary(hosts=False)
+        if summary is not None:
+            return {'play_count': summary['play_count'], 'task_count': summary['task_count']}
+
         task_count = obj.get_event_queryset().filter(event='playbook_on_task_start').count()
         play_count = obj.get_event_queryset().filter(event='playbook_on_play_start').count()
 
@@ -11,6 +11,7 @@ from awx.api.views import (
     JobCreateSchedule,
     JobJobHostSummariesList,
     JobJobEventsChildrenSummary,
+    JobEventSummary,
     JobJobEventsList,
     JobActivityStreamList,
     JobStdout,
@@ -29,6 +30,7 @@ urls = [
     re_path(r'^(?P<pk>[0-9]+)/job_host_summaries/$', JobJobHostSummariesList.as_view(), name='job_job_host_summaries_list'),
     re_path(r'^(?P<pk>[0-9]+)/job_events/$', JobJobEventsList.as_view(), name='job_job_events_list'),
     re_path(r'^(?P<pk>[0-9]+)/job_events/children_summary/$', JobJobEventsChildrenSummary.as_view(), name='job_job_events_children_summary'),
+    re_path(r'^(?P<pk>[0-9]+)/event_summary/$', JobEventSummary.as_view(), name='job_event_summary'),
     re_path(r'^(?P<pk>[0-9]+)/activity_stream/$', JobActivityStreamList.as_view(), name='job_activity_stream_list'),
     re_path(r'^(?P<pk>[0-9]+)/stdout/$', JobStdout.as_view(), name='job_stdout'),
     re_path(r'^(?P<pk>[0-9]+)/notifications/$', JobNotificationsList.as_view(), name='job_notifications_list'),
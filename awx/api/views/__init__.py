@@ -1635,6 +1635,8 @@ class HostRelatedSearchMixin(object):
     def related_search_fields(self):
         # Edge-case handle: https://github.com/ansible/ansible-tower/issues/7712
         ret = super(HostRelatedSearchMixin, self).related_search_fields
+        # facts are searched through ansible_facts rather than the relationship they are stored in
+        ret = [field for field in ret if field != 'host_facts__search']
         ret.append('ansible_facts')
         return ret
 
@@ -2379,6 +2381,7 @@ class JobTemplateLaunch(RetrieveAPIView):
 
     def post(self, request, *args, **kwargs):
         obj = self.get_object()
+        obj.prefetch_for_launch([obj])
 
         try:
             modern_data = self.modernize_launch_payload(data=request.data, obj=obj)
@@ -3711,6 +3714,22 @@ class JobJobEventsList(BaseJobEventsList):
         return job.get_event_queryset().prefetch_related('job__job_template', 'host').order_by('start_line')
 
 
+class JobEventSummary(GenericAPIView):
+    """
+    Counts of the events of a job by type, of its plays and tasks and of its
+    hosts by status, kept up to date while the job runs.
+    """
+
+    model = models.Job
+    name = _('Job Event Summary')
+    serializer_class = serializers.EmptySerializer
+
+    def get(self, request, *args, **kwargs):
+        obj = self.get_object()
+        # empty for jobs that ran before the summary existed
+        return Response(obj.get_event_summary() or {})
+
+
 class JobJobEventsChildrenSummary(APIView):
     renderer_classes = [JSONRenderer]
     meta_events = ('debug', 'verbose', 'warning', 'error', 'system_warning', 'deprecated')
@@ -14,6 +14,7 @@ from awx.api import serializers
 from awx.api.generics import GenericAPIView, Response
 from awx.api.permissions import IsSystemAdminOrAuditor
 from awx.main import models
+from awx.main.utils import receptor_payload
 from cryptography import x509
 from cryptography.hazmat.primitives import hashes, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
@@ -41,7 +42,8 @@ RECEPTOR_OID = "1.3.6.1.4.1.2312.19.1"
 # │   │   ├── receptor.crt
 # │   │   └── receptor.key
 # │   └── work-public-key.pem
-# └── requirements.yml
+# ├── requirements.yml
+# └── awx-payload-cache (execution nodes only)
 
 
 class InstanceInstallBundle(GenericAPIView):
@@ -102,6 +104,13 @@ class InstanceInstallBundle(GenericAPIView):
                 requirements_yml_tarinfo = tarfile.TarInfo(f"{instance_obj.hostname}_install_bundle/requirements.yml")
                 tar_addfile(requirements_yml_tarinfo, requirements_yml)
 
+                if instance_obj.node_type == 'execution':
+                    # work command that keeps the content of job payloads between jobs
+                    payload_cache_tarinfo = tarfile.TarInfo(f"{instance_obj.hostname}_install_bundle/awx-payload-cache")
+                    payload_cache_tarinfo.mode = 0o755
+                    with open(receptor_payload.__file__, 'rb') as payload_cache:
+                        tar_addfile(payload_cache_tarinfo, payload_cache.read())
+
             # respond with the tarfile
             f.seek(0)
             response = HttpResponse(f.read(), status=status.HTTP_200_OK)
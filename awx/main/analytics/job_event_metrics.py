@@ -0,0 +1,58 @@
+"""
+Event processing metrics of each job, kept in redis for a while after the job
+finishes. The node controlling the job records how fast events were read from
+the execution node and how full the queues of its event pipeline got, the
+callback receiver adds how long events took from being emitted by
+ansible-runner to being saved in the database.
+"""
+
+from django.conf import settings
+
+KEY_PREFIX = 'awx_job_event_metrics_'
+
+# HSET only when the value is larger than the one stored
+_SET_MAX_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if not current or tonumber(ARGV[2]) > tonumber(current) then
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+end
+"""
+
+
+def metrics_key(unified_job_id):
+    return f'{KEY_PREFIX}{unified_job_id}'
+
+
+def record_pipeline_metrics(conn, unified_job_id, stats):
+    key = metrics_key(unified_job_id)
+    pipe = conn.pipeline()
+    pipe.hset(key, mapping=stats)
+    pipe.expire(key, settings.AWX_JOB_EVENT_METRICS_TTL)
+    pipe.execute()
+
+
+def record_insert_lag(conn, lag_by_job):
+    """
+    lag_by_job maps unified job ids to (events, total seconds, max seconds)
+    from emitted to saved, for the events of one bulk insert.
+    """
+    set_max = conn.register_script(_SET_MAX_SCRIPT)
+    pipe = conn.pipeline()
+    for unified_job_id, (count, total, maximum) in lag_by_job.items():
+        key = metrics_key(unified_job_id)
+        pipe.hincrby(key, 'events_saved', count)
+        pipe.hincrbyfloat(key, 'insert_lag_seconds_total', total)
+        set_max(keys=[key], args=['insert_lag_seconds_max', maximum], client=pipe)
+        pipe.expire(key, settings.AWX_JOB_EVENT_METRICS_TTL)
+    pipe.execute()
+
+
+def get_job_event_metrics(conn, unified_job_id):
+    metrics = {}
+    for field, value in conn.hgetall(metrics_key(unified_job_id)).items():
+        field = field.decode('utf-8') if isinstance(field, bytes) else field
+        value = float(value)
+        metrics[field] = int(value) if value.is_integer() else value
+    if metrics.get('events_saved'):
+        metrics['insert_lag_seconds_avg'] = metrics['insert_lag_seconds_total'] / metrics['events_saved']
+    return metrics
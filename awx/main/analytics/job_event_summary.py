@@ -0,0 +1,105 @@
+"""
+Live summary of the events of each job, counted in redis by the callback
+receiver as events are saved so that watching a running job does not
+aggregate its events over and over. The summary is saved on the job at
+wrapup, see job_stats_wrapup.
+"""
+
+from collections import Counter
+
+import redis
+
+from django.conf import settings
+
+KEY_PREFIX = 'awx_job_event_summary_'
+
+# the status of a host is the last of these it had, same as create_host_status_counts
+HOST_STATUSES = ('skipped', 'ok', 'changed', 'failures', 'dark')
+
+
+_redis_conn = None
+
+
+def get_redis():
+    """
+    The connection the API reads live summaries with, shared by the requests
+    of the process through its connection pool.
+    """
+    global _redis_conn
+    if _redis_conn is None:
+        _redis_conn = redis.Redis.from_url(settings.BROKER_URL)
+    return _redis_conn
+
+
+def summary_key(unified_job_id):
+    return f'{KEY_PREFIX}{unified_job_id}'
+
+
+def event_host_status(event):
+    if event.event == 'runner_on_ok':
+        return 'changed' if event.changed else 'ok'
+    if event.event == 'runner_on_failed':
+        # ignored errors are counted as ok by ansible
+        return 'failures' if event.failed else 'ok'
+    if event.event == 'runner_on_unreachable':
+        return 'dark'
+    if event.event == 'runner_on_skipped':
+        return 'skipped'
+    return None
+
+
+def summary_fields(event):
+    fields = ['events', f'event:{event.event}']
+    if event.event == 'playbook_on_play_start':
+        fields.append('play_count')
+    elif event.event == 'playbook_on_task_start':
+        fields.append('task_count')
+    status = event_host_status(event)
+    if status and event.host_name:
+        fields.append(f'host:{status}:{event.host_name}')
+    return fields
+
+
+def record_event_summaries(conn, events):
+    """
+    Count saved events into the summary of their jobs, one HINCRBY per
+    counter and job for the whole batch.
+    """
+    counts_by_job = {}
+    for event in events:
+        counts_by_job.setdefault(getattr(event, event.JOB_REFERENCE), Counter()).update(summary_fields(event))
+    pipe = conn.pipeline()
+    for unified_job_id, counts in counts_by_job.items():
+        key = summary_key(unified_job_id)
+        for field, count in counts.items():
+            pipe.hincrby(key, field, count)
+        pipe.expire(key, settings.AWX_JOB_EVENT_METRICS_TTL)
+    pipe.execute()
+
+
+def get_job_event_summary(conn, unified_job_id, hosts=True):
+    """
+    The summary of a job, or None when no event of the job was counted.
+    host_status_counts counts the hosts by their worst status like the
+    playbook_on_stats event does, hosts has the counters of each host.
+    """
+    counters = conn.hgetall(summary_key(unified_job_id))
+    if not counters:
+        return None
+    summary = {'events': 0, 'event_counts': {}, 'play_count': 0, 'task_count': 0, 'host_status_counts': {}}
+    host_counts = {}
+    for field, value in counters.items():
+        field = field.decode('utf-8') if isinstance(field, bytes) else field
+        value = int(value)
+        if field.startswith('event:'):
+            summary['event_counts'][field[len('event:') :]] = value
+        elif field.startswith('host:'):
+            status, host_name = field[len('host:') :].split(':', 1)
+            host_counts.setdefault(host_name, {})[status] = value
+        else:
+            summary[field] = value
+    host_status_counts = Counter(max(statuses, key=HOST_STATUSES.index) for statuses in host_counts.values())
+    summary['host_status_counts'] = dict(host_status_counts)
+    if hosts:
+        summary['hosts'] = host_counts
+    return summary
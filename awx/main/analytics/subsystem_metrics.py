@@ -126,6 +126,45 @@ class SetFloatM(SetIntM):
             return 0
 
 
+class SetFloatLabeledM(BaseM):
+    """
+    A gauge with one value for each value of a label, like one value per task name.
+    All values are saved to redis together as a JSON object.
+    """
+
+    def __init__(self, field, help_text, label):
+        self.label = label
+        super(SetFloatLabeledM, self).__init__(field, help_text)
+        self.current_value = {}
+
+    def reset_value(self, conn):
+        conn.hset(root_key, self.field, json.dumps({}))
+        self.current_value = {}
+
+    def decode_value(self, value):
+        if value is None:
+            return {}
+        try:
+            data = json.loads(value)
+        except ValueError:
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        return data
+
+    def store_value(self, conn):
+        if self.metric_has_changed:
+            conn.hset(root_key, self.field, json.dumps(self.current_value))
+            self.metric_has_changed = False
+
+    def to_prometheus(self, instance_data):
+        output_text = f"# HELP {self.field} {self.help_text}\n# TYPE {self.field} gauge\n"
+        for instance in instance_data:
+            for label_value, value in instance_data[instance].get(self.field, {}).items():
+                output_text += f'{self.field}{{node="{instance}",{self.label}="{label_value}"}} {value}\n'
+        return output_text
+
+
 class HistogramM(BaseM):
     def __init__(self, field, help_text, buckets):
         self.buckets = buckets
@@ -359,6 +398,8 @@ class DispatcherMetrics(Metrics):
         SetFloatM('task_manager_process_pending_tasks_seconds', 'Time spent processing pending tasks'),
         SetFloatM('task_manager__schedule_seconds', 'Time spent in running the entire _schedule'),
         IntM('task_manager__schedule_calls', 'Number of calls to _schedule, after lock is acquired'),
+        IntM('task_manager_wakeups_requested', 'Number of times a run of the manager was requested'),
+        IntM('task_manager_wakeups_dispatched', 'Number of manager runs dispatched after coalescing requests'),
         SetFloatM('task_manager_recorded_timestamp', 'Unix timestamp when metrics were last recorded'),
         SetIntM('task_manager_tasks_started', 'Number of tasks started'),
         SetIntM('task_manager_running_processed', 'Number of running tasks processed'),
@@ -369,10 +410,14 @@ class DispatcherMetrics(Metrics):
         SetFloatM('dependency_manager_generate_dependencies_seconds', 'Time spent generating dependencies for pending tasks'),
         SetFloatM('dependency_manager__schedule_seconds', 'Time spent in running the entire _schedule'),
         IntM('dependency_manager__schedule_calls', 'Number of calls to _schedule, after lock is acquired'),
+        IntM('dependency_manager_wakeups_requested', 'Number of times a run of the manager was requested'),
+        IntM('dependency_manager_wakeups_dispatched', 'Number of manager runs dispatched after coalescing requests'),
         SetFloatM('dependency_manager_recorded_timestamp', 'Unix timestamp when metrics were last recorded'),
         SetIntM('dependency_manager_pending_processed', 'Number of pending tasks processed'),
         SetFloatM('workflow_manager__schedule_seconds', 'Time spent in running the entire _schedule'),
         IntM('workflow_manager__schedule_calls', 'Number of calls to _schedule, after lock is acquired'),
+        IntM('workflow_manager_wakeups_requested', 'Number of times a run of the manager was requested'),
+        IntM('workflow_manager_wakeups_dispatched', 'Number of manager runs dispatched after coalescing requests'),
         SetFloatM('workflow_manager_recorded_timestamp', 'Unix timestamp when metrics were last recorded'),
         SetFloatM('workflow_manager_spawn_workflow_graph_jobs_seconds', 'Time spent spawning workflow tasks'),
         SetFloatM('workflow_manager_get_tasks_seconds', 'Time spent loading workflow tasks from db'),
@@ -381,6 +426,12 @@ class DispatcherMetrics(Metrics):
         SetIntM('dispatcher_pool_active_task_count', 'Number of active tasks in the worker pool when last task was submitted'),
         SetIntM('dispatcher_pool_max_worker_count', 'Highest number of workers in worker pool in last collection interval, about 20s'),
         SetFloatM('dispatcher_availability', 'Fraction of time (in last collection interval) dispatcher was able to receive messages'),
+        SetIntM('dispatcher_pool_queued_task_count', 'Number of tasks waiting in the local dispatcher for an idle worker'),
+        SetFloatLabeledM(
+            'dispatcher_pool_task_queue_delay_seconds',
+            'Longest time (in last collection interval) a task waited in the local dispatcher before a worker took it, by task name',
+            'task',
+        ),
     ]
 
     def __init__(self, *args, **kwargs):
@@ -445,6 +496,11 @@ class CustomToPrometheusMetricsCollector(prometheus_client.registry.Collector):
                 buckets = list(zip(metric.buckets, entry['counts']))
                 buckets = [[str(i[0]), str(i[1])] for i in buckets]
                 yield HistogramMetricFamily(metric.field, metric.help_text, buckets=buckets, sum_value=entry['sum'])
+            elif isinstance(metric, SetFloatLabeledM):
+                family = GaugeMetricFamily(metric.field, metric.help_text, labels=[metric.label])
+                for label_value, value in entry.items():
+                    family.add_metric([label_value], value)
+                yield family
             else:
                 yield GaugeMetricFamily(metric.field, metric.help_text, value=entry)
 
@@ -1,6 +1,6 @@
 from django.apps import AppConfig
 from django.utils.translation import gettext_lazy as _
-from awx.main.utils.named_url_graph import _customize_graph, generate_graph
+from awx.main.utils.named_url_graph import _customize_graph, connect_named_url_cache_signals, generate_graph
 from awx.conf import register, fields
 
 
@@ -12,6 +12,7 @@ class MainConfig(AppConfig):
         models = [m for m in self.get_models() if hasattr(m, 'get_absolute_url')]
         generate_graph(models)
         _customize_graph()
+        connect_named_url_cache_signals()
         register(
             'NAMED_URL_FORMATS',
             field_class=fields.DictField,
@@ -112,8 +112,9 @@ ANSIBLE_RUNNER_NEEDS_UPDATE_MESSAGE = (
 # Values for setting SUBSCRIPTION_USAGE_MODEL
 SUBSCRIPTION_USAGE_MODEL_UNIQUE_HOSTS = 'unique_managed_hosts'
 
-# Shared prefetch to use for creating a queryset for the purpose of writing or saving facts
-HOST_FACTS_FIELDS = ('name', 'ansible_facts', 'ansible_facts_modified', 'modified', 'inventory_id')
+# Shared prefetch to use for creating a queryset for the purpose of writing or saving facts,
+# the queryset also needs select_related('host_facts')
+HOST_FACTS_FIELDS = ('name', 'ansible_facts_modified', 'modified', 'inventory_id', 'host_facts__ansible_facts', 'host_facts__facts_hash')
 
 # Data for RBAC compatibility layer
 role_name_to_perm_mapping = {
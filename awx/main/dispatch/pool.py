@@ -9,6 +9,7 @@ from datetime import datetime
 from uuid import uuid4
 
 import collections
+import itertools
 from multiprocessing import Process
 from multiprocessing import Queue as MPQueue
 from queue import Full as QueueFull, Empty as QueueEmpty
@@ -36,6 +37,50 @@ class NoOpResultQueue(object):
         pass
 
 
+def task_name(body):
+    if isinstance(body, dict):
+        return body.get('task', 'unknown')
+    return 'unknown'
+
+
+class ReadyQueue(object):
+    """
+    Messages held by the pool until a worker is idle and pulls them.
+
+    Tasks listed in settings.DISPATCHER_PRIORITY_TASKS (the task managers and the
+    heartbeat) are kept in a separate lane that is always handed out first.
+    """
+
+    def __init__(self):
+        self.priority = collections.deque()
+        self.normal = collections.deque()
+
+    def __len__(self):
+        return len(self.priority) + len(self.normal)
+
+    def __iter__(self):
+        return itertools.chain(self.priority, self.normal)
+
+    def append(self, body):
+        if task_name(body) in settings.DISPATCHER_PRIORITY_TASKS:
+            self.priority.append(body)
+        else:
+            self.normal.append(body)
+
+    def pop(self, running, limits):
+        """
+        Return the oldest message that would not exceed its concurrency limit,
+        given a Counter of how many of each task are running, or None
+        """
+        for lane in (self.priority, self.normal):
+            for i, body in enumerate(lane):
+                limit = limits.get(task_name(body))
+                if limit is None or running[task_name(body)] < limit:
+                    del lane[i]
+                    return body
+        return None
+
+
 class PoolWorker(object):
     """
     Used to track a worker child process and its pending and finished messages.
@@ -297,6 +342,26 @@ class WorkerPool(object):
         logger.error("could not write payload to any queue, attempted order: {}".format(write_attempt_order))
         return None
 
+    @property
+    def backlog_size(self):
+        return 0
+
+    @property
+    def free_capacity(self):
+        """How many more messages could be handed to workers right away"""
+        return len(self.workers)
+
+    def held_messages(self):
+        """Messages given to this pool that have not finished yet"""
+        held = []
+        for w in self.workers:
+            w.calculate_managed_tasks()
+            held.extend(w.managed_tasks.values())
+        return held
+
+    def drain(self):
+        return 0
+
     def stop(self, signum):
         try:
             for worker in self.workers:
@@ -343,12 +408,19 @@ class AutoscalePool(WorkerPool):
         # the AutoscalePool class does not save these to redis directly, but reports via produce_subsystem_metrics
         self.scale_up_ct = 0
         self.worker_count_max = 0
+        self.queue_delay_max = {}
+
+        # messages that have not been given to a worker yet, idle workers take from here
+        self.ready_queue = ReadyQueue()
 
     def produce_subsystem_metrics(self, metrics_object):
         metrics_object.set('dispatcher_pool_scale_up_events', self.scale_up_ct)
         metrics_object.set('dispatcher_pool_active_task_count', sum(len(w.managed_tasks) for w in self.workers))
         metrics_object.set('dispatcher_pool_max_worker_count', self.worker_count_max)
+        metrics_object.set('dispatcher_pool_queued_task_count', self.backlog_size)
+        metrics_object.set('dispatcher_pool_task_queue_delay_seconds', self.queue_delay_max)
         self.worker_count_max = len(self.workers)
+        self.queue_delay_max = {}
 
     @property
     def should_grow(self):
@@ -364,7 +436,19 @@ class AutoscalePool(WorkerPool):
 
     @property
     def debug_meta(self):
-        return 'min={} max={}'.format(self.min_workers, self.max_workers)
+        return 'min={} max={} queued={}'.format(self.min_workers, self.max_workers, self.backlog_size)
+
+    @property
+    def backlog_size(self):
+        return len(self.ready_queue)
+
+    @property
+    def free_capacity(self):
+        busy = sum(1 for w in self.workers if w.busy)
+        return max(self.max_workers - busy - self.backlog_size, 0)
+
+    def held_messages(self):
+        return super(AutoscalePool, self).held_messages() + list(self.ready_queue)
 
     @log_excess_runtime(logger)
     def cleanup(self):
@@ -461,28 +545,54 @@ class AutoscalePool(WorkerPool):
                 self.worker_count_max = new_worker_ct
             return ret
 
+    def record_queue_delay(self, body):
+        if isinstance(body, dict) and 'time_ack' in body:
+            name = task_name(body)
+            delay = time.time() - body['time_ack']
+            self.queue_delay_max[name] = max(delay, self.queue_delay_max.get(name, 0.0))
+
+    def drain(self):
+        """
+        Hand queued messages to idle workers, so that a long running task never
+        blocks messages queued behind it while other workers could take them.
+
+        This is called on every write, and periodically by the consumer while
+        there is a backlog. Returns the number of messages handed out.
+        """
+        if not len(self.ready_queue):
+            return 0
+        idle = [w for w in self.workers if not w.busy]
+        random.shuffle(idle)
+        running = collections.Counter(task_name(body) for w in self.workers for body in w.managed_tasks.values())
+        limits = settings.DISPATCHER_TASK_CONCURRENCY_LIMITS
+        sent = 0
+        for w in idle:
+            body = self.ready_queue.pop(running, limits)
+            if body is None:
+                break
+            if isinstance(body, dict) and body.get('bind_kwargs'):
+                self.add_bind_kwargs(body)
+            self.record_queue_delay(body)
+            w.put(body)
+            running[task_name(body)] += 1
+            sent += 1
+        return sent
+
     def write(self, preferred_queue, body):
         if 'guid' in body:
             set_guid(body['guid'])
         try:
-            if isinstance(body, dict) and body.get('bind_kwargs'):
-                self.add_bind_kwargs(body)
             if self.should_grow:
                 self.up()
-            # we don't care about "preferred queue" round robin distribution, just
-            # find the first non-busy worker and claim it
-            workers = self.workers[:]
-            random.shuffle(workers)
-            for w in workers:
-                if not w.busy:
-                    w.put(body)
-                    break
-            else:
-                task_name = 'unknown'
-                if isinstance(body, dict):
-                    task_name = body.get('task')
-                logger.warning(f'Workers maxed, queuing {task_name}, load: {sum(len(w.managed_tasks) for w in self.workers)} / {len(self.workers)}')
-                return super(AutoscalePool, self).write(preferred_queue, body)
+            # we don't care about "preferred queue" round robin distribution, messages
+            # go to the shared ready queue and the first idle workers take them
+            self.ready_queue.append(body)
+            self.drain()
+            if len(self.ready_queue):
+                logger.warning(
+                    f'Workers maxed, queuing {task_name(body)}, load: {sum(len(w.managed_tasks) for w in self.workers)} / {len(self.workers)}, '
+                    f'queued: {len(self.ready_queue)}'
+                )
         except Exception:
             for conn in connections.all():
                 # If the database connection has a hiccup, re-establish a new
@@ -7,6 +7,7 @@ from uuid import uuid4
 from django_guid import get_guid
 
 from . import pg_bus_conn
+from .taskqueue import enqueue, idempotency_key_for, use_task_table
 from awx.main.utils import is_testing
 
 logger = logging.getLogger('awx.main.dispatch')
@@ -55,15 +56,24 @@ class task:
     @task(bind_kwargs=['dispatch_time'])
     def print_time(dispatch_time=None):
         print(f"Time I was dispatched: {dispatch_time}")
+
+    # When the dispatcher uses the durable task table (DISPATCHER_TASK_QUEUE_BACKEND = 'table'),
+    # deduplicate collapses identical pending calls (same args and kwargs) into one task cluster-wide
+
+    @task(deduplicate=True)
+    def recompute(inventory_id):
+        ...
     """
 
-    def __init__(self, queue=None, bind_kwargs=None):
+    def __init__(self, queue=None, bind_kwargs=None, deduplicate=False):
         self.queue = queue
         self.bind_kwargs = bind_kwargs
+        self.deduplicate = deduplicate
 
     def __call__(self, fn=None):
         queue = self.queue
         bind_kwargs = self.bind_kwargs
+        deduplicate = self.deduplicate
 
         class PublisherMixin(object):
             queue = None
@@ -92,7 +102,7 @@ class task:
                 return obj
 
             @classmethod
-            def apply_async(cls, args=None, kwargs=None, queue=None, uuid=None, **kw):
+            def apply_async(cls, args=None, kwargs=None, queue=None, uuid=None, idempotency_key=None, **kw):
                 queue = queue or getattr(cls.queue, 'im_func', cls.queue)
                 if not queue:
                     msg = f'{cls.name}: Queue value required and may not be None'
@@ -102,8 +112,13 @@ class task:
                 if callable(queue):
                     queue = queue()
                 if not is_testing():
-                    with pg_bus_conn() as conn:
-                        conn.notify(queue, json.dumps(obj))
+                    if use_task_table(queue):
+                        if idempotency_key is None and deduplicate:
+                            idempotency_key = idempotency_key_for(cls.name, args=args, kwargs=kwargs)
+                        enqueue(queue, obj, idempotency_key=idempotency_key)
+                    else:
+                        with pg_bus_conn() as conn:
+                            conn.notify(queue, json.dumps(obj))
                 return (obj, queue)
 
         # If the object we're wrapping *is* a class (e.g., RunJob), return
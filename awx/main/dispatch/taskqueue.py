@@ -0,0 +1,126 @@
+import hashlib
+import json
+import logging
+import os
+
+from django.conf import settings
+from django.db import connection
+
+from . import pg_bus_conn
+
+logger = logging.getLogger('awx.main.dispatch')
+
+# queues that are consumed by more than one process (or by processes other
+# than the dispatcher), these always use plain pg_notify delivery
+NOTIFY_ONLY_QUEUES = frozenset(['tower_broadcast_all', 'tower_settings_change', 'rsyslog_configurer'])
+
+# pg_notify payload sent to the dispatcher as a hint that rows are waiting
+WAKEUP_MESSAGE = {'claim': True}
+
+
+def use_task_table(queue):
+    return getattr(settings, 'DISPATCHER_TASK_QUEUE_BACKEND', 'pg_notify') == 'table' and queue not in NOTIFY_ONLY_QUEUES
+
+
+def idempotency_key_for(task_name, args=None, kwargs=None):
+    """
+    Identify a task by what it would do when ran, so that identical pending
+    publishes can be collapsed into a single unit of work.
+    The queue is not part of the key, so this collapses pending tasks cluster-wide.
+    """
+    data = json.dumps([task_name, args or [], kwargs or {}], sort_keys=True, default=str)
+    return '{}:{}'.format(task_name, hashlib.sha256(data.encode('utf-8')).hexdigest())[:255]
+
+
+def enqueue(queue, body, idempotency_key=None):
+    """
+    Save the task body to the durable queue table, then notify the queue so a
+    listening dispatcher claims it right away.
+
+    This uses the Django connection, so the task follows the transaction rules of
+    the caller, same as pg_notify publishing does.
+    Returns False if an identical task was already pending.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO main_dispatchertask (queue, idempotency_key, body, created) VALUES (%s, %s, %s, now()) '
+            'ON CONFLICT (idempotency_key) DO NOTHING RETURNING id',
+            (queue, idempotency_key, json.dumps(body)),
+        )
+        created = cursor.fetchone() is not None
+    if not created:
+        logger.debug(f'Task {body.get("task")} with key {idempotency_key} is already pending, not queuing duplicate')
+        return False
+    # postgres collapses identical notifications sent inside of a single transaction
+    with pg_bus_conn() as conn:
+        conn.notify(queue, json.dumps(WAKEUP_MESSAGE))
+    return True
+
+
+def claimant():
+    """Identify this dispatcher process on the claims it holds"""
+    return '{}:{}'.format(settings.CLUSTER_HOST_ID, os.getpid())
+
+
+def claim(queues, claimed_by, limit=None):
+    """
+    Claim up to limit pending tasks for the given queues, oldest first.
+
+    Claimed rows stay in the table until their task finishes.  Claims that have
+    not been renewed for DISPATCHER_TASK_QUEUE_CLAIM_TIMEOUT seconds belong to a
+    dispatcher that went away, those tasks are claimed again.
+    SKIP LOCKED allows multiple dispatchers to claim concurrently from the same
+    queue without blocking on each other.
+    """
+    queues = [q for q in queues if q not in NOTIFY_ONLY_QUEUES]
+    if limit is None:
+        limit = settings.DISPATCHER_TASK_QUEUE_BATCH_SIZE
+    if not queues or limit <= 0:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'UPDATE main_dispatchertask SET claimed_by = %s, claimed_at = now() WHERE id IN ('
+            'SELECT id FROM main_dispatchertask WHERE queue = ANY(%s) '
+            'AND (claimed_at IS NULL OR claimed_at < now() - make_interval(secs => %s)) '
+            'ORDER BY id LIMIT %s FOR UPDATE SKIP LOCKED'
+            ') RETURNING id, body',
+            (claimed_by, queues, settings.DISPATCHER_TASK_QUEUE_CLAIM_TIMEOUT, limit),
+        )
+        rows = cursor.fetchall()
+    bodies = []
+    for task_id, body in sorted(rows):
+        if isinstance(body, str):
+            body = json.loads(body)
+        body['task_table_id'] = task_id
+        bodies.append(body)
+    return bodies
+
+
+def renew(task_ids):
+    """Refresh the claims on tasks that are still queued or running in this dispatcher"""
+    if not task_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('UPDATE main_dispatchertask SET claimed_at = now() WHERE id = ANY(%s)', (list(task_ids),))
+
+
+def start(task_id, retry=True):
+    """
+    Called by the worker right before the task runs.  Clearing the idempotency key
+    lets an identical task be queued again, since this run may not see what changed.
+
+    The row is kept while the task runs, so a task of a dispatcher that dies
+    meanwhile is ran again once its claim expires.  Without retry the row is
+    deleted right away instead and the task runs at most once.
+    """
+    with connection.cursor() as cursor:
+        if retry:
+            cursor.execute('UPDATE main_dispatchertask SET idempotency_key = NULL WHERE id = %s', (task_id,))
+        else:
+            cursor.execute('DELETE FROM main_dispatchertask WHERE id = %s', (task_id,))
+
+
+def finish(task_id):
+    """Called by the worker once the task has ran, whatever its outcome"""
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM main_dispatchertask WHERE id = %s', (task_id,))
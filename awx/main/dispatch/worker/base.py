@@ -19,6 +19,7 @@ from django.conf import settings
 from awx.main.dispatch.pool import WorkerPool
 from awx.main.dispatch.periodic import Scheduler
 from awx.main.dispatch import pg_bus_conn
+from awx.main.dispatch import taskqueue
 from awx.main.utils.common import log_excess_runtime
 from awx.main.utils.db import set_connection_name
 import awx.main.analytics.subsystem_metrics as s_metrics
@@ -58,6 +59,9 @@ class AWXConsumerBase(object):
             self.pool = WorkerPool()
         self.pool.init_workers(self.worker.work_loop)
         self.redis = redis.Redis.from_url(settings.BROKER_URL)
+        self.claimant = taskqueue.claimant()
+        # set when the last claim from the task table was limited by free workers or the batch size
+        self.task_table_backlog = False
 
     @property
     def listening_on(self):
@@ -116,8 +120,30 @@ class AWXConsumerBase(object):
         self.pool.write(queue, body)
         self.total_messages += 1
 
+    def claim_tasks(self):
+        """
+        Claim pending tasks from the durable task table, only as many as there are
+        free workers for, the rest stay in the table where other dispatchers can claim them
+        """
+        limit = min(self.pool.free_capacity, settings.DISPATCHER_TASK_QUEUE_BATCH_SIZE)
+        if limit <= 0:
+            self.task_table_backlog = True
+            return
+        bodies = taskqueue.claim(self.queues, self.claimant, limit=limit)
+        for body in bodies:
+            self.dispatch_task(body)
+        self.task_table_backlog = len(bodies) == limit
+
+    def renew_task_claims(self):
+        """Renew the claims on tasks that are queued or running here, so no other dispatcher takes them over"""
+        task_ids = [body['task_table_id'] for body in self.pool.held_messages() if isinstance(body, dict) and 'task_table_id' in body]
+        taskqueue.renew(task_ids)
+
     def process_task(self, body):
         """Routes the task details in body as either a control task or a task-task"""
+        if body.get('claim'):
+            # wakeup hint for the durable task table, the task itself is not in the payload
+            return self.claim_tasks()
         if 'control' in body:
             try:
                 return self.control(body)
@@ -160,6 +186,8 @@ class AWXConsumerRedis(AWXConsumerBase):
 
 
 class AWXConsumerPG(AWXConsumerBase):
+    backlog_poll_interval = 0.1
+
     def __init__(self, *args, schedule=None, **kwargs):
         super().__init__(*args, **kwargs)
         self.pg_max_wait = getattr(settings, 'DISPATCHER_DB_DOWNTOWN_TOLLERANCE', settings.DISPATCHER_DB_DOWNTIME_TOLERANCE)
@@ -181,6 +209,10 @@ class AWXConsumerPG(AWXConsumerBase):
         schedule['pool_cleanup'] = {'control': self.pool.cleanup, 'schedule': timedelta(seconds=60)}
         # record subsystem metrics for the dispatcher
         schedule['metrics_gather'] = {'control': self.record_metrics, 'schedule': timedelta(seconds=20)}
+        if settings.DISPATCHER_TASK_QUEUE_BACKEND == 'table':
+            # pick up any tasks whose wakeup notification was missed, like while this dispatcher was down
+            schedule['claim_tasks'] = {'control': self.claim_tasks, 'schedule': timedelta(seconds=settings.DISPATCHER_TASK_QUEUE_POLL_INTERVAL)}
+            schedule['renew_task_claims'] = {'control': self.renew_task_claims, 'schedule': timedelta(seconds=settings.DISPATCHER_TASK_QUEUE_POLL_INTERVAL)}
         self.scheduler = Scheduler(schedule)
 
     def record_metrics(self):
@@ -214,12 +246,22 @@ class AWXConsumerPG(AWXConsumerBase):
                 # bypasses pg_notify for scheduled tasks
                 self.dispatch_task(body)
 
+        # give queued messages to any workers that finished since the last loop
+        self.pool.drain()
+
+        if self.task_table_backlog and self.pool.free_capacity:
+            # more tasks are waiting in the task table, and workers have freed up since they were left there
+            self.claim_tasks()
+
         if self.pg_is_down:
             logger.info('Dispatcher listener connection established')
             self.pg_is_down = False
 
         self.listen_start = time.time()
 
+        if self.pool.backlog_size or self.task_table_backlog:
+            # come back soon to check for idle workers, rather than waiting for the next message
+            return min(self.scheduler.time_until_next_run(), self.backlog_poll_interval)
         return self.scheduler.time_until_next_run()
 
     def run(self, *args, **kwargs):
@@ -236,6 +278,8 @@ class AWXConsumerPG(AWXConsumerBase):
                     if init is False:
                         self.worker.on_start()
                         init = True
+                        if settings.DISPATCHER_TASK_QUEUE_BACKEND == 'table':
+                            self.claim_tasks()
                     # run_periodic_tasks run scheduled actions and gives time until next scheduled action
                     # this is saved to the conn (PubSub) object in order to modify read timeout in-loop
                     conn.select_timeout = self.run_periodic_tasks()
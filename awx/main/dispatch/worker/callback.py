@@ -21,13 +21,15 @@ from awx.main.constants import ACTIVE_STATES
 from awx.main.models.events import emit_event_detail
 from awx.main.utils.profiling import AWXProfiler
 import awx.main.analytics.subsystem_metrics as s_metrics
+from awx.main.analytics.job_event_metrics import record_insert_lag
+from awx.main.analytics.job_event_summary import get_job_event_summary, record_event_summaries
 from .base import BaseWorker
 
 logger = logging.getLogger('awx.main.commands.run_callback_receiver')
 
 
-def job_stats_wrapup(job_identifier, event=None):
-    """Fill in the unified job host_status_counts, fire off notifications if needed"""
+def job_stats_wrapup(job_identifier, event=None, conn=None):
+    """Fill in the unified job host_status_counts and event_summary, fire off notifications if needed"""
     try:
         # empty dict (versus default of None) can still indicate that events have been processed
         # for job types like system jobs, and jobs with no hosts matched
@@ -35,11 +37,20 @@ def job_stats_wrapup(job_identifier, event=None):
         if event:
             host_status_counts = event.get_host_status_counts()
 
+        # other callback workers may still hold unsaved events of the job, readers
+        # only use this summary once it counted all of them, see UnifiedJob.get_event_summary
+        event_summary = None
+        try:
+            event_summary = get_job_event_summary(conn or redis.Redis.from_url(settings.BROKER_URL), job_identifier, hosts=False)
+        except Exception:
+            logger.exception('Failed to read the event summary of Job {} from redis'.format(job_identifier))
+
         # Update host_status_counts while holding the row lock
         with transaction.atomic():
             uj = UnifiedJob.objects.select_for_update().get(pk=job_identifier)
             uj.host_status_counts = host_status_counts
-            uj.save(update_fields=['host_status_counts'])
+            uj.event_summary = event_summary
+            uj.save(update_fields=['host_status_counts', 'event_summary'])
 
         uj.log_lifecycle("stats_wrapup_finished")
 
@@ -124,6 +135,22 @@ class CallbackBrokerWorker(BaseWorker):
                 logger.exception("encountered an error communicating with redis")
                 self.last_stats = time.time()
 
+    def record_job_event_lag(self, lag_by_job):
+        if not lag_by_job:
+            return
+        try:
+            record_insert_lag(self.redis, lag_by_job)
+        except Exception:
+            logger.exception("encountered an error communicating with redis")
+
+    def record_job_event_summaries(self, events):
+        if not events:
+            return
+        try:
+            record_event_summaries(self.redis, events)
+        except Exception:
+            logger.exception("encountered an error communicating with redis")
+
     def debug(self):
         return f'.  worker[pid:{self.pid}] sent={self.total} rss={self.mb}MB {self.last_event}'
 
@@ -153,6 +180,7 @@ class CallbackBrokerWorker(BaseWorker):
             metrics_events_broadcast = 0
             metrics_events_missing_created = 0
             metrics_total_job_event_processing_seconds = datetime.timedelta(seconds=0)
+            lag_by_job = {}
             for cls, events in self.buff.items():
                 if not events:
                     continue
@@ -163,7 +191,12 @@ class CallbackBrokerWorker(BaseWorker):
                         e.created = now
                         metrics_events_missing_created += 1
                     else:  # only calculate the seconds if the created time already has been set
-                        metrics_total_job_event_processing_seconds += e.modified - e.created
+                        lag = e.modified - e.created
+                        metrics_total_job_event_processing_seconds += lag
+                        job_lag = lag_by_job.setdefault(getattr(e, e.JOB_REFERENCE), [0, 0.0, 0.0])
+                        job_lag[0] += 1
+                        job_lag[1] += lag.total_seconds()
+                        job_lag[2] = max(job_lag[2], lag.total_seconds())
                 metrics_duration_to_save = time.perf_counter()
                 saved_events = []
                 try:
@@ -203,12 +236,14 @@ class CallbackBrokerWorker(BaseWorker):
                                 logger.info(f'Database Error Saving individual Event uuid={e.uuid} try={retry_count}, error: {str(exc_indv)}')
 
                 metrics_duration_to_save = time.perf_counter() - metrics_duration_to_save
+                # before the wrapup below, which saves the summary on the job
+                self.record_job_event_summaries(saved_events)
                 for e in saved_events:
                     if not getattr(e, '_skip_websocket_message', False):
                         metrics_events_broadcast += 1
                         emit_event_detail(e)
                     if getattr(e, '_notification_trigger_event', False):
-                        job_stats_wrapup(getattr(e, e.JOB_REFERENCE), event=e)
+                        job_stats_wrapup(getattr(e, e.JOB_REFERENCE), event=e, conn=self.redis)
             self.last_flush = time.time()
             # only update metrics if we saved events
             if (metrics_bulk_events_saved + metrics_singular_events_saved) > 0:
@@ -223,6 +258,7 @@ class CallbackBrokerWorker(BaseWorker):
                     metrics_total_job_event_processing_seconds.total_seconds()
                     / (metrics_bulk_events_saved + metrics_singular_events_saved - metrics_events_missing_created),
                 )
+                self.record_job_event_lag(lag_by_job)
             if self.subsystem_metrics.should_pipe_execute() is True:
                 self.subsystem_metrics.pipe_execute()
 
@@ -255,7 +291,7 @@ class CallbackBrokerWorker(BaseWorker):
                         emit_channel_notification('jobs-summary', dict(group_name='jobs', unified_job_id=job_identifier, final_counter=final_counter))
 
                         if notification_trigger_event:
-                            job_stats_wrapup(job_identifier)
+                            job_stats_wrapup(job_identifier, conn=self.redis)
                     except Exception:
                         logger.exception('Worker failed to perform EOF tasks: Job {}'.format(job_identifier))
                     finally:
@@ -10,6 +10,7 @@ from kubernetes.config import kube_config
 from django.conf import settings
 from django_guid import set_guid
 
+from awx.main.dispatch import taskqueue
 from awx.main.tasks.system import dispatch_startup, inform_cluster_of_shutdown
 
 from .base import BaseWorker
@@ -46,6 +47,21 @@ class TaskWorker(BaseWorker):
 
         return _call
 
+    @staticmethod
+    def runs_unified_job(task):
+        """
+        Whether the task runs a unified job, e.g., RunJob.  These are not ran
+        again when their dispatcher goes away, the reaper fails the job instead.
+        """
+        from awx.main.tasks.jobs import BaseTask  # circular import
+
+        try:
+            _call = TaskWorker.resolve_callable(task)
+        except (ImportError, ValueError):
+            # reported once the task runs
+            return False
+        return inspect.isclass(_call) and issubclass(_call, BaseTask)
+
     @staticmethod
     def run_callable(body):
         """
@@ -97,6 +113,17 @@ class TaskWorker(BaseWorker):
             'task': u'awx.main.tasks.jobs.RunProjectUpdate'
         }
         """
+        task_table_id = body.pop('task_table_id', None)
+        if task_table_id is not None:
+            # claimed from the durable task table, the row is removed once the task has ran
+            retry = not self.runs_unified_job(body['task'])
+            taskqueue.start(task_table_id, retry=retry)
+            try:
+                return self.perform_work(body)
+            finally:
+                if retry:
+                    taskqueue.finish(task_table_id)
+
         settings.__clean_on_fork__()
         result = None
         try:
@@ -1007,6 +1007,11 @@ class OrderedManyToManyDescriptor(ManyToManyDescriptor):
                 def get_queryset(self):
                     return super(OrderedManyRelatedManager, self).get_queryset().order_by('%s__position' % self.through._meta.model_name)
 
+                def get_prefetch_queryset(self, instances, queryset=None):
+                    # keep the order when the relation is loaded with prefetch_related
+                    prefetch = super(OrderedManyRelatedManager, self).get_prefetch_queryset(instances, queryset=queryset)
+                    return (prefetch[0].order_by('%s__position' % self.through._meta.model_name),) + prefetch[1:]
+
                 def add(self, *objects):
                     if len(objects) > 1:
                         raise RuntimeError('Ordered many-to-many fields do not support multiple objects')
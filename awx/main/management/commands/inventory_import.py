@@ -2,12 +2,14 @@
 # All Rights Reserved.
 
 # Python
+import copy
 import json
 import logging
 import os
 import re
 import subprocess
 import sys
+import tempfile
 import time
 import traceback
 from collections import OrderedDict
@@ -17,20 +19,31 @@ from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
 from django.db import connection, transaction
 from django.utils.encoding import smart_str
+from django.utils.timezone import now
 
 # DRF error class to distinguish license exceptions
 from rest_framework.exceptions import PermissionDenied
 
 # AWX inventory imports
 from awx.main.models.inventory import Inventory, InventorySource, InventoryUpdate, Host
-from awx.main.utils.mem_inventory import MemInventory, dict_to_mem_data
+from awx.main.utils.named_url_graph import invalidate_named_urls
+from awx.main.tasks.system import schedule_smart_membership_update
+from awx.main.utils.mem_inventory import MemInventory, dict_to_mem_data, iter_streamed_hostvars, stream_to_mem_data
 from awx.main.utils.safe_yaml import sanitize_jinja
 
 # other AWX imports
 from awx.main.models.rbac import batch_role_ancestor_rebuilding
-from awx.main.utils import ignore_inventory_computed_fields, get_licenser
+from awx.main.utils import ignore_inventory_computed_fields, get_licenser, model_instance_diff, model_to_dict
 from awx.main.utils.execution_environments import get_default_execution_environment
-from awx.main.signals import disable_activity_stream
+from awx.main.signals import (
+    activity_stream_enabled,
+    batch_activity_stream,
+    disable_activity_stream,
+    get_activity_stream_class,
+    get_current_user_or_none,
+    model_serializer_mapping,
+    record_activity_entry,
+)
 from awx.main.constants import STANDARD_INVENTORY_UPDATE_ENV
 from awx.main.utils.pglock import advisory_lock
 
@@ -59,6 +72,23 @@ def functioning_dir(path):
     return os.path.dirname(path)
 
 
+def load_inventory_json(path):
+    """
+    Load the ansible-inventory output saved at `path` for perform_update.
+    Files of at least INVENTORY_IMPORT_STREAMING_THRESHOLD bytes are not
+    loaded, their path is returned instead so the import streams them.
+    """
+    threshold = getattr(settings, 'INVENTORY_IMPORT_STREAMING_THRESHOLD', None)
+    if threshold is not None and os.path.getsize(path) >= threshold:
+        logger.info('Inventory JSON is %d bytes, streaming it from %s', os.path.getsize(path), path)
+        return path
+    with open(path) as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise TypeError('Returned JSON must be a dictionary, got %s instead' % str(type(data)))
+    return data
+
+
 class AnsibleInventoryLoader(object):
     """
     Given executable `source` (directory, executable, or file) this will
@@ -104,26 +134,38 @@ class AnsibleInventoryLoader(object):
         return bargs
 
     def command_to_json(self, cmd):
+        """
+        Run cmd and load its JSON output. Large outputs are left in a
+        temporary file and its path is returned, see load_inventory_json,
+        the caller has to remove that file when done with it.
+        """
         data = {}
-        stdout, stderr = '', ''
+        stderr = ''
 
-        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        stdout, stderr = proc.communicate()
-        stdout = smart_str(stdout)
+        with tempfile.NamedTemporaryFile(prefix='awx_inventory_', suffix='.json', delete=False) as stdout_file:
+            proc = subprocess.Popen(cmd, stdout=stdout_file, stderr=subprocess.PIPE)
+            _, stderr = proc.communicate()
         stderr = smart_str(stderr)
 
-        if proc.returncode != 0:
-            raise RuntimeError('%s failed (rc=%d) with stdout:\n%s\nstderr:\n%s' % ('ansible-inventory', proc.returncode, stdout, stderr))
-
-        for line in stderr.splitlines():
-            logger.error(line)
         try:
-            data = json.loads(stdout)
-            if not isinstance(data, dict):
-                raise TypeError('Returned JSON must be a dictionary, got %s instead' % str(type(data)))
+            if proc.returncode != 0:
+                with open(stdout_file.name) as f:
+                    stdout = f.read()
+                raise RuntimeError('%s failed (rc=%d) with stdout:\n%s\nstderr:\n%s' % ('ansible-inventory', proc.returncode, stdout, stderr))
+
+            for line in stderr.splitlines():
+                logger.error(line)
+            try:
+                data = load_inventory_json(stdout_file.name)
+            except Exception:
+                with open(stdout_file.name) as f:
+                    logger.error('Failed to load JSON from: %s', f.read())
+                raise
         except Exception:
-            logger.error('Failed to load JSON from: %s', stdout)
+            os.remove(stdout_file.name)
             raise
+        if not isinstance(data, str):
+            os.remove(stdout_file.name)
         return data
 
     def load(self):
@@ -300,13 +342,33 @@ class Command(BaseCommand):
         """
         self.mem_instance_id_map = {}
         if self.instance_id_var:
-            for mem_host in self.all_group.all_hosts.values():
-                instance_id = self._get_instance_id(mem_host.variables)
-                if not instance_id:
-                    logger.warning('Host "%s" has no "%s" variable(s)', mem_host.name, self.instance_id_var)
-                    continue
-                mem_host.instance_id = instance_id
-                self.mem_instance_id_map[instance_id] = mem_host.name
+            for chunk in self._iter_host_chunks():
+                for mem_host, variables in chunk:
+                    instance_id = self._get_instance_id(variables)
+                    if not instance_id:
+                        logger.warning('Host "%s" has no "%s" variable(s)', mem_host.name, self.instance_id_var)
+                        continue
+                    mem_host.instance_id = instance_id
+                    self.mem_instance_id_map[instance_id] = mem_host.name
+
+    def _iter_host_chunks(self, only=None):
+        """
+        Yield lists of up to _batch_size (mem_host, variables) pairs for the
+        imported hosts, sorted by name within each list. When streaming, the
+        variables are read from the source file one chunk at a time rather
+        than kept on the in-memory hosts. If `only` is given, only the hosts
+        whose name is in it are included.
+        """
+        if only is not None and not only:
+            return
+        if self.hostvars_path:
+            for chunk in iter_streamed_hostvars(self.hostvars_path, self.all_group, self._batch_size, only=only):
+                yield sorted(chunk, key=lambda item: item[0].name)
+            return
+        all_host_names = sorted(self.all_group.all_hosts.keys() if only is None else only)
+        for offset in range(0, len(all_host_names), self._batch_size):
+            host_names = all_host_names[offset : (offset + self._batch_size)]
+            yield [(self.all_group.all_hosts[name], self.all_group.all_hosts[name].variables) for name in host_names]
 
     def _existing_host_pks(self):
         """Returns cached set of existing / previous host primary key values
@@ -526,10 +588,13 @@ class Command(BaseCommand):
         if settings.SQL_DEBUG:
             logger.warning('group updates took %d queries for %d groups', len(connection.queries) - queries_before, len(self.all_group.all_groups))
 
-    def _update_db_host_from_mem_host(self, db_host, mem_host):
+    def _update_db_host_from_mem_host(self, db_host, mem_host, mem_variables, save=True):
+        """
+        Apply the imported values to db_host and return the changed fields.
+        When save is False the caller is responsible for saving the host.
+        """
         # Update host variables.
         db_variables = db_host.variables_dict
-        mem_variables = mem_host.variables
         update_fields = []
 
         # Update host instance_id.
@@ -564,7 +629,7 @@ class Command(BaseCommand):
             db_host.name = mem_host.name
             update_fields.append('name')
         # Update host and display message(s) on what changed.
-        if update_fields:
+        if update_fields and save:
             db_host.save(update_fields=update_fields)
         if 'name' in update_fields:
             logger.debug('Host renamed from "%s" to "%s"', old_name, mem_host.name)
@@ -586,6 +651,80 @@ class Command(BaseCommand):
             else:
                 logger.debug('Host "%s" is now disabled', mem_host.name)
         self._batch_add_m2m(self.inventory_source.hosts, db_host)
+        return update_fields
+
+    def _bulk_update_hosts(self, changed_hosts):
+        """
+        Save the hosts changed by _update_db_host_from_mem_host with a single
+        bulk update, given as a list of (db_host, update_fields, old_host)
+        tuples. old_host is only needed for the activity stream.
+        Returns the activity stream entries of the updates.
+        """
+        user = get_current_user_or_none()
+        modified = now()
+        fields = set(['modified', 'modified_by'])
+        for db_host, update_fields, old_host in changed_hosts:
+            db_host.modified = modified
+            db_host.modified_by = user
+            fields.update(update_fields)
+        Host.objects.bulk_update([db_host for db_host, _, _ in changed_hosts], sorted(fields))
+        # bulk_update sends no post_save, renamed hosts would still resolve by their old named url
+        if 'name' in fields:
+            invalidate_named_urls(Host)
+        activity = []
+        if activity_stream_enabled:
+            for db_host, update_fields, old_host in changed_hosts:
+                changes = model_instance_diff(old_host, db_host, model_serializer_mapping())
+                if changes:
+                    activity.append(('update', db_host, changes))
+        return activity
+
+    def _bulk_create_hosts(self, new_hosts):
+        """
+        Insert new_hosts with a single bulk insert, updating the hosts that
+        were created in the meantime, like update_or_create would.
+        Returns the saved hosts and the activity stream entries for them.
+        """
+        user = get_current_user_or_none()
+        created = now()
+        for db_host in new_hosts:
+            db_host.created = db_host.modified = created
+            db_host.created_by = db_host.modified_by = user
+        update_fields = ['description', 'variables', 'modified', 'modified_by']
+        if self.enabled_var:
+            update_fields.append('enabled')
+        if self.instance_id_var:
+            update_fields.append('instance_id')
+        Host.objects.bulk_create(new_hosts, update_conflicts=True, unique_fields=['inventory', 'name'], update_fields=update_fields)
+        # primary keys are not returned for upserts
+        db_hosts = list(self.inventory.hosts.filter(name__in=[db_host.name for db_host in new_hosts]))
+        activity = []
+        if activity_stream_enabled:
+            activity = [('create', db_host, model_to_dict(db_host, model_serializer_mapping())) for db_host in db_hosts]
+        return db_hosts, activity
+
+    def _record_host_activity(self, activity):
+        """
+        Write the activity stream entries for hosts saved in bulk, which do not
+        send the signals the entries are otherwise recorded from. activity is
+        a list of (operation, db_host, changes) tuples. With
+        INVENTORY_IMPORT_SUMMARIZE_ACTIVITY_STREAM a single entry counting
+        the changes is recorded for the inventory instead.
+        """
+        if not activity or not activity_stream_enabled:
+            return
+        ActivityStream = get_activity_stream_class()
+        actor = get_current_user_or_none()
+        if settings.INVENTORY_IMPORT_SUMMARIZE_ACTIVITY_STREAM:
+            operations = [operation for operation, _, _ in activity]
+            changes = {'coalesced_data': {'hosts_created': operations.count('create'), 'hosts_updated': operations.count('update')}}
+            entry = ActivityStream(operation='update', object1='inventory', changes=json.dumps(changes), actor=actor)
+            record_activity_entry(entry, [('inventory', self.inventory.pk)])
+        else:
+            with batch_activity_stream():
+                for operation, db_host, changes in activity:
+                    entry = ActivityStream(operation=operation, object1='host', changes=json.dumps(changes), actor=actor)
+                    record_activity_entry(entry, [('host', db_host.pk)])
 
     def _build_pk_mem_host_map(self):
         """
@@ -597,7 +736,8 @@ class Command(BaseCommand):
         mem_host_pk_map_by_id = {}  # incomplete mapping by new instance_id to be sorted and pushed to mem_host_pk_map
         mem_host_instance_id_map = {}
         for k, v in self.all_group.all_hosts.items():
-            instance_id = self._get_instance_id(v.variables)
+            # set from the host variables by _build_mem_instance_id_map
+            instance_id = v.instance_id or ''
             if instance_id in self.db_instance_id_map:
                 mem_host_pk_map_by_id[self.db_instance_id_map[instance_id]] = v
             elif instance_id:
@@ -653,50 +793,96 @@ class Command(BaseCommand):
         if settings.SQL_DEBUG:
             queries_before = len(connection.queries)
 
+        # Bulk mode saves each batch of hosts with one statement per kind of
+        # change instead of saving the hosts one by one, so it records the
+        # activity stream entries itself.
+        bulk = settings.INVENTORY_IMPORT_BULK_HOST_WRITES
+        begin = time.time()
+        updated_count = created_count = 0
+        # hosts saved one by one update their smart inventory memberships in Host.save
+        bulk_host_pks = []
+
         updated_mem_host_names = set()
 
-        all_host_pks = sorted(pk_mem_host_map.keys())
-        for offset in range(0, len(all_host_pks), self._batch_size):
-            host_pks = all_host_pks[offset : (offset + self._batch_size)]
-            for db_host in self.inventory.hosts.filter(pk__in=host_pks):
-                mem_host_name = pk_mem_host_map[db_host.pk]
-                mem_host = self.all_group.all_hosts[mem_host_name]
-                self._update_db_host_from_mem_host(db_host, mem_host)
+        # All existing hosts are updated before any host is created, a new
+        # host may take the name of an existing host that is being renamed.
+        mem_host_pk_map = {name: pk for pk, name in pk_mem_host_map.items()}
+        for chunk in self._iter_host_chunks(only=mem_host_pk_map):
+            host_pks = sorted(mem_host_pk_map[mem_host.name] for mem_host, _ in chunk)
+            db_hosts = {db_host.pk: db_host for db_host in self.inventory.hosts.filter(pk__in=host_pks)}
+            changed_hosts = []
+            for mem_host, variables in chunk:
+                db_host = db_hosts.get(mem_host_pk_map[mem_host.name])
+                if db_host is None:
+                    continue
+                old_host = copy.copy(db_host) if bulk and activity_stream_enabled else None
+                # renames are saved one by one, in order, so swapped names do not collide within one statement
+                update_fields = self._update_db_host_from_mem_host(db_host, mem_host, variables, save=not bulk or db_host.name != mem_host.name)
+                if update_fields:
+                    updated_count += 1
+                    if bulk and 'name' not in update_fields:
+                        changed_hosts.append((db_host, update_fields, old_host))
                 updated_mem_host_names.add(mem_host.name)
+            if changed_hosts:
+                self._record_host_activity(self._bulk_update_hosts(changed_hosts))
+                bulk_host_pks.extend(db_host.pk for db_host, _, _ in changed_hosts)
 
         mem_host_names_to_create = set(self.all_group.all_hosts.keys()) - updated_mem_host_names
 
         # Create any new hosts.
-        for mem_host_name in sorted(mem_host_names_to_create):
-            mem_host = self.all_group.all_hosts[mem_host_name]
-            import_vars = mem_host.variables
-            host_desc = import_vars.pop('_awx_description', 'imported')
-            host_attrs = dict(description=host_desc)
-            enabled = self._get_enabled(mem_host.variables)
-            if enabled is not None:
-                host_attrs['enabled'] = enabled
-            if self.instance_id_var:
-                instance_id = self._get_instance_id(mem_host.variables)
-                host_attrs['instance_id'] = instance_id
-            if self.inventory.kind == 'constructed':
-                # remote towervars so the constructed hosts do not have extra variables
-                for prefix in ('host', 'tower'):
-                    for var in ('remote_{}_enabled', 'remote_{}_id'):
-                        import_vars.pop(var.format(prefix), None)
-            host_attrs['variables'] = json.dumps(import_vars)
-            try:
-                sanitize_jinja(mem_host_name)
-            except ValueError as e:
-                raise ValueError(str(e) + ': {}'.format(mem_host_name))
-            db_host = self.inventory.hosts.update_or_create(name=mem_host_name, defaults=host_attrs)[0]
-            if enabled is False:
-                logger.debug('Host "%s" added (disabled)', mem_host_name)
-            else:
-                logger.debug('Host "%s" added', mem_host_name)
-            self._batch_add_m2m(self.inventory_source.hosts, db_host)
+        for chunk in self._iter_host_chunks(only=mem_host_names_to_create):
+            new_hosts = []
+            for mem_host, import_vars in chunk:
+                mem_host_name = mem_host.name
+                host_desc = import_vars.pop('_awx_description', 'imported')
+                host_attrs = dict(description=host_desc)
+                enabled = self._get_enabled(import_vars)
+                if enabled is not None:
+                    host_attrs['enabled'] = enabled
+                if self.instance_id_var:
+                    instance_id = self._get_instance_id(import_vars)
+                    host_attrs['instance_id'] = instance_id
+                if self.inventory.kind == 'constructed':
+                    # remote towervars so the constructed hosts do not have extra variables
+                    for prefix in ('host', 'tower'):
+                        for var in ('remote_{}_enabled', 'remote_{}_id'):
+                            import_vars.pop(var.format(prefix), None)
+                host_attrs['variables'] = json.dumps(import_vars)
+                try:
+                    sanitize_jinja(mem_host_name)
+                except ValueError as e:
+                    raise ValueError(str(e) + ': {}'.format(mem_host_name))
+                if bulk:
+                    new_hosts.append(Host(inventory=self.inventory, name=mem_host_name, **host_attrs))
+                else:
+                    db_host = self.inventory.hosts.update_or_create(name=mem_host_name, defaults=host_attrs)[0]
+                    self._batch_add_m2m(self.inventory_source.hosts, db_host)
+                created_count += 1
+                if enabled is False:
+                    logger.debug('Host "%s" added (disabled)', mem_host_name)
+                else:
+                    logger.debug('Host "%s" added', mem_host_name)
+            if new_hosts:
+                db_hosts, activity = self._bulk_create_hosts(new_hosts)
+                for db_host in db_hosts:
+                    self._batch_add_m2m(self.inventory_source.hosts, db_host)
+                    bulk_host_pks.append(db_host.pk)
+                self._record_host_activity(activity)
 
         self._batch_add_m2m(self.inventory_source.hosts, flush=True)
 
+        if bulk_host_pks:
+            schedule_smart_membership_update(bulk_host_pks)
+
+        elapsed = time.time() - begin
+        logger.info(
+            'Hosts created: %d, updated: %d, unchanged: %d in %0.1fs (%d rows/s)',
+            created_count,
+            updated_count,
+            len(self.all_group.all_hosts) - created_count - updated_count,
+            elapsed,
+            (created_count + updated_count) / elapsed if elapsed else 0,
+        )
         if settings.SQL_DEBUG:
             logger.warning('host updates took %d queries for %d hosts', len(connection.queries) - queries_before, len(self.all_group.all_hosts))
 
@@ -911,6 +1097,10 @@ class Command(BaseCommand):
                     status = 'canceled'
                 else:
                     tb = traceback.format_exc()
+            finally:
+                if isinstance(data, str):
+                    # large output streamed from the temporary file of the loader
+                    os.remove(data)
 
             with ignore_inventory_computed_fields():
                 inventory_update = InventoryUpdate.objects.get(pk=inventory_update.pk)
@@ -934,6 +1124,9 @@ class Command(BaseCommand):
 
         This saves the inventory data to the database, calling load_into_database
         but also wraps that method in a host of options processing
+
+        data is either the loaded inventory JSON, or the path of a JSON file
+        to stream the inventory from, as returned by load_inventory_json
         """
         # outside of normal options, these are needed as part of programatic interface
         self.inventory = inventory_update.inventory
@@ -949,6 +1142,7 @@ class Command(BaseCommand):
         self.host_filter = options.get('host_filter', None) or r'^.+$'
         self.exclude_empty_groups = bool(options.get('exclude_empty_groups', False))
         self.instance_id_var = options.get('instance_id_var', None)
+        self.hostvars_path = data if isinstance(data, str) else None
 
         try:
             self.group_filter_re = re.compile(self.group_filter)
@@ -993,7 +1187,11 @@ class Command(BaseCommand):
 
             logger.info('Processing JSON output...')
             inventory = MemInventory(group_filter_re=self.group_filter_re, host_filter_re=self.host_filter_re)
-            inventory = dict_to_mem_data(data, inventory=inventory)
+            if self.hostvars_path:
+                # host variables are read back in chunks as the hosts are saved
+                inventory = stream_to_mem_data(self.hostvars_path, inventory=inventory)
+            else:
+                inventory = dict_to_mem_data(data, inventory=inventory)
 
             logger.info('Loaded %d groups, %d hosts', len(inventory.all_group.all_groups), len(inventory.all_group.all_hosts))
 
@@ -0,0 +1,25 @@
+import json
+
+import redis
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from awx.main.analytics.job_event_metrics import get_job_event_metrics
+
+
+class Command(BaseCommand):
+    """
+    Print the event processing metrics of jobs
+    """
+
+    help = 'Display events per second, queue depths and event lag of jobs that ran recently'
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_ids', nargs='+', type=int, help='Ids of the unified jobs')
+
+    def handle(self, *args, **options):
+        conn = redis.Redis.from_url(settings.BROKER_URL)
+        for job_id in options['job_ids']:
+            metrics = get_job_event_metrics(conn, job_id)
+            self.stdout.write(json.dumps({'id': job_id, 'metrics': metrics}, sort_keys=True))
@@ -0,0 +1,96 @@
+import hashlib
+import json
+from collections import Counter
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from awx.main.models import Inventory
+from awx.main.utils.filters import FACT_PATH_INDEX_PREFIX, INDEXED_FACT_PATHS_CACHE_KEY, SmartFilter
+
+
+def fact_path_index_name(path):
+    return FACT_PATH_INDEX_PREFIX + hashlib.sha256(json.dumps(list(path)).encode('utf-8')).hexdigest()[:16]
+
+
+class Command(BaseCommand):
+    """
+    Advise and manage expression indexes over the fact paths used by the
+    host_filter of smart inventories
+    """
+
+    help = (
+        'List the paths into ansible_facts compared by the host filters of smart inventories and how many inventories use each, '
+        'optionally create a GIN index for each path used by at least --min-uses inventories. Host filters over host variables '
+        'can not be indexed this way, variables are stored as text.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-uses', dest='min_uses', type=int, default=2, help='Number of smart inventories that must use a path before it is indexed')
+        parser.add_argument('--create', dest='create', action='store_true', default=False, help='Create the missing indexes for the advised paths')
+        parser.add_argument(
+            '--drop-unused', dest='drop_unused', action='store_true', default=False, help='Drop the indexes of paths no host filter uses anymore'
+        )
+
+    def existing_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname, obj_description(i.indexrelid, 'pg_class'), i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid = 'main_hostfacts'::regclass AND c.relname LIKE %s",
+                [FACT_PATH_INDEX_PREFIX + '%'],
+            )
+            return {name: (tuple(json.loads(comment)) if comment else None, valid) for name, comment, valid in cursor.fetchall()}
+
+    def count_paths(self):
+        uses = Counter()
+        for inventory in Inventory.objects.filter(kind='smart').exclude(host_filter__isnull=True).exclude(host_filter='').only('id', 'host_filter'):
+            try:
+                paths = SmartFilter.fact_paths(inventory.host_filter)
+            except Exception as e:
+                self.stderr.write('Skipping smart inventory {} with invalid host_filter: {}'.format(inventory.id, e))
+                continue
+            uses.update(set(paths))
+        return uses
+
+    def create_index(self, name, path):
+        # written the way the ORM compiles key transforms, so that the planner matches the queries to the index
+        if len(path) == 1:
+            expression, param = '(ansible_facts -> %s)', path[0]
+        else:
+            expression, param = '(ansible_facts #> %s)', list(path)
+        quoted = connection.ops.quote_name(name)
+        with connection.cursor() as cursor:
+            # a concurrent build that failed leaves an invalid index behind
+            cursor.execute('DROP INDEX CONCURRENTLY IF EXISTS {}'.format(quoted))
+            cursor.execute('CREATE INDEX CONCURRENTLY {} ON main_hostfacts USING gin ({} jsonb_path_ops)'.format(quoted, expression), [param])
+            cursor.execute('COMMENT ON INDEX {} IS %s'.format(quoted), [json.dumps(list(path))])
+
+    def drop_index(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute('DROP INDEX CONCURRENTLY IF EXISTS {}'.format(connection.ops.quote_name(name)))
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Fact path indexes require PostgreSQL')
+
+        uses = self.count_paths()
+        existing = self.existing_indexes()
+        indexed = {path: valid for path, valid in existing.values() if path}
+
+        for path, count in uses.most_common():
+            advised = count >= options['min_uses']
+            state = 'indexed' if indexed.get(path) else ('invalid' if path in indexed else ('advised' if advised else '-'))
+            self.stdout.write('{:>6}  {:<8}  {}'.format(count, state, '.'.join(path)))
+            if options['create'] and advised and not indexed.get(path):
+                name = fact_path_index_name(path)
+                self.stdout.write('Creating index {} for {}'.format(name, '.'.join(path)))
+                self.create_index(name, path)
+
+        if options['drop_unused']:
+            for name, (path, valid) in existing.items():
+                if path not in uses:
+                    self.stdout.write('Dropping index {} for {}'.format(name, '.'.join(path or ())))
+                    self.drop_index(name)
+
+        cache.delete(INDEXED_FACT_PATHS_CACHE_KEY)
@@ -10,6 +10,7 @@ from pathlib import Path
 
 from django.conf import settings
 from django.contrib.auth import logout
+from django.core.cache import cache
 from django.db.migrations.recorder import MigrationRecorder
 from django.db import connection
 from django.shortcuts import redirect
@@ -113,8 +114,14 @@ class URLModificationMiddleware(MiddlewareMixin):
     def _named_url_to_pk(cls, node, resource, named_url):
         kwargs = {}
         if node.populate_named_url_query_kwargs(kwargs, named_url):
+            cache_key = node.cache_key(named_url)
+            pk = cache.get(cache_key) if cache_key else None
+            if pk is not None:
+                return pk
             match = node.model.objects.filter(**kwargs).first()
             if match:
+                if cache_key:
+                    cache.set(cache_key, str(match.pk), timeout=settings.NAMED_URL_CACHE_TIMEOUT)
                 return str(match.pk)
             else:
                 # if the name does *not* resolve to any actual resource,
@@ -0,0 +1,54 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('main', '0192_custom_roles'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DispatcherTask',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                (
+                    'queue',
+                    models.CharField(help_text='Name of the queue (generally an instance hostname) this task was published to.', max_length=255),
+                ),
+                (
+                    'idempotency_key',
+                    models.CharField(
+                        default=None,
+                        help_text='If set, identical tasks with this key that have not started are collapsed into a single row.',
+                        max_length=255,
+                        null=True,
+                    ),
+                ),
+                ('body', models.JSONField(default=dict)),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, editable=False)),
+                (
+                    'claimed_by',
+                    models.CharField(
+                        default=None, editable=False, help_text='The dispatcher (hostname and pid) holding this task, if any.', max_length=255, null=True
+                    ),
+                ),
+                (
+                    'claimed_at',
+                    models.DateTimeField(
+                        default=None,
+                        editable=False,
+                        help_text='When the claim was last renewed, claims older than DISPATCHER_TASK_QUEUE_CLAIM_TIMEOUT are taken over.',
+                        null=True,
+                    ),
+                ),
+            ],
+            options={
+                'indexes': [models.Index(fields=['queue', 'id'], name='main_dispatchertask_queue_id')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='dispatchertask',
+            constraint=models.UniqueConstraint(fields=('idempotency_key',), name='unique_pending_dispatcher_task'),
+        ),
+    ]
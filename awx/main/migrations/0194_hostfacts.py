@@ -0,0 +1,95 @@
+import hashlib
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+from ._sqlite_helper import dbawaremigrations
+
+
+def _hash_facts(ansible_facts):
+    # same as HostFacts.hash_facts
+    data = json.dumps(ansible_facts or {}, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+def copy_facts_to_host_facts(apps, schema_editor):
+    Host = apps.get_model('main', 'Host')
+    HostFacts = apps.get_model('main', 'HostFacts')
+
+    batch = []
+    for host in Host.objects.exclude(ansible_facts={}).only('id', 'ansible_facts', 'ansible_facts_modified').order_by('id').iterator(chunk_size=1000):
+        batch.append(
+            HostFacts(host_id=host.id, ansible_facts=host.ansible_facts, facts_hash=_hash_facts(host.ansible_facts), modified=host.ansible_facts_modified)
+        )
+        if len(batch) >= 1000:
+            HostFacts.objects.bulk_create(batch)
+            batch = []
+    HostFacts.objects.bulk_create(batch)
+
+
+def copy_host_facts_to_facts(apps, schema_editor):
+    Host = apps.get_model('main', 'Host')
+    HostFacts = apps.get_model('main', 'HostFacts')
+
+    batch = []
+    for facts in HostFacts.objects.order_by('host_id').iterator(chunk_size=1000):
+        batch.append(Host(id=facts.host_id, ansible_facts=facts.ansible_facts))
+        if len(batch) >= 1000:
+            Host.objects.bulk_update(batch, ['ansible_facts'])
+            batch = []
+    Host.objects.bulk_update(batch, ['ansible_facts'])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('main', '0193_dispatchertask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HostFacts',
+            fields=[
+                (
+                    'host',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='host_facts', serialize=False, to='main.host'
+                    ),
+                ),
+                ('ansible_facts', models.JSONField(blank=True, default=dict, help_text='Arbitrary JSON structure of most recent ansible_facts, per-host.')),
+                (
+                    'facts_hash',
+                    models.CharField(
+                        default='', editable=False, help_text='Content hash of ansible_facts, used to skip writing unchanged facts.', max_length=64
+                    ),
+                ),
+                ('modified', models.DateTimeField(default=None, editable=False, help_text='The date and time ansible_facts last changed.', null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HostFactsHistory',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False)),
+                ('diff', models.BinaryField(help_text='zlib compressed JSON of the changed and removed top level facts.')),
+                ('host', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='main.host')),
+            ],
+            options={
+                'ordering': ('-created',),
+            },
+        ),
+        migrations.RunPython(copy_facts_to_host_facts, copy_host_facts_to_facts),
+        # host_filter of smart inventories compiles to containment (@>) queries over
+        # ansible_facts, this replaces the index on main_host that goes away with the column
+        dbawaremigrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS hostfacts_ansible_facts_default_gin ON main_hostfacts USING gin(ansible_facts jsonb_path_ops);',
+            reverse_sql='DROP INDEX IF EXISTS hostfacts_ansible_facts_default_gin;',
+            sqlite_sql=dbawaremigrations.RunSQL.noop,
+            sqlite_reverse_sql=dbawaremigrations.RunSQL.noop,
+        ),
+        migrations.RemoveField(
+            model_name='host',
+            name='ansible_facts',
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('main', '0194_hostfacts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='unifiedjob',
+            name='event_summary',
+            field=models.JSONField(
+                blank=True,
+                default=None,
+                editable=False,
+                help_text='Counts of the events of the job by type and of its plays and tasks, saved when the events of the job are processed.',
+                null=True,
+            ),
+        ),
+    ]
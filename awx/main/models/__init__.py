@@ -22,10 +22,13 @@ from awx.main.models.organization import Organization, Profile, Team, UserSessio
 from awx.main.models.credential import Credential, CredentialType, CredentialInputSource, ManagedCredentialType, build_safe_env  # noqa
 from awx.main.models.projects import Project, ProjectUpdate  # noqa
 from awx.main.models.receptor_address import ReceptorAddress  # noqa
+from awx.main.models.dispatch import DispatcherTask  # noqa
 from awx.main.models.inventory import (  # noqa
     CustomInventoryScript,
     Group,
     Host,
+    HostFacts,
+    HostFactsHistory,
     HostMetric,
     HostMetricSummaryMonthly,
     Inventory,
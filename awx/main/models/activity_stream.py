@@ -100,7 +100,11 @@ class ActivityStream(models.Model):
     def get_absolute_url(self, request=None):
         return reverse('api:activity_stream_detail', kwargs={'pk': self.pk}, request=request)
 
-    def save(self, *args, **kwargs):
+    def set_denormalized_fields(self):
+        """
+        Fill in the fields derived from the actor and the node, done by save()
+        and needed before entries are created with bulk_create.
+        """
         # Store denormalized actor metadata so that we retain it for accounting
         # purposes when the User row is deleted.
         if self.actor:
@@ -110,10 +114,13 @@ class ActivityStream(models.Model):
                 'first_name': smart_str(self.actor.first_name),
                 'last_name': smart_str(self.actor.last_name),
             }
-            if 'update_fields' in kwargs and 'deleted_actor' not in kwargs['update_fields']:
-                kwargs['update_fields'].append('deleted_actor')
 
         hostname_char_limit = self._meta.get_field('action_node').max_length
         self.action_node = settings.CLUSTER_HOST_ID[:hostname_char_limit]
 
+    def save(self, *args, **kwargs):
+        self.set_denormalized_fields()
+        if self.actor and 'update_fields' in kwargs and 'deleted_actor' not in kwargs['update_fields']:
+            kwargs['update_fields'].append('deleted_actor')
+
         super(ActivityStream, self).save(*args, **kwargs)
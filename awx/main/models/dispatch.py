@@ -0,0 +1,47 @@
+from django.db import models
+from django.utils.timezone import now
+from django.utils.translation import gettext_lazy as _
+
+
+class DispatcherTask(models.Model):
+    """
+    A task waiting to be claimed by a dispatcher, used when
+    DISPATCHER_TASK_QUEUE_BACKEND is 'table'.  A claimed row is kept until its
+    task finishes, so the task is claimed again if its dispatcher goes away.
+    """
+
+    class Meta:
+        app_label = 'main'
+        indexes = [
+            models.Index(fields=['queue', 'id'], name='main_dispatchertask_queue_id'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['idempotency_key'], name='unique_pending_dispatcher_task'),
+        ]
+
+    id = models.BigAutoField(primary_key=True)
+    queue = models.CharField(max_length=255, help_text=_("Name of the queue (generally an instance hostname) this task was published to."))
+    idempotency_key = models.CharField(
+        max_length=255,
+        null=True,
+        default=None,
+        help_text=_("If set, identical tasks with this key that have not started are collapsed into a single row."),
+    )
+    body = models.JSONField(default=dict)
+    created = models.DateTimeField(default=now, editable=False)
+    claimed_by = models.CharField(
+        max_length=255,
+        null=True,
+        default=None,
+        editable=False,
+        help_text=_("The dispatcher (hostname and pid) holding this task, if any."),
+    )
+    claimed_at = models.DateTimeField(
+        null=True,
+        default=None,
+        editable=False,
+        help_text=_("When the claim was last renewed, claims older than DISPATCHER_TASK_QUEUE_CLAIM_TIMEOUT are taken over."),
+    )
+
+    def __str__(self):
+        return f'{self.body.get("task")} on {self.queue}'
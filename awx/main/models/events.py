@@ -4,11 +4,12 @@ import datetime
 from datetime import timezone
 import logging
 from collections import defaultdict
+import itertools
 import time
 
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models, DatabaseError
+from django.db import connection, models, DatabaseError
 from django.db.models.functions import Cast
 from django.utils.dateparse import parse_datetime
 from django.utils.text import Truncator
@@ -585,33 +586,88 @@ class JobEvent(BasePlaybookEvent):
 
             # update the last_job_id and last_job_host_summary_id
             # in single queries
-            host_mapping = dict((summary['host_id'], summary['id']) for summary in JobHostSummary.objects.filter(job_id=job.id).values('id', 'host_id'))
-            updated_hosts = set()
+            if all(summary.pk is not None for summary in summaries.values()):
+                # primary keys come back from the INSERT on databases that support RETURNING
+                host_mapping = dict((summary.host_id, summary.pk) for summary in summaries.values() if summary.host_id is not None)
+            else:
+                host_mapping = dict((summary['host_id'], summary['id']) for summary in JobHostSummary.objects.filter(job_id=job.id).values('id', 'host_id'))
+            host_updates = dict()
             for h in all_hosts:
                 # if the hostname *shows up* in the playbook_on_stats event
-                if h.name in hostnames:
-                    h.last_job_id = job.id
-                    updated_hosts.add(h)
-                if h.id in host_mapping:
-                    h.last_job_host_summary_id = host_mapping[h.id]
-                    updated_hosts.add(h)
+                last_job_id = job.id if h.name in hostnames else None
+                summary_id = host_mapping.get(h.id)
+                if last_job_id or summary_id:
+                    host_updates[h.id] = (last_job_id, summary_id)
 
-            Host.objects.bulk_update(list(updated_hosts), ['last_job_id', 'last_job_host_summary_id'], batch_size=100)
+            self._update_hosts_last_job(host_updates)
 
             # Create/update Host Metrics
             self._update_host_metrics(updated_hosts_list)
 
+    @staticmethod
+    def _update_hosts_last_job(host_updates):
+        """
+        host_updates maps host id to a (last_job_id, last_job_host_summary_id)
+        tuple, a None value leaves that field of the host unchanged
+        """
+        from awx.main.models import Host  # circular import
+
+        batch_size = 1000
+        host_ids = sorted(host_updates)
+        if connection.vendor == 'postgresql':
+            table = Host._meta.db_table
+            with connection.cursor() as cursor:
+                for batch_start in range(0, len(host_ids), batch_size):
+                    batch = host_ids[batch_start : (batch_start + batch_size)]
+                    values = ', '.join(['(%s::integer, %s::integer, %s::integer)'] * len(batch))
+                    cursor.execute(
+                        f'UPDATE {table} SET last_job_id = COALESCE(v.last_job_id, {table}.last_job_id), '
+                        f'last_job_host_summary_id = COALESCE(v.summary_id, {table}.last_job_host_summary_id) '
+                        f'FROM (VALUES {values}) AS v(id, last_job_id, summary_id) WHERE {table}.id = v.id',
+                        list(itertools.chain.from_iterable((host_id,) + host_updates[host_id] for host_id in batch)),
+                    )
+            return
+
+        for batch_start in range(0, len(host_ids), batch_size):
+            batch = host_ids[batch_start : (batch_start + batch_size)]
+            hosts = list(Host.objects.filter(pk__in=batch).only('id', 'last_job_id', 'last_job_host_summary_id'))
+            for h in hosts:
+                last_job_id, summary_id = host_updates[h.id]
+                if last_job_id:
+                    h.last_job_id = last_job_id
+                if summary_id:
+                    h.last_job_host_summary_id = summary_id
+            Host.objects.bulk_update(hosts, ['last_job_id', 'last_job_host_summary_id'], batch_size=100)
+
     @staticmethod
     def _update_host_metrics(updated_hosts_list):
         from awx.main.models import HostMetric  # circular import
 
-        # bulk-create
         current_time = now()
+        batch_size = 1000
+        if connection.vendor == 'postgresql':
+            # insert new hosts and count the automation of known ones in one statement,
+            # sorted so that concurrent jobs lock the rows in the same order
+            hostnames = sorted(set(updated_hosts_list))
+            table = HostMetric._meta.db_table
+            with connection.cursor() as cursor:
+                for batch_start in range(0, len(hostnames), batch_size):
+                    batch = hostnames[batch_start : (batch_start + batch_size)]
+                    values = ', '.join(['(%s, %s, %s, 1, 0, false)'] * len(batch))
+                    cursor.execute(
+                        f'INSERT INTO {table} (hostname, first_automation, last_automation, automated_counter, deleted_counter, deleted) '
+                        f'VALUES {values} ON CONFLICT (hostname) DO UPDATE SET last_automation = EXCLUDED.last_automation, '
+                        f'automated_counter = {table}.automated_counter + 1, deleted = false',
+                        list(itertools.chain.from_iterable((hostname, current_time, current_time) for hostname in batch)),
+                    )
+            return
+
+        # bulk-create
         HostMetric.objects.bulk_create(
             [HostMetric(hostname=hostname, last_automation=current_time) for hostname in updated_hosts_list], ignore_conflicts=True, batch_size=100
         )
         # bulk-update
-        batch_start, batch_size = 0, 1000
+        batch_start = 0
         while batch_start <= len(updated_hosts_list):
             batched_host_list = updated_hosts_list[batch_start : (batch_start + batch_size)]
             HostMetric.objects.filter(hostname__in=batched_host_list).update(
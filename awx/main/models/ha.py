@@ -339,7 +339,7 @@ class Instance(HasPolicyEditsMixin, BaseModel):
             self.mem_capacity = get_mem_effective_capacity(self.memory, is_control_node=bool(self.node_type in (Instance.Types.CONTROL, Instance.Types.HYBRID)))
         self.set_capacity_value()
 
-    def save_health_data(self, version=None, cpu=0, memory=0, uuid=None, update_last_seen=False, errors=''):
+    def save_health_data(self, version=None, cpu=0, memory=0, uuid=None, update_last_seen=False, errors='', perform_save=True):
         update_fields = ['errors']
         if self.node_type != 'hop':
             self.last_health_check = now()
@@ -385,11 +385,13 @@ class Instance(HasPolicyEditsMixin, BaseModel):
             update_fields.extend(fields_to_update)
         update_fields.extend(['cpu_capacity', 'mem_capacity', 'capacity'])
 
-        # disabling activity stream will avoid extra queries, which is important for heatbeat actions
-        from awx.main.signals import disable_activity_stream
+        if perform_save:
+            # disabling activity stream will avoid extra queries, which is important for heatbeat actions
+            from awx.main.signals import disable_activity_stream
 
-        with disable_activity_stream():
-            self.save(update_fields=update_fields)
+            with disable_activity_stream():
+                self.save(update_fields=update_fields)
+        return update_fields
 
     def local_health_check(self):
         """Only call this method on the instance that this record represents"""
@@ -3,6 +3,8 @@
 
 # Python
 import datetime
+import hashlib
+import json
 import time
 import logging
 import re
@@ -13,6 +15,7 @@ from urllib.parse import urljoin
 import yaml
 import tempfile
 import stat
+import zlib
 
 # Django
 from django.conf import settings
@@ -59,7 +62,18 @@ from awx.main.utils.execution_environments import to_container_path, get_control
 from awx.main.utils.licensing import server_product_name
 
 
-__all__ = ['Inventory', 'Host', 'Group', 'InventorySource', 'InventoryUpdate', 'SmartInventoryMembership', 'HostMetric', 'HostMetricSummaryMonthly']
+__all__ = [
+    'Inventory',
+    'Host',
+    'HostFacts',
+    'HostFactsHistory',
+    'Group',
+    'InventorySource',
+    'InventoryUpdate',
+    'SmartInventoryMembership',
+    'HostMetric',
+    'HostMetricSummaryMonthly',
+]
 
 logger = logging.getLogger('awx.main.models.inventory')
 
@@ -464,7 +478,7 @@ class Inventory(CommonModelNameNotUnique, ResourceMixin, RelatedJobsMixin):
             def on_commit():
                 from awx.main.tasks.system import update_host_smart_inventory_memberships
 
-                update_host_smart_inventory_memberships.delay()
+                update_host_smart_inventory_memberships.delay(smart_inventory_ids=[self.pk])
 
             connection.on_commit(on_commit)
 
@@ -480,15 +494,16 @@ class Inventory(CommonModelNameNotUnique, ResourceMixin, RelatedJobsMixin):
                 )
 
     def save(self, *args, **kwargs):
-        self._update_host_smart_inventory_memeberships()
         super(Inventory, self).save(*args, **kwargs)
+        if 'host_filter' in kwargs.get('update_fields', ['host_filter']):
+            self._update_host_smart_inventory_memeberships()
         if self.kind == 'smart' and 'host_filter' in kwargs.get('update_fields', ['host_filter']) and connection.vendor != 'sqlite':
             # Minimal update of host_count for smart inventory host filter changes
             self.update_computed_fields()
         self._enforce_constructed_source()
 
     def delete(self, *args, **kwargs):
-        self._update_host_smart_inventory_memeberships()
+        # the memberships of a deleted smart inventory go with it
         super(Inventory, self).delete(*args, **kwargs)
 
     '''
@@ -574,11 +589,6 @@ class Host(CommonModelNameNotUnique, RelatedJobsMixin):
         editable=False,
         help_text=_('Inventory source(s) that created or modified this host.'),
     )
-    ansible_facts = models.JSONField(
-        blank=True,
-        default=dict,
-        help_text=_('Arbitrary JSON structure of most recent ansible_facts, per-host.'),
-    )
     ansible_facts_modified = models.DateTimeField(
         default=None,
         editable=False,
@@ -628,15 +638,11 @@ class Host(CommonModelNameNotUnique, RelatedJobsMixin):
             host_name = self.variables_dict['ansible_host']
         return host_name
 
-    def _update_host_smart_inventory_memeberships(self):
+    def _update_host_smart_inventory_memeberships(self, host_ids):
         if settings.AWX_REBUILD_SMART_MEMBERSHIP:
+            from awx.main.tasks.system import schedule_smart_membership_update
 
-            def on_commit():
-                from awx.main.tasks.system import update_host_smart_inventory_memberships
-
-                update_host_smart_inventory_memberships.delay()
-
-            connection.on_commit(on_commit)
+            schedule_smart_membership_update(host_ids)
 
     def clean_name(self):
         try:
@@ -645,12 +651,54 @@ class Host(CommonModelNameNotUnique, RelatedJobsMixin):
             raise ValidationError(str(e) + ": {}".format(self.name))
         return self.name
 
+    @property
+    def ansible_facts(self):
+        """
+        Most recent ansible_facts of the host, stored in HostFacts
+        """
+        try:
+            return self.host_facts.ansible_facts
+        except HostFacts.DoesNotExist:
+            return {}
+
+    @ansible_facts.setter
+    def ansible_facts(self, value):
+        try:
+            record = self.host_facts
+        except HostFacts.DoesNotExist:
+            record = HostFacts(host=self)
+        if not hasattr(record, '_previous_facts'):
+            record._previous_facts = record.ansible_facts if record.facts_hash else None
+        record.ansible_facts = value or {}
+        self._facts_changed = True
+
+    @property
+    def ansible_facts_hash(self):
+        try:
+            record = self.host_facts
+        except HostFacts.DoesNotExist:
+            return HostFacts.hash_facts({})
+        if record.facts_hash and not self.__dict__.get('_facts_changed'):
+            return record.facts_hash
+        return HostFacts.hash_facts(record.ansible_facts)
+
     def save(self, *args, **kwargs):
-        self._update_host_smart_inventory_memeberships()
+        previous_name = self._prior_values_store.get('name')
         super(Host, self).save(*args, **kwargs)
+        if settings.AWX_REBUILD_SMART_MEMBERSHIP:
+            host_ids = [self.pk]
+            if previous_name is not None and previous_name != self.name:
+                # a host that had the old name may now take the place of this one in smart inventories
+                host_ids += list(Host.objects.filter(name=previous_name).exclude(pk=self.pk).values_list('pk', flat=True))
+            self._update_host_smart_inventory_memeberships(host_ids)
+        if self.__dict__.pop('_facts_changed', False):
+            HostFacts.save_facts([self])
 
     def delete(self, *args, **kwargs):
-        self._update_host_smart_inventory_memeberships()
+        # memberships of the host are deleted with it, but a host of the same
+        # name in another inventory may take its place in smart inventories
+        if settings.AWX_REBUILD_SMART_MEMBERSHIP:
+            self._update_host_smart_inventory_memeberships(Host.objects.filter(name=self.name).exclude(pk=self.pk).values_list('pk', flat=True))
         super(Host, self).delete(*args, **kwargs)
 
     '''
@@ -661,6 +709,127 @@ class Host(CommonModelNameNotUnique, RelatedJobsMixin):
         return self.inventory._get_related_jobs()
 
 
+class HostFacts(models.Model):
+    """
+    The ansible_facts of a host, kept out of the host row so that saving facts
+    does not rewrite the (frequently read and updated) host table, and only
+    written when the content of the facts changes.
+    """
+
+    class Meta:
+        app_label = 'main'
+
+    host = models.OneToOneField('Host', primary_key=True, related_name='host_facts', on_delete=models.CASCADE)
+    ansible_facts = models.JSONField(
+        blank=True,
+        default=dict,
+        help_text=_('Arbitrary JSON structure of most recent ansible_facts, per-host.'),
+    )
+    facts_hash = models.CharField(
+        max_length=64, default='', editable=False, help_text=_('Content hash of ansible_facts, used to skip writing unchanged facts.')
+    )
+    modified = models.DateTimeField(default=None, null=True, editable=False, help_text=_('The date and time ansible_facts last changed.'))
+
+    @staticmethod
+    def hash_facts(ansible_facts):
+        """
+        Content hash of a facts dict, independent of key order
+        """
+        data = json.dumps(ansible_facts or {}, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def save_facts(cls, hosts, batch_size=500):
+        """
+        Save the facts of the given hosts, skipping hosts whose facts did not change
+        since they were loaded and hosts that have been deleted in the meantime.
+        """
+        changed = []
+        for host in hosts:
+            try:
+                record = host.host_facts
+            except cls.DoesNotExist:
+                continue
+            new_hash = cls.hash_facts(record.ansible_facts)
+            if new_hash != record.facts_hash:
+                record.host_id = host.pk
+                changed.append((record, new_hash))
+        if not changed:
+            return 0
+
+        existing_ids = set()
+        for i in range(0, len(changed), batch_size):
+            existing_ids.update(Host.objects.filter(pk__in=[r.host_id for r, _ in changed[i : i + batch_size]]).values_list('pk', flat=True))
+        changed = [(r, new_hash) for r, new_hash in changed if r.host_id in existing_ids]
+        records = [r for r, _ in changed]
+
+        # the stored hash is only updated once the write went through, so a retry writes the facts again
+        saved = [(r, r.facts_hash, r.modified) for r in records]
+        modified = now()
+        for record, new_hash in changed:
+            record.facts_hash = new_hash
+            record.modified = modified
+        try:
+            cls.objects.bulk_create(
+                records, batch_size=batch_size, update_conflicts=True, unique_fields=['host'], update_fields=['ansible_facts', 'facts_hash', 'modified']
+            )
+            if settings.HOST_FACTS_HISTORY_DAYS:
+                HostFactsHistory.record(records)
+        except Exception:
+            for record, facts_hash, record_modified in saved:
+                record.facts_hash = facts_hash
+                record.modified = record_modified
+            raise
+        for record in records:
+            record._previous_facts = record.ansible_facts
+        if settings.AWX_REBUILD_SMART_MEMBERSHIP:
+            from awx.main.tasks.system import schedule_smart_membership_update
+
+            schedule_smart_membership_update([record.host_id for record in records])
+        return len(records)
+
+
+class HostFactsHistory(models.Model):
+    """
+    Compressed diffs of the top level keys of host facts, saved when
+    HOST_FACTS_HISTORY_DAYS is set and kept for that many days.
+    """
+
+    class Meta:
+        app_label = 'main'
+        ordering = ('-created',)
+
+    host = models.ForeignKey('Host', related_name='+', on_delete=models.CASCADE)
+    created = models.DateTimeField(default=now, db_index=True, editable=False)
+    diff = models.BinaryField(help_text=_('zlib compressed JSON of the changed and removed top level facts.'))
+
+    @property
+    def diff_data(self):
+        return json.loads(zlib.decompress(bytes(self.diff)).decode('utf-8'))
+
+    @staticmethod
+    def compute_diff(previous, current):
+        previous = previous or {}
+        current = current or {}
+        return {
+            'changed': dict((k, v) for k, v in current.items() if previous.get(k, object()) != v),
+            'removed': sorted(k for k in previous if k not in current),
+        }
+
+    @classmethod
+    def record(cls, records):
+        created = now()
+        history = []
+        for record in records:
+            previous = getattr(record, '_previous_facts', None)
+            if previous is None:
+                continue  # first facts of the host, nothing to diff against
+            data = json.dumps(cls.compute_diff(previous, record.ansible_facts), default=str)
+            history.append(cls(host_id=record.host_id, created=created, diff=zlib.compress(data.encode('utf-8'))))
+        cls.objects.bulk_create(history, batch_size=500)
+        cls.objects.filter(created__lt=created - datetime.timedelta(days=settings.HOST_FACTS_HISTORY_DAYS)).delete()
+
+
 class Group(CommonModelNameNotUnique, RelatedJobsMixin):
     """
     A group containing managed hosts.  A group or host may belong to multiple
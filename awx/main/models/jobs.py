@@ -340,7 +340,8 @@ class JobTemplate(UnifiedJobTemplate, JobOptions, SurveyJobTemplateMixin, Resour
         actual_slice_count = self.job_slice_count
         if self.ask_job_slice_count_on_launch and 'job_slice_count' in kwargs:
             actual_slice_count = kwargs['job_slice_count']
-        if actual_inventory:
+        if actual_inventory and actual_slice_count > 1:
+            # counting hosts is only needed when the job could be sliced
             return min(actual_slice_count, actual_inventory.hosts.count())
         else:
             return actual_slice_count
@@ -375,6 +376,12 @@ class JobTemplate(UnifiedJobTemplate, JobOptions, SurveyJobTemplateMixin, Resour
         if errors:
             raise ValidationError(errors)
 
+    launch_prefetch_lookups = UnifiedJobTemplate.launch_prefetch_lookups + (
+        'project',
+        'inventory__instance_groups',
+        'organization__instance_groups',
+    )
+
     def create_unified_job(self, **kwargs):
         prevent_slicing = kwargs.pop('_prevent_slicing', False)
         slice_ct = self.get_effective_slice_ct(kwargs)
@@ -857,7 +864,7 @@ class Job(UnifiedJob, JobOptions, SurveyJobMixin, JobNotificationMixin, TaskMana
         else:
             host_qs = self.inventory.hosts
 
-        host_qs = host_qs.only(*HOST_FACTS_FIELDS)
+        host_qs = host_qs.select_related('host_facts').only(*HOST_FACTS_FIELDS)
         host_qs = self.inventory.get_sliced_hosts(host_qs, self.job_slice_number, self.job_slice_count)
         return host_qs
 
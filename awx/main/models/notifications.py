@@ -167,23 +167,35 @@ class NotificationTemplate(CommonModelNameNotUnique):
         notification.save()
         return notification
 
-    def send(self, subject, body):
+    def build_backend(self):
+        """
+        Return an instance of the backend for this template, configured with
+        the decrypted passwords, along with the sender and the recipients of
+        its messages.
+        """
+        notification_configuration = deepcopy(self.notification_configuration)
         for field in filter(lambda x: self.notification_class.init_parameters[x]['type'] == "password", self.notification_class.init_parameters):
-            if field in self.notification_configuration:
-                self.notification_configuration[field] = decrypt_field(self, 'notification_configuration', subfield=field)
-        recipients = self.notification_configuration.pop(self.notification_class.recipient_parameter)
+            if field in notification_configuration:
+                notification_configuration[field] = decrypt_field(self, 'notification_configuration', subfield=field)
+        recipients = notification_configuration.pop(self.notification_class.recipient_parameter)
         if not isinstance(recipients, list):
             recipients = [recipients]
-        sender = self.notification_configuration.pop(self.notification_class.sender_parameter, None)
-        notification_configuration = deepcopy(self.notification_configuration)
+        sender = notification_configuration.pop(self.notification_class.sender_parameter, None)
         for field, params in self.notification_class.init_parameters.items():
             if field not in notification_configuration:
                 if 'default' in params:
                     notification_configuration[field] = params['default']
-        backend_obj = self.notification_class(**notification_configuration)
+        return self.notification_class(**notification_configuration), sender, recipients
+
+    @staticmethod
+    def send_with_backend(backend_obj, sender, recipients, subject, body):
         notification_obj = EmailMessage(subject, backend_obj.format_body(body), sender, recipients)
+        return backend_obj.send_messages([notification_obj])
+
+    def send(self, subject, body):
+        backend_obj, sender, recipients = self.build_backend()
         with set_environ(**settings.AWX_TASK_ENV):
-            return backend_obj.send_messages([notification_obj])
+            return self.send_with_backend(backend_obj, sender, recipients, subject, body)
 
     def display_notification_configuration(self):
         field_val = self.notification_configuration.copy()
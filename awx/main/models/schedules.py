@@ -1,6 +1,8 @@
 # Copyright (c) 2015 Ansible, Inc.
 # All Rights Reserved.
 
+import bisect
+import collections
 import datetime
 import logging
 import re
@@ -11,6 +13,7 @@ from dateutil.tz import datetime_exists, tzutc
 from dateutil.zoneinfo import get_zonefile_instance
 
 # Django
+from django.conf import settings
 from django.db import models
 from django.db.models.query import QuerySet
 from django.utils.timezone import now, make_aware
@@ -21,6 +24,7 @@ from awx.api.versioning import reverse
 from awx.main.fields import OrderedManyToManyField
 from awx.main.models.base import PrimordialModel
 from awx.main.models.jobs import LaunchTimeConfig
+from awx.main.models.unified_jobs import UnifiedJobTemplate
 from awx.main.utils import ignore_inventory_computed_fields
 from awx.main.consumers import emit_channel_notification
 
@@ -35,6 +39,66 @@ __all__ = ['Schedule']
 UTC_TIMEZONES = {x: tzutc() for x in dateutil.parser.parserinfo().UTCZONE}
 
 
+class ParsedRRule(object):
+    """
+    A parsed rrule, along with values derived from it that do not change
+    for the same rrule text: the first and last occurrence, and an index of
+    the next few occurrences, so that finding the next run is a bisect
+    """
+
+    def __init__(self, rrule):
+        self.ruleset = Schedule.rrulestr(rrule)
+        try:
+            self.dtstart = self.ruleset[0].astimezone(pytz.utc)
+        except IndexError:
+            self.dtstart = None
+        self.dtend = Schedule.get_end_date(self.ruleset)
+        self.index_start = None
+        self.occurrences = []
+
+    def after(self, dt):
+        """Same as ruleset.after(dt), answered from the occurrence index when possible"""
+        i = bisect.bisect_right(self.occurrences, dt)
+        # keep one spare occurrence in the index, since callers may look one further to skip imaginary times
+        if self.index_start is None or dt < self.index_start or i >= len(self.occurrences) - 1:
+            self.index_start = dt
+            self.occurrences = list(self.ruleset.xafter(dt, count=settings.SCHEDULE_OCCURRENCE_INDEX_SIZE))
+            i = 0
+        if i < len(self.occurrences):
+            return self.occurrences[i]
+        return None
+
+
+class ParsedRRuleCache(object):
+    """
+    Least-recently-used cache of ParsedRRule objects, keyed by rrule text.
+
+    Parsing depends on the current date (see the fast forward logic in
+    Schedule.rrulestr), so the date is part of the key.
+    """
+
+    def __init__(self):
+        self.entries = collections.OrderedDict()
+
+    def get(self, rrule):
+        key = (rrule, now().date())
+        parsed = self.entries.get(key)
+        if parsed is not None:
+            self.entries.move_to_end(key)
+            return parsed
+        parsed = ParsedRRule(rrule)
+        self.entries[key] = parsed
+        while len(self.entries) > settings.SCHEDULE_RRULE_CACHE_SIZE:
+            self.entries.popitem(last=False)
+        return parsed
+
+    def clear(self):
+        self.entries.clear()
+
+
+parsed_rrule_cache = ParsedRRuleCache()
+
+
 class ScheduleFilterMethods(object):
     def enabled(self, enabled=True):
         return self.filter(enabled=enabled)
@@ -108,7 +172,7 @@ class Schedule(PrimordialModel, LaunchTimeConfig):
     def timezone(self):
         utc = tzutc()
         # All rules in a ruleset will have the same dtstart so we can just take the first rule
-        tzinfo = Schedule.rrulestr(self.rrule)._rrule[0]._dtstart.tzinfo
+        tzinfo = Schedule.parsed_rrule(self.rrule).ruleset._rrule[0]._dtstart.tzinfo
         if tzinfo is utc:
             return 'UTC'
         all_zones = Schedule.get_zoneinfo()
@@ -126,7 +190,7 @@ class Schedule(PrimordialModel, LaunchTimeConfig):
     def until(self):
         # The UNTIL= datestamp (if any) coerced from UTC to the local naive time
         # of the DTSTART
-        for r in Schedule.rrulestr(self.rrule)._rrule:
+        for r in Schedule.parsed_rrule(self.rrule).ruleset._rrule:
             if r._until:
                 local_until = r._until.astimezone(r._dtstart.tzinfo)
                 naive_until = local_until.replace(tzinfo=None)
@@ -230,6 +294,13 @@ class Schedule(PrimordialModel, LaunchTimeConfig):
 
         return x
 
+    @classmethod
+    def parsed_rrule(cls, rrule):
+        """
+        Like rrulestr, but cached by rrule text, the returned ruleset must not be modified
+        """
+        return parsed_rrule_cache.get(rrule)
+
     def __str__(self):
         return u'%s_t%s_%s_%s' % (self.name, self.unified_job_template.id, self.id, self.next_run)
 
@@ -266,24 +337,21 @@ class Schedule(PrimordialModel, LaunchTimeConfig):
         for field_name in affects_fields:
             starting_values[field_name] = getattr(self, field_name)
 
-        future_rs = Schedule.rrulestr(self.rrule)
+        parsed = Schedule.parsed_rrule(self.rrule)
 
         if self.enabled:
-            next_run_actual = future_rs.after(now())
+            next_run_actual = parsed.after(now())
             if next_run_actual is not None:
                 if not datetime_exists(next_run_actual):
                     # skip imaginary dates, like 2:30 on DST boundaries
-                    next_run_actual = future_rs.after(next_run_actual)
+                    next_run_actual = parsed.after(next_run_actual)
                 next_run_actual = next_run_actual.astimezone(pytz.utc)
         else:
             next_run_actual = None
 
         self.next_run = next_run_actual
-        try:
-            self.dtstart = future_rs[0].astimezone(pytz.utc)
-        except IndexError:
-            self.dtstart = None
-        self.dtend = Schedule.get_end_date(future_rs)
+        self.dtstart = parsed.dtstart
+        self.dtend = parsed.dtend
 
         changed = any(getattr(self, field_name) != starting_values[field_name] for field_name in affects_fields)
         return changed
@@ -300,6 +368,35 @@ class Schedule(PrimordialModel, LaunchTimeConfig):
         with ignore_inventory_computed_fields():
             self.unified_job_template.update_computed_fields()
 
+    @classmethod
+    def bulk_update_computed_fields(cls, schedules):
+        """
+        Same as calling update_computed_fields for each of the schedules, but
+        changed schedules are saved in batches with bulk_update, and each
+        related unified job template is updated only once.
+        Returns the list of changed schedules.
+        """
+        changed = []
+        batch = []
+        for schedule in schedules:
+            if schedule.update_computed_fields_no_save():
+                batch.append(schedule)
+            if len(batch) >= settings.SCHEDULE_BULK_UPDATE_BATCH_SIZE:
+                cls.objects.bulk_update(batch, ['next_run', 'dtstart', 'dtend'])
+                changed.extend(batch)
+                batch = []
+        if batch:
+            cls.objects.bulk_update(batch, ['next_run', 'dtstart', 'dtend'])
+            changed.extend(batch)
+
+        for schedule in changed:
+            emit_channel_notification('schedules-changed', dict(id=schedule.id, group_name='schedules'))
+        ujt_ids = set(schedule.unified_job_template_id for schedule in changed)
+        with ignore_inventory_computed_fields():
+            for ujt in UnifiedJobTemplate.objects.filter(id__in=ujt_ids):
+                ujt.update_computed_fields()
+        return changed
+
     def save(self, *args, **kwargs):
         self.rrule = Schedule.coerce_naive_until(self.rrule)
         changed = self.update_computed_fields_no_save()
@@ -15,6 +15,8 @@ import subprocess
 import tempfile
 from collections import OrderedDict
 
+import redis
+
 # Django
 from django.conf import settings
 from django.db import models, connection
@@ -342,6 +344,23 @@ class UnifiedJobTemplate(PolymorphicModel, CommonModelNameNotUnique, ExecutionEn
 
         return NotificationTemplate.objects.none()
 
+    # Related objects read by create_unified_job, see prefetch_for_launch
+    launch_prefetch_lookups = ('credentials__credential_type', 'labels', 'instance_groups')
+
+    @staticmethod
+    def prefetch_for_launch(templates):
+        """
+        Load the related objects read while launching jobs from the given
+        templates with a few queries for all of them, instead of per field
+        and per launch. Templates may be of different types.
+        """
+        templates_by_class = {}
+        for template in templates:
+            templates_by_class.setdefault(template.__class__, []).append(template)
+        for template_class, class_templates in templates_by_class.items():
+            models.prefetch_related_objects(class_templates, *template_class.launch_prefetch_lookups)
+        return templates
+
     def create_unified_job(self, instance_groups=None, **kwargs):
         """
         Create a new unified job based on this unified job template.
@@ -757,6 +776,13 @@ class UnifiedJob(
         editable=False,
         help_text=_("Playbook stats from the Ansible playbook_on_stats event."),
     )
+    event_summary = models.JSONField(
+        blank=True,
+        null=True,
+        default=None,
+        editable=False,
+        help_text=_("Counts of the events of the job by type and of its plays and tasks, saved when the events of the job are processed."),
+    )
     work_unit_id = models.CharField(
         max_length=255, blank=True, default=None, editable=False, null=True, help_text=_("The Receptor work unit ID associated with this job.")
     )
@@ -1070,6 +1096,33 @@ class UnifiedJob(
             kwargs['job_created'] = self.created
         return self.event_class.objects.filter(**kwargs)
 
+    def event_summary_complete(self, summary):
+        """
+        Whether the summary counted every event of the job, the number of
+        events is only known once the job finished.
+        """
+        return self.status not in ACTIVE_STATES and summary.get('events', 0) >= self.emitted_events
+
+    def get_event_summary(self, hosts=True):
+        """
+        The summary of the events of the job. The callback receiver counts it
+        in redis as events are saved, and saves it on the job at wrapup. Other
+        callback workers can still be saving events of the job at that point,
+        so the saved summary is only used once it counted all of them.
+        None if there is neither, like for jobs that ran before the summary
+        existed or once the live one expired.
+        """
+        if self.event_summary is not None and self.event_summary_complete(self.event_summary):
+            return self.event_summary
+        # awx.main.analytics imports models
+        from awx.main.analytics.job_event_summary import get_job_event_summary, get_redis
+
+        try:
+            return get_job_event_summary(get_redis(), self.id, hosts=hosts)
+        except redis.exceptions.RedisError:
+            logger.exception('Failed to read the event summary of {} from redis'.format(self.log_format))
+            return None
+
     @property
     def event_processing_finished(self):
         """
@@ -1,9 +1,28 @@
 # Copyright (c) 2016 Ansible, Inc.
 # All Rights Reserved.
 
+import requests
+
 from django.core.mail.backends.base import BaseEmailBackend
 
 
 class AWXBaseEmailBackend(BaseEmailBackend):
+    # Backends that can keep their connection open across messages, once
+    # open() is called they are reused for all the notifications of a template.
+    # HTTP backends send with the requests session while they are open.
+    reusable_connection = False
+    session = None
+
     def format_body(self, body):
         return body
+
+    def open(self):
+        if not self.reusable_connection or self.session is not None:
+            return False
+        self.session = requests.Session()
+        return True
+
+    def close(self):
+        if self.session is not None:
+            self.session.close()
+            self.session = None
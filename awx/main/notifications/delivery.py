@@ -0,0 +1,152 @@
+import json
+import logging
+import smtplib
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from django.conf import settings
+from django.db import connections
+
+from awx.main.utils import set_environ
+
+logger = logging.getLogger('awx.main.notifications.delivery')
+
+# Failures to reach the other end, sending again on a new connection may work.
+# Errors reported by the service itself are not retried.
+RETRY_EXCEPTIONS = (ConnectionError, TimeoutError, smtplib.SMTPServerDisconnected, requests.exceptions.ConnectionError)
+
+
+class PooledBackend(object):
+    """
+    The backend of a notification template, built once and, for backends
+    with a reusable connection, kept open for the messages that follow.
+    """
+
+    def __init__(self, notification_template):
+        self.notification_template = notification_template
+        self.reusable = getattr(notification_template.notification_class, 'reusable_connection', False)
+        self.backend = None
+        self.last_used = time.monotonic()
+
+    def send(self, subject, body):
+        self.last_used = time.monotonic()
+        if not self.reusable:
+            # backends like irc hold per-message state, so use a new one every time
+            backend_obj, sender, recipients = self.notification_template.build_backend()
+            return self.notification_template.send_with_backend(backend_obj, sender, recipients, subject, body)
+        if self.backend is None:
+            self.backend, self.sender, self.recipients = self.notification_template.build_backend()
+            self.backend.open()
+        return self.notification_template.send_with_backend(self.backend, self.sender, self.recipients, subject, body)
+
+    def close(self):
+        if self.backend is not None:
+            try:
+                self.backend.close()
+            except Exception:
+                logger.exception('Error closing connection of notification template {}'.format(self.notification_template.pk))
+            self.backend = None
+
+
+class BackendPool(object):
+    """
+    Backends by notification template, kept by the process between tasks.
+    A backend is replaced when the configuration of its template changes and
+    closed once it has not been used for NOTIFICATION_BACKEND_IDLE_TIMEOUT.
+    """
+
+    def __init__(self):
+        self.backends = {}
+
+    def get(self, notification_template):
+        key = (
+            notification_template.pk,
+            notification_template.notification_type,
+            json.dumps(notification_template.notification_configuration, sort_keys=True, default=str),
+        )
+        pooled = self.backends.get(key)
+        if pooled is None:
+            for other_key in [k for k in self.backends if k[0] == notification_template.pk]:
+                self.backends.pop(other_key).close()
+            pooled = self.backends[key] = PooledBackend(notification_template)
+        return pooled
+
+    def close_idle(self, max_idle=None):
+        if max_idle is None:
+            max_idle = settings.NOTIFICATION_BACKEND_IDLE_TIMEOUT
+        cutoff = time.monotonic() - max_idle
+        for key, pooled in list(self.backends.items()):
+            if pooled.last_used < cutoff:
+                self.backends.pop(key).close()
+
+    def close_all(self):
+        self.close_idle(max_idle=-1)
+
+
+backend_pool = BackendPool()
+
+
+def send_with_retries(pooled, subject, body, retries=0, backoff=0):
+    for attempt in range(retries + 1):
+        try:
+            return pooled.send(subject, body)
+        except RETRY_EXCEPTIONS as e:
+            # the connection can not be trusted anymore, the next attempt opens a new one
+            pooled.close()
+            if attempt >= retries:
+                raise
+            delay = backoff * (2**attempt)
+            logger.warning('Notification template {} send failed ({}), retrying in {}s'.format(pooled.notification_template.pk, e, delay))
+            time.sleep(delay)
+
+
+def _send_group(pooled, items, retries, backoff):
+    results = []
+    for index, subject, body in items:
+        try:
+            results.append((index, send_with_retries(pooled, subject, body, retries=retries, backoff=backoff), None))
+        except Exception as e:
+            results.append((index, 0, e))
+    return results
+
+
+def _send_group_in_thread(pooled, items, retries, backoff):
+    try:
+        return _send_group(pooled, items, retries, backoff)
+    finally:
+        # backends may read settings from the database, do not leak the connection of this thread
+        connections.close_all()
+
+
+def deliver_notifications(messages, pool=backend_pool):
+    """
+    Send messages given as (notification_template, subject, body) tuples.
+
+    Messages of the same template go through the same backend one after the
+    other, different templates are sent concurrently up to
+    NOTIFICATION_SEND_CONCURRENCY. Returns a (sent, exception) tuple for each
+    message in the order given, exception is None for successful sends.
+    """
+    pool.close_idle()
+    groups = {}
+    for index, (notification_template, subject, body) in enumerate(messages):
+        pooled = pool.get(notification_template)
+        groups.setdefault(id(pooled), (pooled, []))[1].append((index, subject, body))
+
+    results = [None] * len(messages)
+    retries, backoff = settings.NOTIFICATION_SEND_RETRIES, settings.NOTIFICATION_SEND_RETRY_BACKOFF
+    workers = max(min(settings.NOTIFICATION_SEND_CONCURRENCY, len(groups)), 1)
+    # proxy settings are read from the environment by the backends
+    with set_environ(**settings.AWX_TASK_ENV):
+        if workers == 1:
+            group_results = [_send_group(pooled, items, retries, backoff) for pooled, items in groups.values()]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_send_group_in_thread, pooled, items, retries, backoff) for pooled, items in groups.values()]
+                group_results = [future.result() for future in futures]
+    for group_result in group_results:
+        for index, sent, error in group_result:
+            results[index] = (sent, error)
+    return results
@@ -31,6 +31,7 @@ logger = logging.getLogger('awx.main.notifications.grafana_backend')
 
 
 class GrafanaBackend(AWXBaseEmailBackend, CustomNotificationBase):
+    reusable_connection = True
     init_parameters = {"grafana_url": {"label": "Grafana URL", "type": "string"}, "grafana_key": {"label": "Grafana API Key", "type": "password"}}
     recipient_parameter = "grafana_url"
     sender_parameter = None
@@ -94,7 +95,7 @@ class GrafanaBackend(AWXBaseEmailBackend, CustomNotificationBase):
             grafana_data['text'] = m.subject
             grafana_headers['Authorization'] = "Bearer {}".format(self.grafana_key)
             grafana_headers['Content-Type'] = "application/json"
-            r = requests.post(
+            r = (self.session or requests).post(
                 "{}/api/annotations".format(m.recipients()[0]), json=grafana_data, headers=grafana_headers, verify=(not self.grafana_no_verify_ssl)
             )
             if r.status_code >= 400:
@@ -14,6 +14,7 @@ logger = logging.getLogger('awx.main.notifications.mattermost_backend')
 
 
 class MattermostBackend(AWXBaseEmailBackend, CustomNotificationBase):
+    reusable_connection = True
     init_parameters = {"mattermost_url": {"label": "Target URL", "type": "string"}, "mattermost_no_verify_ssl": {"label": "Verify SSL", "type": "bool"}}
     recipient_parameter = "mattermost_url"
     sender_parameter = None
@@ -41,7 +42,7 @@ class MattermostBackend(AWXBaseEmailBackend, CustomNotificationBase):
 
             payload['text'] = m.subject
 
-            r = requests.post("{}".format(m.recipients()[0]), json=payload, verify=(not self.mattermost_no_verify_ssl))
+            r = (self.session or requests).post("{}".format(m.recipients()[0]), json=payload, verify=(not self.mattermost_no_verify_ssl))
             if r.status_code >= 400:
                 logger.error(smart_str(_("Error sending notification mattermost: {}").format(r.status_code)))
                 if not self.fail_silently:
@@ -16,6 +16,7 @@ logger = logging.getLogger('awx.main.notifications.rocketchat_backend')
 
 
 class RocketChatBackend(AWXBaseEmailBackend, CustomNotificationBase):
+    reusable_connection = True
     init_parameters = {"rocketchat_url": {"label": "Target URL", "type": "string"}, "rocketchat_no_verify_ssl": {"label": "Verify SSL", "type": "bool"}}
     recipient_parameter = "rocketchat_url"
     sender_parameter = None
@@ -38,7 +39,7 @@ class RocketChatBackend(AWXBaseEmailBackend, CustomNotificationBase):
                 if optvalue is not None:
                     payload[optval] = optvalue.strip()
 
-            r = requests.post(
+            r = (self.session or requests).post(
                 "{}".format(m.recipients()[0]), data=json.dumps(payload), headers=get_awx_http_client_headers(), verify=(not self.rocketchat_no_verify_ssl)
             )
 
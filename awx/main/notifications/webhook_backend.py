@@ -14,6 +14,7 @@ logger = logging.getLogger('awx.main.notifications.webhook_backend')
 
 class WebhookBackend(AWXBaseEmailBackend, CustomNotificationBase):
     MAX_RETRIES = 5
+    reusable_connection = True
 
     init_parameters = {
         "url": {"label": "Target URL", "type": "string"},
@@ -61,7 +62,7 @@ class WebhookBackend(AWXBaseEmailBackend, CustomNotificationBase):
         sent_messages = 0
         if self.http_method.lower() not in ['put', 'post']:
             raise ValueError("HTTP method must be either 'POST' or 'PUT'.")
-        chosen_method = getattr(requests, self.http_method.lower(), None)
+        chosen_method = getattr(self.session or requests, self.http_method.lower(), None)
 
         for m in messages:
             auth = None
@@ -30,3 +30,6 @@ class CallbackQueueDispatcher(object):
 
     def dispatch(self, obj):
         self.connection.rpush(self.queue, json.dumps(obj, cls=AnsibleJSONEncoder))
+
+    def dispatch_many(self, objs):
+        self.connection.rpush(self.queue, *[json.dumps(obj, cls=AnsibleJSONEncoder) for obj in objs])
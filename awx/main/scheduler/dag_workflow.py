@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.utils.translation import gettext_lazy as _
 from django.utils.encoding import smart_str
 
@@ -11,12 +13,63 @@ from awx.main.models import (
 from awx.main.scheduler.dag_simple import SimpleDAG
 
 
+EDGE_LABELS = ('success_nodes', 'failure_nodes', 'always_nodes')
+
+
+def _query_workflow_job_edges(workflow_job_ids):
+    edges = {workflow_job_id: [] for workflow_job_id in workflow_job_ids}
+    for label in EDGE_LABELS:
+        through = getattr(WorkflowJobNode, label).through
+        rows = through.objects.filter(from_workflowjobnode__workflow_job_id__in=workflow_job_ids).values_list(
+            'from_workflowjobnode__workflow_job_id', 'from_workflowjobnode_id', 'to_workflowjobnode_id'
+        )
+        for workflow_job_id, from_id, to_id in rows:
+            edges[workflow_job_id].append((from_id, to_id, label))
+    return edges
+
+
+def get_workflow_job_edges(workflow_job_ids):
+    """
+    Return a dict of workflow job id to a list of (from node id, to node id, label)
+    edges.  The graph of a workflow job does not change once it is launched, so
+    edges are cached and only queried for workflow jobs not seen before.
+    """
+    keys = {workflow_job_id: f'workflow_job_dag_edges_{workflow_job_id}' for workflow_job_id in workflow_job_ids}
+    cached = cache.get_many(list(keys.values()))
+    edges = {}
+    missing = []
+    for workflow_job_id, key in keys.items():
+        if key in cached:
+            edges[workflow_job_id] = cached[key]
+        else:
+            missing.append(workflow_job_id)
+    if missing:
+        found = _query_workflow_job_edges(missing)
+        cache.set_many({keys[workflow_job_id]: found[workflow_job_id] for workflow_job_id in missing}, settings.WORKFLOW_DAG_CACHE_TIMEOUT)
+        edges.update(found)
+    return edges
+
+
 class WorkflowDAG(SimpleDAG):
-    def __init__(self, workflow_job=None):
+    def __init__(self, workflow_job=None, workflow_nodes=None, edges=None):
         super(WorkflowDAG, self).__init__()
-        if workflow_job:
+        if workflow_nodes is not None:
+            self._init_graph_from_nodes(workflow_nodes, edges or [])
+        elif workflow_job:
             self._init_graph(workflow_job)
 
+    def _init_graph_from_nodes(self, workflow_nodes, edges):
+        """
+        Build the graph from already loaded nodes and (from id, to id, label) edges,
+        as done by the workflow manager, which loads all of these in bulk
+        """
+        wfn_by_id = dict()
+        for workflow_node in workflow_nodes:
+            wfn_by_id[workflow_node.id] = workflow_node
+            self.add_node(workflow_node)
+        for from_id, to_id, label in edges:
+            self.add_edge(wfn_by_id[from_id], wfn_by_id[to_id], label)
+
     def _init_graph(self, workflow_job_or_jt):
         if hasattr(workflow_job_or_jt, 'workflow_job_template_nodes'):
             vals = ['from_workflowjobtemplatenode_id', 'to_workflowjobtemplatenode_id']
@@ -64,23 +117,28 @@ class WorkflowDAG(SimpleDAG):
                 return False
         return True
 
+    def _parent_ords(self, node_index, *labels):
+        return set(index for label in labels for index in self.node_to_edges_by_label.get(label, {}).get(node_index, []))
+
+    def _child_ords(self, node_index, *labels):
+        return set(index for label in labels for index in self.node_from_edges_by_label.get(label, {}).get(node_index, []))
+
     def _all_parents_met_convergence_criteria(self, node):
         # This function takes any node and checks that all it's parents have met their criteria to run the child.
         # This returns a boolean and is really only useful if the node is an ALL convergence node and is
         # intended to be used in conjuction with the node property `all_parents_must_converge`
         obj = node['node_object']
+        this_ord = self.find_ord(obj)
         parent_nodes = [p['node_object'] for p in self.get_parents(obj)]
         for p in parent_nodes:
             # node has a status
             if p.job and p.job.status in ["successful", "failed"]:
-                if p.job and p.job.status == "successful":
+                if p.job.status == "successful":
                     status = "success_nodes"
-                elif p.job and p.job.status == "failed":
+                else:
                     status = "failure_nodes"
                 # check that the nodes status matches either a pathway of the same status or is an always path.
-                if p not in [node['node_object'] for node in self.get_parents(obj, status)] and p not in [
-                    node['node_object'] for node in self.get_parents(obj, "always_nodes")
-                ]:
+                if self.find_ord(p) not in self._parent_ords(this_ord, status, "always_nodes"):
                     return False
         return True
 
@@ -202,20 +260,21 @@ class WorkflowDAG(SimpleDAG):
     '''
 
     def _should_mark_node_dnr(self, node, parent_nodes):
+        node_ord = self.find_ord(node['node_object'])
         for p in parent_nodes:
             if p.do_not_run is True:
                 pass
             elif p.job:
                 if p.job.status == 'successful':
-                    if node in (self.get_children(p, 'success_nodes') + self.get_children(p, 'always_nodes')):
+                    if node_ord in self._child_ords(self.find_ord(p), 'success_nodes', 'always_nodes'):
                         return False
                 elif p.job.status in ['failed', 'error', 'canceled']:
-                    if node in (self.get_children(p, 'failure_nodes') + self.get_children(p, 'always_nodes')):
+                    if node_ord in self._child_ords(self.find_ord(p), 'failure_nodes', 'always_nodes'):
                         return False
                 else:
                     return False
             elif not p.do_not_run and p.unified_job_template is None:
-                if node in (self.get_children(p, 'failure_nodes') + self.get_children(p, 'always_nodes')):
+                if node_ord in self._child_ords(self.find_ord(p), 'failure_nodes', 'always_nodes'):
                     return False
             else:
                 return False
@@ -231,13 +290,12 @@ class WorkflowDAG(SimpleDAG):
     '''
 
     def mark_dnr_nodes(self):
-        root_nodes = self.get_root_nodes()
         nodes_marked_do_not_run = []
 
         for node in self.sort_nodes_topological():
             obj = node['node_object']
             parent_nodes = [p['node_object'] for p in self.get_parents(obj)]
-            if not obj.do_not_run and not obj.job and node not in root_nodes:
+            if not obj.do_not_run and not obj.job and self.find_ord(obj) not in self.root_nodes:
                 if obj.all_parents_must_converge:
                     if any(p.do_not_run for p in parent_nodes) or not self._all_parents_met_convergence_criteria(node):
                         obj.do_not_run = True
@@ -12,6 +12,7 @@ import signal
 
 # Django
 from django.db import transaction
+from django.db.models import prefetch_related_objects
 from django.utils.translation import gettext_lazy as _, gettext_noop
 from django.utils.timezone import now as tz_now
 from django.conf import settings
@@ -28,13 +29,15 @@ from awx.main.models import (
     Job,
     Project,
     UnifiedJob,
+    UnifiedJobTemplate,
     WorkflowApproval,
     WorkflowJob,
     WorkflowJobNode,
     WorkflowJobTemplate,
 )
-from awx.main.scheduler.dag_workflow import WorkflowDAG
+from awx.main.scheduler.dag_workflow import WorkflowDAG, get_workflow_job_edges
 from awx.main.utils.pglock import advisory_lock
+from awx.main.scheduler.wakeup import ManagerWakeup
 from awx.main.utils import (
     ScheduleTaskManager,
     ScheduleWorkflowManager,
@@ -65,6 +68,7 @@ def timeit(func):
 class TaskBase:
     def __init__(self, prefix=""):
         self.prefix = prefix
+        self.wakeup = ManagerWakeup(prefix)
         # initialize each metric to 0 and force metric_has_changed to true. This
         # ensures each task manager metric will be overridden when pipe_execute
         # is called later.
@@ -142,8 +146,11 @@ class TaskBase:
                 with transaction.atomic():
                     if acquired is False:
                         logger.debug(f"Not running {self.prefix} scheduler, another task holds lock")
+                        # the lock holder may have started before this wakeup was requested
+                        self.wakeup.run_skipped()
                         return
                     logger.debug(f"Starting {self.prefix} Scheduler")
+                    self.wakeup.run_started()
                     # if sigusr1 due to timeout, still record metrics
                     signal.signal(signal.SIGUSR1, self.record_aggregate_metrics_and_exit)
                     try:
@@ -163,21 +170,54 @@ class TaskBase:
 
                 logger.debug(f"Finished {self.prefix} Scheduler, timing data:\n{local_metrics}")
 
+            # only after the lock is released, so the trailing run can take it
+            self.wakeup.run_finished()
+
 
 class WorkflowManager(TaskBase):
     def __init__(self):
         super().__init__(prefix="workflow_manager")
 
+    def load_workflow_graphs(self, workflow_jobs):
+        """
+        Build the WorkflowDAG of each of the given workflow jobs with a fixed number
+        of queries: nodes, their jobs and templates are loaded in bulk, and edges
+        come from the cache since they do not change once a workflow job is launched
+        """
+        workflow_jobs_by_id = {workflow_job.id: workflow_job for workflow_job in workflow_jobs}
+        nodes_by_workflow_job = {workflow_job_id: [] for workflow_job_id in workflow_jobs_by_id}
+        nodes = list(WorkflowJobNode.objects.filter(workflow_job_id__in=workflow_jobs_by_id.keys()).order_by('id'))
+        # the polymorphic querysets return the concrete job and template types, as accessing node.job would
+        jobs = UnifiedJob.objects.in_bulk(set(node.job_id for node in nodes if node.job_id))
+        templates = UnifiedJobTemplate.objects.in_bulk(set(node.unified_job_template_id for node in nodes if node.unified_job_template_id))
+        for node in nodes:
+            if node.job_id in jobs:
+                node.job = jobs[node.job_id]
+            if node.unified_job_template_id in templates:
+                node.unified_job_template = templates[node.unified_job_template_id]
+            node.workflow_job = workflow_jobs_by_id[node.workflow_job_id]
+            nodes_by_workflow_job[node.workflow_job_id].append(node)
+
+        edges = get_workflow_job_edges(list(workflow_jobs_by_id.keys()))
+        return {
+            workflow_job_id: WorkflowDAG(workflow_job=workflow_jobs_by_id[workflow_job_id], workflow_nodes=workflow_nodes, edges=edges[workflow_job_id])
+            for workflow_job_id, workflow_nodes in nodes_by_workflow_job.items()
+        }
+
     @timeit
     def spawn_workflow_graph_jobs(self):
         result = []
-        for workflow_job in self.all_tasks:
+        dags = {}
+        for index, workflow_job in enumerate(self.all_tasks):
             if self.timed_out():
                 logger.warning("Workflow manager has reached time out while processing running workflows, exiting loop early")
                 ScheduleWorkflowManager().schedule()
                 # Do not process any more workflow jobs. Stop here.
                 break
-            dag = WorkflowDAG(workflow_job)
+            if workflow_job.id not in dags:
+                # load graphs a batch of workflow jobs at a time, to bound memory use
+                dags = self.load_workflow_graphs(self.all_tasks[index : index + settings.WORKFLOW_MANAGER_BATCH_SIZE])
+            dag = dags[workflow_job.id]
             status_changed = False
             if workflow_job.cancel_flag:
                 workflow_job.workflow_nodes.filter(do_not_run=False, job__isnull=True).update(do_not_run=True)
@@ -223,6 +263,9 @@ class WorkflowManager(TaskBase):
                     logger.debug('Spawning jobs for %s', workflow_job.log_format)
                 else:
                     logger.debug('No nodes to spawn for %s', workflow_job.log_format)
+                # load what the launches read for all of the nodes at once
+                prefetch_related_objects(spawn_nodes, 'credentials', 'labels', 'instance_groups', 'inventory', 'execution_environment')
+                UnifiedJobTemplate.prefetch_for_launch([node.unified_job_template for node in spawn_nodes if node.unified_job_template is not None])
                 for spawn_node in spawn_nodes:
                     if spawn_node.unified_job_template is None:
                         continue
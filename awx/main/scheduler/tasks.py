@@ -20,16 +20,16 @@ def run_manager(manager, prefix):
     manager().schedule()
 
 
-@task(queue=get_task_queuename)
+@task(queue=get_task_queuename, deduplicate=True)
 def task_manager():
     run_manager(TaskManager, "task")
 
 
-@task(queue=get_task_queuename)
+@task(queue=get_task_queuename, deduplicate=True)
 def dependency_manager():
     run_manager(DependencyManager, "dependency")
 
 
-@task(queue=get_task_queuename)
+@task(queue=get_task_queuename, deduplicate=True)
 def workflow_manager():
     run_manager(WorkflowManager, "workflow")
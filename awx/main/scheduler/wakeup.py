@@ -0,0 +1,147 @@
+# Python
+import logging
+
+# Django
+from django.conf import settings
+
+# Redis
+import redis
+
+# AWX
+from awx.main.analytics.subsystem_metrics import root_key
+from awx.main.utils.common import is_testing
+
+logger = logging.getLogger('awx.main.scheduler')
+
+# Set the wakeup key if nobody holds it, meaning a run must be dispatched,
+# otherwise leave a note for the run in flight that it has to go again
+REQUEST_SCRIPT = """
+if redis.call('SET', KEYS[1], '1', 'NX', 'EX', ARGV[1]) then
+    return 1
+end
+redis.call('SET', KEYS[2], '1', 'EX', ARGV[1])
+return 0
+"""
+
+# If wakeups arrived while the run was in progress keep the wakeup key for the
+# trailing run, otherwise release it so the next request dispatches right away
+FINISH_SCRIPT = """
+if redis.call('DEL', KEYS[2]) == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+    return 1
+end
+redis.call('DEL', KEYS[1])
+return 0
+"""
+
+_redis_conn = None
+
+
+def get_redis():
+    global _redis_conn
+    if _redis_conn is None:
+        _redis_conn = redis.Redis.from_url(settings.BROKER_URL)
+    return _redis_conn
+
+
+class ManagerWakeup:
+    """
+    Coalesces requests to run a task manager.
+
+    Only one wakeup per manager is in flight at any time. Requests made while a
+    wakeup is queued or the manager is running are folded into a single
+    trailing run, which is dispatched when the current run finishes.
+    The wakeup key expires after TASK_MANAGER_WAKEUP_DEBOUNCE_WINDOW seconds and
+    is also released by the periodic manager runs, so a lost message does not
+    hold back the managers for long.
+    """
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.wakeup_key = f'awx_{prefix}_wakeup'
+        self.pending_key = f'awx_{prefix}_wakeup_pending'
+
+    @property
+    def window(self):
+        return max(int(settings.TASK_MANAGER_WAKEUP_DEBOUNCE_WINDOW), 1)
+
+    def dispatch(self):
+        from awx.main.scheduler import tasks
+
+        getattr(tasks, self.prefix).delay()
+
+    def request(self):
+        """
+        Ask for a run of the manager, returns True if a wakeup was dispatched
+        and False if the request was folded into a wakeup already in flight.
+        """
+        if is_testing() or not settings.TASK_MANAGER_WAKEUP_COALESCE:
+            self.dispatch()
+            return True
+        try:
+            conn = get_redis()
+            with conn.pipeline() as pipe:
+                pipe.eval(REQUEST_SCRIPT, 2, self.wakeup_key, self.pending_key, self.window)
+                pipe.hincrby(root_key, f'{self.prefix}_wakeups_requested', 1)
+                acquired = pipe.execute()[0]
+        except redis.exceptions.RedisError:
+            # never lose a wakeup because redis is unavailable
+            logger.exception(f'Could not coalesce {self.prefix} wakeup, dispatching it')
+            self.dispatch()
+            return True
+        if not acquired:
+            logger.debug(f'{self.prefix} wakeup already in flight, coalescing request')
+            return False
+        self.dispatch()
+        self._count_dispatched()
+        return True
+
+    def run_started(self):
+        """
+        Called once the manager holds its lock, anything requested from now
+        on has to be looked at by a trailing run.
+        """
+        if is_testing() or not settings.TASK_MANAGER_WAKEUP_COALESCE:
+            return
+        try:
+            get_redis().delete(self.pending_key)
+        except redis.exceptions.RedisError:
+            logger.exception(f'Could not reset {self.prefix} pending wakeups')
+
+    def run_skipped(self):
+        """
+        Called when the manager found its lock taken.  The wakeup that started this
+        run may have been the only one, so mark it pending for the lock holder,
+        which then dispatches a trailing run when it finishes.
+        """
+        if is_testing() or not settings.TASK_MANAGER_WAKEUP_COALESCE:
+            return
+        try:
+            get_redis().set(self.pending_key, '1', ex=self.window)
+        except redis.exceptions.RedisError:
+            # dispatching here could loop for as long as the lock is held, leave it to the periodic run
+            logger.exception(f'Could not mark {self.prefix} wakeup pending')
+
+    def run_finished(self):
+        """
+        Called once the manager released its lock, dispatches the trailing
+        run if wakeups were requested while the manager was running.
+        """
+        if is_testing() or not settings.TASK_MANAGER_WAKEUP_COALESCE:
+            return False
+        try:
+            trailing = get_redis().eval(FINISH_SCRIPT, 2, self.wakeup_key, self.pending_key, self.window)
+        except redis.exceptions.RedisError:
+            logger.exception(f'Could not check {self.prefix} pending wakeups, dispatching trailing run')
+            trailing = True
+        if trailing:
+            logger.debug(f'Wakeups were requested while {self.prefix} ran, dispatching trailing run')
+            self.dispatch()
+            self._count_dispatched()
+        return bool(trailing)
+
+    def _count_dispatched(self):
+        try:
+            get_redis().hincrby(root_key, f'{self.prefix}_wakeups_dispatched', 1)
+        except redis.exceptions.RedisError:
+            pass
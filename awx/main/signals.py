@@ -2,8 +2,12 @@
 # All Rights Reserved.
 
 # Python
+from collections import defaultdict
 import contextlib
+import copy
+import functools
 import logging
+import random
 import threading
 import json
 import sys
@@ -57,7 +61,7 @@ from awx.main.models import (
 from awx.main.constants import CENSOR_VALUE
 from awx.main.utils import model_instance_diff, model_to_dict, camelcase_to_underscore, get_current_apps
 from awx.main.utils import ignore_inventory_computed_fields, ignore_inventory_group_removal, _inventory_updates
-from awx.main.tasks.system import update_inventory_computed_fields, handle_removed_image
+from awx.main.tasks.system import update_inventory_computed_fields, handle_removed_image, emit_activity_stream_changes
 from awx.main.fields import (
     is_implicit_parent,
     update_role_parentage_for_instance,
@@ -194,6 +198,25 @@ def cleanup_detached_labels_on_deleted_parent(sender, instance, **kwargs):
             label.delete()
 
 
+def update_smart_memberships_on_group_hosts_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Smart inventories can filter hosts by group, so the hosts added to or
+    removed from groups have their smart inventory memberships updated.
+    """
+    if not settings.AWX_REBUILD_SMART_MEMBERSHIP:
+        return
+    from awx.main.tasks.system import schedule_smart_membership_update
+
+    if reverse:
+        # host.groups.add() and similar, only this host changes
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            schedule_smart_membership_update([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        schedule_smart_membership_update(pk_set)
+    elif action == 'pre_clear':
+        schedule_smart_membership_update(list(instance.hosts.values_list('pk', flat=True)))
+
+
 def save_related_job_templates(sender, instance, **kwargs):
     """save_related_job_templates loops through all of the
     job templates that use an Inventory that have had their
@@ -233,6 +256,7 @@ def connect_computed_field_signals():
 connect_computed_field_signals()
 
 post_save.connect(save_related_job_templates, sender=Inventory)
+m2m_changed.connect(update_smart_memberships_on_group_hosts_change, Group.hosts.through)
 m2m_changed.connect(rebuild_role_ancestor_list, Role.parents.through)
 m2m_changed.connect(rbac_activity_stream, Role.members.through)
 m2m_changed.connect(rbac_activity_stream, Role.parents.through)
@@ -352,6 +376,141 @@ def disable_activity_stream():
         activity_stream_enabled.enabled = previous_value
 
 
+class ActivityStreamBuffer(threading.local):
+    def __init__(self):
+        self.depth = 0
+        self.entries = []
+
+
+activity_stream_buffer = ActivityStreamBuffer()
+
+# Number of entries per task sending activity stream changes to external logging
+ACTIVITY_STREAM_EMIT_CHUNK_SIZE = 500
+
+
+@contextlib.contextmanager
+def batch_activity_stream():
+    """
+    Context manager to buffer the activity stream entries recorded inside of
+    it, they are written with bulk inserts when the outermost block exits.
+    Entries are dropped if the transaction they belong to is rolled back.
+    """
+    activity_stream_buffer.depth += 1
+    try:
+        yield
+    except Exception:
+        if activity_stream_buffer.depth == 1 and connection.in_atomic_block:
+            activity_stream_buffer.entries = []
+        raise
+    finally:
+        activity_stream_buffer.depth -= 1
+        if activity_stream_buffer.depth == 0:
+            entries, activity_stream_buffer.entries = activity_stream_buffer.entries, []
+            if entries and not (connection.in_atomic_block and connection.needs_rollback):
+                write_activity_entries(entries, deleted_objects=True)
+
+
+def record_activity_entry(activity_entry, links=()):
+    """
+    Save an activity stream entry and relate it to the objects given as
+    (relation name, pk) pairs, or buffer it inside batch_activity_stream().
+    """
+    if activity_stream_buffer.depth:
+        activity_stream_buffer.entries.append((activity_entry, list(links)))
+    else:
+        write_activity_entries([(activity_entry, links)])
+
+
+def write_activity_entries(entries, deleted_objects=False):
+    """
+    Insert activity stream entries, given as (entry, links) pairs, and their
+    relationships in bulk, then hand them over to external logging.
+    With deleted_objects, objects may have been deleted since the entries
+    were recorded and relationships to them are skipped.
+    """
+    if 'migrate' in sys.argv:
+        # historical models, save them one by one
+        for activity_entry, links in entries:
+            activity_entry.save()
+            for relation, pk in links:
+                getattr(activity_entry, relation).add(pk)
+        return
+    ActivityStream = get_activity_stream_class()
+    for activity_entry, links in entries:
+        activity_entry.set_denormalized_fields()
+    ActivityStream.objects.bulk_create([activity_entry for activity_entry, links in entries])
+
+    related = defaultdict(set)
+    for activity_entry, links in entries:
+        for relation, pk in links:
+            related[relation].add((activity_entry.pk, pk))
+    for relation, pairs in related.items():
+        field = ActivityStream._meta.get_field(relation)
+        if deleted_objects:
+            existing = set(field.related_model._base_manager.filter(pk__in={pk for entry_pk, pk in pairs}).values_list('pk', flat=True))
+            pairs = {(entry_pk, pk) for entry_pk, pk in pairs if pk in existing}
+        through = field.remote_field.through
+        source = through._meta.get_field(field.m2m_field_name()).attname
+        target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+        through.objects.bulk_create([through(**{source: entry_pk, target: pk}) for entry_pk, pk in sorted(pairs)], ignore_conflicts=True)
+
+    schedule_activity_stream_emit([activity_entry.pk for activity_entry, links in entries])
+
+
+def record_update_activity(changed):
+    """
+    Record the update entries of objects saved without sending signals, for
+    instance with bulk_update, given as (old, new) instance pairs.
+    """
+    if not changed or not activity_stream_enabled:
+        return
+    ActivityStream = get_activity_stream_class()
+    actor = get_current_user_or_none()
+    with batch_activity_stream():
+        for old, new in changed:
+            object1 = camelcase_to_underscore(new.__class__.__name__)
+            if not activity_stream_sampled('update', object1):
+                continue
+            changes = model_instance_diff(old, new, model_serializer_mapping())
+            if changes:
+                record_activity_entry(ActivityStream(operation='update', object1=object1, changes=json.dumps(changes), actor=actor), [(object1, new.pk)])
+
+
+def activity_stream_external_logging_enabled():
+    return bool(settings.LOG_AGGREGATOR_ENABLED and 'activity_stream' in (settings.LOG_AGGREGATOR_LOGGERS or []))
+
+
+def schedule_activity_stream_emit(entry_ids):
+    """
+    Send activity stream entries to external logging from a background task
+    once the transaction commits. Nothing is serialized if the activity
+    stream logger is not enabled, the records would be filtered out anyway.
+    """
+    if not entry_ids or not activity_stream_external_logging_enabled():
+        return
+
+    def dispatch():
+        for i in range(0, len(entry_ids), ACTIVITY_STREAM_EMIT_CHUNK_SIZE):
+            emit_activity_stream_changes.delay(entry_ids[i : i + ACTIVITY_STREAM_EMIT_CHUNK_SIZE])
+
+    connection.on_commit(dispatch)
+
+
+def activity_stream_sampled(operation, *object_names):
+    """
+    Apply ACTIVITY_STREAM_MODEL_POLICY, which maps object names (like host) to
+    the fraction of their entries to record per operation. Returns False if
+    the entry is suppressed or not sampled.
+    """
+    policy = settings.ACTIVITY_STREAM_MODEL_POLICY
+    if not policy:
+        return True
+    rate = min(float(policy.get(name, {}).get(operation, 1.0)) for name in object_names)
+    if rate >= 1.0:
+        return True
+    return rate > 0.0 and random.random() < rate
+
+
 @contextlib.contextmanager
 def disable_computed_fields():
     post_save.disconnect(emit_update_inventory_on_created_or_deleted, sender=Host)
@@ -366,6 +525,7 @@ def disable_computed_fields():
     connect_computed_field_signals()
 
 
+@functools.lru_cache(maxsize=None)
 def model_serializer_mapping():
     from awx.api import serializers
     from awx.main import models
@@ -436,6 +596,8 @@ def activity_stream_create(sender, instance, created, **kwargs):
         if getattr(_type, '_deferred', False):
             return
         object1 = camelcase_to_underscore(instance.__class__.__name__)
+        if not activity_stream_sampled('create', object1):
+            return
         changes = model_to_dict(instance, model_serializer_mapping())
         # Special case where Job survey password variables need to be hidden
         if type(instance) == Job:
@@ -450,12 +612,31 @@ def activity_stream_create(sender, instance, created, **kwargs):
         #      it might actually be a good idea to remove all of these FK references since
         #      we don't really use them anyway.
         if instance._meta.model_name != 'setting':  # Is not conf.Setting instance
-            activity_entry.save()
-            getattr(activity_entry, object1).add(instance.pk)
+            record_activity_entry(activity_entry, [(object1, instance.pk)])
         else:
             activity_entry.setting = conf_to_dict(instance)
-            activity_entry.save()
-        connection.on_commit(lambda: emit_activity_stream_change(activity_entry))
+            record_activity_entry(activity_entry)
+
+
+def get_saved_instance(sender, instance, update_fields=None):
+    """
+    Return the instance as currently saved in the database. When only some
+    fields are being saved only those are fetched, and the other fields are
+    taken from the instance since they can not have changed.
+    """
+    if not update_fields:
+        return sender.objects.get(id=instance.id)
+    fields = [sender._meta.get_field(name) for name in update_fields]
+    values = sender.objects.filter(id=instance.id).values(*[field.attname for field in fields]).first()
+    if values is None:
+        raise sender.DoesNotExist
+    old = copy.copy(instance)
+    for field in fields:
+        setattr(old, field.attname, values[field.attname])
+        if field.is_relation:
+            # drop the related object cached for the new value
+            old._state.fields_cache.pop(field.name, None)
+    return old
 
 
 def activity_stream_update(sender, instance, **kwargs):
@@ -463,8 +644,14 @@ def activity_stream_update(sender, instance, **kwargs):
         return
     if not activity_stream_enabled:
         return
+    _type = type(instance)
+    if getattr(_type, '_deferred', False):
+        return
+    object1 = camelcase_to_underscore(instance.__class__.__name__)
+    if not activity_stream_sampled('update', object1):
+        return
     try:
-        old = sender.objects.get(id=instance.id)
+        old = get_saved_instance(sender, instance, update_fields=kwargs.get('update_fields'))
     except sender.DoesNotExist:
         return
 
@@ -472,18 +659,12 @@ def activity_stream_update(sender, instance, **kwargs):
     changes = model_instance_diff(old, new, model_serializer_mapping())
     if changes is None:
         return
-    _type = type(instance)
-    if getattr(_type, '_deferred', False):
-        return
-    object1 = camelcase_to_underscore(instance.__class__.__name__)
     activity_entry = get_activity_stream_class()(operation='update', object1=object1, changes=json.dumps(changes), actor=get_current_user_or_none())
     if instance._meta.model_name != 'setting':  # Is not conf.Setting instance
-        activity_entry.save()
-        getattr(activity_entry, object1).add(instance.pk)
+        record_activity_entry(activity_entry, [(object1, instance.pk)])
     else:
         activity_entry.setting = conf_to_dict(instance)
-        activity_entry.save()
-    connection.on_commit(lambda: emit_activity_stream_change(activity_entry))
+        record_activity_entry(activity_entry)
 
 
 def activity_stream_delete(sender, instance, **kwargs):
@@ -504,13 +685,14 @@ def activity_stream_delete(sender, instance, **kwargs):
     _type = type(instance)
     if getattr(_type, '_deferred', False):
         return
-    changes.update(model_to_dict(instance, model_serializer_mapping()))
     object1 = camelcase_to_underscore(instance.__class__.__name__)
+    if not activity_stream_sampled('delete', object1):
+        return
+    changes.update(model_to_dict(instance, model_serializer_mapping()))
     if type(instance) == OAuth2AccessToken:
         changes['token'] = CENSOR_VALUE
     activity_entry = get_activity_stream_class()(operation='delete', changes=json.dumps(changes), object1=object1, actor=get_current_user_or_none())
-    activity_entry.save()
-    connection.on_commit(lambda: emit_activity_stream_change(activity_entry))
+    record_activity_entry(activity_entry)
 
 
 def activity_stream_associate(sender, instance, **kwargs):
@@ -552,6 +734,8 @@ def activity_stream_associate(sender, instance, **kwargs):
                 continue
             if isinstance(obj1, SystemJob) or isinstance(obj2_actual, SystemJob):
                 continue
+            if not activity_stream_sampled(action, object1, object2):
+                continue
             activity_entry = get_activity_stream_class()(
                 changes=json.dumps(dict(object1=object1, object1_pk=obj1.pk, object2=object2, object2_pk=obj2_id, action=action, relationship=obj_rel)),
                 operation=action,
@@ -560,9 +744,7 @@ def activity_stream_associate(sender, instance, **kwargs):
                 object_relationship_type=obj_rel,
                 actor=get_current_user_or_none(),
             )
-            activity_entry.save()
-            getattr(activity_entry, object1).add(obj1.pk)
-            getattr(activity_entry, object2).add(obj2_actual.pk)
+            links = [(object1, obj1.pk), (object2, obj2_actual.pk)]
 
             # Record the role for RBAC changes
             if 'role' in kwargs:
@@ -573,12 +755,11 @@ def activity_stream_associate(sender, instance, **kwargs):
                 # If the m2m is from the User side we need to
                 # set the content_object of the Role for our entry.
                 if type(instance) == User and role.content_object is not None:
-                    getattr(activity_entry, role.content_type.name.replace(' ', '_')).add(role.content_object)
+                    links.append((role.content_type.name.replace(' ', '_'), role.content_object.pk))
 
-                activity_entry.role.add(role)
+                links.append(('role', role.pk))
                 activity_entry.object_relationship_type = obj_rel
-                activity_entry.save()
-            connection.on_commit(lambda: emit_activity_stream_change(activity_entry))
+            record_activity_entry(activity_entry, links)
 
 
 @receiver(current_user_getter)
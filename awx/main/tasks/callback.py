@@ -1,4 +1,7 @@
+import datetime
 import json
+import queue
+import threading
 import time
 import logging
 from collections import deque
@@ -14,6 +17,7 @@ from awx.main.redact import UriCleaner
 from awx.main.constants import MINIMAL_EVENTS, ANSIBLE_RUNNER_NEEDS_UPDATE_MESSAGE
 from awx.main.utils.update_model import update_model
 from awx.main.queue import CallbackQueueDispatcher
+from awx.main.analytics.job_event_metrics import record_pipeline_metrics
 
 logger = logging.getLogger('awx.main.tasks.callback')
 
@@ -252,3 +256,193 @@ class RunnerCallbackForAdHocCommand(RunnerCallback):
 
 class RunnerCallbackForSystemJob(RunnerCallback):
     pass
+
+
+class EventPipelineAborted(Exception):
+    pass
+
+
+class EventPipeline:
+    """
+    Passes the events read from the worker stream to a runner callback in
+    stages connected by bounded queues:
+
+    - the thread reading the stream (ansible-runner's processor) only decodes,
+    - the enrich thread runs the event handler of the runner callback,
+    - the publish thread serializes events and pushes them to redis in batches,
+      as many as are waiting up to AWX_EVENT_PIPELINE_BATCH_SIZE.
+
+    When redis or the callback receiver fall behind, the queues fill up and
+    the reader stops reading from receptor instead of buffering every event
+    of the job in memory.
+    """
+
+    STOP = object()
+
+    def __init__(self, runner_callback, queue_size=None, batch_size=None):
+        self.runner_callback = runner_callback
+        self.publisher = runner_callback.dispatcher
+        self.events = queue.Queue(maxsize=queue_size or settings.AWX_EVENT_PIPELINE_QUEUE_SIZE)
+        self.published = queue.Queue(maxsize=queue_size or settings.AWX_EVENT_PIPELINE_QUEUE_SIZE)
+        self.batch_size = batch_size or settings.AWX_EVENT_PIPELINE_BATCH_SIZE
+        self.error = None
+        self.threads = []
+        self.started = self.closed = False
+        self.stats = {
+            'events_read': 0,
+            'events_published': 0,
+            'publish_batches': 0,
+            'max_event_queue_depth': 0,
+            'max_publish_queue_depth': 0,
+            'publish_lag_seconds_total': 0.0,
+            'publish_lag_seconds_max': 0.0,
+        }
+        self.first_event_time = self.last_event_time = None
+
+    def start(self):
+        # events dispatched by the runner callback go through the publish stage
+        self.runner_callback.dispatcher = self
+        for target in (self._enrich, self._publish):
+            thread = threading.Thread(target=target, name=f'event-pipeline-{target.__name__}', daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        self.started = True
+        return self
+
+    def _put(self, q, item, depth_stat):
+        while True:
+            if self.error is not None:
+                raise EventPipelineAborted()
+            try:
+                q.put(item, timeout=0.5)
+            except queue.Full:
+                continue
+            depth = q.qsize()
+            if depth > self.stats[depth_stat]:
+                self.stats[depth_stat] = depth
+            return
+
+    def _get(self, q):
+        while True:
+            if self.error is not None:
+                raise EventPipelineAborted()
+            try:
+                return q.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+    def _fail(self, exc):
+        if self.error is None:
+            logger.exception(f'Event pipeline of {self.runner_callback.instance.log_format} failed')
+            self.error = exc
+
+    def event_handler(self, event_data):
+        if event_data.get('event') == 'keepalive':
+            return False
+        try:
+            self._put(self.events, event_data, 'max_event_queue_depth')
+        except EventPipelineAborted:
+            raise RuntimeError('Could not process job events') from self.error
+        self.last_event_time = time.time()
+        if self.first_event_time is None:
+            self.first_event_time = self.last_event_time
+        self.stats['events_read'] += 1
+        # events are not written to the artifacts dir, same as RunnerCallback.event_handler
+        return False
+
+    def dispatch(self, event_data):
+        self._put(self.published, event_data, 'max_publish_queue_depth')
+
+    def _enrich(self):
+        try:
+            while True:
+                event_data = self._get(self.events)
+                if event_data is self.STOP:
+                    self._put(self.published, self.STOP, 'max_publish_queue_depth')
+                    return
+                self.runner_callback.event_handler(event_data)
+        except EventPipelineAborted:
+            pass
+        except Exception as e:
+            self._fail(e)
+        finally:
+            connections.close_all()
+
+    def _publish(self):
+        try:
+            while True:
+                batch = [self._get(self.published)]
+                while len(batch) < self.batch_size and batch[-1] is not self.STOP:
+                    try:
+                        batch.append(self.published.get_nowait())
+                    except queue.Empty:
+                        break
+                done = batch[-1] is self.STOP
+                if done:
+                    batch.pop()
+                if batch:
+                    self.publisher.dispatch_many(batch)
+                    self._record_published(batch)
+                if done:
+                    return
+        except EventPipelineAborted:
+            pass
+        except Exception as e:
+            self._fail(e)
+
+    def _record_published(self, batch):
+        now = datetime.datetime.utcnow()
+        for event_data in batch:
+            created = event_data.get('created')
+            if not created:
+                continue
+            try:
+                lag = (now - datetime.datetime.fromisoformat(created)).total_seconds()
+            except (TypeError, ValueError):
+                continue
+            self.stats['publish_lag_seconds_total'] += lag
+            if lag > self.stats['publish_lag_seconds_max']:
+                self.stats['publish_lag_seconds_max'] = lag
+        self.stats['events_published'] += len(batch)
+        self.stats['publish_batches'] += 1
+
+    def close(self):
+        """
+        Wait for the events read so far to be published, raises if the
+        pipeline failed. Called again after that, does nothing.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self.started:
+            try:
+                self._put(self.events, self.STOP, 'max_event_queue_depth')
+            except EventPipelineAborted:
+                pass
+            for thread in self.threads:
+                thread.join()
+        self.runner_callback.dispatcher = self.publisher
+        self.record_metrics()
+        if self.error is not None:
+            raise RuntimeError('Could not process job events') from self.error
+
+    def finished_callback(self, runner_obj):
+        self.close()
+        self.runner_callback.finished_callback(runner_obj)
+
+    def get_metrics(self):
+        metrics = dict(self.stats)
+        elapsed = 0.0
+        if self.first_event_time is not None:
+            elapsed = self.last_event_time - self.first_event_time
+        metrics['events_per_second'] = round(metrics['events_read'] / elapsed, 2) if elapsed > 0 else metrics['events_read']
+        return metrics
+
+    def record_metrics(self):
+        metrics = self.get_metrics()
+        instance = self.runner_callback.instance
+        logger.debug(f'Event pipeline of {instance.log_format}: ' + ', '.join(f'{k}={v}' for k, v in metrics.items()))
+        try:
+            record_pipeline_metrics(self.publisher.connection, instance.id, metrics)
+        except Exception:
+            logger.exception(f'Could not record event metrics of {instance.log_format}')
@@ -1,5 +1,7 @@
 import codecs
+from concurrent.futures import ThreadPoolExecutor
 import datetime
+import itertools
 import os
 import json
 import logging
@@ -9,17 +11,65 @@ from django.conf import settings
 from django.db.models.query import QuerySet
 from django.utils.encoding import smart_str
 from django.utils.timezone import now
-from django.db import OperationalError
+from django.db import OperationalError, transaction
 
 # AWX
 from awx.main.utils.common import log_excess_runtime
-from awx.main.models.inventory import Host
+from awx.main.models.inventory import Host, HostFacts
 
 
 logger = logging.getLogger('awx.main.tasks.facts')
 system_tracking_logger = logging.getLogger('awx.analytics.system_tracking')
 
 
+def _fact_cache_filepath(destination, host):
+    filepath = os.sep.join(map(str, [destination, host.name]))
+    if not os.path.realpath(filepath).startswith(destination):
+        system_tracking_logger.error('facts for host {} could not be cached'.format(smart_str(host.name)))
+        return None
+    return filepath
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write_host_facts(args):
+    filepath, ansible_facts = args
+    try:
+        with codecs.open(filepath, 'w', encoding='utf-8') as f:
+            os.chmod(f.name, 0o600)
+            json.dump(ansible_facts, f)
+    except IOError:
+        return None
+    return os.path.getmtime(filepath)
+
+
+def _read_host_facts(args):
+    """
+    Returns a (status, facts) tuple for the fact cache file, the facts are only loaded if the file changed
+    """
+    filepath, facts_write_time = args
+    try:
+        modified = os.path.getmtime(filepath)
+    except FileNotFoundError:
+        # if the file goes missing, ansible removed it (likely via clear_facts)
+        return ('cleared', {})
+    # If the file changed since we wrote the last facts file, pre-playbook run...
+    if facts_write_time and modified <= facts_write_time:
+        return ('unmodified', None)
+    try:
+        with codecs.open(filepath, 'r', encoding='utf-8') as f:
+            return ('modified', json.load(f))
+    except ValueError:
+        return ('invalid', None)
+
+
 @log_excess_runtime(logger, debug_cutoff=0.01, msg='Inventory {inventory_id} host facts prepared for {written_ct} hosts, took {delta:.3f} s', add_log_data=True)
 def start_fact_cache(hosts, destination, log_data, timeout=None, inventory_id=None):
     log_data['inventory_id'] = inventory_id
@@ -35,31 +85,32 @@ def start_fact_cache(hosts, destination, log_data, timeout=None, inventory_id=No
     if isinstance(hosts, QuerySet):
         hosts = hosts.iterator()
 
-    last_filepath_written = None
-    for host in hosts:
-        if (not host.ansible_facts_modified) or (timeout and host.ansible_facts_modified < now() - datetime.timedelta(seconds=timeout)):
-            continue  # facts are expired - do not write them
-        filepath = os.sep.join(map(str, [destination, host.name]))
-        if not os.path.realpath(filepath).startswith(destination):
-            system_tracking_logger.error('facts for host {} could not be cached'.format(smart_str(host.name)))
-            continue
-        try:
-            with codecs.open(filepath, 'w', encoding='utf-8') as f:
-                os.chmod(f.name, 0o600)
-                json.dump(host.ansible_facts, f)
+    last_write_time = None
+    with ThreadPoolExecutor(max_workers=settings.AWX_FACT_CACHE_IO_WORKERS) as executor:
+        for chunk in _chunked(hosts, settings.AWX_FACT_CACHE_BATCH_SIZE):
+            to_write = []
+            for host in chunk:
+                if (not host.ansible_facts_modified) or (timeout and host.ansible_facts_modified < now() - datetime.timedelta(seconds=timeout)):
+                    continue  # facts are expired - do not write them
+                filepath = _fact_cache_filepath(destination, host)
+                if filepath:
+                    to_write.append((host, filepath))
+            write_times = executor.map(_write_host_facts, [(filepath, host.ansible_facts) for host, filepath in to_write])
+            for (host, filepath), write_time in zip(to_write, write_times):
+                if write_time is None:
+                    system_tracking_logger.error('facts for host {} could not be cached'.format(smart_str(host.name)))
+                    continue
                 log_data['written_ct'] += 1
-                last_filepath_written = filepath
-        except IOError:
-            system_tracking_logger.error('facts for host {} could not be cached'.format(smart_str(host.name)))
-            continue
-    # make note of the time we wrote the last file so we can check if any file changed later
-    if last_filepath_written:
-        return os.path.getmtime(last_filepath_written)
-    return None
+                # make note of the time we wrote the last file so we can check if any file changed later
+                last_write_time = write_time if last_write_time is None else max(last_write_time, write_time)
+    return last_write_time
 
 
 def raw_update_hosts(host_list):
-    Host.objects.bulk_update(host_list, ['ansible_facts', 'ansible_facts_modified'])
+    # facts are only written for hosts where they changed, the host row only gets the timestamp
+    with transaction.atomic():
+        Host.objects.bulk_update(host_list, ['ansible_facts_modified'])
+        HostFacts.save_facts(host_list)
 
 
 def update_hosts(host_list, max_tries=5):
@@ -80,6 +131,11 @@ def update_hosts(host_list, max_tries=5):
         break
 
 
+def _log_fact_changes():
+    # system tracking records only go to the external logger, avoid building them otherwise
+    return settings.LOG_AGGREGATOR_ENABLED and settings.AWX_FACT_CACHE_LOG_CHANGES and 'system_tracking' in settings.LOG_AGGREGATOR_LOGGERS
+
+
 @log_excess_runtime(
     logger,
     debug_cutoff=0.01,
@@ -95,45 +151,56 @@ def finish_fact_cache(hosts, destination, facts_write_time, log_data, job_id=Non
     if isinstance(hosts, QuerySet):
         hosts = hosts.iterator()
 
-    hosts_to_update = []
-    for host in hosts:
-        filepath = os.sep.join(map(str, [destination, host.name]))
-        if not os.path.realpath(filepath).startswith(destination):
-            system_tracking_logger.error('facts for host {} could not be cached'.format(smart_str(host.name)))
-            continue
-        if os.path.exists(filepath):
-            # If the file changed since we wrote the last facts file, pre-playbook run...
-            modified = os.path.getmtime(filepath)
-            if (not facts_write_time) or modified > facts_write_time:
-                with codecs.open(filepath, 'r', encoding='utf-8') as f:
-                    try:
-                        ansible_facts = json.load(f)
-                    except ValueError:
-                        continue
+    log_changes = _log_fact_changes()
+    inventory_names = {}
+
+    def inventory_name(host):
+        if host.inventory_id not in inventory_names:
+            inventory_names[host.inventory_id] = host.inventory.name
+        return inventory_names[host.inventory_id]
+
+    with ThreadPoolExecutor(max_workers=settings.AWX_FACT_CACHE_IO_WORKERS) as executor:
+        for chunk in _chunked(hosts, settings.AWX_FACT_CACHE_BATCH_SIZE):
+            to_read = []
+            for host in chunk:
+                filepath = _fact_cache_filepath(destination, host)
+                if filepath:
+                    to_read.append((host, filepath))
+            results = executor.map(_read_host_facts, [(filepath, facts_write_time) for host, filepath in to_read])
+
+            hosts_to_update = []
+            for (host, filepath), (status, ansible_facts) in zip(to_read, results):
+                if status == 'invalid':
+                    continue
+                if status == 'unmodified':
+                    log_data['unmodified_ct'] += 1
+                    continue
+                # facts that were gathered again but came out the same are not assigned, only
+                # when that happened is recorded and HostFacts.save_facts skips writing them
+                unchanged = HostFacts.hash_facts(ansible_facts) == host.ansible_facts_hash
+                if not unchanged:
                     host.ansible_facts = ansible_facts
-                    host.ansible_facts_modified = now()
-                    hosts_to_update.append(host)
+                host.ansible_facts_modified = now()
+                hosts_to_update.append(host)
+                if status == 'cleared':
+                    if log_changes:
+                        system_tracking_logger.info('Facts cleared for inventory {} host {}'.format(smart_str(inventory_name(host)), smart_str(host.name)))
+                    log_data['cleared_ct'] += 1
+                    continue
+                if unchanged:
+                    log_data['unmodified_ct'] += 1
+                    continue
+                if log_changes:
                     system_tracking_logger.info(
-                        'New fact for inventory {} host {}'.format(smart_str(host.inventory.name), smart_str(host.name)),
+                        'New fact for inventory {} host {}'.format(smart_str(inventory_name(host)), smart_str(host.name)),
                         extra=dict(
-                            inventory_id=host.inventory.id,
+                            inventory_id=host.inventory_id,
                             host_name=host.name,
                             ansible_facts=host.ansible_facts,
                             ansible_facts_modified=host.ansible_facts_modified.isoformat(),
                             job_id=job_id,
                         ),
                     )
-                    log_data['updated_ct'] += 1
-            else:
-                log_data['unmodified_ct'] += 1
-        else:
-            # if the file goes missing, ansible removed it (likely via clear_facts)
-            host.ansible_facts = {}
-            host.ansible_facts_modified = now()
-            hosts_to_update.append(host)
-            system_tracking_logger.info('Facts cleared for inventory {} host {}'.format(smart_str(host.inventory.name), smart_str(host.name)))
-            log_data['cleared_ct'] += 1
-        if len(hosts_to_update) > 100:
-            update_hosts(hosts_to_update)
-            hosts_to_update = []
-    update_hosts(hosts_to_update)
+                log_data['updated_ct'] += 1
+            if hosts_to_update:
+                update_hosts(hosts_to_update)
@@ -65,6 +65,7 @@ from awx.main.tasks.callback import (
 from awx.main.tasks.signals import with_signal_handling, signal_callback
 from awx.main.tasks.receptor import AWXReceptorJob
 from awx.main.tasks.facts import start_fact_cache, finish_fact_cache
+from awx.main.tasks.project_snapshots import copy_from_snapshot, prune_snapshots
 from awx.main.exceptions import AwxTaskError, PostRunError, ReceptorNodeNotFound
 from awx.main.utils.ansible import read_ansible_config
 from awx.main.utils.execution_environments import CONTAINER_ROOT, to_container_path
@@ -374,7 +375,7 @@ class BaseTask(object):
         os.close(self.lock_fd)
         self.lock_fd = None
 
-    def acquire_lock(self, project, unified_job_id=None):
+    def acquire_lock(self, project, unified_job_id=None, shared=False):
         if not os.path.exists(settings.PROJECTS_ROOT):
             os.mkdir(settings.PROJECTS_ROOT)
 
@@ -396,7 +397,7 @@ class BaseTask(object):
         start_time = time.time()
         while True:
             try:
-                fcntl.lockf(self.lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                fcntl.lockf(self.lock_fd, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
                 break
             except IOError as e:
                 if e.errno not in (errno.EAGAIN, errno.EACCES):
@@ -769,7 +770,32 @@ class SourceControlMixin(BaseTask):
             # Project update does not copy the folder, so copy here
             RunProjectUpdate.make_local_copy(project, private_data_dir)
 
+    def copy_from_snapshot_with_shared_lock(self, project, private_data_dir, scm_branch=None):
+        """
+        Fast path for jobs running the current revision of a project, returns
+        True if the project content was linked from a snapshot.
+
+        Only a shared lock is taken, so many jobs using the same revision
+        prepare their private data dirs at the same time. If a project sync is
+        needed the caller has to go through the exclusive lock instead.
+        """
+        if not settings.AWX_PROJECT_SNAPSHOTS_ENABLED:
+            return False
+        if (not project.scm_type) or (not project.scm_revision) or (scm_branch and scm_branch != project.scm_branch):
+            return False
+        self.acquire_lock(project, self.instance.id, shared=True)
+        try:
+            if project.get_reason_if_failed() or self.get_sync_needs(project, scm_branch=scm_branch):
+                return False
+            self.instance = self.update_model(self.instance.pk, scm_revision=project.scm_revision)
+            copy_from_snapshot(project, private_data_dir)
+            return True
+        finally:
+            self.release_lock(project)
+
     def sync_and_copy(self, project, private_data_dir, scm_branch=None):
+        if self.copy_from_snapshot_with_shared_lock(project, private_data_dir, scm_branch=scm_branch):
+            return
         self.acquire_lock(project, self.instance.id)
         is_commit = False
         try:
@@ -1408,11 +1434,18 @@ class RunProjectUpdate(BaseTask):
                     logger.debug('{0} wrote to cache at {1}'.format(instance.log_format, cache_path))
             elif os.path.exists(stage_path):
                 shutil.rmtree(stage_path)  # cannot trust content update produced
+            if status == 'successful':
+                # snapshots of older revisions are only kept around for jobs still launching with them
+                prune_snapshots(instance.get_project_path(check_if_exists=False))
 
             if self.job_private_data_dir:
                 if status == 'successful':
                     # copy project folder before resetting to default branch
-                    self.make_local_copy(instance, self.job_private_data_dir)
+                    if settings.AWX_PROJECT_SNAPSHOTS_ENABLED and instance.scm_revision and (not instance.branch_override):
+                        # later jobs on this revision can then be prepared under the shared lock
+                        copy_from_snapshot(instance, self.job_private_data_dir)
+                    else:
+                        self.make_local_copy(instance, self.job_private_data_dir)
         finally:
             if instance.launch_type != 'sync':
                 self.release_lock(instance.project)
@@ -1555,7 +1588,7 @@ class RunInventoryUpdate(SourceControlMixin, BaseTask):
                 args.append(to_container_path(source_inv_path, private_data_dir))
                 # Include any facts from input inventories so they can be used in filters
                 start_fact_cache(
-                    input_inventory.hosts.only(*HOST_FACTS_FIELDS),
+                    input_inventory.hosts.select_related('host_facts').only(*HOST_FACTS_FIELDS),
                     os.path.join(private_data_dir, 'artifacts', str(inventory_update.id), 'fact_cache'),
                     inventory_id=input_inventory.id,
                 )
@@ -1644,8 +1677,11 @@ class RunInventoryUpdate(SourceControlMixin, BaseTask):
         inventory_update.refresh_from_db()
         private_data_dir = inventory_update.job_env['AWX_PRIVATE_DATA_DIR']
         expected_output = os.path.join(private_data_dir, 'artifacts', str(inventory_update.id), 'output.json')
-        with open(expected_output) as f:
-            data = json.load(f)
+
+        from awx.main.management.commands.inventory_import import Command as InventoryImportCommand, load_inventory_json
+
+        # large outputs are streamed from the file by the import rather than loaded here
+        data = load_inventory_json(expected_output)
 
         # build inventory save options
         options = dict(
@@ -1690,8 +1726,6 @@ class RunInventoryUpdate(SourceControlMixin, BaseTask):
         handler.formatter = formatter
         inv_logger.handlers[0] = handler
 
-        from awx.main.management.commands.inventory_import import Command as InventoryImportCommand
-
         cmd = InventoryImportCommand()
         try:
             # save the inventory data to database.
@@ -0,0 +1,190 @@
+import errno
+import fcntl
+import logging
+import os
+import shutil
+import tempfile
+
+# Django
+from django.conf import settings
+
+
+logger = logging.getLogger('awx.main.tasks.project_snapshots')
+
+# ioctl number from linux/fs.h, not exposed by the fcntl module before python 3.12
+FICLONE = getattr(fcntl, 'FICLONE', 0x40049409)
+
+# errors meaning the filesystem (or the pair of filesystems) can not do this kind of link
+UNSUPPORTED_ERRNOS = (errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS, errno.EPERM)
+
+SNAPSHOT_SUBFOLDERS = ('requirements_collections', 'requirements_roles')
+
+
+def get_snapshots_root(project_path):
+    return os.path.join(os.path.dirname(project_path), '.__awx_snapshots', os.path.basename(project_path))
+
+
+def get_snapshot_path(project):
+    """
+    Snapshots are keyed by the revision of the source tree and the id of the
+    roles and collections cache, the content for a key never changes.
+
+    :param object project: Either a project or a project update
+    """
+    project_path = project.get_project_path(check_if_exists=False)
+    return os.path.join(get_snapshots_root(project_path), '{0}_{1}'.format(project.scm_revision, project.cache_id))
+
+
+class TreeLinker(object):
+    """
+    Copies files by reflinking them where the filesystem supports it, by
+    hardlinking them if allowed, and by copying their content otherwise.
+    Once a method fails because it is not supported it is not tried again.
+    """
+
+    def __init__(self, hardlinks=False):
+        self.reflinks = True
+        self.hardlinks = hardlinks
+        self.counts = {'reflink': 0, 'hardlink': 0, 'copy': 0}
+
+    def reflink(self, src, dst):
+        with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+        shutil.copystat(src, dst)
+
+    def link_file(self, src, dst):
+        if self.reflinks:
+            try:
+                self.reflink(src, dst)
+                self.counts['reflink'] += 1
+                return dst
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRNOS:
+                    raise
+                self.reflinks = False
+                logger.debug(f'Reflinks not supported for {dst}, falling back: {e}')
+        if self.hardlinks:
+            try:
+                if os.path.lexists(dst):
+                    os.remove(dst)
+                os.link(src, dst)
+                self.counts['hardlink'] += 1
+                return dst
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRNOS + (errno.EMLINK,):
+                    raise
+                self.hardlinks = False
+                logger.debug(f'Hardlinks not supported for {dst}, falling back: {e}')
+        shutil.copy2(src, dst)
+        self.counts['copy'] += 1
+        return dst
+
+    def link_tree(self, src, dst, ignore=None):
+        return shutil.copytree(src, dst, ignore=ignore, symlinks=True, copy_function=self.link_file)
+
+
+def create_snapshot(project, snapshot_path):
+    """
+    Materialize the source tree and the roles and collections cache of the
+    project into snapshot_path. The snapshot is built in a temporary folder
+    and renamed into place, so jobs racing to create the same snapshot all
+    end up using a complete one.
+    """
+    project_path = project.get_project_path(check_if_exists=False)
+    cache_path = os.path.join(project.get_cache_path(), project.cache_id)
+    snapshots_root = os.path.dirname(snapshot_path)
+    os.makedirs(snapshots_root, exist_ok=True)
+
+    # the source tree is mutated in place by project updates, so it is never hardlinked
+    linker = TreeLinker(hardlinks=False)
+    tmp_path = tempfile.mkdtemp(prefix='.~~tmp~~', dir=snapshots_root)
+    try:
+        linker.link_tree(project_path, os.path.join(tmp_path, 'project'), ignore=shutil.ignore_patterns('.git'))
+        for subfolder in SNAPSHOT_SUBFOLDERS:
+            cache_subpath = os.path.join(cache_path, subfolder)
+            if os.path.exists(cache_subpath):
+                linker.link_tree(cache_subpath, os.path.join(tmp_path, subfolder))
+        try:
+            os.rename(tmp_path, snapshot_path)
+        except OSError as e:
+            if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+                raise
+            logger.debug(f'Snapshot {snapshot_path} was created by another job')
+    finally:
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path, ignore_errors=True)
+    logger.debug('Created project snapshot {0} ({1})'.format(snapshot_path, ', '.join(f'{k}: {v}' for k, v in linker.counts.items())))
+
+
+def copy_from_snapshot(project, job_private_data_dir):
+    """Link the snapshot of the project content (source tree, roles and
+    collections) for the current revision into a job private_data_dir,
+    creating the snapshot first if needed.
+
+    The caller must hold at least a shared lock on the project, which keeps
+    project updates from changing the source tree while it is read.
+
+    :param object project: Either a project or a project update
+    :param str job_private_data_dir: The root of the target ansible-runner folder
+    """
+    snapshot_path = get_snapshot_path(project)
+    if not os.path.exists(snapshot_path):
+        create_snapshot(project, snapshot_path)
+    else:
+        # keep track of use, pruning keeps the most recently used snapshots
+        os.utime(snapshot_path)
+
+    subfolders = ['project']
+    if settings.AWX_COLLECTIONS_ENABLED:
+        subfolders.append('requirements_collections')
+    if settings.AWX_ROLES_ENABLED:
+        subfolders.append('requirements_roles')
+
+    linker = TreeLinker(hardlinks=settings.AWX_PROJECT_SNAPSHOT_HARDLINKS)
+    for subfolder in subfolders:
+        snapshot_subpath = os.path.join(snapshot_path, subfolder)
+        if os.path.exists(snapshot_subpath):
+            linker.link_tree(snapshot_subpath, os.path.join(job_private_data_dir, subfolder))
+    logger.debug(
+        '{0} {1} prepared {2} from snapshot {3} ({4})'.format(
+            type(project).__name__, project.pk, job_private_data_dir, snapshot_path, ', '.join(f'{k}: {v}' for k, v in linker.counts.items())
+        )
+    )
+
+
+def prune_snapshots(project_path, keep=None):
+    """
+    Remove all but the most recently used snapshots of a project, the caller
+    must hold the exclusive lock on the project.
+    """
+    if keep is None:
+        keep = settings.AWX_PROJECT_SNAPSHOTS_KEEP
+    snapshots_root = get_snapshots_root(project_path)
+    if not os.path.isdir(snapshots_root):
+        return
+    snapshots = []
+    for entry in os.listdir(snapshots_root):
+        path = os.path.join(snapshots_root, entry)
+        if entry.startswith('.~~'):
+            # left behind by an interrupted create or delete, nobody else can be using it
+            shutil.rmtree(path, ignore_errors=True)
+            continue
+        try:
+            snapshots.append((os.stat(path).st_mtime, path))
+        except OSError:
+            continue
+    snapshots.sort(reverse=True)
+    for mtime, path in snapshots[max(keep, 0) :]:
+        # same as clear_project_cache, rename first so a partial delete is never used
+        delete_path = os.path.join(snapshots_root, '.~~delete~~' + os.path.basename(path))
+        try:
+            os.rename(path, delete_path)
+            shutil.rmtree(delete_path)
+        except OSError:
+            logger.warning(f'Could not remove project snapshot {path}')
+
+
+def delete_snapshots(project_path):
+    snapshots_root = get_snapshots_root(project_path)
+    if os.path.exists(snapshots_root):
+        shutil.rmtree(snapshots_root, ignore_errors=True)
@@ -3,6 +3,9 @@ from base64 import b64encode
 from collections import namedtuple
 import concurrent.futures
 from enum import Enum
+import functools
+import io
+import json
 import logging
 import os
 import shutil
@@ -27,10 +30,12 @@ from awx.main.utils.common import (
 )
 from awx.main.constants import MAX_ISOLATED_PATH_COLON_DELIMITER
 from awx.main.tasks.signals import signal_state, signal_callback, SignalExit
+from awx.main.tasks.callback import EventPipeline
 from awx.main.models import Instance, InstanceLink, UnifiedJob, ReceptorAddress
 from awx.main.dispatch import get_task_queuename
 from awx.main.dispatch.publish import task
 from awx.main.utils.pglock import advisory_lock
+from awx.main.utils.receptor_payload import PAYLOAD_CACHE_WORKTYPE, build_manifest, manifest_digests, write_payload
 
 # Receptorctl
 from receptorctl.socket_interface import ReceptorControl
@@ -226,9 +231,9 @@ class RemoteJobError(RuntimeError):
     pass
 
 
-def run_until_complete(node, timing_data=None, **kwargs):
+def run_until_complete(node, timing_data=None, timeout=20.0, worktype='ansible-runner', **kwargs):
     """
-    Runs an ansible-runner work_type on remote node, waits until it completes, then returns stdout.
+    Runs an ansible-runner (by default) work_type on remote node, waits until it completes, then returns stdout.
     """
     config_data = read_receptor_config()
     receptor_ctl = get_receptor_ctl(config_data)
@@ -241,7 +246,7 @@ def run_until_complete(node, timing_data=None, **kwargs):
         kwargs['signwork'] = True
 
     transmit_start = time.time()
-    result = receptor_ctl.submit_work(worktype='ansible-runner', node=node, **kwargs)
+    result = receptor_ctl.submit_work(worktype=worktype, node=node, **kwargs)
 
     unit_id = result['unitid']
     run_start = time.time()
@@ -254,7 +259,7 @@ def run_until_complete(node, timing_data=None, **kwargs):
     try:
         resultfile = receptor_ctl.get_work_results(unit_id)
 
-        while run_timing < 20.0:
+        while run_timing < timeout:
             status = receptor_ctl.simple_command(f'work status {unit_id}')
             state_name = status.get('StateName')
             if state_name not in RECEPTOR_ACTIVE_STATES:
@@ -311,12 +316,12 @@ def run_until_complete(node, timing_data=None, **kwargs):
     return stdout
 
 
-def worker_info(node_name, work_type='ansible-runner'):
+def worker_info(node_name, work_type='ansible-runner', timeout=20.0):
     error_list = []
     data = {'errors': error_list, 'transmit_timing': 0.0}
 
     try:
-        stdout = run_until_complete(node=node_name, timing_data=data, params={"params": "--worker-info"})
+        stdout = run_until_complete(node=node_name, timing_data=data, timeout=timeout, params={"params": "--worker-info"})
 
         yaml_stdout = stdout.strip()
         remote_data = {}
@@ -351,6 +356,42 @@ def worker_info(node_name, work_type='ansible-runner'):
     return data
 
 
+def worker_info_many(node_names, timeout=None, max_workers=None):
+    """
+    Run worker_info against many nodes at once, returns a dict of node name to data.
+
+    Every node is probed from its own thread with its own receptor control connection.
+    Nodes that have not answered within the timeout (plus some slack for finding the
+    node in the mesh) are reported with an error instead of holding up the rest.
+    """
+    node_names = list(dict.fromkeys(node_names))
+    if not node_names:
+        return {}
+    if timeout is None:
+        timeout = settings.EXECUTION_NODE_HEALTH_CHECK_TIMEOUT
+    if max_workers is None:
+        max_workers = settings.EXECUTION_NODE_HEALTH_CHECK_CONCURRENCY
+    max_workers = max(min(max_workers, len(node_names)), 1)
+
+    results = {}
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='worker_info')
+    try:
+        futures = {executor.submit(worker_info, node_name, timeout=timeout): node_name for node_name in node_names}
+        # every thread gets the full timeout, queued nodes wait for a free thread first
+        deadline = (timeout + 10.0) * -(-len(node_names) // max_workers)
+        done, not_done = concurrent.futures.wait(futures, timeout=deadline)
+        for future in done:
+            results[futures[future]] = future.result()
+        for future in not_done:
+            node_name = futures[future]
+            future.cancel()
+            results[node_name] = {'errors': [f'Health check of {node_name} did not complete within {deadline} seconds'], 'transmit_timing': 0.0}
+    finally:
+        # do not wait on threads stuck talking to unresponsive nodes
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
 def _convert_args_to_cli(vargs):
     """
     For the ansible-runner worker cleanup command
@@ -380,6 +421,14 @@ def worker_cleanup(node_name, vargs, timeout=300.0):
     return stdout
 
 
+def payload_cache_missing(node_name, digests):
+    """
+    Ask the payload cache of an execution node which of the given blobs it does not hold.
+    """
+    stdout = run_until_complete(node=node_name, worktype=PAYLOAD_CACHE_WORKTYPE, params={"params": "query"}, payload=json.dumps(digests))
+    return json.loads(stdout)['missing']
+
+
 class AWXReceptorJob:
     def __init__(self, task, runner_params=None):
         self.task = task
@@ -423,8 +472,15 @@ class AWXReceptorJob:
             use_stream_tls = get_conn_type(work_submit_kw['node'], receptor_ctl).name == "STREAMTLS"
             work_submit_kw['tlsclient'] = get_tls_client(self.config_data, use_stream_tls)
 
+        transmit = self.transmit
+        if self.work_type == 'ansible-runner' and settings.AWX_RECEPTOR_PAYLOAD_CACHE_ENABLED:
+            cached_transmit = self.prepare_cached_transmit(work_submit_kw['node'])
+            if cached_transmit is not None:
+                transmit = cached_transmit
+                work_submit_kw.update(worktype=PAYLOAD_CACHE_WORKTYPE, params=self.payload_cache_params)
+
         with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
-            transmitter_future = executor.submit(self.transmit, sockin)
+            transmitter_future = executor.submit(transmit, sockin)
 
             # submit our work, passing in the right side of our socketpair for reading.
             result = receptor_ctl.submit_work(payload=sockout.makefile('rb'), **work_submit_kw)
@@ -541,18 +597,52 @@ class AWXReceptorJob:
             # Socket must be shutdown here, or the reader will hang forever.
             _socket.shutdown(socket.SHUT_WR)
 
+    def prepare_cached_transmit(self, node):
+        """
+        Find out which blobs of the project and its roles and collections the
+        payload cache of the execution node is missing, so only those are sent.
+        Returns None when the cache can not be used, the full payload is sent then.
+        """
+        private_data_dir = self.runner_params['private_data_dir']
+        # the transmitter writes the artifacts given as arguments into the private data dir, so this goes first
+        kwargs_stream = io.BytesIO()
+        ansible_runner.interface.run(streamer='transmit', _output=kwargs_stream, **dict(self.runner_params, only_transmit_kwargs=True))
+        kwargs_line = kwargs_stream.getvalue().split(b'\n', 1)[0]
+        manifest = build_manifest(private_data_dir)
+        digests = manifest_digests(manifest)
+        try:
+            missing = payload_cache_missing(node, digests)
+        except Exception:
+            logger.exception(f'Could not query the payload cache of {node}, sending the full payload of {self.task.instance.log_format}')
+            return None
+        logger.debug(f'Payload cache of {node} has {len(digests) - len(missing)} of {len(digests)} blobs for {self.task.instance.log_format}')
+        return functools.partial(self.transmit_cached, manifest=manifest, missing=missing, kwargs_line=kwargs_line)
+
+    @cleanup_new_process
+    def transmit_cached(self, _socket, manifest, missing, kwargs_line):
+        try:
+            write_payload(_socket.makefile('wb'), self.runner_params['private_data_dir'], manifest, missing, kwargs_line)
+        finally:
+            # Socket must be shutdown here, or the reader will hang forever.
+            _socket.shutdown(socket.SHUT_WR)
+
     @cleanup_new_process
     def processor(self, resultfile):
-        return ansible_runner.interface.run(
-            streamer='process',
-            quiet=True,
-            _input=resultfile,
-            event_handler=self.task.runner_callback.event_handler,
-            finished_callback=self.task.runner_callback.finished_callback,
-            status_handler=self.task.runner_callback.status_handler,
-            artifacts_handler=self.task.runner_callback.artifacts_handler,
-            **self.runner_params,
-        )
+        pipeline = EventPipeline(self.task.runner_callback).start()
+        try:
+            return ansible_runner.interface.run(
+                streamer='process',
+                quiet=True,
+                _input=resultfile,
+                event_handler=pipeline.event_handler,
+                finished_callback=pipeline.finished_callback,
+                status_handler=self.task.runner_callback.status_handler,
+                artifacts_handler=self.task.runner_callback.artifacts_handler,
+                **self.runner_params,
+            )
+        finally:
+            # stops the pipeline threads if reading the stream failed
+            pipeline.close()
 
     @property
     def receptor_params(self):
@@ -579,6 +669,11 @@ class AWXReceptorJob:
 
         return receptor_params
 
+    @property
+    def payload_cache_params(self):
+        params = self.receptor_params['params']
+        return {"params": f"worker {params} --max-size={settings.AWX_RECEPTOR_PAYLOAD_CACHE_MAX_SIZE}"}
+
     @property
     def sign_work(self):
         if self.work_type in ('ansible-runner', 'local'):
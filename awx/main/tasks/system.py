@@ -1,5 +1,6 @@
 # Python
 from collections import namedtuple
+import copy
 import functools
 import importlib
 import itertools
@@ -7,6 +8,7 @@ import json
 import logging
 import os
 import psycopg
+import redis
 from io import StringIO
 from contextlib import redirect_stdout
 import shutil
@@ -17,6 +19,7 @@ from datetime import datetime
 # Django
 from django.conf import settings
 from django.db import connection, transaction, DatabaseError, IntegrityError
+from django.db.models import Q
 from django.db.models.fields.related import ForeignKey
 from django.utils.timezone import now, timedelta
 from django.utils.encoding import smart_str
@@ -40,6 +43,7 @@ from dateutil.parser import parse as parse_date
 from awx import __version__ as awx_application_version
 from awx.main.access import access_registry
 from awx.main.models import (
+    ActivityStream,
     Schedule,
     TowerScheduleState,
     Instance,
@@ -47,6 +51,7 @@ from awx.main.models import (
     UnifiedJob,
     Notification,
     Inventory,
+    Host,
     SmartInventoryMembership,
     Job,
     convert_jsonfields,
@@ -59,7 +64,9 @@ from awx.main.utils.common import ignore_inventory_computed_fields, ignore_inven
 from awx.main.utils.reload import stop_local_services
 from awx.main.utils.pglock import advisory_lock
 from awx.main.tasks.helpers import is_run_threshold_reached
-from awx.main.tasks.receptor import get_receptor_ctl, worker_info, worker_cleanup, administrative_workunit_reaper, write_receptor_config
+from awx.main.tasks.project_snapshots import delete_snapshots
+from awx.main.notifications.delivery import deliver_notifications
+from awx.main.tasks.receptor import get_receptor_ctl, worker_info, worker_info_many, worker_cleanup, administrative_workunit_reaper, write_receptor_config
 from awx.main.consumers import emit_channel_notification
 from awx.main import analytics
 from awx.conf import settings_registry
@@ -318,6 +325,7 @@ def delete_project_files(project_path):
             logger.debug('Success removing {}'.format(lock_file))
         except Exception:
             logger.exception('Could not remove lock file {}'.format(lock_file))
+    delete_snapshots(project_path)
 
 
 @task(queue='tower_broadcast_all')
@@ -332,33 +340,38 @@ def profile_sql(threshold=1, minutes=1):
 
 @task(queue=get_task_queuename)
 def send_notifications(notification_list, job_id=None):
+    from awx.main.signals import record_update_activity  # circular import
+
     if not isinstance(notification_list, list):
         raise TypeError("notification_list should be of type list")
     if job_id is not None:
         job_actual = UnifiedJob.objects.get(id=job_id)
 
-    notifications = Notification.objects.filter(id__in=notification_list)
+    notifications = list(Notification.objects.filter(id__in=notification_list).select_related('notification_template'))
     if job_id is not None:
         job_actual.notifications.add(*notifications)
 
-    for notification in notifications:
-        update_fields = ['status', 'notifications_sent']
-        try:
-            sent = notification.notification_template.send(notification.subject, notification.body)
+    results = deliver_notifications([(notification.notification_template, notification.subject, notification.body) for notification in notifications])
+    changed = []
+    modified = now()
+    for notification, (sent, error) in zip(notifications, results):
+        changed.append((copy.copy(notification), notification))
+        # bulk_update does not bump modified like save does
+        notification.modified = modified
+        if error is None:
             notification.status = "successful"
             notification.notifications_sent = sent
             if job_id is not None:
                 job_actual.log_lifecycle("notifications_sent")
-        except Exception as e:
-            logger.exception("Send Notification Failed {}".format(e))
+        else:
+            logger.error("Send Notification Failed {}".format(error), exc_info=error)
             notification.status = "failed"
-            notification.error = smart_str(e)
-            update_fields.append('error')
-        finally:
-            try:
-                notification.save(update_fields=update_fields)
-            except Exception:
-                logger.exception('Error saving notification {} result.'.format(notification.id))
+            notification.error = smart_str(error)
+    try:
+        Notification.objects.bulk_update(notifications, ['status', 'notifications_sent', 'error', 'modified'])
+        record_update_activity(changed)
+    except Exception:
+        logger.exception('Error saving notification results {}.'.format([notification.id for notification in notifications]))
 
 
 @task(queue=get_task_queuename)
@@ -415,6 +428,15 @@ def handle_removed_image(remove_images=None):
     _cleanup_images_and_files(remove_images=remove_images, file_pattern='')
 
 
+@task(queue=get_task_queuename)
+def emit_activity_stream_changes(entry_ids):
+    """Send activity stream entries recorded by a request or job to external logging"""
+    from awx.main.signals import emit_activity_stream_change  # circular import
+
+    for entry in ActivityStream.objects.filter(pk__in=entry_ids).select_related('actor').order_by('pk'):
+        emit_activity_stream_change(entry)
+
+
 @task(queue=get_task_queuename)
 def cleanup_images_and_files():
     _cleanup_images_and_files(image_prune=True)
@@ -439,34 +461,30 @@ def cluster_node_health_check(node):
     this_inst.local_health_check()
 
 
-@task(queue=get_task_queuename)
-def execution_node_health_check(node):
-    if node == '':
-        logger.warning('Remote health check incorrectly called with blank string')
-        return
-    try:
-        instance = Instance.objects.get(hostname=node)
-    except Instance.DoesNotExist:
-        logger.warning(f'Instance record for {node} missing, could not check capacity.')
-        return
-
+def _health_checkable_execution_node(instance):
     if instance.node_type != 'execution':
         logger.warning(f'Execution node health check ran against {instance.node_type} node {instance.hostname}')
-        return
+        return False
 
     if instance.node_state not in (Instance.States.READY, Instance.States.UNAVAILABLE, Instance.States.INSTALLED):
         logger.warning(f"Execution node health check ran against node {instance.hostname} in state {instance.node_state}")
-        return
+        return False
+    return True
 
-    data = worker_info(node)
 
+def _record_execution_node_health(instance, data, perform_save=True):
+    """
+    Apply worker info data collected from an execution node to its instance, returns the fields changed
+    """
+    node = instance.hostname
     prior_capacity = instance.capacity
-    instance.save_health_data(
+    update_fields = instance.save_health_data(
         version='ansible-runner-' + data.get('runner_version', '???'),
         cpu=data.get('cpu_count', 0),
         memory=data.get('mem_in_bytes', 0),
         uuid=data.get('uuid'),
         errors='\n'.join(data.get('errors', [])),
+        perform_save=perform_save,
     )
 
     if data['errors']:
@@ -477,10 +495,57 @@ def execution_node_health_check(node):
             logger.info(f'Failed to find capacity of new or lost execution node {node}, errors:\n{formatted_error}')
     else:
         logger.info('Set capacity of execution node {} to {}, worker info data:\n{}'.format(node, instance.capacity, json.dumps(data, indent=2)))
+    return update_fields
+
+
+@task(queue=get_task_queuename)
+def execution_node_health_check(node):
+    if node == '':
+        logger.warning('Remote health check incorrectly called with blank string')
+        return
+    try:
+        instance = Instance.objects.get(hostname=node)
+    except Instance.DoesNotExist:
+        logger.warning(f'Instance record for {node} missing, could not check capacity.')
+        return
+
+    if not _health_checkable_execution_node(instance):
+        return
+
+    data = worker_info(node)
+    _record_execution_node_health(instance, data)
 
     return data
 
 
+@task(queue=get_task_queuename)
+def execution_node_health_checks(nodes):
+    """
+    Health check a batch of execution nodes concurrently, see worker_info_many,
+    then save the results of all nodes in a single bulk update.
+    """
+    nodes = [node for node in nodes if node]
+    hostnames = [inst.hostname for inst in Instance.objects.filter(hostname__in=nodes) if _health_checkable_execution_node(inst)]
+    for node in set(nodes) - set(hostnames):
+        logger.debug(f'Skipping health check of {node}')
+    if not hostnames:
+        return {}
+
+    results = worker_info_many(hostnames)
+
+    # probing can take a while, apply the results to fresh copies of the records
+    update_fields = set()
+    instances = []
+    for instance in Instance.objects.filter(hostname__in=list(results)):
+        if not _health_checkable_execution_node(instance):
+            continue
+        update_fields.update(_record_execution_node_health(instance, results[instance.hostname], perform_save=False))
+        instances.append(instance)
+    if instances:
+        Instance.objects.bulk_update(instances, sorted(update_fields))
+    return results
+
+
 def inspect_established_receptor_connections(mesh_status):
     '''
     Flips link state from ADDING to ESTABLISHED
@@ -514,6 +579,10 @@ def inspect_execution_and_hop_nodes(instance_list):
 
         nowtime = now()
         workers = mesh_status['Advertisements']
+        seen_instances = []
+        rejoined_hops = []
+        hop_fields = set()
+        health_check_nodes = []
 
         for ad in workers:
             hostname = ad['NodeID']
@@ -532,13 +601,14 @@ def inspect_execution_and_hop_nodes(instance_list):
             if instance.last_seen and instance.last_seen >= last_seen:
                 continue
             instance.last_seen = last_seen
-            instance.save(update_fields=['last_seen'])
+            seen_instances.append(instance)
 
             # Only execution nodes should be dealt with by execution_node_health_check
             if instance.node_type == Instance.Types.HOP:
                 if instance.node_state in (Instance.States.UNAVAILABLE, Instance.States.INSTALLED):
                     logger.warning(f'Hop node {hostname}, has rejoined the receptor mesh')
-                    instance.save_health_data(errors='')
+                    hop_fields.update(instance.save_health_data(errors='', perform_save=False))
+                    rejoined_hops.append(instance)
                 continue
 
             if instance.node_state in (Instance.States.UNAVAILABLE, Instance.States.INSTALLED):
@@ -546,14 +616,22 @@ def inspect_execution_and_hop_nodes(instance_list):
                 # attempt to re-establish the initial capacity and version
                 # check
                 logger.warning(f'Execution node attempting to rejoin as instance {hostname}.')
-                execution_node_health_check.apply_async([hostname])
+                health_check_nodes.append(hostname)
             elif instance.capacity == 0 and instance.enabled:
                 # nodes with proven connection but need remediation run health checks are reduced frequency
                 if not instance.last_health_check or (nowtime - instance.last_health_check).total_seconds() >= settings.EXECUTION_NODE_REMEDIATION_CHECKS:
                     # Periodically re-run the health check of errored nodes, in case someone fixed it
                     # TODO: perhaps decrease the frequency of these checks
                     logger.debug(f'Restarting health check for execution node {hostname} with known errors.')
-                    execution_node_health_check.apply_async([hostname])
+                    health_check_nodes.append(hostname)
+
+        if seen_instances:
+            Instance.objects.bulk_update(seen_instances, ['last_seen'])
+        if rejoined_hops:
+            Instance.objects.bulk_update(rejoined_hops, sorted(hop_fields))
+        if health_check_nodes:
+            # probe the nodes concurrently from one worker instead of a task per node
+            execution_node_health_checks.apply_async([health_check_nodes])
 
 
 @task(queue=get_task_queuename, bind_kwargs=['dispatch_time', 'worker_tasks'])
@@ -725,10 +803,11 @@ def awx_periodic_scheduler():
         state.schedule_last_run = run_now
         state.save()
 
-        old_schedules = Schedule.objects.enabled().before(last_run)
-        for schedule in old_schedules:
-            schedule.update_computed_fields()
-        schedules = Schedule.objects.enabled().between(last_run, run_now)
+        old_schedules = Schedule.objects.enabled().before(last_run).only('id', 'rrule', 'enabled', 'next_run', 'dtstart', 'dtend', 'unified_job_template_id')
+        Schedule.bulk_update_computed_fields(old_schedules.iterator())
+        schedules = list(Schedule.objects.enabled().between(last_run, run_now))
+        # To update next_run timestamps, before spawning any jobs
+        Schedule.bulk_update_computed_fields(schedules)
 
         invalid_license = False
         try:
@@ -738,7 +817,6 @@ def awx_periodic_scheduler():
 
         for schedule in schedules:
             template = schedule.unified_job_template
-            schedule.update_computed_fields()  # To update next_run timestamp.
             if template.cache_timeout_blocked:
                 logger.warning("Cache timeout is in the future, bypassing schedule for template %s" % str(template.id))
                 continue
@@ -768,7 +846,7 @@ def awx_periodic_scheduler():
             emit_channel_notification('schedules-changed', dict(id=schedule.id, group_name="schedules"))
 
 
-@task(queue=get_task_queuename)
+@task(queue=get_task_queuename, deduplicate=True)
 def handle_failure_notifications(task_ids):
     """A task-ified version of the method that sends notifications."""
     found_task_ids = set()
@@ -783,7 +861,7 @@ def handle_failure_notifications(task_ids):
         logger.warning(f'Could not send notifications for {deleted_tasks} because they were not found in the database')
 
 
-@task(queue=get_task_queuename)
+@task(queue=get_task_queuename, deduplicate=True)
 def update_inventory_computed_fields(inventory_id):
     """
     Signal handler and wrapper around inventory.update_computed_fields to
@@ -812,38 +890,105 @@ def update_inventory_computed_fields(inventory_id):
         logger.debug('Exiting duplicate update_inventory_computed_fields task.')
 
 
-def update_smart_memberships_for_inventory(smart_inventory):
-    current = set(SmartInventoryMembership.objects.filter(inventory=smart_inventory).values_list('host_id', flat=True))
-    new = set(smart_inventory.hosts.values_list('id', flat=True))
-    additions = new - current
-    removals = current - new
-    if additions or removals:
-        with transaction.atomic():
-            if removals:
-                SmartInventoryMembership.objects.filter(inventory=smart_inventory, host_id__in=removals).delete()
-            if additions:
-                add_for_inventory = [SmartInventoryMembership(inventory_id=smart_inventory.id, host_id=host_id) for host_id in additions]
-                SmartInventoryMembership.objects.bulk_create(add_for_inventory, ignore_conflicts=True)
-        logger.debug(
-            'Smart host membership cached for {}, {} additions, {} removals, {} total count.'.format(
-                smart_inventory.pk, len(additions), len(removals), len(new)
-            )
+SMART_MEMBERSHIP_CHANGED_HOSTS_KEY = 'awx_smart_membership_changed_hosts'
+
+
+def update_smart_memberships_for_inventory(smart_inventory, host_ids=None):
+    """
+    Make the SmartInventoryMembership rows of a smart inventory match its
+    host_filter with one DELETE and one INSERT ... SELECT. With host_ids,
+    only the memberships of those hosts, and of the hosts sharing a name
+    with them since smart inventories keep one host per name, are updated.
+    """
+    hosts = smart_inventory.hosts.all()
+    table = SmartInventoryMembership._meta.db_table
+    restrict_sql, restrict_params = '', []
+    if host_ids is not None:
+        names = Host.objects.filter(id__in=host_ids).values('name')
+        hosts = hosts.filter(name__in=names)
+        affected_sql, affected_params = Host.objects.filter(Q(id__in=host_ids) | Q(name__in=names)).values('id').query.sql_with_params()
+        restrict_sql, restrict_params = f' AND host_id IN ({affected_sql})', list(affected_params)
+    hosts_sql, hosts_params = hosts.values('id').query.sql_with_params()
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {table} WHERE inventory_id = %s{restrict_sql} AND host_id NOT IN ({hosts_sql})',
+            [smart_inventory.id] + restrict_params + list(hosts_params),
+        )
+        removals = cursor.rowcount
+        cursor.execute(
+            f'INSERT INTO {table} (inventory_id, host_id) SELECT %s, smart_hosts.id FROM ({hosts_sql}) AS smart_hosts '
+            f'EXCEPT SELECT inventory_id, host_id FROM {table} WHERE inventory_id = %s ON CONFLICT DO NOTHING',
+            [smart_inventory.id] + list(hosts_params) + [smart_inventory.id],
         )
+        additions = cursor.rowcount
+    if additions or removals:
+        logger.debug('Smart host membership cached for {}, {} additions, {} removals.'.format(smart_inventory.pk, additions, removals))
         return True  # changed
     return False
 
 
+def schedule_smart_membership_update(host_ids):
+    """
+    Update the smart inventory memberships of the given hosts once the
+    current transaction commits. The host ids are collected in redis, the
+    task dispatched here handles all of the hosts changed since its last run.
+    """
+    if not settings.AWX_REBUILD_SMART_MEMBERSHIP:
+        return
+
+    def on_commit():
+        ids = [host_id for host_id in host_ids if host_id is not None]
+        if not ids:
+            return
+        try:
+            redis.Redis.from_url(settings.BROKER_URL).sadd(SMART_MEMBERSHIP_CHANGED_HOSTS_KEY, *ids)
+        except redis.exceptions.RedisError:
+            logger.exception('Could not record changed hosts, updating all smart inventory memberships')
+            update_host_smart_inventory_memberships.delay()
+            return
+        update_host_smart_inventory_memberships.delay(changed_hosts=True)
+
+    connection.on_commit(on_commit)
+
+
+def pop_smart_membership_changed_hosts(conn):
+    with conn.pipeline() as pipe:
+        pipe.smembers(SMART_MEMBERSHIP_CHANGED_HOSTS_KEY)
+        pipe.delete(SMART_MEMBERSHIP_CHANGED_HOSTS_KEY)
+        members, deleted = pipe.execute()
+    return sorted(int(member) for member in members)
+
+
 @task(queue=get_task_queuename)
-def update_host_smart_inventory_memberships():
+def update_host_smart_inventory_memberships(smart_inventory_ids=None, changed_hosts=False):
+    """
+    Update the memberships of the given smart inventories, or of all of them.
+    With changed_hosts, only the memberships of hosts changed since the last
+    run are looked at.
+    """
+    host_ids = None
+    if changed_hosts:
+        conn = redis.Redis.from_url(settings.BROKER_URL)
+        host_ids = pop_smart_membership_changed_hosts(conn)
+        if not host_ids:
+            return  # handled by an earlier run
     smart_inventories = Inventory.objects.filter(kind='smart', host_filter__isnull=False, pending_deletion=False)
+    if smart_inventory_ids is not None:
+        smart_inventories = smart_inventories.filter(id__in=smart_inventory_ids)
     changed_inventories = set([])
-    for smart_inventory in smart_inventories:
-        try:
-            changed = update_smart_memberships_for_inventory(smart_inventory)
-            if changed:
-                changed_inventories.add(smart_inventory)
-        except IntegrityError:
-            logger.exception('Failed to update smart inventory memberships for {}'.format(smart_inventory.pk))
+    try:
+        for smart_inventory in smart_inventories:
+            try:
+                changed = update_smart_memberships_for_inventory(smart_inventory, host_ids=host_ids)
+                if changed:
+                    changed_inventories.add(smart_inventory)
+            except IntegrityError:
+                logger.exception('Failed to update smart inventory memberships for {}'.format(smart_inventory.pk))
+    except Exception:
+        if host_ids:
+            # leave the hosts for the next run
+            conn.sadd(SMART_MEMBERSHIP_CHANGED_HOSTS_KEY, *host_ids)
+        raise
     # Update computed fields for changed inventories outside atomic action
     for smart_inventory in changed_inventories:
         smart_inventory.update_computed_fields()
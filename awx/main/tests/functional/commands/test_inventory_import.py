@@ -2,6 +2,7 @@
 # All Rights Reserved
 
 # Python
+import json
 import pytest
 from unittest import mock
 import os
@@ -9,13 +10,15 @@ import yaml
 
 # Django
 from django.core.management.base import CommandError
+from django.db import connection
 
 # for license errors
 from rest_framework.exceptions import PermissionDenied
 
 # AWX
 from awx.main.management.commands import inventory_import
-from awx.main.models import Inventory, Host, Group, InventorySource
+from awx.main.models import ActivityStream, Inventory, Host, Group, InventorySource
+from awx.main.tasks.system import update_smart_memberships_for_inventory
 from awx.main.utils.mem_inventory import MemGroup
 
 
@@ -157,6 +160,146 @@ class TestMigrationCases:
                 assert host.instance_id == ('fooval' if id_var else '')
 
 
+@pytest.mark.django_db
+@pytest.mark.inventory_import
+@mock.patch.object(inventory_import.Command, 'set_logging_level', mock_logging)
+class TestStreamingImport:
+    """The host variables of large inventories are streamed from the JSON file
+    rather than loaded along with the groups, the result should be the same.
+    """
+
+    def test_streamed_import_matches_loaded_import(self, inventory, tmp_path):
+        streamed_inventory = Inventory.objects.create(name='streamed', organization=inventory.organization)
+        path = tmp_path / 'inventory.json'
+        path.write_text(json.dumps(TEST_INVENTORY_CONTENT))
+
+        for inv, data in ((inventory, json.loads(json.dumps(TEST_INVENTORY_CONTENT))), (streamed_inventory, str(path))):
+            inv_src = InventorySource.objects.create(inventory=inv, source='gce')
+            inventory_import.Command().perform_update(dict(overwrite=True), data, inv_src.create_unified_job())
+
+        def summary(inv):
+            hosts = {h.name: h.variables_dict for h in inv.hosts.all()}
+            groups = {
+                g.name: (g.variables_dict, set(g.hosts.values_list('name', flat=True)), set(g.children.values_list('name', flat=True)))
+                for g in inv.groups.all()
+            }
+            return hosts, groups, Inventory.objects.get(pk=inv.pk).variables_dict
+
+        assert inventory.hosts.count() == 10
+        assert summary(streamed_inventory) == summary(inventory)
+
+    def test_streamed_import_updates_hosts(self, inventory, tmp_path):
+        inv_src = InventorySource.objects.create(inventory=inventory, source='gce')
+        options = dict(overwrite=True, instance_id_var='foo.id')
+        path = tmp_path / 'inventory.json'
+        old_id = None
+
+        for host_name in ('host-1', 'host-2'):
+            data = {'_meta': {'hostvars': {host_name: {'foo': {'id': 'fooval'}}}}, 'ungrouped': {'hosts': [host_name]}}
+            path.write_text(json.dumps(data))
+            inventory_import.Command().perform_update(options.copy(), str(path), inv_src.create_unified_job())
+
+            host = inventory.hosts.get()
+            assert host.name == host_name
+            assert host.instance_id == 'fooval'
+            assert host.variables_dict == {'foo': {'id': 'fooval'}}
+            if old_id is not None:
+                assert host.id == old_id
+            old_id = host.id
+
+
+@pytest.mark.django_db
+@pytest.mark.inventory_import
+@mock.patch.object(inventory_import.Command, 'set_logging_level', mock_logging)
+class TestBulkHostWrites:
+    def import_hosts(self, inv_src, hostvars, **options):
+        data = {'_meta': {'hostvars': hostvars}, 'ungrouped': {'hosts': list(hostvars)}}
+        inventory_import.Command().perform_update(dict(overwrite=True, **options), data, inv_src.create_unified_job())
+
+    @pytest.mark.parametrize('bulk', [True, False])
+    def test_create_and_update(self, inventory, settings, bulk):
+        settings.INVENTORY_IMPORT_BULK_HOST_WRITES = bulk
+        inv_src = InventorySource.objects.create(inventory=inventory, source='gce')
+        self.import_hosts(
+            inv_src, {'host-1': {'status': 'up'}, 'host-2': {'status': 'up'}, 'host-3': {'status': 'up'}}, enabled_var='status', enabled_value='up'
+        )
+        pks = dict(inventory.hosts.values_list('name', 'pk'))
+        assert set(inv_src.hosts.values_list('pk', flat=True)) == set(pks.values())
+
+        with mock.patch.object(inventory_import, 'schedule_smart_membership_update') as schedule_smart_membership_update:
+            self.import_hosts(
+                inv_src,
+                {'host-1': {'status': 'up'}, 'host-2': {'status': 'down', 'foo': 'bar'}, 'host-4': {'status': 'up'}},
+                enabled_var='status',
+                enabled_value='up',
+            )
+        hosts = {h.name: h for h in inventory.hosts.all()}
+        if bulk:
+            # the unchanged host-1 is left alone
+            schedule_smart_membership_update.assert_called_once()
+            assert sorted(schedule_smart_membership_update.call_args[0][0]) == sorted([hosts['host-2'].pk, hosts['host-4'].pk])
+        else:
+            schedule_smart_membership_update.assert_not_called()
+        assert set(hosts) == set(['host-1', 'host-2', 'host-4'])
+        assert hosts['host-1'].pk == pks['host-1'] and hosts['host-2'].pk == pks['host-2']
+        assert hosts['host-2'].variables_dict == {'status': 'down', 'foo': 'bar'}
+        assert [h.enabled for h in (hosts['host-1'], hosts['host-2'], hosts['host-4'])] == [True, False, True]
+        assert set(inv_src.hosts.values_list('name', flat=True)) == set(hosts)
+
+    def test_rename(self, inventory, settings):
+        settings.INVENTORY_IMPORT_BULK_HOST_WRITES = True
+        inv_src = InventorySource.objects.create(inventory=inventory, source='gce')
+        self.import_hosts(inv_src, {'host-1': {'foo': {'id': 'a'}}, 'host-2': {'foo': {'id': 'b'}}}, instance_id_var='foo.id')
+        pks = dict(inventory.hosts.values_list('instance_id', 'pk'))
+        # the renamed host keeps its row and a new host takes its old name
+        with mock.patch.object(inventory_import, 'invalidate_named_urls') as invalidate_named_urls:
+            self.import_hosts(inv_src, {'host-1': {'foo': {'id': 'c'}}, 'host-3': {'foo': {'id': 'a'}}}, instance_id_var='foo.id')
+        invalidate_named_urls.assert_called_once_with(Host)
+        assert dict(inventory.hosts.values_list('instance_id', 'name')) == {'a': 'host-3', 'c': 'host-1'}
+        assert inventory.hosts.get(instance_id='a').pk == pks['a']
+
+    def test_smart_inventory_memberships(self, inventory, organization, settings):
+        if connection.vendor != 'postgresql':
+            pytest.skip('smart inventories keep one host per name with DISTINCT ON, postgres only')
+        settings.INVENTORY_IMPORT_BULK_HOST_WRITES = True
+        settings.AWX_REBUILD_SMART_MEMBERSHIP = True
+        smart = Inventory.objects.create(name='enabled', kind='smart', organization=organization, host_filter='enabled=true')
+        inv_src = InventorySource.objects.create(inventory=inventory, source='gce')
+
+        def update_memberships(host_ids):
+            update_smart_memberships_for_inventory(smart, host_ids=host_ids)
+
+        with mock.patch.object(inventory_import, 'schedule_smart_membership_update', side_effect=update_memberships):
+            self.import_hosts(inv_src, {'host-1': {'status': 'up'}, 'host-2': {'status': 'down'}}, enabled_var='status', enabled_value='up')
+            assert set(Host.objects.filter(smart_inventories=smart).values_list('name', flat=True)) == {'host-1'}
+            # host-1 and host-2 are updated in bulk, host-3 is created in bulk
+            self.import_hosts(
+                inv_src, {'host-1': {'status': 'down'}, 'host-2': {'status': 'up'}, 'host-3': {'status': 'up'}}, enabled_var='status', enabled_value='up'
+            )
+        assert set(Host.objects.filter(smart_inventories=smart).values_list('name', flat=True)) == {'host-2', 'host-3'}
+
+    @pytest.mark.parametrize('summarize', [True, False])
+    def test_activity_stream(self, inventory, settings, summarize):
+        settings.ACTIVITY_STREAM_ENABLED_FOR_INVENTORY_SYNC = True
+        settings.INVENTORY_IMPORT_SUMMARIZE_ACTIVITY_STREAM = summarize
+        inv_src = InventorySource.objects.create(inventory=inventory, source='gce')
+        self.import_hosts(inv_src, {'host-1': {}, 'host-2': {}})
+        self.import_hosts(inv_src, {'host-1': {'foo': 'bar'}, 'host-2': {}})
+        host_entries = ActivityStream.objects.filter(object1='host', operation__in=('create', 'update'))
+        if summarize:
+            assert not host_entries.exists()
+            entries = ActivityStream.objects.filter(object1='inventory', inventory=inventory, changes__contains='coalesced_data').order_by('id')
+            assert [json.loads(e.changes)['coalesced_data'] for e in entries] == [
+                {'hosts_created': 2, 'hosts_updated': 0},
+                {'hosts_created': 0, 'hosts_updated': 1},
+            ]
+        else:
+            assert sorted(host_entries.filter(operation='create').values_list('host__name', flat=True)) == ['host-1', 'host-2']
+            update = host_entries.get(operation='update')
+            assert list(update.host.values_list('name', flat=True)) == ['host-1']
+            assert 'variables' in json.loads(update.changes)
+
+
 @pytest.mark.django_db
 @pytest.mark.inventory_import
 @mock.patch.object(inventory_import.Command, 'check_license', mock.MagicMock())
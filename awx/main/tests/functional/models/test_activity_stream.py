@@ -9,7 +9,7 @@ from awx.main.models import ActivityStream, Organization, JobTemplate, Credentia
 # other AWX
 from awx.main.utils import model_to_dict, model_instance_diff
 from awx.main.utils.common import get_allowed_fields
-from awx.main.signals import model_serializer_mapping
+from awx.main.signals import model_serializer_mapping, batch_activity_stream
 
 # Django
 from django.contrib.auth.models import AnonymousUser
@@ -280,3 +280,60 @@ def test_credential_defaults_idempotency():
     CredentialType.setup_tower_managed_defaults()
     assert CredentialType.objects.get(name='Red Hat Ansible Automation Platform', kind='cloud').inputs == old_inputs
     assert ActivityStream.objects.count() == prior_count
+
+
+@pytest.mark.django_db
+class TestBatchedActivityStream:
+    def test_entries_written_at_end_of_batch(self, organization):
+        prior_count = ActivityStream.objects.count()
+        with batch_activity_stream():
+            inv = organization.inventories.create(name='batched-inv')
+            host = inv.hosts.create(name='batched-host')
+            assert ActivityStream.objects.count() == prior_count
+        assert ActivityStream.objects.filter(inventory=inv, operation='create').count() == 1
+        entry = ActivityStream.objects.get(host=host)
+        assert entry.operation == 'create'
+        assert entry.action_node
+
+    def test_object_deleted_in_batch(self, inventory):
+        with batch_activity_stream():
+            host = inventory.hosts.create(name='short-lived')
+            host.delete()
+        entries = ActivityStream.objects.filter(object1='host', changes__icontains='short-lived').order_by('pk')
+        assert [entry.operation for entry in entries] == ['create', 'delete']
+        assert not entries[0].host.exists()
+
+    def test_update_fields_diff(self, organization):
+        organization.description = 'new description'
+        organization.name = 'not saved'
+        organization.save(update_fields=['description'])
+        entry = ActivityStream.objects.filter(organization=organization, operation='update').last()
+        assert set(json.loads(entry.changes)) == {'description'}
+
+    def test_policy_suppresses_entries(self, inventory, settings):
+        settings.ACTIVITY_STREAM_MODEL_POLICY = {'host': {'create': 0}}
+        host = inventory.hosts.create(name='suppressed-host')
+        assert not ActivityStream.objects.filter(host=host).exists()
+        host.description = 'changed'
+        host.save()
+        assert ActivityStream.objects.filter(host=host, operation='update').count() == 1
+
+    def test_external_logging(self, organization, settings, django_capture_on_commit_callbacks):
+        settings.LOG_AGGREGATOR_ENABLED = True
+        settings.LOG_AGGREGATOR_LOGGERS = ['activity_stream']
+        with mock.patch('awx.main.signals.emit_activity_stream_changes') as emit:
+            with django_capture_on_commit_callbacks(execute=True):
+                with batch_activity_stream():
+                    organization.inventories.create(name='inv-1')
+                    organization.inventories.create(name='inv-2')
+        emit.delay.assert_called_once()
+        entry_ids = emit.delay.call_args[0][0]
+        assert len(entry_ids) == 2
+        assert ActivityStream.objects.filter(pk__in=entry_ids, inventory__name__in=['inv-1', 'inv-2']).count() == 2
+
+    def test_no_external_logging(self, organization, settings, django_capture_on_commit_callbacks):
+        settings.LOG_AGGREGATOR_ENABLED = False
+        with mock.patch('awx.main.signals.emit_activity_stream_changes') as emit:
+            with django_capture_on_commit_callbacks(execute=True):
+                organization.inventories.create(name='inv-1')
+        emit.delay.assert_not_called()
@@ -113,6 +113,22 @@ class TestEvents:
                 assert h.last_job_id is None
                 assert h.last_job_host_summary_id is None
 
+    def test_host_summary_generation_second_job(self):
+        self._generate_hosts(10)
+        self._create_job_event(ok=dict((hostname, 1) for hostname in self.hostnames))
+        first_job = self.job
+
+        self.job = Job(inventory=self.inventory)
+        self.job.save()
+        self._create_job_event(ok=dict((hostname, 1) for hostname in self.hostnames[0:5]))
+
+        for h in Host.objects.all():
+            expected_job = self.job if h.name in self.hostnames[0:5] else first_job
+            assert h.last_job_id == expected_job.id
+            assert h.last_job_host_summary == JobHostSummary.objects.get(job=expected_job, host=h)
+        for hm in HostMetric.objects.all():
+            assert hm.automated_counter == (2 if hm.hostname in [h.lower() for h in self.hostnames[0:5]] else 1)
+
     def test_host_metrics_insert(self):
         self._generate_hosts(10)
 
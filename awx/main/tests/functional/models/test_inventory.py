@@ -3,9 +3,12 @@
 import pytest
 from unittest import mock
 
+from django.db import connection
+
 # AWX
-from awx.main.models import Host, Inventory, InventorySource, InventoryUpdate, CredentialType, Credential, Job
+from awx.main.models import Host, Inventory, InventorySource, InventoryUpdate, CredentialType, Credential, Job, SmartInventoryMembership
 from awx.main.constants import CLOUD_PROVIDERS
+from awx.main.tasks.system import update_smart_memberships_for_inventory
 from awx.main.utils.filters import SmartFilter
 
 
@@ -285,3 +288,90 @@ class TestHostManager:
     # 2 organizations with host of same name only has 1 entry in smart inventory
     # smart inventory in 1 organization does not include host from another
     # smart inventory correctly returns hosts in filter in same organization
+
+
+@pytest.mark.django_db
+class TestSmartInventoryMemberships:
+    @pytest.fixture(autouse=True)
+    def postgres_only(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('smart inventories keep one host per name with DISTINCT ON, postgres only')
+
+    @pytest.fixture
+    def inventories(self, organization):
+        return [Inventory.objects.create(name=f'inv{i}', organization=organization) for i in range(2)]
+
+    def smart(self, organization, host_filter):
+        return Inventory.objects.create(name=host_filter, kind='smart', organization=organization, host_filter=host_filter)
+
+    def members(self, smart_inventory):
+        return set(SmartInventoryMembership.objects.filter(inventory=smart_inventory).values_list('host_id', flat=True))
+
+    def test_host_added_deleted_and_facts_changed(self, organization, inventories):
+        smart = self.smart(organization, 'ansible_facts__os=linux')
+        web = inventories[0].hosts.create(name='web', ansible_facts={'os': 'linux'})
+        db = inventories[0].hosts.create(name='db', ansible_facts={'os': 'windows'})
+        assert update_smart_memberships_for_inventory(smart) is True
+        assert self.members(smart) == {web.id}
+        assert update_smart_memberships_for_inventory(smart) is False
+
+        db.ansible_facts = {'os': 'linux'}
+        db.save()
+        update_smart_memberships_for_inventory(smart, host_ids=[db.id])
+        assert self.members(smart) == {web.id, db.id}
+
+        web.ansible_facts = {'os': 'windows'}
+        web.save()
+        update_smart_memberships_for_inventory(smart, host_ids=[web.id])
+        assert self.members(smart) == {db.id}
+
+        added = inventories[1].hosts.create(name='app', ansible_facts={'os': 'linux'})
+        update_smart_memberships_for_inventory(smart, host_ids=[added.id])
+        assert self.members(smart) == {db.id, added.id}
+
+        added.delete()
+        update_smart_memberships_for_inventory(smart, host_ids=[added.id])
+        assert self.members(smart) == {db.id}
+
+    def test_group_changed(self, organization, inventories):
+        smart = self.smart(organization, 'groups__name=prod')
+        group = inventories[0].groups.create(name='prod')
+        host = inventories[0].hosts.create(name='web')
+        update_smart_memberships_for_inventory(smart)
+        assert self.members(smart) == set()
+
+        group.hosts.add(host)
+        update_smart_memberships_for_inventory(smart, host_ids=[host.id])
+        assert self.members(smart) == {host.id}
+
+        group.hosts.remove(host)
+        update_smart_memberships_for_inventory(smart, host_ids=[host.id])
+        assert self.members(smart) == set()
+
+    def test_duplicate_names_with_host_ids(self, organization, inventories):
+        smart = self.smart(organization, 'ansible_facts__os=linux')
+        first, second = [inventory.hosts.create(name='web', ansible_facts={'os': 'linux'}) for inventory in inventories]
+        update_smart_memberships_for_inventory(smart)
+        # one host per name, the first one
+        assert self.members(smart) == {first.id}
+
+        first.ansible_facts = {}
+        first.save()
+        update_smart_memberships_for_inventory(smart, host_ids=[first.id])
+        assert self.members(smart) == {second.id}
+
+    def test_rename_updates_hosts_with_old_name(self, organization, inventories, settings):
+        settings.AWX_REBUILD_SMART_MEMBERSHIP = True
+        smart = self.smart(organization, 'ansible_facts__os=linux')
+        first, second = [inventory.hosts.create(name='web', ansible_facts={'os': 'linux'}) for inventory in inventories]
+        update_smart_memberships_for_inventory(smart)
+        assert self.members(smart) == {first.id}
+
+        first = Host.objects.get(pk=first.pk)
+        with mock.patch('awx.main.tasks.system.schedule_smart_membership_update') as schedule:
+            first.name = 'web-renamed'
+            first.save()
+        scheduled = list(schedule.call_args[0][0])
+        assert set(scheduled) == {first.id, second.id}
+        update_smart_memberships_for_inventory(smart, host_ids=scheduled)
+        assert self.members(smart) == {first.id, second.id}
@@ -120,6 +120,44 @@ class TestComputedFields:
         job_template.refresh_from_db()
         assert job_template.next_schedule == expected_schedule
 
+    def test_bulk_update_computed_fields(self, job_template):
+        s1 = Schedule.objects.create(name='first schedule', rrule=self.continuing_rrule, unified_job_template=job_template)
+        s2 = Schedule.objects.create(name='second schedule', rrule=self.dead_rrule, unified_job_template=job_template)
+        old_next_run = datetime(2009, 3, 13, tzinfo=pytz.utc)
+        Schedule.objects.filter(pk=s1.pk).update(next_run=old_next_run)
+        with self.assert_no_unwanted_stuff(s1):
+            with mock.patch('awx.main.models.schedules.emit_channel_notification'):
+                changed = Schedule.bulk_update_computed_fields(Schedule.objects.filter(pk__in=[s1.pk, s2.pk]))
+        assert [s.pk for s in changed] == [s1.pk]
+        s1.refresh_from_db()
+        assert s1.next_run > now()
+        job_template.refresh_from_db()
+        assert job_template.next_schedule == s1
+        assert job_template.next_job_run == s1.next_run
+
+
+@pytest.mark.parametrize(
+    'rrule',
+    [
+        'DTSTART;TZID=America/New_York:20300303T023000 RRULE:FREQ=WEEKLY;BYDAY=SU;INTERVAL=1;COUNT=3',
+        'DTSTART:20300101T000000Z RRULE:FREQ=HOURLY;INTERVAL=7',
+        'DTSTART;TZID=America/New_York:20300310T150000 RRULE:INTERVAL=1;FREQ=DAILY EXRULE:FREQ=WEEKLY;INTERVAL=1;BYDAY=SU',
+    ],
+)
+def test_parsed_rrule_index_matches_ruleset(rrule):
+    parsed = Schedule.parsed_rrule(rrule)
+    ruleset = Schedule.rrulestr(rrule)
+    start = datetime(2030, 3, 1, tzinfo=pytz.utc)
+    # walk forward past the end of the index, then jump backwards before its start
+    for hours in list(range(0, 24 * 30, 5)) + [3, 0]:
+        dt = start + timedelta(hours=hours)
+        assert parsed.after(dt) == ruleset.after(dt)
+
+
+def test_parsed_rrule_is_cached():
+    rrule = 'DTSTART:20300101T000000Z RRULE:FREQ=DAILY;INTERVAL=1'
+    assert Schedule.parsed_rrule(rrule) is Schedule.parsed_rrule(rrule)
+
 
 @pytest.mark.django_db
 @pytest.mark.parametrize('freq, delta', (('MINUTELY', 1), ('HOURLY', 1)))
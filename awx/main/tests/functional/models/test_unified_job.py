@@ -96,6 +96,24 @@ class TestCreateUnifiedJob:
         relaunched_job = job.copy_unified_job()
         assert set(relaunched_job.credentials.all()) == set(new_creds)
 
+    def test_launch_prefetched_template(self, jt_linked, organization, django_assert_max_num_queries):
+        jt_linked.labels.create(name='label-1', organization=organization)
+        expected = jt_linked.create_unified_job()
+
+        jt = JobTemplate.objects.get(pk=jt_linked.pk)
+        JobTemplate.prefetch_for_launch([jt])
+        with django_assert_max_num_queries(0):
+            # the template state read at launch is served by the prefetch
+            Credential.unique_dict(jt.credentials.all())
+            list(jt.labels.all())
+            list(jt.inventory.instance_groups.all())
+            assert jt.project.pk == jt_linked.project_id
+        job = jt.create_unified_job()
+        assert job.inventory is jt.inventory
+        assert set(job.labels.all()) == set(expected.labels.all())
+        assert set(job.credentials.all()) == set(expected.credentials.all())
+        assert job.preferred_instance_groups_cache == expected.preferred_instance_groups_cache
+
 
 @pytest.mark.django_db
 class TestMetaVars:
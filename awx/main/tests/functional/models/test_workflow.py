@@ -15,7 +15,8 @@ from awx.main.models.projects import ProjectUpdate
 from awx.main.models.credential import Credential, CredentialType
 from awx.main.models.label import Label
 from awx.main.models.ha import InstanceGroup
-from awx.main.scheduler.dag_workflow import WorkflowDAG
+from awx.main.scheduler.dag_workflow import WorkflowDAG, get_workflow_job_edges
+from awx.main.scheduler.task_manager import WorkflowManager
 from awx.api.versioning import reverse
 from awx.api.views import WorkflowJobTemplateNodeSuccessNodesList
 
@@ -65,6 +66,27 @@ class TestWorkflowDAGFunctional(TransactionTestCase):
         with self.assertNumQueries(4):
             dag._init_graph(wfj)
 
+    def test_bulk_loaded_dag_needs_no_queries(self):
+        """
+        Graphs loaded by the workflow manager have jobs and templates attached,
+        so evaluating them does not query per node
+        """
+        wfj = self.workflow_job(states=['failed', None, None, 'successful', None])
+        dag = WorkflowManager().load_workflow_graphs([wfj])[wfj.id]
+        assert len(dag) == 5
+        with self.assertNumQueries(0):
+            assert 3 == len(dag.mark_dnr_nodes())
+            assert dag.is_workflow_done()
+            assert dag.has_workflow_failed() == (False, None)
+            assert dag.bfs_nodes_to_run() == []
+
+    def test_workflow_job_edges_cached(self):
+        wfj = self.workflow_job()
+        edges = get_workflow_job_edges([wfj.id])[wfj.id]
+        assert len(edges) == 4
+        with self.assertNumQueries(0):
+            assert get_workflow_job_edges([wfj.id])[wfj.id] == edges
+
     def test_workflow_done(self):
         wfj = self.workflow_job(states=['failed', None, None, 'successful', None])
         dag = WorkflowDAG(workflow_job=wfj)
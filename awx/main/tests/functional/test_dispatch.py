@@ -1,19 +1,24 @@
+import collections
 import datetime
 import multiprocessing
 import random
 import signal
 import time
 import yaml
+from types import SimpleNamespace
 from unittest import mock
 
+from django.db import connection
 from django.utils.timezone import now as tz_now
 import pytest
 
-from awx.main.models import Job, WorkflowJob, Instance
+from awx.main.models import Job, WorkflowJob, Instance, DispatcherTask
 from awx.main.dispatch import reaper
-from awx.main.dispatch.pool import StatefulPoolWorker, WorkerPool, AutoscalePool
+from awx.main.dispatch.pool import StatefulPoolWorker, WorkerPool, AutoscalePool, ReadyQueue
 from awx.main.dispatch.publish import task
+from awx.main.dispatch import taskqueue
 from awx.main.dispatch.worker import BaseWorker, TaskWorker
+from awx.main.dispatch.worker.base import AWXConsumerBase
 from awx.main.dispatch.periodic import Scheduler
 
 
@@ -228,14 +233,32 @@ class TestAutoScaling:
             assert w.busy
             assert len(w.managed_tasks) == 1
 
-        # the queue is full at 10, the _next_ write should put the message into
-        # a worker's backlog
+        # the queue is full at 10, the _next_ write should hold the message in
+        # the pool until a worker is idle, rather than queue it behind a busy worker
         assert len(self.pool) == 10
         for w in self.pool.workers:
             assert w.messages_sent == 1
         self.pool.write(0, 'Hello, World!')
         assert len(self.pool) == 10
-        assert self.pool.workers[0].messages_sent == 2
+        assert self.pool.backlog_size == 1
+        for w in self.pool.workers:
+            assert w.messages_sent == 1
+
+    def test_idle_worker_takes_backlog(self):
+        self.pool.init_workers(ResultWriter().work_loop, multiprocessing.Queue())
+        self.pool.ready_queue.append({'task': 'awx.main.tasks.system.foo', 'uuid': 'abc', 'time_ack': time.time()})
+        assert self.pool.drain() == 1
+        assert self.pool.backlog_size == 0
+        assert 'awx.main.tasks.system.foo' in self.pool.queue_delay_max
+
+    def test_free_capacity(self):
+        self.pool.init_workers(SlowResultWriter().work_loop, multiprocessing.Queue())
+        assert self.pool.free_capacity == 10
+        self.pool.write(0, 'Hello, World!')
+        self.pool.ready_queue.append({'task': 'awx.main.tasks.system.foo', 'uuid': 'abc'})
+        # one busy worker and one queued message
+        assert self.pool.free_capacity == 8
+        assert [m if isinstance(m, str) else m['uuid'] for m in self.pool.held_messages()] == ['Hello, World!', 'abc']
 
     @pytest.mark.timeout(20)
     def test_lost_worker_autoscale(self):
@@ -259,6 +282,28 @@ class TestAutoScaling:
         assert len(self.pool) == 2
 
 
+class TestReadyQueue:
+    def test_priority_tasks_first(self, settings):
+        settings.DISPATCHER_PRIORITY_TASKS = ['awx.main.scheduler.tasks.task_manager']
+        ready = ReadyQueue()
+        ready.append({'task': 'awx.main.tasks.system.gather_analytics'})
+        ready.append({'task': 'awx.main.scheduler.tasks.task_manager'})
+        assert ready.pop(collections.Counter(), {})['task'] == 'awx.main.scheduler.tasks.task_manager'
+        assert ready.pop(collections.Counter(), {})['task'] == 'awx.main.tasks.system.gather_analytics'
+        assert ready.pop(collections.Counter(), {}) is None
+
+    def test_concurrency_limit_skips_to_next_task(self, settings):
+        settings.DISPATCHER_PRIORITY_TASKS = []
+        ready = ReadyQueue()
+        ready.append({'task': 'awx.main.tasks.system.gather_analytics'})
+        ready.append({'task': 'awx.main.tasks.system.purge_old_stdout_files'})
+        limits = {'awx.main.tasks.system.gather_analytics': 1}
+        running = collections.Counter({'awx.main.tasks.system.gather_analytics': 1})
+        assert ready.pop(running, limits)['task'] == 'awx.main.tasks.system.purge_old_stdout_files'
+        assert ready.pop(running, limits) is None
+        assert len(ready) == 1
+
+
 @pytest.mark.usefixtures("disable_database_settings")
 class TestTaskDispatcher:
     @property
@@ -338,6 +383,96 @@ class TestTaskPublisher:
         assert queue == 'called'
 
 
+class TestTaskTable:
+    def test_idempotency_key_ignores_kwarg_order(self):
+        key = taskqueue.idempotency_key_for('awx.main.tasks.system.foo', args=[1], kwargs={'a': 1, 'b': 2})
+        assert key == taskqueue.idempotency_key_for('awx.main.tasks.system.foo', args=[1], kwargs={'b': 2, 'a': 1})
+        assert key.startswith('awx.main.tasks.system.foo:')
+
+    def test_idempotency_key_differs_by_args(self):
+        assert taskqueue.idempotency_key_for('awx.main.tasks.system.foo', args=[1]) != taskqueue.idempotency_key_for('awx.main.tasks.system.foo', args=[2])
+
+    def test_broadcast_queues_use_notify(self, settings):
+        settings.DISPATCHER_TASK_QUEUE_BACKEND = 'table'
+        assert taskqueue.use_task_table('awx-1')
+        assert not taskqueue.use_task_table('tower_broadcast_all')
+        settings.DISPATCHER_TASK_QUEUE_BACKEND = 'pg_notify'
+        assert not taskqueue.use_task_table('awx-1')
+
+
+@pytest.mark.django_db
+class TestTaskTableQueries:
+    @pytest.fixture(autouse=True)
+    def postgres_only(self, mocker):
+        if connection.vendor != 'postgresql':
+            pytest.skip('the task table is claimed with postgres only SQL')
+        # only the wakeup hint goes through pg_notify
+        mocker.patch('awx.main.dispatch.taskqueue.pg_bus_conn')
+
+    def enqueue(self, queue, *args, idempotency_key=None):
+        return taskqueue.enqueue(queue, {'task': 'awx.main.tests.functional.test_dispatch.add', 'args': list(args)}, idempotency_key=idempotency_key)
+
+    def test_enqueue_and_claim_in_order(self):
+        for i in range(3):
+            assert self.enqueue('awx-1', i, i) is True
+        self.enqueue('awx-2', 9, 9)
+        bodies = taskqueue.claim(['awx-1'], 'awx-1:100')
+        assert [body['args'] for body in bodies] == [[0, 0], [1, 1], [2, 2]]
+        assert set(DispatcherTask.objects.filter(claimed_by='awx-1:100').values_list('pk', flat=True)) == {body['task_table_id'] for body in bodies}
+        # claimed rows stay until their task has ran, but are not claimed twice
+        assert DispatcherTask.objects.count() == 4
+        assert taskqueue.claim(['awx-1'], 'awx-1:200') == []
+
+    def test_duplicate_skipped_until_task_starts(self):
+        assert self.enqueue('awx-1', 1, 2, idempotency_key='add:1:2') is True
+        assert self.enqueue('awx-1', 1, 2, idempotency_key='add:1:2') is False
+        [body] = taskqueue.claim(['awx-1'], 'awx-1:100')
+        # claimed is not ran yet, so this would still be a duplicate
+        assert self.enqueue('awx-1', 1, 2, idempotency_key='add:1:2') is False
+        taskqueue.start(body['task_table_id'])
+        assert self.enqueue('awx-1', 1, 2, idempotency_key='add:1:2') is True
+        assert DispatcherTask.objects.count() == 2
+
+    def test_expired_claims_are_taken_over(self, settings):
+        settings.DISPATCHER_TASK_QUEUE_CLAIM_TIMEOUT = 60
+        self.enqueue('awx-1', 1, 1)
+        self.enqueue('awx-1', 2, 2)
+        held, lost = taskqueue.claim(['awx-1'], 'awx-1:100')
+        DispatcherTask.objects.update(claimed_at=tz_now() - datetime.timedelta(seconds=120))
+        taskqueue.renew([held['task_table_id']])
+        assert [body['task_table_id'] for body in taskqueue.claim(['awx-1'], 'awx-1:200')] == [lost['task_table_id']]
+
+    def test_worker_removes_row_when_task_finishes(self):
+        self.enqueue('awx-1', 2, 2)
+        [body] = taskqueue.claim(['awx-1'], 'awx-1:100')
+        assert TaskWorker().perform_work(body) == 4
+        assert not DispatcherTask.objects.exists()
+
+    def test_unified_job_tasks_not_ran_again(self, settings):
+        settings.DISPATCHER_TASK_QUEUE_CLAIM_TIMEOUT = 60
+        assert TaskWorker.runs_unified_job('awx.main.tasks.jobs.RunJob')
+        assert not TaskWorker.runs_unified_job('awx.main.tests.functional.test_dispatch.add')
+        self.enqueue('awx-1', 1, 1)
+        self.enqueue('awx-1', 2, 2)
+        job_task, other_task = taskqueue.claim(['awx-1'], 'awx-1:100')
+        taskqueue.start(job_task['task_table_id'], retry=False)
+        taskqueue.start(other_task['task_table_id'])
+        # the dispatcher went away while both ran
+        DispatcherTask.objects.update(claimed_at=tz_now() - datetime.timedelta(seconds=120))
+        assert [body['task_table_id'] for body in taskqueue.claim(['awx-1'], 'awx-1:200')] == [other_task['task_table_id']]
+
+    def test_claim_limited_to_free_workers(self, settings):
+        settings.DISPATCHER_TASK_QUEUE_BATCH_SIZE = 100
+        for i in range(5):
+            self.enqueue('awx-1', i, i)
+        dispatched = []
+        consumer = SimpleNamespace(queues=['awx-1'], claimant='awx-1:100', pool=SimpleNamespace(free_capacity=2), dispatch_task=dispatched.append)
+        AWXConsumerBase.claim_tasks(consumer)
+        assert [body['args'] for body in dispatched] == [[0, 0], [1, 1]]
+        assert consumer.task_table_backlog is True
+        assert DispatcherTask.objects.filter(claimed_by__isnull=True).count() == 3
+
+
 yesterday = tz_now() - datetime.timedelta(days=1)
 minute = tz_now() - datetime.timedelta(seconds=120)
 now = tz_now()
@@ -106,3 +106,15 @@ def test_input_inventories_ordering():
 
     constructed_inventory.input_inventories.clear()
     assert constructed_inventory.input_inventories.through.objects.count() == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('source_model', ['job_template', 'inventory', 'organization'], indirect=True)
+def test_instance_group_prefetch_ordering(source_model):
+    groups = [InstanceGroup.objects.create(name='host-%d' % i) for i in range(5)]
+    groups.reverse()
+    for group in groups:
+        source_model.instance_groups.add(group)
+
+    prefetched = source_model.__class__.objects.prefetch_related('instance_groups').get(pk=source_model.pk)
+    assert [g.name for g in prefetched.instance_groups.all()] == ['host-4', 'host-3', 'host-2', 'host-1', 'host-0']
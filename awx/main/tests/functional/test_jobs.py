@@ -7,6 +7,8 @@ from awx.main.models import (
     Job,
     Instance,
     Host,
+    HostFacts,
+    HostFactsHistory,
     JobHostSummary,
     InventoryUpdate,
     InventorySource,
@@ -19,10 +21,11 @@ from awx.main.models import (
     ExecutionEnvironment,
 )
 from awx.main.tasks.system import cluster_node_heartbeat
-from awx.main.tasks.facts import update_hosts
+from awx.main.tasks.facts import raw_update_hosts, update_hosts
 
 from django.db import OperationalError
 from django.test.utils import override_settings
+from django.utils.timezone import now
 
 
 @pytest.mark.django_db
@@ -145,7 +148,7 @@ class TestAnsibleFactsSave:
 
     def fake_bulk_update(self, host_list):
         if self.current_call > 2:
-            return Host.objects.bulk_update(host_list, ['ansible_facts', 'ansible_facts_modified'])
+            return raw_update_hosts(host_list)
         self.current_call += 1
         raise OperationalError('deadlock detected')
 
@@ -160,6 +163,31 @@ class TestAnsibleFactsSave:
             host.refresh_from_db()
             assert host.ansible_facts == {'foo': 'bar'}
 
+    def test_update_hosts_unchanged_facts(self, inventory):
+        host = Host.objects.create(inventory=inventory, name='foo', ansible_facts={'foo': 'bar'})
+        facts_modified = HostFacts.objects.get(host=host).modified
+
+        host = Host.objects.select_related('host_facts').get(pk=host.pk)
+        host.ansible_facts = {'foo': 'bar'}
+        host.ansible_facts_modified = now()
+        update_hosts([host])
+        assert HostFacts.objects.get(host=host).modified == facts_modified
+
+        host.ansible_facts = {'foo': 'baz'}
+        update_hosts([host])
+        host.refresh_from_db()
+        assert host.ansible_facts == {'foo': 'baz'}
+        assert host.host_facts.modified > facts_modified
+
+    @override_settings(HOST_FACTS_HISTORY_DAYS=7)
+    def test_update_hosts_history(self, inventory):
+        host = Host.objects.create(inventory=inventory, name='foo', ansible_facts={'a': 1, 'b': 2})
+        host = Host.objects.get(pk=host.pk)
+        host.ansible_facts = {'a': 1, 'c': 3}
+        update_hosts([host])
+        history = HostFactsHistory.objects.get(host=host)
+        assert history.diff_data == {'changed': {'c': 3}, 'removed': ['b']}
+
 
 @pytest.mark.django_db
 class TestLaunchConfig:
@@ -205,3 +205,24 @@ def test_403_vs_404(get):
 
     get(f'/api/v2/users/{cindy.pk}/', expect=401)
     get('/api/v2/users/cindy/', expect=404)
+
+
+@pytest.mark.django_db
+def test_named_url_resolution_cached(django_assert_num_queries):
+    test_org = Organization.objects.create(name='test_org')
+    test_jt = JobTemplate.objects.create(name='test_jt', organization=test_org)
+    named_url = '/api/v2/job_templates/test_jt++test_org/'
+    url = '/api/v2/job_templates/{}/'.format(test_jt.pk)
+
+    assert URLModificationMiddleware._convert_named_url(named_url) == url
+    with django_assert_num_queries(0):
+        assert URLModificationMiddleware._convert_named_url(named_url) == url
+
+    # renaming any object along the named url invalidates it
+    test_org.name = 'new_org'
+    test_org.save()
+    assert URLModificationMiddleware._convert_named_url(named_url) == '/api/v2/job_templates/0/'
+    assert URLModificationMiddleware._convert_named_url('/api/v2/job_templates/test_jt++new_org/') == url
+
+    test_jt.delete()
+    assert URLModificationMiddleware._convert_named_url('/api/v2/job_templates/test_jt++new_org/') == '/api/v2/job_templates/0/'
@@ -5,7 +5,7 @@ import tempfile
 import shutil
 
 from awx.main.tasks.jobs import RunJob
-from awx.main.tasks.system import execution_node_health_check, _cleanup_images_and_files
+from awx.main.tasks.system import execution_node_health_check, execution_node_health_checks, _cleanup_images_and_files
 from awx.main.models import Instance, Job
 
 
@@ -26,6 +26,30 @@ def test_no_worker_info_on_AWX_nodes(node_type):
     assert execution_node_health_check(hostname) is None
 
 
+@pytest.mark.django_db
+def test_execution_node_health_checks_bulk_update():
+    good = Instance.objects.create(hostname='good.invalid', node_type='execution', node_state=Instance.States.INSTALLED)
+    bad = Instance.objects.create(hostname='bad.invalid', node_type='execution', node_state=Instance.States.READY)
+    Instance.objects.create(hostname='control.invalid', node_type='control')
+    results = {
+        'good.invalid': {'errors': [], 'runner_version': '2.3.0', 'cpu_count': 4, 'mem_in_bytes': 8 * 1024**3, 'uuid': '00000000-0000-0000-0000-000000000001'},
+        'bad.invalid': {'errors': ['Receptor error from bad.invalid'], 'transmit_timing': 0.0},
+    }
+    with mock.patch('awx.main.tasks.system.worker_info_many', return_value=results) as worker_info_many:
+        execution_node_health_checks(['good.invalid', 'bad.invalid', 'control.invalid', 'missing.invalid'])
+    assert sorted(worker_info_many.call_args[0][0]) == ['bad.invalid', 'good.invalid']
+
+    good.refresh_from_db()
+    assert good.node_state == Instance.States.READY
+    assert good.version == 'ansible-runner-2.3.0'
+    assert good.cpu == 4
+    assert good.last_health_check is not None
+    bad.refresh_from_db()
+    assert bad.node_state == Instance.States.UNAVAILABLE
+    assert bad.capacity == 0
+    assert bad.errors == 'Receptor error from bad.invalid'
+
+
 @pytest.fixture
 def mock_job_folder(request):
     pdd_path = tempfile.mkdtemp(prefix='awx_123_')
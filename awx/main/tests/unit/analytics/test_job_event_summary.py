@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+from awx.main.analytics.job_event_summary import get_job_event_summary, record_event_summaries, summary_key
+from awx.main.models import Job
+
+
+def event(event, host_name='', changed=False, failed=False, job_id=1):
+    return SimpleNamespace(JOB_REFERENCE='job_id', job_id=job_id, event=event, host_name=host_name, changed=changed, failed=failed)
+
+
+def test_summary_counted_across_batches(settings, stand_in_redis):
+    settings.AWX_JOB_EVENT_METRICS_TTL = 60
+    conn = stand_in_redis
+    record_event_summaries(
+        conn,
+        [
+            event('playbook_on_start'),
+            event('playbook_on_play_start'),
+            event('playbook_on_task_start'),
+            event('runner_on_ok', 'web1'),
+            event('runner_on_ok', 'web2', changed=True),
+            event('runner_on_failed', 'web3', failed=True),
+            event('playbook_on_start', job_id=2),
+        ],
+    )
+    record_event_summaries(
+        conn,
+        [
+            event('playbook_on_task_start'),
+            event('runner_on_failed', 'web1'),  # ignore_errors
+            event('runner_on_skipped', 'web2'),
+            event('runner_on_unreachable', 'db:1'),
+        ],
+    )
+    assert conn.expires[summary_key(1)] == 60
+
+    summary = get_job_event_summary(conn, 1)
+    assert summary['events'] == 10
+    assert summary['play_count'] == 1
+    assert summary['task_count'] == 2
+    assert summary['event_counts']['runner_on_ok'] == 2
+    # each host counts once, with the worst status it had
+    assert summary['host_status_counts'] == {'ok': 1, 'changed': 1, 'failures': 1, 'dark': 1}
+    assert summary['hosts']['web2'] == {'changed': 1, 'skipped': 1}
+    assert summary['hosts']['db:1'] == {'dark': 1}
+
+    assert 'hosts' not in get_job_event_summary(conn, 1, hosts=False)
+    assert get_job_event_summary(conn, 2)['events'] == 1
+    assert get_job_event_summary(conn, 3) is None
+
+
+def test_saved_summary_only_used_once_complete(settings, stand_in_redis, mocker):
+    settings.AWX_JOB_EVENT_METRICS_TTL = 60
+    mocker.patch('awx.main.analytics.job_event_summary.get_redis', return_value=stand_in_redis)
+    record_event_summaries(stand_in_redis, [event('playbook_on_start'), event('playbook_on_play_start'), event('playbook_on_task_start')])
+    # saved at wrapup while another callback worker still held the last task of the job
+    job = Job(id=1, status='successful', emitted_events=4, event_summary=get_job_event_summary(stand_in_redis, 1, hosts=False))
+    record_event_summaries(stand_in_redis, [event('playbook_on_task_start')])
+    assert job.get_event_summary(hosts=False)['task_count'] == 2
+
+    job.event_summary = get_job_event_summary(stand_in_redis, 1, hosts=False)
+    stand_in_redis.delete(summary_key(1))
+    assert job.get_event_summary(hosts=False)['task_count'] == 2
+
+    # incomplete and the live summary expired, callers count the events instead
+    job.emitted_events = 5
+    assert job.get_event_summary(hosts=False) is None
@@ -59,3 +59,70 @@ def dummy_log_record():
         tuple(),  # args,
         None,  # exc_info
     )
+
+
+class StandInRedis:
+    """
+    In memory stand-in for the parts of redis.Redis the tested code uses,
+    values are returned as bytes like redis does.
+    """
+
+    class Pipeline:
+        def __init__(self, conn):
+            self.conn = conn
+            self.calls = []
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def __getattr__(self, name):
+            method = getattr(self.conn, name)
+            return lambda *args: self.calls.append((method, args))
+
+        def execute(self):
+            calls, self.calls = self.calls, []
+            return [method(*args) for method, args in calls]
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+
+    @staticmethod
+    def encode(value):
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def pipeline(self):
+        return self.Pipeline(self)
+
+    def delete(self, *keys):
+        return sum(int(self.data.pop(key, None) is not None) for key in keys)
+
+    def expire(self, key, seconds):
+        self.expires[key] = seconds
+        return int(key in self.data)
+
+    def sadd(self, key, *members):
+        values = self.data.setdefault(key, set())
+        added = set(self.encode(m) for m in members) - values
+        values.update(added)
+        return len(added)
+
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    def hincrby(self, key, field, amount=1):
+        values = self.data.setdefault(key, {})
+        field = self.encode(field)
+        values[field] = self.encode(int(values.get(field, 0)) + amount)
+        return int(values[field])
+
+    def hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+
+@pytest.fixture
+def stand_in_redis():
+    return StandInRedis()
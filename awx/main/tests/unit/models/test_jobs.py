@@ -82,7 +82,7 @@ def test_finish_job_fact_cache_with_existing_data(hosts, mocker, tmpdir, ref_tim
     fact_cache = os.path.join(tmpdir, 'facts')
     last_modified = start_fact_cache(hosts, fact_cache, timeout=0)
 
-    bulk_update = mocker.patch('django.db.models.query.QuerySet.bulk_update')
+    update_hosts = mocker.patch('awx.main.tasks.facts.update_hosts')
 
     ansible_facts_new = {"foo": "bar"}
     filepath = os.path.join(fact_cache, hosts[1].name)
@@ -103,14 +103,14 @@ def test_finish_job_fact_cache_with_existing_data(hosts, mocker, tmpdir, ref_tim
         assert host.ansible_facts_modified == ref_time
     assert hosts[1].ansible_facts == ansible_facts_new
     assert hosts[1].ansible_facts_modified > ref_time
-    bulk_update.assert_called_once_with([hosts[1]], ['ansible_facts', 'ansible_facts_modified'])
+    update_hosts.assert_called_once_with([hosts[1]])
 
 
 def test_finish_job_fact_cache_with_bad_data(hosts, mocker, tmpdir):
     fact_cache = os.path.join(tmpdir, 'facts')
     last_modified = start_fact_cache(hosts, fact_cache, timeout=0)
 
-    bulk_update = mocker.patch('django.db.models.query.QuerySet.bulk_update')
+    update_hosts = mocker.patch('awx.main.tasks.facts.update_hosts')
 
     for h in hosts:
         filepath = os.path.join(fact_cache, h.name)
@@ -122,14 +122,14 @@ def test_finish_job_fact_cache_with_bad_data(hosts, mocker, tmpdir):
 
     finish_fact_cache(hosts, fact_cache, last_modified)
 
-    bulk_update.assert_not_called()
+    update_hosts.assert_not_called()
 
 
 def test_finish_job_fact_cache_clear(hosts, mocker, ref_time, tmpdir):
     fact_cache = os.path.join(tmpdir, 'facts')
     last_modified = start_fact_cache(hosts, fact_cache, timeout=0)
 
-    bulk_update = mocker.patch('django.db.models.query.QuerySet.bulk_update')
+    update_hosts = mocker.patch('awx.main.tasks.facts.update_hosts')
 
     os.remove(os.path.join(fact_cache, hosts[1].name))
     finish_fact_cache(hosts, fact_cache, last_modified)
@@ -139,4 +139,62 @@ def test_finish_job_fact_cache_clear(hosts, mocker, ref_time, tmpdir):
         assert host.ansible_facts_modified == ref_time
     assert hosts[1].ansible_facts == {}
     assert hosts[1].ansible_facts_modified > ref_time
-    bulk_update.assert_called_once_with([hosts[1]], ['ansible_facts', 'ansible_facts_modified'])
+    update_hosts.assert_called_once_with([hosts[1]])
+
+
+def test_finish_job_fact_cache_clear_counted_when_already_empty(hosts, mocker, ref_time, tmpdir):
+    hosts[1].ansible_facts = {}
+    fact_cache = os.path.join(tmpdir, 'facts')
+    last_modified = start_fact_cache(hosts, fact_cache, timeout=0)
+
+    update_hosts = mocker.patch('awx.main.tasks.facts.update_hosts')
+
+    os.remove(os.path.join(fact_cache, hosts[1].name))
+    log_data = {}
+    finish_fact_cache.__wrapped__(hosts, fact_cache, last_modified, log_data=log_data)
+
+    assert log_data['cleared_ct'] == 1
+    assert log_data['unmodified_ct'] == 3
+    assert hosts[1].ansible_facts_modified > ref_time
+    update_hosts.assert_called_once_with([hosts[1]])
+
+
+def test_finish_job_fact_cache_same_facts(hosts, mocker, ref_time, tmpdir):
+    fact_cache = os.path.join(tmpdir, 'facts')
+    last_modified = start_fact_cache(hosts, fact_cache, timeout=0)
+
+    update_hosts = mocker.patch('awx.main.tasks.facts.update_hosts')
+
+    # facts gathered again with the same content, in a different key order
+    filepath = os.path.join(fact_cache, hosts[1].name)
+    with open(filepath, 'w') as f:
+        f.write(json.dumps({"b": 2, "a": 1}))
+    new_modification_time = time.time() + 3600
+    os.utime(filepath, (new_modification_time, new_modification_time))
+
+    finish_fact_cache(hosts, fact_cache, last_modified)
+
+    assert hosts[1].ansible_facts == {"a": 1, "b": 2}
+    assert hosts[1].ansible_facts_modified > ref_time
+    update_hosts.assert_called_once_with([hosts[1]])
+
+
+@pytest.mark.parametrize('aggregator_enabled', [True, False])
+def test_finish_job_fact_cache_system_tracking(hosts, mocker, tmpdir, settings, aggregator_enabled):
+    settings.LOG_AGGREGATOR_ENABLED = aggregator_enabled
+    settings.LOG_AGGREGATOR_LOGGERS = ['system_tracking']
+    fact_cache = os.path.join(tmpdir, 'facts')
+    last_modified = start_fact_cache(hosts, fact_cache, timeout=0)
+
+    mocker.patch('awx.main.tasks.facts.update_hosts')
+    system_tracking_logger = mocker.patch('awx.main.tasks.facts.system_tracking_logger')
+
+    filepath = os.path.join(fact_cache, hosts[1].name)
+    with open(filepath, 'w') as f:
+        f.write(json.dumps({"foo": "bar"}))
+    new_modification_time = time.time() + 3600
+    os.utime(filepath, (new_modification_time, new_modification_time))
+
+    finish_fact_cache(hosts, fact_cache, last_modified)
+
+    assert system_tracking_logger.info.called is aggregator_enabled
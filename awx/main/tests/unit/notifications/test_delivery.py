@@ -0,0 +1,128 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+import pytest
+import requests
+
+from awx.main.models.notifications import NotificationTemplate
+from awx.main.notifications import delivery
+from awx.main.notifications.delivery import BackendPool, deliver_notifications
+from awx.main.notifications.webhook_backend import WebhookBackend
+
+
+class StubWebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.server.requests.append((self.path, self.client_address))
+        status = 500 if self.path == '/error' else 200
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def webhook_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubWebhookHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def delivery_settings(settings):
+    settings.AWX_TASK_ENV = {}
+    settings.NOTIFICATION_SEND_CONCURRENCY = 4
+    settings.NOTIFICATION_SEND_RETRIES = 2
+    settings.NOTIFICATION_SEND_RETRY_BACKOFF = 0
+    settings.NOTIFICATION_BACKEND_IDLE_TIMEOUT = 60
+
+
+@pytest.fixture(autouse=True)
+def client_headers():
+    with mock.patch('awx.main.notifications.webhook_backend.get_awx_http_client_headers', return_value={'Content-Type': 'application/json'}):
+        yield
+
+
+def webhook_template(pk, url):
+    template = NotificationTemplate(pk=pk, name=f'webhook-{pk}', notification_type='webhook')
+    template.notification_configuration = {'url': url, 'http_method': 'POST', 'headers': {}, 'disable_ssl_verification': False}
+    return template
+
+
+def test_connection_reused_for_template(webhook_server):
+    template = webhook_template(1, f'http://127.0.0.1:{webhook_server.server_port}/hook')
+    pool = BackendPool()
+    results = deliver_notifications([(template, 'subject', '{"n": %d}' % i) for i in range(5)], pool=pool)
+    assert results == [(1, None)] * 5
+    # all the messages went over a single connection
+    assert len(set(client for path, client in webhook_server.requests)) == 1
+
+    # and it stays open for the next task
+    deliver_notifications([(template, 'subject', '{}')], pool=pool)
+    assert len(set(client for path, client in webhook_server.requests)) == 1
+    pool.close_all()
+
+
+def test_templates_sent_concurrently(webhook_server):
+    base_url = f'http://127.0.0.1:{webhook_server.server_port}'
+    templates = [webhook_template(pk, f'{base_url}/hook{pk}') for pk in range(1, 4)]
+    errors = webhook_template(4, f'{base_url}/error')
+    messages = [(template, 'subject', '{}') for template in templates * 2] + [(errors, 'subject', '{}')]
+    pool = BackendPool()
+    results = deliver_notifications(messages, pool=pool)
+    assert [sent for sent, error in results] == [1] * 6 + [0]
+    assert all(error is None for sent, error in results[:6])
+    assert 'Error sending webhook notification: 500' in str(results[6][1])
+    # errors reported by the service are not retried
+    assert [path for path, client in webhook_server.requests].count('/error') == 1
+    pool.close_all()
+
+
+def test_pool_replaces_changed_template(webhook_server):
+    template = webhook_template(1, f'http://127.0.0.1:{webhook_server.server_port}/hook')
+    pool = BackendPool()
+    first = pool.get(template)
+    assert pool.get(template) is first
+    template.notification_configuration = dict(template.notification_configuration, url=f'http://127.0.0.1:{webhook_server.server_port}/other')
+    assert pool.get(template) is not first
+    assert len(pool.backends) == 1
+
+
+def test_retry_on_connection_error():
+    template = webhook_template(1, 'http://example.invalid/hook')
+    pool = BackendPool()
+    send = mock.patch.object(WebhookBackend, 'send_messages', side_effect=[requests.exceptions.ConnectionError(), 1])
+    with send as send_messages, mock.patch.object(delivery.time, 'sleep'):
+        assert deliver_notifications([(template, 'subject', '{}')], pool=pool) == [(1, None)]
+    assert send_messages.call_count == 2
+
+
+def test_retries_exhausted():
+    template = webhook_template(1, 'http://example.invalid/hook')
+    pool = BackendPool()
+    with mock.patch.object(WebhookBackend, 'send_messages', side_effect=requests.exceptions.ConnectionError('down')) as send_messages:
+        [(sent, error)] = deliver_notifications([(template, 'subject', '{}')], pool=pool)
+    assert sent == 0
+    assert isinstance(error, requests.exceptions.ConnectionError)
+    assert send_messages.call_count == 3
+
+
+def test_non_reusable_backend_built_per_message():
+    template = NotificationTemplate(pk=1, name='irc', notification_type='irc')
+    template.notification_configuration = {'server': 'irc.example.org', 'port': 6667, 'nickname': 'awx', 'password': '', 'use_ssl': False, 'targets': ['#awx']}
+    pool = BackendPool()
+    with mock.patch('awx.main.notifications.irc_backend.IrcBackend.send_messages', return_value=1), mock.patch.object(
+        NotificationTemplate, 'build_backend', wraps=template.build_backend
+    ) as build_backend:
+        results = deliver_notifications([(template, 'subject', 'body')] * 2, pool=pool)
+    assert results == [(1, None)] * 2
+    assert build_backend.call_count == 2
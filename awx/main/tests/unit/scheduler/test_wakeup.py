@@ -0,0 +1,76 @@
+import pytest
+import redis
+
+from awx.main.scheduler import wakeup
+from awx.main.scheduler.wakeup import ManagerWakeup
+
+
+@pytest.fixture
+def conn(mocker, settings):
+    settings.TASK_MANAGER_WAKEUP_COALESCE = True
+    settings.TASK_MANAGER_WAKEUP_DEBOUNCE_WINDOW = 300
+    mocker.patch.object(wakeup, 'is_testing', return_value=False)
+    conn = mocker.MagicMock()
+    mocker.patch.object(wakeup, 'get_redis', return_value=conn)
+    return conn
+
+
+@pytest.fixture
+def dispatch(mocker):
+    return mocker.patch.object(ManagerWakeup, 'dispatch')
+
+
+def request_result(conn, acquired):
+    pipe = conn.pipeline.return_value.__enter__.return_value
+    pipe.execute.return_value = [acquired, 1]
+    return pipe
+
+
+def test_request_dispatches_when_nothing_in_flight(conn, dispatch):
+    pipe = request_result(conn, 1)
+    assert ManagerWakeup('task_manager').request() is True
+    dispatch.assert_called_once()
+    args = pipe.eval.call_args[0]
+    assert args[2:] == ('awx_task_manager_wakeup', 'awx_task_manager_wakeup_pending', 300)
+
+
+def test_request_coalesced_into_wakeup_in_flight(conn, dispatch):
+    request_result(conn, 0)
+    assert ManagerWakeup('task_manager').request() is False
+    dispatch.assert_not_called()
+
+
+def test_request_dispatches_if_redis_unavailable(conn, dispatch):
+    conn.pipeline.side_effect = redis.exceptions.ConnectionError
+    assert ManagerWakeup('task_manager').request() is True
+    dispatch.assert_called_once()
+
+
+@pytest.mark.parametrize('pending', [0, 1])
+def test_trailing_run(conn, dispatch, pending):
+    conn.eval.return_value = pending
+    assert ManagerWakeup('workflow_manager').run_finished() is bool(pending)
+    assert dispatch.called is bool(pending)
+
+
+def test_no_coalescing_when_disabled(conn, dispatch, settings):
+    settings.TASK_MANAGER_WAKEUP_COALESCE = False
+    assert ManagerWakeup('dependency_manager').request() is True
+    dispatch.assert_called_once()
+    conn.pipeline.assert_not_called()
+
+
+def test_lock_miss_leaves_trailing_run(conn, dispatch):
+    # a periodic run holds the lock, the requested run misses it and the holder has to go again
+    keys = {}
+    conn.set.side_effect = lambda key, value, ex=None: keys.__setitem__(key, value)
+    conn.eval.side_effect = lambda script, numkeys, wakeup_key, pending_key, window: int(keys.pop(pending_key, None) is not None)
+    request_result(conn, 1)
+
+    holder = ManagerWakeup('task_manager')
+    holder.run_started()
+    assert ManagerWakeup('task_manager').request() is True
+    ManagerWakeup('task_manager').run_skipped()
+    assert keys == {'awx_task_manager_wakeup_pending': '1'}
+    assert holder.run_finished() is True
+    assert dispatch.call_count == 2
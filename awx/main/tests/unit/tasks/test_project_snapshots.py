@@ -0,0 +1,122 @@
+import errno
+import os
+from unittest import mock
+
+import pytest
+
+from awx.main.tasks import project_snapshots
+from awx.main.tasks.project_snapshots import TreeLinker, copy_from_snapshot, get_snapshot_path, prune_snapshots
+
+
+class FakeProject:
+    pk = 42
+    scm_revision = 'abc123'
+    cache_id = '7'
+
+    def __init__(self, projects_root):
+        self.projects_root = projects_root
+
+    def get_project_path(self, check_if_exists=True):
+        return os.path.join(self.projects_root, '_42__demo')
+
+    def get_cache_path(self):
+        return os.path.join(self.projects_root, '.__awx_cache', '_42__demo')
+
+
+@pytest.fixture
+def project(tmp_path, settings):
+    settings.AWX_COLLECTIONS_ENABLED = True
+    settings.AWX_ROLES_ENABLED = True
+    settings.AWX_PROJECT_SNAPSHOT_HARDLINKS = False
+    settings.AWX_PROJECT_SNAPSHOTS_KEEP = 3
+    project = FakeProject(str(tmp_path))
+    project_path = project.get_project_path()
+    os.makedirs(os.path.join(project_path, '.git'))
+    os.makedirs(os.path.join(project_path, 'roles'))
+    with open(os.path.join(project_path, 'site.yml'), 'w') as f:
+        f.write('- hosts: all\n')
+    with open(os.path.join(project_path, '.git', 'HEAD'), 'w') as f:
+        f.write('ref: refs/heads/main\n')
+    os.symlink('site.yml', os.path.join(project_path, 'main.yml'))
+    collections_path = os.path.join(project.get_cache_path(), project.cache_id, 'requirements_collections')
+    os.makedirs(collections_path)
+    with open(os.path.join(collections_path, 'marker'), 'w') as f:
+        f.write('collections')
+    return project
+
+
+def test_copy_from_snapshot(project, tmp_path):
+    job_dir = str(tmp_path / 'job')
+    copy_from_snapshot(project, job_dir)
+
+    assert os.path.isdir(get_snapshot_path(project))
+    with open(os.path.join(job_dir, 'project', 'site.yml')) as f:
+        assert f.read() == '- hosts: all\n'
+    assert os.readlink(os.path.join(job_dir, 'project', 'main.yml')) == 'site.yml'
+    assert not os.path.exists(os.path.join(job_dir, 'project', '.git'))
+    with open(os.path.join(job_dir, 'requirements_collections', 'marker')) as f:
+        assert f.read() == 'collections'
+    assert not os.path.exists(os.path.join(job_dir, 'requirements_roles'))
+
+
+def test_snapshot_is_immutable(project, tmp_path):
+    copy_from_snapshot(project, str(tmp_path / 'job1'))
+    # project updates changing the checkout do not affect the existing snapshot
+    with open(os.path.join(project.get_project_path(), 'site.yml'), 'w') as f:
+        f.write('changed\n')
+    # and jobs writing to their copy do not affect it either
+    with open(os.path.join(str(tmp_path / 'job1'), 'project', 'site.yml'), 'w') as f:
+        f.write('written by job\n')
+
+    copy_from_snapshot(project, str(tmp_path / 'job2'))
+    with open(os.path.join(str(tmp_path / 'job2'), 'project', 'site.yml')) as f:
+        assert f.read() == '- hosts: all\n'
+
+
+def test_collections_disabled(project, tmp_path, settings):
+    settings.AWX_COLLECTIONS_ENABLED = False
+    job_dir = str(tmp_path / 'job')
+    copy_from_snapshot(project, job_dir)
+    assert os.path.exists(os.path.join(job_dir, 'project', 'site.yml'))
+    assert not os.path.exists(os.path.join(job_dir, 'requirements_collections'))
+
+
+def test_falls_back_to_copy_without_reflinks(tmp_path):
+    src = tmp_path / 'src'
+    src.write_text('content')
+    linker = TreeLinker()
+    with mock.patch.object(project_snapshots.fcntl, 'ioctl', side_effect=OSError(errno.EOPNOTSUPP, 'not supported')) as ioctl:
+        linker.link_file(str(src), str(tmp_path / 'dst1'))
+        linker.link_file(str(src), str(tmp_path / 'dst2'))
+    # not tried again once known to be unsupported
+    assert ioctl.call_count == 1
+    assert linker.counts == {'reflink': 0, 'hardlink': 0, 'copy': 2}
+    assert (tmp_path / 'dst2').read_text() == 'content'
+
+
+def test_hardlinks_when_allowed(tmp_path):
+    src = tmp_path / 'src'
+    src.write_text('content')
+    linker = TreeLinker(hardlinks=True)
+    with mock.patch.object(project_snapshots.fcntl, 'ioctl', side_effect=OSError(errno.EXDEV, 'cross device')):
+        linker.link_file(str(src), str(tmp_path / 'dst'))
+    assert linker.counts['hardlink'] == 1
+    assert os.stat(str(src)).st_ino == os.stat(str(tmp_path / 'dst')).st_ino
+
+
+def test_other_errors_are_raised(tmp_path):
+    linker = TreeLinker()
+    with pytest.raises(FileNotFoundError):
+        linker.link_file(str(tmp_path / 'missing'), str(tmp_path / 'dst'))
+
+
+def test_prune_snapshots(project, tmp_path):
+    for i, revision in enumerate(('r1', 'r2', 'r3', 'r4', 'r5')):
+        project.scm_revision = revision
+        copy_from_snapshot(project, str(tmp_path / f'job{i}'))
+        os.utime(get_snapshot_path(project), (1000 + i, 1000 + i))
+    snapshots_root = os.path.dirname(get_snapshot_path(project))
+    os.makedirs(os.path.join(snapshots_root, '.~~tmp~~leftover'))
+
+    prune_snapshots(project.get_project_path(), keep=2)
+    assert sorted(os.listdir(snapshots_root)) == ['r4_7', 'r5_7']
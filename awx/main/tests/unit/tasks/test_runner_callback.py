@@ -1,5 +1,11 @@
-from awx.main.tasks.callback import RunnerCallback
+import threading
+from unittest import mock
+
+import pytest
+
+from awx.main.tasks.callback import EventPipeline, RunnerCallback
 from awx.main.constants import ANSIBLE_RUNNER_NEEDS_UPDATE_MESSAGE
+from awx.main.models import Job
 
 from django.utils.translation import gettext_lazy as _
 
@@ -50,3 +56,84 @@ def test_special_ansible_runner_message(mock_me):
         'Traceback:\ngot an unexpected keyword argument\nFile: bar.py\n'
         f'{ANSIBLE_RUNNER_NEEDS_UPDATE_MESSAGE}'
     )
+
+
+class StandInPublisher:
+    """Records what would be pushed to redis, optionally holding up each push"""
+
+    def __init__(self, gate=None, error=None):
+        self.batches = []
+        self.gate = gate
+        self.error = error
+        self.connection = mock.MagicMock()
+
+    def dispatch_many(self, objs):
+        if self.gate is not None:
+            self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        self.batches.append(list(objs))
+
+    def dispatch(self, obj):
+        self.batches.append([obj])
+
+
+def pipeline_callback(publisher):
+    rc = RunnerCallback()
+    rc.dispatcher = publisher
+    rc.instance = Job(pk=1, id=1)
+    return rc
+
+
+def test_event_pipeline_publishes_in_order(mock_me):
+    publisher = StandInPublisher()
+    rc = pipeline_callback(publisher)
+    pipeline = EventPipeline(rc, queue_size=10, batch_size=4).start()
+    for i in range(25):
+        assert pipeline.event_handler({'counter': i + 1, 'created': '2024-01-01T00:00:00'}) is False
+    pipeline.finished_callback(None)
+
+    events = [event for batch in publisher.batches for event in batch]
+    assert [event.get('counter') for event in events] == list(range(1, 26)) + [None]
+    # EOF comes after every event and counts them
+    assert events[-1]['event'] == 'EOF' and events[-1]['final_counter'] == 25
+    assert all(event['job_id'] == 1 for event in events)
+    assert max(len(batch) for batch in publisher.batches) <= 4
+    assert rc.dispatcher is publisher
+
+    metrics = pipeline.get_metrics()
+    assert metrics['events_read'] == metrics['events_published'] == 25
+    assert metrics['publish_lag_seconds_max'] > 0
+    publisher.connection.pipeline.return_value.hset.assert_called_once()
+
+
+def test_event_pipeline_backpressure(mock_me):
+    gate = threading.Event()
+    publisher = StandInPublisher(gate=gate)
+    pipeline = EventPipeline(pipeline_callback(publisher), queue_size=2, batch_size=1).start()
+
+    reader = threading.Thread(target=lambda: [pipeline.event_handler({'counter': i + 1}) for i in range(20)])
+    reader.start()
+    reader.join(timeout=1)
+    # the reader is held up while publishing is stuck
+    assert reader.is_alive()
+    assert pipeline.stats['events_read'] < 20
+    assert pipeline.stats['max_event_queue_depth'] <= 2
+
+    gate.set()
+    reader.join(timeout=10)
+    assert not reader.is_alive()
+    pipeline.close()
+    assert sum(len(batch) for batch in publisher.batches) == 20
+
+
+def test_event_pipeline_failure(mock_me):
+    publisher = StandInPublisher(error=ConnectionError('redis is gone'))
+    pipeline = EventPipeline(pipeline_callback(publisher), queue_size=2, batch_size=1).start()
+    with pytest.raises(RuntimeError):
+        for i in range(20):
+            pipeline.event_handler({'counter': i + 1})
+    with pytest.raises(RuntimeError):
+        pipeline.close()
+    # closing again, as the processor does on the way out, does not raise
+    pipeline.close()
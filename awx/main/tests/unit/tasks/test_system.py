@@ -1,6 +1,6 @@
 import pytest
 from unittest.mock import MagicMock, patch
-from awx.main.tasks.system import update_inventory_computed_fields
+from awx.main.tasks.system import update_inventory_computed_fields, update_host_smart_inventory_memberships, SMART_MEMBERSHIP_CHANGED_HOSTS_KEY
 from awx.main.models import Inventory
 from django.db import DatabaseError
 
@@ -62,3 +62,35 @@ def test_update_inventory_computed_fields_database_error_nosqlstate(mock_logger,
             mock_filter.assert_called_once_with(id=1)
             mock_update_computed_fields.assert_called_once()
             mock_inventory.update_computed_fields.assert_called_once()
+
+
+@pytest.fixture
+def smart_inventory():
+    inventory = MagicMock(spec=Inventory)
+    with patch("awx.main.tasks.system.Inventory.objects.filter") as mock_filter:
+        mock_filter.return_value.__iter__.return_value = [inventory]
+        yield inventory
+
+
+def test_smart_memberships_of_changed_hosts(smart_inventory, stand_in_redis):
+    stand_in_redis.sadd(SMART_MEMBERSHIP_CHANGED_HOSTS_KEY, 3, 1, 2)
+    with patch("awx.main.tasks.system.redis.Redis.from_url", return_value=stand_in_redis), patch(
+        "awx.main.tasks.system.update_smart_memberships_for_inventory", return_value=True
+    ) as update_memberships:
+        update_host_smart_inventory_memberships(changed_hosts=True)
+        update_memberships.assert_called_once_with(smart_inventory, host_ids=[1, 2, 3])
+        smart_inventory.update_computed_fields.assert_called_once()
+
+        # the hosts were taken by the first run
+        update_host_smart_inventory_memberships(changed_hosts=True)
+        update_memberships.assert_called_once()
+
+
+def test_smart_memberships_changed_hosts_kept_on_error(smart_inventory, stand_in_redis):
+    stand_in_redis.sadd(SMART_MEMBERSHIP_CHANGED_HOSTS_KEY, 1, 2)
+    with patch("awx.main.tasks.system.redis.Redis.from_url", return_value=stand_in_redis), patch(
+        "awx.main.tasks.system.update_smart_memberships_for_inventory", side_effect=DatabaseError("Some error")
+    ):
+        with pytest.raises(DatabaseError):
+            update_host_smart_inventory_memberships(changed_hosts=True)
+    assert stand_in_redis.smembers(SMART_MEMBERSHIP_CHANGED_HOSTS_KEY) == {b'1', b'2'}
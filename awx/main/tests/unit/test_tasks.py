@@ -144,17 +144,29 @@ def test_send_notifications_job_id(mocker):
 
 
 @mock.patch('awx.main.models.UnifiedJob.objects.get')
+@mock.patch('awx.main.models.Notification.objects.bulk_update')
 @mock.patch('awx.main.models.Notification.objects.filter')
-def test_send_notifications_list(mock_notifications_filter, mock_job_get, mocker):
+def test_send_notifications_list(mock_notifications_filter, mock_bulk_update, mock_job_get, mocker):
     mock_job = mocker.MagicMock(spec=UnifiedJob)
     mock_job_get.return_value = mock_job
-    mock_notifications = [mocker.MagicMock(spec=Notification, subject="test", body={'hello': 'world'})]
-    mock_notifications_filter.return_value = mock_notifications
+    mock_notifications = [
+        mocker.MagicMock(spec=Notification, subject="test", body={'hello': 'world'}),
+        mocker.MagicMock(spec=Notification, subject="test", body={'hello': 'world'}),
+    ]
+    mock_notifications_filter.return_value.select_related.return_value = mock_notifications
+    mocker.patch('awx.main.signals.record_update_activity')
+    deliver = mocker.patch.object(system, 'deliver_notifications', return_value=[(1, None), (0, Exception('boom'))])
 
     system.send_notifications([1, 2], job_id=1)
     assert Notification.objects.filter.call_count == 1
+    assert deliver.call_args[0][0] == [(n.notification_template, 'test', {'hello': 'world'}) for n in mock_notifications]
     assert mock_notifications[0].status == "successful"
-    assert mock_notifications[0].save.called
+    assert mock_notifications[0].notifications_sent == 1
+    assert mock_notifications[1].status == "failed"
+    assert mock_notifications[1].error == 'boom'
+    # statuses are saved with a single query
+    mock_bulk_update.assert_called_once_with(mock_notifications, ['status', 'notifications_sent', 'error', 'modified'])
+    assert mock_notifications[0].modified == mock_notifications[1].modified
 
     assert mock_job.notifications.add.called
     assert mock_job.notifications.add.called_with(*mock_notifications)
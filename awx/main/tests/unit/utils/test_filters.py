@@ -68,6 +68,11 @@ class mockHost:
 
 @mock.patch('awx.main.utils.filters.get_model', return_value=mockHost())
 class TestSmartFilterQueryFromString:
+    @pytest.fixture(autouse=True)
+    def clear_parse_cache(self):
+        # parsed filters are cached by their text, the lookups are only validated on the first parse
+        SmartFilter._parse.cache_clear()
+
     @mock.patch(
         'ansible_base.rest_filters.rest_framework.field_lookup_backend.get_fields_from_path', lambda model, path, **kwargs: ([model], path)
     )  # disable field filtering, because a__b isn't a real Host field
@@ -82,8 +87,8 @@ class TestSmartFilterQueryFromString:
             ('a__b__c=true', Q(**{u"a__b__c": True})),
             ('a__b__c=false', Q(**{u"a__b__c": False})),
             ('a__b__c=null', Q(**{u"a__b__c": None})),
-            ('ansible_facts__a="true"', Q(**{u"ansible_facts__contains": {u"a": u"true"}})),
-            ('ansible_facts__a__exact="true"', Q(**{u"ansible_facts__contains": {u"a": u"true"}})),
+            ('ansible_facts__a="true"', Q(**{u"host_facts__ansible_facts__contains": {u"a": u"true"}})),
+            ('ansible_facts__a__exact="true"', Q(**{u"host_facts__ansible_facts__contains": {u"a": u"true"}})),
             # ('"a__b\"__c"="true"', Q(**{u"a__b\"__c": "true"})),
             # ('a__b\"__c="true"', Q(**{u"a__b\"__c": "true"})),
         ],
@@ -119,7 +124,7 @@ class TestSmartFilterQueryFromString:
         "filter_string,q_expected",
         [
             (u'(a=abc\u1F5E3def)', Q(**{u"a": u"abc\u1F5E3def"})),
-            (u'(ansible_facts__a=abc\u1F5E3def)', Q(**{u"ansible_facts__contains": {u"a": u"abc\u1F5E3def"}})),
+            (u'(ansible_facts__a=abc\u1F5E3def)', Q(**{u"host_facts__ansible_facts__contains": {u"a": u"abc\u1F5E3def"}})),
         ],
     )
     def test_unicode(self, mock_get_host_model, filter_string, q_expected):
@@ -150,21 +155,24 @@ class TestSmartFilterQueryFromString:
     @pytest.mark.parametrize(
         "filter_string,q_expected",
         [
-            ('ansible_facts__a__b__c[]=3', Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [3]}}}})),
-            ('ansible_facts__a__b__c[]=3.14', Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [3.14]}}}})),
-            ('ansible_facts__a__b__c[]=true', Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [True]}}}})),
-            ('ansible_facts__a__b__c[]=false', Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [False]}}}})),
-            ('ansible_facts__a__b__c[]="true"', Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [u"true"]}}}})),
-            ('ansible_facts__a__b__c[]="hello world"', Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [u"hello world"]}}}})),
-            ('ansible_facts__a__b__c[]__d[]="foobar"', Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": [u"foobar"]}]}}}})),
-            ('ansible_facts__a__b__c[]__d="foobar"', Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": u"foobar"}]}}}})),
-            ('ansible_facts__a__b__c[]__d__e="foobar"', Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": {u"e": u"foobar"}}]}}}})),
-            ('ansible_facts__a__b__c[]__d__e[]="foobar"', Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": {u"e": [u"foobar"]}}]}}}})),
-            ('ansible_facts__a__b__c[]__d__e__f[]="foobar"', Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": {u"e": {u"f": [u"foobar"]}}}]}}}})),
+            ('ansible_facts__a__b__c[]=3', Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [3]}}}})),
+            ('ansible_facts__a__b__c[]=3.14', Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [3.14]}}}})),
+            ('ansible_facts__a__b__c[]=true', Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [True]}}}})),
+            ('ansible_facts__a__b__c[]=false', Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [False]}}}})),
+            ('ansible_facts__a__b__c[]="true"', Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [u"true"]}}}})),
+            ('ansible_facts__a__b__c[]="hello world"', Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [u"hello world"]}}}})),
+            ('ansible_facts__a__b__c[]__d[]="foobar"', Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": [u"foobar"]}]}}}})),
+            ('ansible_facts__a__b__c[]__d="foobar"', Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": u"foobar"}]}}}})),
+            ('ansible_facts__a__b__c[]__d__e="foobar"', Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": {u"e": u"foobar"}}]}}}})),
+            ('ansible_facts__a__b__c[]__d__e[]="foobar"', Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": {u"e": [u"foobar"]}}]}}}})),
+            (
+                'ansible_facts__a__b__c[]__d__e__f[]="foobar"',
+                Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": {u"e": {u"f": [u"foobar"]}}}]}}}}),
+            ),
             (
                 '(ansible_facts__a__b__c[]__d__e__f[]="foobar") and (ansible_facts__a__b__c[]__d__e[]="foobar")',
-                Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": {u"e": {u"f": [u"foobar"]}}}]}}}})
-                & Q(**{u"ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": {u"e": [u"foobar"]}}]}}}}),
+                Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": {u"e": {u"f": [u"foobar"]}}}]}}}})
+                & Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": {u"c": [{u"d": {u"e": [u"foobar"]}}]}}}}),
             ),
             # ('"a__b\"__c"="true"', Q(**{u"a__b\"__c": "true"})),
             # ('a__b\"__c="true"', Q(**{u"a__b\"__c": "true"})),
@@ -178,7 +186,7 @@ class TestSmartFilterQueryFromString:
         "filter_string,q_expected",
         [
             # ('a__b__c[]="true"', Q(**{u"a__b__c__contains": u"\"true\""})),
-            ('ansible_facts__a="true"', Q(**{u"ansible_facts__contains": {u"a": u"true"}})),
+            ('ansible_facts__a="true"', Q(**{u"host_facts__ansible_facts__contains": {u"a": u"true"}})),
             # ('"a__b\"__c"="true"', Q(**{u"a__b\"__c": "true"})),
             # ('a__b\"__c="true"', Q(**{u"a__b\"__c": "true"})),
         ],
@@ -190,8 +198,8 @@ class TestSmartFilterQueryFromString:
     @pytest.mark.parametrize(
         "filter_string,q_expected",
         [
-            ('ansible_facts__a=null', Q(**{u"ansible_facts__contains": {u"a": None}})),
-            ('ansible_facts__c="null"', Q(**{u"ansible_facts__contains": {u"c": u"\"null\""}})),
+            ('ansible_facts__a=null', Q(**{u"host_facts__ansible_facts__contains": {u"a": None}})),
+            ('ansible_facts__c="null"', Q(**{u"host_facts__ansible_facts__contains": {u"c": u"\"null\""}})),
         ],
     )
     def test_contains_query_generated_null(self, mock_get_host_model, filter_string, q_expected):
@@ -211,7 +219,7 @@ class TestSmartFilterQueryFromString:
             ),
             (
                 'search=foo or ansible_facts__a=null',
-                Q(Q(**{u"name__icontains": u"foo"}) | Q(**{u"description__icontains": u"foo"})) | Q(**{u"ansible_facts__contains": {u"a": None}}),
+                Q(Q(**{u"name__icontains": u"foo"}) | Q(**{u"description__icontains": u"foo"})) | Q(**{u"host_facts__ansible_facts__contains": {u"a": None}}),
             ),
         ],
     )
@@ -219,6 +227,29 @@ class TestSmartFilterQueryFromString:
         q = SmartFilter.query_from_string(filter_string)
         assert str(q) == str(q_expected)
 
+    def test_parsed_filter_cached(self, mock_get_host_model):
+        q = SmartFilter.query_from_string('a=b and c=d')
+        assert SmartFilter._parse.cache_info().hits == 0
+        assert str(SmartFilter.query_from_string('a=b and c=d')) == str(q)
+        assert SmartFilter._parse.cache_info().hits == 1
+
+    @mock.patch('ansible_base.rest_filters.rest_framework.field_lookup_backend.get_fields_from_path', lambda model, path, **kwargs: ([model], path))
+    def test_fact_paths(self, mock_get_host_model):
+        filter_string = (
+            'ansible_facts__a__b__c[]__d="x" and (ansible_facts__e=1 or ansible_facts__f=null) '
+            'or ansible_facts__contains__g=1 or ansible_facts__h__0=1 or name=foo'
+        )
+        assert SmartFilter.fact_paths(filter_string) == [('a', 'b', 'c'), ('e',)]
+
+    @mock.patch('ansible_base.rest_filters.rest_framework.field_lookup_backend.get_fields_from_path', lambda model, path, **kwargs: ([model], path))
+    def test_indexed_fact_path_predicate(self, mock_get_host_model):
+        with mock.patch('awx.main.utils.filters.get_indexed_fact_paths', return_value=frozenset([('a', 'b')])):
+            q = SmartFilter.query_from_string('ansible_facts__a__b[]="x" or ansible_facts__c="y"')
+        assert str(q) == str(
+            Q(**{u"host_facts__ansible_facts__contains": {u"a": {u"b": [u"x"]}}, u"host_facts__ansible_facts__a__b__contains": [u"x"]})
+            | Q(**{u"host_facts__ansible_facts__contains": {u"c": u"y"}})
+        )
+
 
 '''
 #('"facts__quoted_val"="f\"oo"', 1),
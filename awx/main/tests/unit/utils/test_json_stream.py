@@ -0,0 +1,50 @@
+import io
+import json
+
+import pytest
+
+from awx.main.utils import json_stream
+from awx.main.utils.json_stream import iter_json_items
+
+
+DATA = {
+    '_meta': {'hostvars': {'host-{}'.format(i): {'id': i, 'tags': ['a', 'b'], 'ratio': 0.5, 'up': True, 'note': None} for i in range(50)}},
+    'all': {'children': ['web', 'ungrouped'], 'vars': {'big': 12345678901234567890}},
+    'web': {'hosts': ['host-1', 'host-2']},
+    'ungrouped': {},
+}
+
+
+@pytest.fixture(params=[1, 7, 4096])
+def read_size(request, monkeypatch):
+    # small reads split values, keys and numbers across buffer refills
+    monkeypatch.setattr(json_stream.JSONStreamReader.__init__, '__defaults__', (request.param,))
+    return request.param
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+def test_iter_top_level_items(read_size, indent):
+    items = dict(iter_json_items(io.StringIO(json.dumps(DATA, indent=indent)), exclude=('_meta',)))
+    assert items == {k: v for k, v in DATA.items() if k != '_meta'}
+
+
+@pytest.mark.parametrize('indent', [None, 2])
+def test_iter_nested_items(read_size, indent):
+    items = list(iter_json_items(io.StringIO(json.dumps(DATA, indent=indent)), path=('_meta', 'hostvars')))
+    assert items == list(DATA['_meta']['hostvars'].items())
+
+
+@pytest.mark.parametrize('path', [('missing',), ('web', 'hosts')])
+def test_iter_missing_object(path):
+    assert list(iter_json_items(io.StringIO(json.dumps(DATA)), path=path)) == []
+
+
+@pytest.mark.parametrize('content', ['{"a": [1, 2', '{"a" 1}', '{"a": 1 "b": 2}', '{1: 2}'])
+def test_invalid_json(content):
+    with pytest.raises(ValueError):
+        list(iter_json_items(io.StringIO(content)))
+
+
+def test_not_an_object():
+    with pytest.raises(TypeError):
+        list(iter_json_items(io.StringIO('[]')))
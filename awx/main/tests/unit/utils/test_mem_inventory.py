@@ -1,5 +1,5 @@
 # AWX utils
-from awx.main.utils.mem_inventory import MemInventory, mem_data_to_dict, dict_to_mem_data
+from awx.main.utils.mem_inventory import MemInventory, mem_data_to_dict, dict_to_mem_data, stream_to_mem_data, iter_streamed_hostvars
 
 import pytest
 import json
@@ -118,3 +118,19 @@ def test_host_lists_accepted(JSON_with_lists):
     # Check that marietta's hosts was saved
     h = inventory.get_host('host6.example.com')
     assert h.name == 'host6.example.com'
+
+
+@pytest.mark.inventory_import
+def test_streamed_JSON_matches_loaded_JSON(JSON_of_inv, tmp_path):
+    path = tmp_path / 'inventory.json'
+    path.write_text(json.dumps(JSON_of_inv))
+    inventory = stream_to_mem_data(str(path))
+    # host variables are not kept in memory, only read back in chunks
+    assert inventory.get_host('my_host').variables == {}
+    hostvars = {}
+    for chunk in iter_streamed_hostvars(str(path), inventory.all_group, 1):
+        assert len(chunk) == 1
+        hostvars.update((host.name, variables) for host, variables in chunk)
+        chunk[0][0].variables = chunk[0][1]
+    assert hostvars == {'group_host': {}, 'my_host': {'foo': 'bar'}}
+    assert mem_data_to_dict(inventory) == mem_data_to_dict(dict_to_mem_data(JSON_of_inv))
@@ -1,4 +1,8 @@
-from awx.main.tasks.receptor import _convert_args_to_cli
+import concurrent.futures
+import threading
+import time
+
+from awx.main.tasks.receptor import _convert_args_to_cli, worker_info_many
 
 
 def test_file_cleanup_scenario():
@@ -19,3 +23,36 @@ def test_image_cleanup_scenario():
     assert (
         ' '.join(args) == 'cleanup --remove-images="quay.invalid/foo/bar:latest quay.invalid/foo/bar:devel" --image-prune --process-isolation-executable=podman'
     )
+
+
+def test_worker_info_many_runs_concurrently(mocker):
+    # stand-in for a receptor node that takes a while to answer
+    def slow_worker_info(node_name, timeout=20.0):
+        time.sleep(0.2)
+        return {'errors': [], 'node': node_name}
+
+    mocker.patch('awx.main.tasks.receptor.worker_info', side_effect=slow_worker_info)
+    start = time.time()
+    results = worker_info_many(['node{}'.format(i) for i in range(20)], timeout=1.0, max_workers=20)
+    assert time.time() - start < 2.0
+    assert sorted(results) == sorted('node{}'.format(i) for i in range(20))
+    assert all(data['node'] == name for name, data in results.items())
+
+
+def test_worker_info_many_reports_unresponsive_node(mocker):
+    gate = threading.Event()
+
+    def worker_info(node_name, timeout=20.0):
+        if node_name == 'stuck':
+            gate.wait(5)
+        return {'errors': []}
+
+    mocker.patch('awx.main.tasks.receptor.worker_info', side_effect=worker_info)
+    real_wait = concurrent.futures.wait
+    mocker.patch('awx.main.tasks.receptor.concurrent.futures.wait', side_effect=lambda fs, timeout: real_wait(fs, timeout=0.5))
+    try:
+        results = worker_info_many(['ok', 'stuck'], timeout=0.1, max_workers=2)
+    finally:
+        gate.set()
+    assert results['ok']['errors'] == []
+    assert 'did not complete' in results['stuck']['errors'][0]
@@ -0,0 +1,191 @@
+import hashlib
+import io
+import json
+import os
+import time
+from unittest import mock
+
+import pytest
+
+from awx.main.tasks.receptor import AWXReceptorJob
+from awx.main.utils.receptor_payload import BlobStore, build_manifest, file_digest, manifest_digests, run_query, run_worker, write_payload
+
+
+class StandInReceptor:
+    """
+    Plays the execution node side of the awx-payload-cache work command in
+    process, the payload goes through memory instead of the mesh.
+    """
+
+    def __init__(self, cache_dir, node_dir):
+        self.store = BlobStore(cache_dir)
+        self.node_dir = node_dir
+        self.payload_sizes = []
+        self.job_kwargs = None
+
+    def query(self, digests):
+        output = io.BytesIO()
+        run_query(self.store, io.BytesIO(json.dumps(digests).encode('utf-8')), output)
+        return json.loads(output.getvalue())['missing']
+
+    def fake_run(self, **kwargs):
+        # what ansible-runner would run the job with
+        self.job_kwargs = kwargs
+        return mock.Mock(status='successful', rc=0)
+
+    def submit(self, payload):
+        self.payload_sizes.append(len(payload))
+        output = io.BytesIO()
+        with mock.patch('ansible_runner.interface.run', side_effect=self.fake_run):
+            status, rc = run_worker(self.store, self.node_dir, io.BytesIO(payload), output, delete=True, max_size=10 * 1024 * 1024)
+        return status, [json.loads(line) for line in output.getvalue().splitlines()]
+
+
+def file_digest_bytes(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def transmit(receptor, private_data_dir, kwargs_line=b'{"kwargs": {"playbook": "site.yml", "ident": 1}}\n'):
+    manifest = build_manifest(private_data_dir)
+    missing = receptor.query(manifest_digests(manifest))
+    payload = io.BytesIO()
+    write_payload(payload, private_data_dir, manifest, missing, kwargs_line)
+    return missing, receptor.submit(payload.getvalue())
+
+
+@pytest.fixture
+def private_data_dir(tmp_path):
+    pdd = tmp_path / 'control' / 'awx_1_abc'
+    (pdd / 'project' / 'roles' / 'empty').mkdir(parents=True)
+    (pdd / 'project' / 'site.yml').write_text('- hosts: all\n')
+    (pdd / 'project' / 'big.bin').write_bytes(os.urandom(256 * 1024))
+    (pdd / 'project' / 'script.sh').write_text('#!/bin/sh\n')
+    os.chmod(pdd / 'project' / 'script.sh', 0o755)
+    os.symlink('site.yml', pdd / 'project' / 'main.yml')
+    (pdd / 'requirements_collections' / 'ansible_collections').mkdir(parents=True)
+    (pdd / 'requirements_collections' / 'ansible_collections' / 'MANIFEST.json').write_text('{}')
+    (pdd / 'inventory').mkdir()
+    (pdd / 'inventory' / 'hosts').write_text('#!/bin/sh\necho {}\n')
+    os.chmod(pdd / 'inventory' / 'hosts', 0o700)
+    (pdd / 'env').mkdir()
+    (pdd / 'env' / 'extravars').write_text('{"job_id": 1}')
+    return str(pdd)
+
+
+@pytest.fixture
+def receptor(tmp_path):
+    return StandInReceptor(str(tmp_path / 'cache'), str(tmp_path / 'node' / 'awx_1_abc'))
+
+
+def test_payload_round_trip(private_data_dir, receptor):
+    missing, (status, output) = transmit(receptor, private_data_dir)
+    assert status == 'successful'
+    assert len(missing) == 4  # site.yml, big.bin, script.sh, MANIFEST.json
+    assert receptor.job_kwargs['private_data_dir'] == receptor.node_dir
+    assert receptor.job_kwargs['playbook'] == 'site.yml'
+
+    node_dir = receptor.node_dir
+    with open(os.path.join(node_dir, 'project', 'site.yml')) as f:
+        assert f.read() == '- hosts: all\n'
+    assert file_digest(os.path.join(node_dir, 'project', 'big.bin')) == file_digest(os.path.join(private_data_dir, 'project', 'big.bin'))
+    assert os.stat(os.path.join(node_dir, 'project', 'script.sh')).st_mode & 0o777 == 0o755
+    assert os.readlink(os.path.join(node_dir, 'project', 'main.yml')) == 'site.yml'
+    assert os.path.isdir(os.path.join(node_dir, 'project', 'roles', 'empty'))
+    assert os.path.exists(os.path.join(node_dir, 'requirements_collections', 'ansible_collections', 'MANIFEST.json'))
+    # everything else came through the regular transmit stream
+    assert os.stat(os.path.join(node_dir, 'inventory', 'hosts')).st_mode & 0o777 == 0o700
+    with open(os.path.join(node_dir, 'env', 'extravars')) as f:
+        assert f.read() == '{"job_id": 1}'
+
+
+def test_only_missing_blobs_are_sent(private_data_dir, receptor):
+    transmit(receptor, private_data_dir)
+    missing, (status, output) = transmit(receptor, private_data_dir)
+    assert status == 'successful'
+    assert missing == []
+    # the project is not in the payload anymore
+    assert receptor.payload_sizes[1] < 256 * 1024 < receptor.payload_sizes[0]
+
+    with open(os.path.join(private_data_dir, 'project', 'site.yml'), 'w') as f:
+        f.write('- hosts: localhost\n')
+    missing, (status, output) = transmit(receptor, private_data_dir)
+    assert missing == [file_digest(os.path.join(private_data_dir, 'project', 'site.yml'))]
+    with open(os.path.join(receptor.node_dir, 'project', 'site.yml')) as f:
+        assert f.read() == '- hosts: localhost\n'
+
+
+def test_blob_pruned_after_query(private_data_dir, receptor):
+    transmit(receptor, private_data_dir)
+    manifest = build_manifest(private_data_dir)
+    assert receptor.query(manifest_digests(manifest)) == []
+    os.remove(receptor.store.path(file_digest(os.path.join(private_data_dir, 'project', 'site.yml'))))
+
+    receptor.job_kwargs = None
+    payload = io.BytesIO()
+    write_payload(payload, private_data_dir, manifest, [], b'{"kwargs": {}}\n')
+    status, output = receptor.submit(payload.getvalue())
+    assert status == 'error'
+    assert 'is not in the payload cache' in output[0]['job_explanation']
+    assert output[-1] == {'eof': True}
+    assert receptor.job_kwargs is None
+
+
+def test_corrupt_blob_rejected(tmp_path):
+    store = BlobStore(str(tmp_path))
+    with pytest.raises(ValueError):
+        store.add('0' * 64, 4, io.BytesIO(b'data'))
+    assert store.missing(['0' * 64]) == ['0' * 64]
+    with pytest.raises(ValueError):
+        store.path('../../etc/passwd')
+
+
+def test_cache_dir_others_can_write_refused(tmp_path):
+    cache_dir = tmp_path / 'cache'
+    cache_dir.mkdir()
+    os.chmod(cache_dir, 0o777)
+    store = BlobStore(str(cache_dir))
+    with pytest.raises(PermissionError):
+        run_query(store, io.BytesIO(b'[]'), io.BytesIO())
+
+    os.chmod(cache_dir, 0o700)
+    output = io.BytesIO()
+    run_query(store, io.BytesIO(b'[]'), output)
+    assert json.loads(output.getvalue()) == {'missing': []}
+
+
+def test_prune_least_recently_used(tmp_path):
+    store = BlobStore(str(tmp_path))
+    digests = []
+    for i, content in enumerate((b'a' * 100, b'b' * 100, b'c' * 100)):
+        digest = file_digest_bytes(content)
+        store.add(digest, len(content), io.BytesIO(content))
+        os.utime(store.path(digest), (1000 + i, 1000 + i))
+        digests.append(digest)
+    recent = file_digest_bytes(b'd' * 100)
+    store.add(recent, 100, io.BytesIO(b'd' * 100))
+
+    store.prune(max_size=150)
+    # the recently used blob is kept even though the cache is still too big
+    assert store.missing(digests + [recent]) == digests
+    assert time.time() - os.stat(store.path(recent)).st_mtime < 60
+
+
+def test_prepare_cached_transmit(private_data_dir, receptor, settings):
+    settings.AWX_RECEPTOR_PAYLOAD_CACHE_MAX_SIZE = 1024
+    settings.AWX_CLEANUP_PATHS = True
+    settings.CLUSTER_HOST_ID = 'control1'
+    task = mock.Mock()
+    task.instance.is_container_group_task = False
+    task.instance.execution_node = 'exec1'
+    task.instance.controller_node = 'control1'
+    task.build_execution_environment_params.return_value = {}
+    job = AWXReceptorJob(task, runner_params={'private_data_dir': private_data_dir, 'playbook': 'site.yml', 'ident': 1})
+    with mock.patch('awx.main.tasks.receptor.payload_cache_missing', side_effect=lambda node, digests: receptor.query(digests)):
+        cached_transmit = job.prepare_cached_transmit('exec1')
+    assert cached_transmit.func == job.transmit_cached
+    assert json.loads(cached_transmit.keywords['kwargs_line'])['kwargs']['playbook'] == 'site.yml'
+    assert len(cached_transmit.keywords['missing']) == 4
+    assert job.payload_cache_params == {'params': f'worker --private-data-dir={private_data_dir} --delete --max-size=1024'}
+
+    with mock.patch('awx.main.tasks.receptor.payload_cache_missing', side_effect=RuntimeError('unknown work type')):
+        assert job.prepare_cached_transmit('exec1') is None
@@ -479,6 +479,7 @@ def copy_model_by_class(obj1, Class2, fields, kwargs):
     values in kwargs can override obj1
     """
     create_kwargs = {}
+    related_objects = {}
     for field_name in fields:
         descriptor = getattr(Class2, field_name)
         if isinstance(descriptor, ForwardManyToOneDescriptor):  # ForeignKey
@@ -490,7 +491,10 @@ def copy_model_by_class(obj1, Class2, fields, kwargs):
                 value = kwargs[id_field_name]
             else:
                 value = getattr(obj1, id_field_name)
+                if value is not None and descriptor.is_cached(obj1):
+                    related_objects[field_name] = descriptor.field.get_cached_value(obj1)
             if hasattr(value, 'id'):
+                related_objects[field_name] = value
                 value = value.id
             create_kwargs[id_field_name] = value
         elif isinstance(descriptor, CharPromptDescriptor):
@@ -523,7 +527,15 @@ def copy_model_by_class(obj1, Class2, fields, kwargs):
     else:
         new_kwargs = create_kwargs
 
-    return Class2(**new_kwargs)
+    obj2 = Class2(**new_kwargs)
+    # Related objects already loaded for obj1 or given in kwargs are set on
+    # the new object, so that reading them does not query them again
+    for field_name, related_object in related_objects.items():
+        if not isinstance(related_object, Class2._meta.get_field(field_name).related_model):
+            continue
+        if getattr(obj2, '%s_id' % field_name) == related_object.id:
+            setattr(obj2, field_name, related_object)
+    return obj2
 
 
 def copy_m2m_relationships(obj1, obj2, fields, kwargs=None):
@@ -546,14 +558,20 @@ def copy_m2m_relationships(obj1, obj2, fields, kwargs=None):
                     if isinstance(override_field_val, (set, list, QuerySet)):
                         # Labels are additive so we are going to add any src labels in addition to the override labels
                         if field_name == 'labels':
-                            for jt_label in src_field_value.all():
-                                getattr(obj2, field_name).add(jt_label.id)
+                            override_field_val = _related_ids(src_field_value) + list(override_field_val)
                         getattr(obj2, field_name).add(*override_field_val)
                         continue
                     if override_field_val.__class__.__name__ == 'ManyRelatedManager':
                         src_field_value = override_field_val
                 dest_field = getattr(obj2, field_name)
-                dest_field.add(*list(src_field_value.all().values_list('id', flat=True)))
+                dest_field.add(*_related_ids(src_field_value))
+
+
+def _related_ids(manager):
+    # ids from the prefetch cache when the relation was prefetched, else with a single column query
+    if manager.prefetch_cache_name in getattr(manager.instance, '_prefetched_objects_cache', {}):
+        return [obj.id for obj in manager.all()]
+    return list(manager.all().values_list('id', flat=True))
 
 
 def get_model_for_type(type_name):
@@ -884,9 +902,11 @@ class ScheduleManager:
 
     def _schedule(self):
         from django.db import connection
+        from awx.main.scheduler.wakeup import ManagerWakeup
 
-        # runs right away if not in transaction
-        connection.on_commit(lambda: self.manager.delay())
+        # runs right away if not in transaction, the request is folded into
+        # any wakeup of this manager that is already queued or running
+        connection.on_commit(lambda: ManagerWakeup(self.manager.__name__).request())
 
     def schedule(self):
         if getattr(self.manager_threading_local, 'bulk_reschedule', False):
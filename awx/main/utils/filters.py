@@ -1,5 +1,6 @@
+import json
 import re
-from functools import reduce
+from functools import lru_cache, reduce
 from pyparsing import (
     infixNotation,
     opAssoc,
@@ -12,7 +13,8 @@ import logging
 from logging import Filter
 
 from django.apps import apps
-from django.db import models
+from django.core.cache import cache
+from django.db import connection, models
 from django.conf import settings
 
 from django_guid import get_guid
@@ -143,29 +145,87 @@ def get_model(name):
     return apps.get_model('main', name)
 
 
+# expression indexes over paths into ansible_facts, see the smart_filter_indexes command
+FACT_PATH_INDEX_PREFIX = 'hostfacts_path_'
+INDEXED_FACT_PATHS_CACHE_KEY = 'awx_smart_filter_indexed_fact_paths'
+
+
+def get_indexed_fact_paths():
+    """
+    The fact paths that have a valid expression index, the path of each
+    index is kept in the comment of the index.
+    """
+    if connection.vendor != 'postgresql':
+        return frozenset()
+    paths = cache.get(INDEXED_FACT_PATHS_CACHE_KEY)
+    if paths is None:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT obj_description(i.indexrelid, 'pg_class') FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE i.indrelid = 'main_hostfacts'::regclass AND i.indisvalid AND c.relname LIKE %s",
+                [FACT_PATH_INDEX_PREFIX + '%'],
+            )
+            paths = frozenset(tuple(json.loads(row[0])) for row in cursor.fetchall() if row[0])
+        cache.set(INDEXED_FACT_PATHS_CACHE_KEY, paths, 300)
+    return paths
+
+
 class SmartFilter(object):
     SEARCHABLE_RELATIONSHIP = 'ansible_facts'
+    # facts are stored out of the host row, see HostFacts
+    SEARCHABLE_FIELD = 'host_facts__ansible_facts'
+    CONTAINS_LOOKUP = '%s__contains' % SEARCHABLE_FIELD
 
     class BoolOperand(object):
         def __init__(self, t):
-            kwargs = dict()
+            self.args = ()
+            self.kwargs = dict()
+            self.fact_path = None
+            self.fact_value = None
             k, v = self._extract_key_value(t)
             k, v = self._json_path_to_contains(k, v)
 
-            Host = get_model('host')
             search_kwargs = self._expand_search(k, v)
             if search_kwargs:
-                kwargs.update(search_kwargs)
-                q = reduce(lambda x, y: x | y, [models.Q(**{u'%s__icontains' % _k: _v}) for _k, _v in kwargs.items()])
-                self.result = Host.objects.filter(q)
+                q = reduce(lambda x, y: x | y, [models.Q(**{u'%s__icontains' % _k: _v}) for _k, _v in search_kwargs.items()])
+                self.args = (q,)
             else:
                 # detect loops and restrict access to sensitive fields
                 # this import is intentional here to avoid a circular import
                 from ansible_base.rest_filters.rest_framework.field_lookup_backend import FieldLookupBackend
 
-                FieldLookupBackend().get_field_from_lookup(Host, k)
-                kwargs[k] = v
-                self.result = Host.objects.filter(**kwargs)
+                FieldLookupBackend().get_field_from_lookup(get_model('host'), k)
+                self.kwargs[k] = v
+                if k == SmartFilter.CONTAINS_LOOKUP:
+                    self.fact_path, self.fact_value = self._split_fact_path(v)
+
+        @property
+        def result(self):
+            kwargs = dict(self.kwargs)
+            if self.fact_path and self.fact_path in get_indexed_fact_paths():
+                # implied by the containment over the whole document, lets
+                # postgres use the expression index of the path
+                kwargs['__'.join((SmartFilter.SEARCHABLE_FIELD,) + self.fact_path + ('contains',))] = self.fact_value
+            return get_model('host').objects.filter(*self.args, **kwargs)
+
+        def operands(self):
+            yield self
+
+        @staticmethod
+        def _split_fact_path(v):
+            """
+            Split the document of a fact containment into the keys leading to
+            the first list or value and that list or value, e.g.
+            {"a": {"b": [1]}} into ('a', 'b') and [1]. Returns no path when
+            it can not be expressed as key transforms.
+            """
+            path = []
+            while isinstance(v, dict):
+                key, v = next(iter(v.items()))
+                path.append(key)
+            if v is None or not SmartFilter.indexable_fact_path(path):
+                return None, None
+            return tuple(path), v
 
         def strip_quotes_traditional_logic(self, v):
             if type(v) is str and v.startswith('"') and v.endswith('"'):
@@ -210,7 +270,7 @@ class SmartFilter(object):
 
             pieces = k.split(u'__')
 
-            assembled_k = u'%s__contains' % (SmartFilter.SEARCHABLE_RELATIONSHIP)
+            assembled_k = u'%s__contains' % (SmartFilter.SEARCHABLE_FIELD)
             assembled_v = None
 
             last_v = None
@@ -301,18 +361,19 @@ class SmartFilter(object):
 
     class BoolBinOp(object):
         def __init__(self, t):
-            self.result = None
-            i = 2
-            while i < len(t[0]):
-                """
-                Do NOT observe self.result. It will cause the sql query to be executed.
-                We do not want that. We only want to build the query.
-                """
-                if isinstance(self.result, type(None)):
-                    self.result = t[0][0].result
-                right = t[0][i].result
-                self.result = self.execute_logic(self.result, right)
-                i += 2
+            self.children = t[0][0::2]
+
+        @property
+        def result(self):
+            """
+            Do NOT observe the result. It will cause the sql query to be executed.
+            We do not want that. We only want to build the query.
+            """
+            return reduce(self.execute_logic, (operand.result for operand in self.children))
+
+        def operands(self):
+            for operand in self.children:
+                yield from operand.operands()
 
     class BoolAnd(BoolBinOp):
         def execute_logic(self, left, right):
@@ -322,17 +383,22 @@ class SmartFilter(object):
         def execute_logic(self, left, right):
             return left | right
 
+    @staticmethod
+    def indexable_fact_path(path):
+        # keys that read as lookups or array indexes would change the meaning of the query
+        reserved = set(models.JSONField.get_lookups())
+        return bool(path) and all(key and key not in reserved and not key.lstrip('-').isdigit() for key in path)
+
     @classmethod
-    def query_from_string(cls, filter_string):
+    @lru_cache(maxsize=512)
+    def _parse(cls, filter_string, host_model):
         """
-        TODO:
-        * handle values with " via: a.b.c.d="hello\"world"
-        * handle keys with " via: a.\"b.c="yeah"
-        * handle key with __ in it
+        Parse filter_string into a tree of operands, cached by the text of
+        the filter since smart inventories parse the same few filters over
+        and over. host_model is part of the cache key because the search
+        fields are looked up from it, the querysets are built anew from the
+        tree by query_from_string.
         """
-        filter_string_raw = filter_string
-        filter_string = str(filter_string)
-
         unicode_spaces = list(set(str(c) for c in filter_string if c.isspace()))
         unicode_spaces_other = unicode_spaces + [u'(', u')', u'=', u'"']
         atom = CharsNotIn(unicode_spaces_other)
@@ -354,13 +420,31 @@ class SmartFilter(object):
         try:
             res = boolExpr.parseString('(' + filter_string + ')')
         except ParseException:
-            raise RuntimeError(u"Invalid query %s" % filter_string_raw)
+            raise RuntimeError(u"Invalid query %s" % filter_string)
 
         if len(res) > 0:
-            return res[0].result
+            return res[0]
 
         raise RuntimeError("Parsing the filter_string %s went terribly wrong" % filter_string)
 
+    @classmethod
+    def query_from_string(cls, filter_string):
+        """
+        TODO:
+        * handle values with " via: a.b.c.d="hello\"world"
+        * handle keys with " via: a.\"b.c="yeah"
+        * handle key with __ in it
+        """
+        return cls._parse(str(filter_string), get_model('host')).result
+
+    @classmethod
+    def fact_paths(cls, filter_string):
+        """
+        The paths into ansible_facts that filter_string compares, as used
+        for expression indexes.
+        """
+        return [operand.fact_path for operand in cls._parse(str(filter_string), get_model('host')).operands() if operand.fact_path]
+
 
 class DefaultCorrelationId(CorrelationId):
     def filter(self, record):
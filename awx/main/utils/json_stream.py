@@ -0,0 +1,136 @@
+import json
+import re
+
+
+__all__ = ['iter_json_items']
+
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+READ_SIZE = 1024 * 1024
+
+
+class JSONStreamReader(object):
+    """
+    Incrementally reads JSON from a text file object.
+
+    Only the parts of the document that are asked for are decoded, and the
+    buffer only holds the value currently being decoded, so an object with a
+    huge number of members can be walked through in bounded memory.
+    """
+
+    def __init__(self, fileobj, read_size=READ_SIZE):
+        self.fileobj = fileobj
+        self.read_size = read_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self, size=None):
+        data = self.fileobj.read(size or self.read_size)
+        self.buf = self.buf[self.pos :] + data
+        self.pos = 0
+        if not data:
+            self.eof = True
+        return bool(data)
+
+    def peek(self):
+        """
+        Return the next character that is not whitespace, without consuming it.
+        """
+        while True:
+            self.pos = WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                raise ValueError('Unexpected end of JSON input')
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError('Expected "{}" in JSON input, found "{}"'.format(char, found))
+        self.pos += 1
+
+    def value(self):
+        """
+        Decode and return the next value.
+        """
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                # at least double what is buffered, so big values are not re-decoded too often
+                self._fill(max(self.read_size, len(self.buf) - self.pos))
+                continue
+            if end == len(self.buf) and not self.eof:
+                # a number could continue in the data not read yet
+                if self._fill():
+                    continue
+            self.pos = end
+            return obj
+
+    def skip(self, depth=2):
+        """
+        Consume the next value without keeping it, members of objects are
+        decoded one by one down to the given depth.
+        """
+        if depth and self.peek() == '{':
+            for key in self.members():
+                self.skip(depth - 1)
+        else:
+            self.value()
+
+    def members(self):
+        """
+        Iterate over the keys of the object starting at the current position.
+        The value of each member must be consumed before asking for the next key.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError('Expected string key in JSON object, got {}'.format(type(key)))
+            self.expect(':')
+            yield key
+            char = self.peek()
+            self.pos += 1
+            if char == '}':
+                return
+            if char != ',':
+                raise ValueError('Expected "," or "}}" in JSON object, found "{}"'.format(char))
+
+
+def _iter_items(reader, path, exclude):
+    for key in reader.members():
+        if path:
+            if key == path[0] and reader.peek() == '{':
+                yield from _iter_items(reader, path[1:], exclude)
+            else:
+                reader.skip(depth=0)
+        elif key in exclude:
+            reader.skip()
+        else:
+            yield key, reader.value()
+
+
+def iter_json_items(fileobj, path=(), exclude=()):
+    """
+    Yield the (key, value) members of the JSON object found by following the
+    keys in path from the top level object of the document in fileobj, one
+    member at a time. Values of the members named in exclude are skipped
+    without being loaded as a whole.
+
+    This does not validate the parts of the document that are skipped over
+    any more than needed to find the end of them.
+    """
+    reader = JSONStreamReader(fileobj)
+    if reader.peek() != '{':
+        raise TypeError('Returned JSON must be a dictionary')
+    yield from _iter_items(reader, tuple(path), frozenset(exclude))
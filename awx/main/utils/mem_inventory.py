@@ -6,13 +6,16 @@ import re
 import logging
 from collections import OrderedDict
 
+# AWX
+from awx.main.utils.json_stream import iter_json_items
+
 
 # Logger is used for any data-related messages so that the log level
 # can be adjusted on command invocation
 logger = logging.getLogger('awx.main.commands.inventory_import')
 
 
-__all__ = ['MemHost', 'MemGroup', 'MemInventory', 'mem_data_to_dict', 'dict_to_mem_data']
+__all__ = ['MemHost', 'MemGroup', 'MemInventory', 'mem_data_to_dict', 'dict_to_mem_data', 'stream_to_mem_data', 'iter_streamed_hostvars']
 
 
 ipv6_port_re = re.compile(r'^\[([A-Fa-f0-9:]{3,})\]:(\d+?)$')
@@ -26,6 +29,8 @@ class MemObject(object):
     Common code shared between in-memory groups and hosts.
     """
 
+    __slots__ = ('name',)
+
     def __init__(self, name):
         assert name, 'no name'
         self.name = name
@@ -36,11 +41,12 @@ class MemGroup(MemObject):
     In-memory representation of an inventory group.
     """
 
+    __slots__ = ('children', 'hosts', 'variables', 'parents', 'all_hosts', 'all_groups')
+
     def __init__(self, name):
         super(MemGroup, self).__init__(name)
         self.children = []
         self.hosts = []
-        self.variables = {}
         self.parents = []
         # Used on the "all" group in place of previous global variables.
         # maps host and group names to hosts to prevent redudant additions
@@ -88,6 +94,8 @@ class MemHost(MemObject):
     In-memory representation of an inventory host.
     """
 
+    __slots__ = ('variables', 'instance_id')
+
     def __init__(self, name, port=None):
         super(MemHost, self).__init__(name)
         self.variables = {}
@@ -224,6 +232,68 @@ def mem_data_to_dict(inventory):
     return inventory_data
 
 
+def _load_group_data(inventory, k, v):
+    """
+    Adds the hosts, variables and children of the group named k, given as
+    they appear in the ansible-inventory output, to `inventory`.
+    """
+    group = inventory.get_group(k)
+    if not group:
+        return
+
+    # Load group hosts/vars/children from a dictionary.
+    if isinstance(v, dict):
+        # Process hosts within a group.
+        hosts = v.get('hosts', {})
+        if isinstance(hosts, dict):
+            for hk, hv in hosts.items():
+                host = inventory.get_host(hk)
+                if not host:
+                    continue
+                if isinstance(hv, dict):
+                    host.variables.update(hv)
+                else:
+                    logger.warning('Expected dict of vars for host "%s", got %s instead', hk, str(type(hv)))
+                group.add_host(host)
+        elif isinstance(hosts, (list, tuple)):
+            for hk in hosts:
+                host = inventory.get_host(hk)
+                if not host:
+                    continue
+                group.add_host(host)
+        else:
+            logger.warning('Expected dict or list of "hosts" for group "%s", got %s instead', k, str(type(hosts)))
+        # Process group variables.
+        vars = v.get('vars', {})
+        if isinstance(vars, dict):
+            group.variables.update(vars)
+        else:
+            logger.warning('Expected dict of vars for group "%s", got %s instead', k, str(type(vars)))
+        # Process child groups.
+        children = v.get('children', [])
+        if isinstance(children, (list, tuple)):
+            for c in children:
+                child = inventory.get_group(c, inventory.all_group, child=True)
+                if child and c != 'ungrouped':
+                    group.add_child_group(child)
+        else:
+            logger.warning('Expected list of children for group "%s", got %s instead', k, str(type(children)))
+
+    # Load host names from a list.
+    elif isinstance(v, (list, tuple)):
+        for h in v:
+            host = inventory.get_host(h)
+            if not host:
+                continue
+            group.add_host(host)
+    else:
+        logger.warning('')
+        logger.warning('Expected dict or list for group "%s", got %s instead', k, str(type(v)))
+
+    if k not in ['all', 'ungrouped']:
+        inventory.all_group.add_child_group(group)
+
+
 def dict_to_mem_data(data, inventory=None):
     """
     In-place operation on `inventory`, adds contents from `data` to the
@@ -237,61 +307,7 @@ def dict_to_mem_data(data, inventory=None):
     _meta = data.pop('_meta', {})
 
     for k, v in data.items():
-        group = inventory.get_group(k)
-        if not group:
-            continue
-
-        # Load group hosts/vars/children from a dictionary.
-        if isinstance(v, dict):
-            # Process hosts within a group.
-            hosts = v.get('hosts', {})
-            if isinstance(hosts, dict):
-                for hk, hv in hosts.items():
-                    host = inventory.get_host(hk)
-                    if not host:
-                        continue
-                    if isinstance(hv, dict):
-                        host.variables.update(hv)
-                    else:
-                        logger.warning('Expected dict of vars for host "%s", got %s instead', hk, str(type(hv)))
-                    group.add_host(host)
-            elif isinstance(hosts, (list, tuple)):
-                for hk in hosts:
-                    host = inventory.get_host(hk)
-                    if not host:
-                        continue
-                    group.add_host(host)
-            else:
-                logger.warning('Expected dict or list of "hosts" for group "%s", got %s instead', k, str(type(hosts)))
-            # Process group variables.
-            vars = v.get('vars', {})
-            if isinstance(vars, dict):
-                group.variables.update(vars)
-            else:
-                logger.warning('Expected dict of vars for group "%s", got %s instead', k, str(type(vars)))
-            # Process child groups.
-            children = v.get('children', [])
-            if isinstance(children, (list, tuple)):
-                for c in children:
-                    child = inventory.get_group(c, inventory.all_group, child=True)
-                    if child and c != 'ungrouped':
-                        group.add_child_group(child)
-            else:
-                logger.warning('Expected list of children for group "%s", got %s instead', k, str(type(children)))
-
-        # Load host names from a list.
-        elif isinstance(v, (list, tuple)):
-            for h in v:
-                host = inventory.get_host(h)
-                if not host:
-                    continue
-                group.add_host(host)
-        else:
-            logger.warning('')
-            logger.warning('Expected dict or list for group "%s", got %s instead', k, str(type(v)))
-
-        if k not in ['all', 'ungrouped']:
-            inventory.all_group.add_child_group(group)
+        _load_group_data(inventory, k, v)
 
     if _meta:
         for k, v in inventory.all_group.all_hosts.items():
@@ -302,3 +318,58 @@ def dict_to_mem_data(data, inventory=None):
                 logger.warning('Expected dict of vars for host "%s", got %s instead', k, str(type(meta_hostvars)))
 
     return inventory
+
+
+def stream_to_mem_data(path, inventory=None):
+    """
+    Like dict_to_mem_data, but reads the groups from the JSON file at `path`
+    member by member and leaves out the hostvars in `_meta`, which make up
+    most of a large inventory. Those are read back in chunks with
+    iter_streamed_hostvars when they are needed.
+    """
+    if inventory is None:
+        inventory = MemInventory()
+
+    with open(path) as f:
+        for k, v in iter_json_items(f, exclude=('_meta',)):
+            _load_group_data(inventory, k, v)
+
+    return inventory
+
+
+def iter_streamed_hostvars(path, all_group, chunk_size, only=None):
+    """
+    Yields lists of up to `chunk_size` (host, variables) pairs for the hosts
+    of `all_group`, loaded by stream_to_mem_data, in the order of the JSON
+    file at `path`. The variables combine the host variables kept in memory
+    with the ones of `_meta` and are not kept after the chunk is consumed.
+    If `only` is given, just the hosts whose name is in it are yielded.
+    """
+    all_hosts = all_group.all_hosts
+    seen = set()
+    chunk = []
+    with open(path) as f:
+        for k, meta_hostvars in iter_json_items(f, path=('_meta', 'hostvars')):
+            host = all_hosts.get(k)
+            if host is None or host.name in seen or (only is not None and host.name not in only):
+                continue
+            seen.add(host.name)
+            variables = dict(host.variables)
+            if isinstance(meta_hostvars, dict):
+                variables.update(meta_hostvars)
+            else:
+                logger.warning('Expected dict of vars for host "%s", got %s instead', k, str(type(meta_hostvars)))
+            chunk.append((host, variables))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+    # hosts that have no hostvars
+    for k, host in all_hosts.items():
+        if k in seen or (only is not None and k not in only):
+            continue
+        chunk.append((host, dict(host.variables)))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
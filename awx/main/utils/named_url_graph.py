@@ -1,9 +1,13 @@
 # Python
+import hashlib
 import urllib.parse
+import uuid
 from collections import deque
 
 # Django
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models.signals import post_delete, post_save
 from django.conf import settings
 
 
@@ -18,6 +22,8 @@ NEXT_NODE = 1
 
 NAME_EXCEPTIONS = {"custom_inventory_scripts": "inventory_scripts"}
 
+NAMED_URL_CACHE_PREFIX = 'awx_named_url_'
+
 
 class GraphNode(object):
     def __init__(self, model, fields, adj_list):
@@ -148,6 +154,36 @@ class GraphNode(object):
                 return False
         return idx == len(named_url_names)
 
+    @property
+    def named_url_models(self):
+        """This model and the models of the nodes its named url goes through"""
+        if not hasattr(self, '_named_url_models'):
+            self._named_url_models = [self.model]
+            for _, next_node in self.adj_list:
+                self._named_url_models.extend(m for m in next_node.named_url_models if m not in self._named_url_models)
+        return self._named_url_models
+
+    @property
+    def identity_fields(self):
+        """The fields of this model that its own part of a named url depends on"""
+        fields = set(self.fields)
+        for fk_name, _ in self.adj_list:
+            fields.update((fk_name, self.model._meta.get_field(fk_name).attname))
+        return fields
+
+    def cache_key(self, named_url):
+        """
+        The cache key of the primary key a named url resolves to. The key
+        includes the generation of every model along the named url, so that
+        renaming or deleting any of them leaves the keys cached before
+        unused. None if the cache is not available.
+        """
+        generations = get_named_url_generations(self.named_url_models)
+        if None in generations:
+            return None
+        digest = hashlib.sha1(named_url.encode('utf-8')).hexdigest()
+        return '{}{}_{}_{}'.format(NAMED_URL_CACHE_PREFIX, self.model_url_name, '_'.join(generations), digest)
+
     def add_bindings(self):
         if self.model_url_name not in settings.NAMED_URL_FORMATS:
             settings.NAMED_URL_FORMATS[self.model_url_name] = self.named_url_format
@@ -323,3 +359,43 @@ def _customize_graph():
     if Instance not in settings.NAMED_URL_GRAPH:
         settings.NAMED_URL_GRAPH[Instance] = GraphNode(Instance, ['hostname'], [])
         settings.NAMED_URL_GRAPH[Instance].add_bindings()
+
+
+def _generation_key(model):
+    return '{}generation_{}'.format(NAMED_URL_CACHE_PREFIX, model._meta.label_lower)
+
+
+def get_named_url_generations(models):
+    keys = [_generation_key(model) for model in models]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # a fresh generation, the keys of an evicted one are not reused
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def invalidate_named_urls(model):
+    key = _generation_key(model)
+    cache.set(key, uuid.uuid4().hex, timeout=None)
+    # and again once committed, in case a concurrent request cached what it read before the change under the new generation
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, timeout=None))
+
+
+def _named_url_changed(sender, instance, created=False, update_fields=None, **kwargs):
+    # new objects only resolve named urls that did not resolve before, and those are not cached
+    if created:
+        return
+    node = settings.NAMED_URL_GRAPH.get(sender)
+    if node is None:
+        return
+    if update_fields is not None and not node.identity_fields.intersection(update_fields):
+        return
+    invalidate_named_urls(sender)
+
+
+def connect_named_url_cache_signals():
+    for model in settings.NAMED_URL_GRAPH:
+        post_save.connect(_named_url_changed, sender=model, dispatch_uid='named_url_save_{}'.format(model._meta.label_lower))
+        post_delete.connect(_named_url_changed, sender=model, dispatch_uid='named_url_delete_{}'.format(model._meta.label_lower))
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+Content-addressed transfer of job payloads over the Receptor mesh.
+
+The project tree and the roles and collections of a job are the same for
+every job of a project revision, so instead of zipping them into every
+payload the control node sends a manifest of their files by sha256 digest
+plus only the blobs the execution node does not hold yet. The execution
+node keeps the blobs in a cache, builds the private data dir from it and
+hands the rest of the stream, which is a regular ansible-runner transmit
+stream without those folders, to the ansible-runner worker.
+
+This module is also the awx-payload-cache work command installed on
+execution nodes by the install bundle, so it must only depend on the
+standard library and ansible-runner.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+import zipfile
+
+PAYLOAD_CACHE_WORKTYPE = 'awx-payload-cache'
+
+CACHED_SUBFOLDERS = ('project', 'requirements_collections', 'requirements_roles')
+
+# in the home of the user receptor runs as, a directory others can write to,
+# like one under /tmp, would let them change the content of jobs
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'awx_payload_cache')
+
+# blobs used more recently than this are never pruned, which covers the time
+# between a query from the control node and the job that follows it
+PRUNE_MIN_AGE = 3600
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(private_data_dir, subfolders=CACHED_SUBFOLDERS):
+    """
+    Describe the content of the given subfolders of private_data_dir:
+    files by digest and mode, symlinks by target, and directories so that
+    empty ones are kept. Paths are relative to private_data_dir.
+    """
+    manifest = {'dirs': [], 'files': {}, 'symlinks': {}}
+    for subfolder in subfolders:
+        top = os.path.join(private_data_dir, subfolder)
+        if not os.path.isdir(top) or os.path.islink(top):
+            continue
+        manifest['dirs'].append(subfolder)
+        for dirpath, dirs, files in os.walk(top):
+            for name in sorted(dirs + files):
+                path = os.path.join(dirpath, name)
+                relpath = os.path.relpath(path, private_data_dir)
+                st = os.lstat(path)
+                if stat.S_ISLNK(st.st_mode):
+                    manifest['symlinks'][relpath] = os.readlink(path)
+                elif stat.S_ISDIR(st.st_mode):
+                    manifest['dirs'].append(relpath)
+                elif stat.S_ISREG(st.st_mode):
+                    manifest['files'][relpath] = [file_digest(path), stat.S_IMODE(st.st_mode)]
+    return manifest
+
+
+def manifest_digests(manifest):
+    return sorted(set(digest for digest, mode in manifest['files'].values()))
+
+
+class BlobStore(object):
+    """
+    Blobs by sha256 digest on the execution node. The mtime of a blob is the
+    last time it was used, pruning removes the least recently used ones.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def ensure_private(self):
+        """
+        Create the store only accessible by this user, and refuse to use one that
+        others can write to, blobs are not hashed again when jobs use them.
+        """
+        os.makedirs(self.root, mode=0o700, exist_ok=True)
+        st = os.lstat(self.root)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or stat.S_IMODE(st.st_mode) & 0o077:
+            raise PermissionError('Payload cache {} must be a directory owned by and only accessible to uid {}'.format(self.root, os.getuid()))
+
+    def path(self, digest):
+        if len(digest) != 64 or not all(c in '0123456789abcdef' for c in digest):
+            raise ValueError('Invalid blob digest {}'.format(digest))
+        return os.path.join(self.root, digest[:2], digest)
+
+    def touch(self, digest):
+        try:
+            os.utime(self.path(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def missing(self, digests):
+        return [digest for digest in digests if not self.touch(digest)]
+
+    def add(self, digest, size, stream):
+        """
+        Read a blob of size bytes from stream into the store, the content
+        must match the digest.
+        """
+        path = self.path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.~~tmp~~', dir=os.path.dirname(path))
+        try:
+            hasher = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as f:
+                remaining = size
+                while remaining:
+                    chunk = stream.read(min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        raise EOFError('Payload ended inside of blob {}'.format(digest))
+                    hasher.update(chunk)
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            if hasher.hexdigest() != digest:
+                raise ValueError('Content of blob {} does not match its digest'.format(digest))
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def prune(self, max_size, min_age=PRUNE_MIN_AGE):
+        blobs = []
+        total = 0
+        for dirpath, dirs, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                if name.startswith('.~~') and st.st_mtime < time.time() - min_age:
+                    # left behind by an interrupted transfer
+                    os.remove(path)
+                    continue
+                blobs.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+        cutoff = time.time() - min_age
+        for mtime, size, path in sorted(blobs):
+            if total <= max_size or mtime >= cutoff:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+def materialize(manifest, store, private_data_dir):
+    """
+    Create the folders described by the manifest in private_data_dir from
+    blobs in the store. Files are copied, jobs may change them.
+    """
+    for relpath in manifest['dirs']:
+        os.makedirs(os.path.join(private_data_dir, relpath), exist_ok=True)
+    for relpath, (digest, mode) in manifest['files'].items():
+        src = store.path(digest)
+        dst = os.path.join(private_data_dir, relpath)
+        try:
+            shutil.copyfile(src, dst)
+        except FileNotFoundError:
+            if not os.path.exists(src):
+                raise LookupError('Blob {} for {} is not in the payload cache'.format(digest, relpath))
+            raise
+        os.chmod(dst, mode)
+        os.utime(src)
+    for relpath, target in manifest['symlinks'].items():
+        os.symlink(target, os.path.join(private_data_dir, relpath))
+
+
+def stream_dir_excluding(source_directory, stream, exclude=CACHED_SUBFOLDERS):
+    """
+    Same as ansible_runner.utils.streaming.stream_dir, without the top level
+    folders named in exclude.
+    """
+    from ansible_runner.utils.base64io import Base64IO
+
+    with tempfile.NamedTemporaryFile() as tmp:
+        with zipfile.ZipFile(tmp.name, 'w', compression=zipfile.ZIP_DEFLATED, allowZip64=True, strict_timestamps=False) as archive:
+            for dirpath, dirs, files in os.walk(source_directory):
+                relpath = os.path.relpath(dirpath, source_directory)
+                if relpath == '.':
+                    relpath = ''
+                    dirs[:] = [name for name in dirs if name not in exclude]
+                for name in files + dirs:
+                    full_path = os.path.join(dirpath, name)
+                    arcname = os.path.join(relpath, name)
+                    if os.path.islink(full_path):
+                        zip_info = zipfile.ZipInfo(arcname)
+                        zip_info.create_system = 3
+                        zip_info.external_attr = (0o777 | 0xA000) << 16
+                        archive.writestr(zip_info, os.readlink(full_path))
+                    elif stat.S_ISFIFO(os.stat(full_path).st_mode):
+                        continue
+                    else:
+                        archive.write(full_path, arcname=arcname)
+        stream.write(json.dumps({'zipfile': os.path.getsize(tmp.name)}).encode('utf-8') + b'\n')
+        stream.flush()
+        with open(tmp.name, 'rb') as source, Base64IO(stream) as encoded:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b''):
+                encoded.write(chunk)
+
+
+def write_payload(stream, private_data_dir, manifest, missing, kwargs_line):
+    """
+    Write the payload for the awx-payload-cache worker: the manifest, the
+    blobs in missing, then the ansible-runner transmit stream made of
+    kwargs_line and everything in private_data_dir that is not in the
+    manifest.
+    """
+    paths = {}
+    for relpath, (digest, mode) in manifest['files'].items():
+        paths.setdefault(digest, os.path.join(private_data_dir, relpath))
+    missing = [digest for digest in dict.fromkeys(missing) if digest in paths]
+
+    stream.write(json.dumps({'manifest': manifest, 'blobs': len(missing)}).encode('utf-8') + b'\n')
+    for digest in missing:
+        with open(paths[digest], 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            stream.write(json.dumps({'blob': digest, 'size': size}).encode('utf-8') + b'\n')
+            copied = 0
+            for chunk in iter(lambda: f.read(min(CHUNK_SIZE, size - copied)), b''):
+                stream.write(chunk)
+                copied += len(chunk)
+            if copied != size:
+                raise RuntimeError('{} changed while it was sent'.format(paths[digest]))
+    stream.write(kwargs_line.rstrip(b'\n') + b'\n')
+    stream_dir_excluding(private_data_dir, stream, exclude=[relpath for relpath in manifest['dirs'] if os.sep not in relpath])
+    stream.write(json.dumps({'eof': True}).encode('utf-8') + b'\n')
+    stream.flush()
+
+
+def _write_error(stream, explanation):
+    # what the ansible-runner worker sends when it can not start a job
+    stream.write(json.dumps({'status': 'error', 'job_explanation': explanation}).encode('utf-8') + b'\n')
+    stream.write(json.dumps({'eof': True}).encode('utf-8') + b'\n')
+    stream.flush()
+
+
+def run_query(store, _input, _output):
+    store.ensure_private()
+    digests = json.loads(_input.read() or b'[]')
+    _output.write(json.dumps({'missing': store.missing(digests)}).encode('utf-8') + b'\n')
+    _output.flush()
+
+
+def receive_payload(store, _input, private_data_dir):
+    """
+    Read the manifest and the blobs that come with it from _input and
+    create the cached folders in private_data_dir. _input is left at the
+    start of the ansible-runner transmit stream.
+    """
+    store.ensure_private()
+    header = json.loads(_input.readline())
+    if 'manifest' not in header:
+        raise ValueError('Payload does not start with a manifest')
+    for i in range(header['blobs']):
+        blob = json.loads(_input.readline())
+        store.add(blob['blob'], blob['size'], _input)
+    os.makedirs(private_data_dir, exist_ok=True)
+    materialize(header['manifest'], store, private_data_dir)
+
+
+def run_worker(store, private_data_dir, _input, _output, delete=False, max_size=None, worker_class=None):
+    if worker_class is None:
+        from ansible_runner.streaming import Worker as worker_class
+
+    if delete:
+        from ansible_runner.utils import register_for_cleanup
+
+        # same as ansible-runner worker --delete
+        shutil.rmtree(private_data_dir, ignore_errors=True)
+        register_for_cleanup(private_data_dir)
+    try:
+        receive_payload(store, _input, private_data_dir)
+    except Exception as e:
+        _write_error(_output, 'Failed to prepare private data directory from payload cache: {}'.format(e))
+        return 'error', 1
+    try:
+        return worker_class(_input=_input, _output=_output, private_data_dir=private_data_dir).run()
+    finally:
+        if max_size is not None:
+            store.prune(max_size)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog=PAYLOAD_CACHE_WORKTYPE)
+    parser.add_argument('command', choices=('query', 'worker'))
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--private-data-dir')
+    parser.add_argument('--delete', action='store_true')
+    parser.add_argument('--max-size', type=int)
+    args = parser.parse_args(args)
+
+    store = BlobStore(args.cache_dir)
+    if args.command == 'query':
+        run_query(store, sys.stdin.buffer, sys.stdout.buffer)
+        return 0
+    if not args.private_data_dir:
+        parser.error('--private-data-dir is required for worker')
+    status, rc = run_worker(store, args.private_data_dir, sys.stdin.buffer, sys.stdout.buffer, delete=args.delete, max_size=args.max_size)
+    return rc or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
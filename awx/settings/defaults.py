@@ -132,6 +132,8 @@ LOCALE_PATHS = (os.path.join(BASE_DIR, 'locale'),)
 
 # Graph of resources that can have named-url
 NAMED_URL_GRAPH = {}
+# Seconds that a named url resolved to a primary key is cached for, renames and deletes invalidate it sooner
+NAMED_URL_CACHE_TIMEOUT = 60 * 60
 
 # Maximum number of the same job that can be waiting to run when launching from scheduler
 # Note: This setting may be overridden by database settings.
@@ -235,6 +237,16 @@ JOB_EVENT_STATISTICS_INTERVAL = 5
 # The maximum size of the job event worker queue before requests are blocked
 JOB_EVENT_MAX_QUEUE_SIZE = 10000
 
+# Events read from the worker stream of a job that may wait to be handled, and
+# to be published to redis, before reading from the stream stops
+AWX_EVENT_PIPELINE_QUEUE_SIZE = 1000
+
+# The most events published to redis at once
+AWX_EVENT_PIPELINE_BATCH_SIZE = 100
+
+# Seconds the event processing metrics of a job are kept in redis
+AWX_JOB_EVENT_METRICS_TTL = 86400
+
 # The number of job events to migrate per-transaction when moving from int -> bigint
 JOB_EVENT_MIGRATION_CHUNK_SIZE = 1000000
 
@@ -262,6 +274,13 @@ START_TASK_LIMIT = 100
 TASK_MANAGER_TIMEOUT = 300
 TASK_MANAGER_TIMEOUT_GRACE_PERIOD = 60
 
+# Coalesce requests to run the task managers, at most one wakeup per manager is
+# queued at a time, requests made while it is queued or running result in a
+# single trailing run. The window bounds how long a wakeup is considered in
+# flight, it should be at least as long as the longest expected manager run.
+TASK_MANAGER_WAKEUP_COALESCE = True
+TASK_MANAGER_WAKEUP_DEBOUNCE_WINDOW = 300
+
 # Number of seconds _in addition to_ the task manager timeout a job can stay
 # in waiting without being reaped
 JOB_WAITING_GRACE_PERIOD = 60
@@ -467,10 +486,52 @@ CLUSTER_NODE_MISSED_HEARTBEAT_TOLERANCE = 2
 
 RECEPTOR_SERVICE_ADVERTISEMENT_PERIOD = 60  # https://github.com/ansible/receptor/blob/aa1d589e154d8a0cb99a220aff8f98faf2273be6/pkg/netceptor/netceptor.go#L34
 EXECUTION_NODE_REMEDIATION_CHECKS = 60 * 30  # once every 30 minutes check if an execution node errors have been resolved
+# Execution nodes health checked together are probed from this many threads at once,
+# each probe is given up on after the timeout in seconds
+EXECUTION_NODE_HEALTH_CHECK_CONCURRENCY = 16
+EXECUTION_NODE_HEALTH_CHECK_TIMEOUT = 20
+
+# Number of parsed schedule rrules kept in memory by each process
+SCHEDULE_RRULE_CACHE_SIZE = 2048
+# Number of upcoming occurrences precomputed for each parsed schedule rrule
+SCHEDULE_OCCURRENCE_INDEX_SIZE = 10
+# Number of schedules saved per query when the periodic scheduler updates next_run
+SCHEDULE_BULK_UPDATE_BATCH_SIZE = 500
+
+# Number of running workflow jobs whose graphs the workflow manager loads together
+WORKFLOW_MANAGER_BATCH_SIZE = 50
+# Seconds that the graph edges of a running workflow job are cached for the workflow manager
+WORKFLOW_DAG_CACHE_TIMEOUT = 60 * 60 * 24
 
 # Amount of time dispatcher will try to reconnect to database for jobs and consuming new work
 DISPATCHER_DB_DOWNTIME_TOLERANCE = 40
 
+# How tasks are delivered to the dispatcher, either 'pg_notify' (the task is the notification payload)
+# or 'table' (the task is saved to the main_dispatchertask table and pg_notify is only used as a wakeup)
+DISPATCHER_TASK_QUEUE_BACKEND = 'pg_notify'
+# Maximum number of tasks a dispatcher claims from the task table in one query, it never claims more than its free workers
+DISPATCHER_TASK_QUEUE_BATCH_SIZE = 100
+# Seconds between polls of the task table, to pick up tasks whose wakeup notification was missed,
+# this is also how often a dispatcher renews the claims on the tasks it holds
+DISPATCHER_TASK_QUEUE_POLL_INTERVAL = 10
+# Seconds after which a claim that was not renewed is taken over by another dispatcher.
+# Tasks are ran at least once, a task that was running when its dispatcher went away
+# is ran again, except for the tasks that run unified jobs which the reaper fails instead.
+DISPATCHER_TASK_QUEUE_CLAIM_TIMEOUT = 60
+
+# Tasks handed to idle dispatcher workers ahead of any other queued tasks
+DISPATCHER_PRIORITY_TASKS = [
+    'awx.main.scheduler.tasks.task_manager',
+    'awx.main.scheduler.tasks.dependency_manager',
+    'awx.main.scheduler.tasks.workflow_manager',
+    'awx.main.tasks.system.cluster_node_heartbeat',
+]
+# Maximum number of concurrently running dispatcher tasks, by task name
+# extra tasks wait in the dispatcher until a running one finishes
+DISPATCHER_TASK_CONCURRENCY_LIMITS = {
+    'awx.main.tasks.system.gather_analytics': 1,
+}
+
 BROKER_URL = 'unix:///var/run/redis/redis.sock'
 CELERYBEAT_SCHEDULE = {
     'tower_scheduler': {'task': 'awx.main.tasks.system.awx_periodic_scheduler', 'schedule': timedelta(seconds=30), 'options': {'expires': 20}},
@@ -610,7 +671,8 @@ AWX_TASK_ENV = {}
 # to fetch Ansible content - roles and collections
 GALAXY_TASK_ENV = {'ANSIBLE_FORCE_COLOR': 'false', 'GIT_SSH_COMMAND': "ssh -o StrictHostKeyChecking=no"}
 
-# Rebuild Host Smart Inventory memberships.
+# Update Host Smart Inventory memberships when hosts, their facts or their groups
+# change, and when the host_filter of a smart inventory changes.
 AWX_REBUILD_SMART_MEMBERSHIP = False
 
 # By default, allow arbitrary Jinja templating in extra_vars defined on a Job Template
@@ -632,6 +694,19 @@ AWX_COLLECTIONS_ENABLED = True
 # Follow symlinks when scanning for playbooks
 AWX_SHOW_PLAYBOOK_LINKS = False
 
+# Prepare job private data dirs from immutable per revision snapshots of the
+# project, linked under a shared project lock instead of copied under the
+# exclusive one. Files are reflinked where the filesystem supports it.
+AWX_PROJECT_SNAPSHOTS_ENABLED = True
+
+# Number of most recently used snapshots kept per project
+AWX_PROJECT_SNAPSHOTS_KEEP = 3
+
+# Hardlink snapshot files into job private data dirs when reflinks are not
+# supported. Only safe if playbooks never modify project files in place,
+# since a change would be seen by every later job using the same snapshot.
+AWX_PROJECT_SNAPSHOT_HARDLINKS = False
+
 # Applies to any galaxy server
 GALAXY_IGNORE_CERTS = False
 
@@ -797,6 +872,20 @@ CONSTRUCTED_INSTANCE_ID_VAR = 'remote_tower_id'
 
 CONSTRUCTED_EXCLUDE_EMPTY_GROUPS = False
 
+# Inventory imports whose ansible-inventory output is at least this many bytes
+# are streamed, only the groups are loaded at once while the host variables are
+# read and saved in batches. Set to None to always load the whole output.
+INVENTORY_IMPORT_STREAMING_THRESHOLD = 64 * 1024 * 1024
+
+# Save the hosts of inventory imports in bulk, one insert and one update per
+# batch of hosts, rather than one query per created or changed host.
+INVENTORY_IMPORT_BULK_HOST_WRITES = True
+
+# When the activity stream is enabled for inventory syncs, record a single
+# entry with the number of hosts created and updated for each batch of hosts
+# saved in bulk instead of one entry per host.
+INVENTORY_IMPORT_SUMMARIZE_ACTIVITY_STREAM = False
+
 # ---------------------
 # -- Activity Stream --
 # ---------------------
@@ -805,6 +894,11 @@ CONSTRUCTED_EXCLUDE_EMPTY_GROUPS = False
 ACTIVITY_STREAM_ENABLED = True
 ACTIVITY_STREAM_ENABLED_FOR_INVENTORY_SYNC = False
 
+# Fraction of the activity stream entries to record per object and operation,
+# to sample or suppress entries for objects changing at a high rate, e.g.
+# {'host': {'update': 0.1, 'associate': 0}}. Anything not listed is recorded.
+ACTIVITY_STREAM_MODEL_POLICY = {}
+
 CALLBACK_QUEUE = "callback_tasks"
 
 # Note: This setting may be overridden by database settings.
@@ -815,12 +909,35 @@ DISABLE_LOCAL_AUTH = False
 # Note: This setting may be overridden by database settings.
 TOWER_URL_BASE = "https://towerhost"
 
+# Notification templates sent at the same time by send_notifications, messages
+# of one template always go out one after the other on the same connection.
+NOTIFICATION_SEND_CONCURRENCY = 8
+
+# Attempts to send a notification again after a connection failure, waiting
+# NOTIFICATION_SEND_RETRY_BACKOFF seconds, doubled on each attempt, in between.
+NOTIFICATION_SEND_RETRIES = 2
+NOTIFICATION_SEND_RETRY_BACKOFF = 1.0
+
+# Seconds an SMTP or HTTP connection of a notification template is kept open
+# by a dispatcher worker without being used.
+NOTIFICATION_BACKEND_IDLE_TIMEOUT = 60
+
 INSIGHTS_URL_BASE = "https://example.org"
 INSIGHTS_AGENT_MIME = 'application/example'
 # See https://github.com/ansible/awx-facts-playbooks
 INSIGHTS_SYSTEM_ID_FILE = '/etc/redhat-access-insights/machine-id'
 INSIGHTS_CERT_PATH = "/etc/pki/ca-trust/extracted/pem/tls-ca-bundle.pem"
 
+# Threads used to write and read the per-host fact cache files of a job,
+# hosts are processed and saved in batches of this size
+AWX_FACT_CACHE_IO_WORKERS = 8
+AWX_FACT_CACHE_BATCH_SIZE = 500
+# Keep a compressed diff of host facts every time they change for this many days, 0 disables it
+HOST_FACTS_HISTORY_DAYS = 0
+# Send a system_tracking record with the full facts of every host whose facts
+# changed, only has an effect if system_tracking is sent to the log aggregator
+AWX_FACT_CACHE_LOG_CHANGES = True
+
 # Settings related to external logger configuration
 LOG_AGGREGATOR_ENABLED = False
 LOG_AGGREGATOR_TCP_TIMEOUT = 5
@@ -994,6 +1111,14 @@ AWX_RUNNER_KEEPALIVE_SECONDS = 0
 # Delete completed work units in receptor
 RECEPTOR_RELEASE_WORK = True
 
+# Send the project, roles and collections of jobs to execution nodes by content,
+# only the files the node does not hold yet go over the mesh. Needs the
+# awx-payload-cache work command from the install bundle on execution nodes.
+AWX_RECEPTOR_PAYLOAD_CACHE_ENABLED = False
+
+# Size in bytes the payload cache of an execution node is pruned down to after each job
+AWX_RECEPTOR_PAYLOAD_CACHE_MAX_SIZE = 2 * 1024 * 1024 * 1024
+
 # K8S only. Use receptor_log_level on AWX spec to set this properly
 RECEPTOR_LOG_LEVEL = 'info'
 
@@ -301,6 +301,8 @@ class ControllerAPIModule(ControllerModule):
     }
     session = None
     IDENTITY_FIELDS = {'users': 'username', 'workflow_job_template_nodes': 'identifier', 'instances': 'hostname'}
+    # Number of names looked up with one query by resolve_names_to_ids
+    LOOKUP_CHUNK_SIZE = 50
     ENCRYPTED_STRING = "$encrypted$"
 
     def __init__(self, argument_spec, direct_params=None, error_callback=None, warn_callback=None, **kwargs):
@@ -308,6 +310,8 @@ class ControllerAPIModule(ControllerModule):
 
         super().__init__(argument_spec=argument_spec, direct_params=direct_params, error_callback=error_callback, warn_callback=warn_callback, **kwargs)
         self.session = Request(cookies=CookieJar(), timeout=self.request_timeout, validate_certs=self.verify_ssl)
+        # (endpoint, name or id) -> id of the items already looked up by this module
+        self.id_cache = {}
 
         if 'update_secrets' in self.params:
             self.update_secrets = self.params.pop('update_secrets')
@@ -471,7 +475,39 @@ class ControllerAPIModule(ControllerModule):
         return self.get_one(endpoint, name_or_id=name_or_id, allow_none=False, **kwargs)
 
     def resolve_name_to_id(self, endpoint, name_or_id):
-        return self.get_exactly_one(endpoint, name_or_id)['id']
+        key = (endpoint, str(name_or_id))
+        if key not in self.id_cache:
+            self.id_cache[key] = self.get_exactly_one(endpoint, name_or_id)['id']
+        return self.id_cache[key]
+
+    def resolve_names_to_ids(self, endpoint, names_or_ids):
+        # Like resolve_name_to_id for each item of the list, but looks the names and ids up with
+        # one name__in and one id__in query per chunk of the list instead of one query per item.
+        # Anything these queries can not settle exactly falls back to resolve_name_to_id, which
+        # fails with the usual message: named URLs, names with commas, missing or duplicate names.
+        name_field = self.get_name_field_from_endpoint(endpoint)
+        wanted = [str(item) for item in names_or_ids if (endpoint, str(item)) not in self.id_cache and '++' not in str(item) and ',' not in str(item)]
+        wanted = list(dict.fromkeys(wanted))
+        for start in range(0, len(wanted), self.LOOKUP_CHUNK_SIZE):
+            chunk = wanted[start : start + self.LOOKUP_CHUNK_SIZE]
+            by_name, by_id = {}, {}
+            queries = [{'{0}__in'.format(name_field): ','.join(chunk)}]
+            ids = [item for item in chunk if item.isdigit()]
+            if ids:
+                queries.append({'id__in': ','.join(ids)})
+            for query in queries:
+                query['page_size'] = self.LOOKUP_CHUNK_SIZE
+                response = self.get_all_endpoint(endpoint, **{'data': query})
+                for item in response['json']['results']:
+                    by_name.setdefault(str(item.get(name_field)), []).append(item['id'])
+                    by_id[str(item['id'])] = item['id']
+            for item in chunk:
+                # the same preference as get_one, an id over a name
+                if item in by_id:
+                    self.id_cache[(endpoint, item)] = by_id[item]
+                elif len(set(by_name.get(item, []))) == 1:
+                    self.id_cache[(endpoint, item)] = by_name[item][0]
+        return [self.resolve_name_to_id(endpoint, item) for item in names_or_ids]
 
     def make_request(self, method, endpoint, *args, **kwargs):
         # In case someone is calling us directly; make sure we were given a method, let's not just assume a GET
@@ -706,15 +742,20 @@ class ControllerAPIModule(ControllerModule):
             return
 
         # First get the existing associations
-        response = self.get_all_endpoint(association_endpoint)
+        response = self.get_all_endpoint(association_endpoint, **{'data': {'page_size': 200}})
         existing_associated_ids = [association['id'] for association in response['json']['results']]
 
         # Some associations can be ordered (like galaxy credentials)
         if association_endpoint.strip('/').split('/')[-1] in self.ordered_associations:
             if existing_associated_ids == new_association_list:
                 return  # If the current associations EXACTLY match the desired associations then we can return
-            removal_list = existing_associated_ids  # because of ordering, we have to remove everything
-            addition_list = new_association_list  # re-add everything back in-order
+            # Items are associated at the end of the list, so the items in the right place at the start
+            # can stay; everything after them is removed and re-added in order
+            keep = 0
+            while keep < min(len(existing_associated_ids), len(new_association_list)) and existing_associated_ids[keep] == new_association_list[keep]:
+                keep += 1
+            removal_list = existing_associated_ids[keep:]
+            addition_list = new_association_list[keep:]
         else:
             if set(existing_associated_ids) == set(new_association_list):
                 return
@@ -140,9 +140,7 @@ def main():
         credential_id = module.resolve_name_to_id('credentials', credential)
     instances_ids = None
     if instances is not None:
-        instances_ids = []
-        for item in instances:
-            instances_ids.append(module.resolve_name_to_id('instances', item))
+        instances_ids = module.resolve_names_to_ids('instances', instances)
 
     # Create the data that gets sent for create and update
     new_fields = {}
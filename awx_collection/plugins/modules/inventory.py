@@ -208,9 +208,7 @@ def main():
 
     instance_group_names = module.params.get('instance_groups')
     if instance_group_names is not None:
-        association_fields['instance_groups'] = []
-        for item in instance_group_names:
-            association_fields['instance_groups'].append(module.resolve_name_to_id('instance_groups', item))
+        association_fields['instance_groups'] = module.resolve_names_to_ids('instance_groups', instance_group_names)
 
     # We need to perform a check to make sure you are not trying to convert a regular inventory into a smart one.
     if inventory and inventory['kind'] == '' and inventory_fields['kind'] == 'smart':
@@ -219,9 +217,7 @@ def main():
     if kind == 'constructed':
         input_inventory_names = module.params.get('input_inventories')
         if input_inventory_names is not None:
-            association_fields['input_inventories'] = []
-            for item in input_inventory_names:
-                association_fields['input_inventories'].append(module.resolve_name_to_id('inventories', item))
+            association_fields['input_inventories'] = module.resolve_names_to_ids('inventories', input_inventory_names)
 
     # If the state was present and we can let the module build or update the existing inventory, this will return on its own
     module.create_or_update_if_needed(
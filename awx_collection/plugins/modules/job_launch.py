@@ -263,17 +263,11 @@ def main():
         post_data['execution_environment'] = module.resolve_name_to_id('execution_environments', execution_environment)
 
     if credentials:
-        post_data['credentials'] = []
-        for credential in credentials:
-            post_data['credentials'].append(module.resolve_name_to_id('credentials', credential))
+        post_data['credentials'] = module.resolve_names_to_ids('credentials', credentials)
     if labels:
-        post_data['labels'] = []
-        for label in labels:
-            post_data['labels'].append(module.resolve_name_to_id('labels', label))
+        post_data['labels'] = module.resolve_names_to_ids('labels', labels)
     if instance_groups:
-        post_data['instance_groups'] = []
-        for instance_group in instance_groups:
-            post_data['instance_groups'].append(module.resolve_name_to_id('instance_groups', instance_group))
+        post_data['instance_groups'] = module.resolve_names_to_ids('instance_groups', instance_groups)
 
     # Attempt to look up job_template based on the provided name
     lookup_data = {}
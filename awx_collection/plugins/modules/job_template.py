@@ -581,9 +581,7 @@ def main():
     association_fields = {}
 
     if credentials is not None:
-        association_fields['credentials'] = []
-        for item in credentials:
-            association_fields['credentials'].append(module.resolve_name_to_id('credentials', item))
+        association_fields['credentials'] = module.resolve_names_to_ids('credentials', credentials)
 
     labels = module.params.get('labels')
     if labels is not None:
@@ -597,27 +595,19 @@ def main():
 
     notifications_start = module.params.get('notification_templates_started')
     if notifications_start is not None:
-        association_fields['notification_templates_started'] = []
-        for item in notifications_start:
-            association_fields['notification_templates_started'].append(module.resolve_name_to_id('notification_templates', item))
+        association_fields['notification_templates_started'] = module.resolve_names_to_ids('notification_templates', notifications_start)
 
     notifications_success = module.params.get('notification_templates_success')
     if notifications_success is not None:
-        association_fields['notification_templates_success'] = []
-        for item in notifications_success:
-            association_fields['notification_templates_success'].append(module.resolve_name_to_id('notification_templates', item))
+        association_fields['notification_templates_success'] = module.resolve_names_to_ids('notification_templates', notifications_success)
 
     notifications_error = module.params.get('notification_templates_error')
     if notifications_error is not None:
-        association_fields['notification_templates_error'] = []
-        for item in notifications_error:
-            association_fields['notification_templates_error'].append(module.resolve_name_to_id('notification_templates', item))
+        association_fields['notification_templates_error'] = module.resolve_names_to_ids('notification_templates', notifications_error)
 
     instance_group_names = module.params.get('instance_groups')
     if instance_group_names is not None:
-        association_fields['instance_groups'] = []
-        for item in instance_group_names:
-            association_fields['instance_groups'].append(module.resolve_name_to_id('instance_groups', item))
+        association_fields['instance_groups'] = module.resolve_names_to_ids('instance_groups', instance_group_names)
 
     on_change = None
     new_spec = module.params.get('survey_spec')
@@ -296,9 +296,7 @@ def main():
     association_fields = {}
 
     if credentials is not None:
-        association_fields['credentials'] = []
-        for item in credentials:
-            association_fields['credentials'].append(module.resolve_name_to_id('credentials', item))
+        association_fields['credentials'] = module.resolve_names_to_ids('credentials', credentials)
 
     # We need to clear out the organization from the search fields the searches for labels and instance_groups doesnt support it and won't be needed anymore
     if 'organization' in search_fields:
@@ -923,27 +923,19 @@ def main():
 
     notifications_start = module.params.get('notification_templates_started')
     if notifications_start is not None:
-        association_fields['notification_templates_started'] = []
-        for item in notifications_start:
-            association_fields['notification_templates_started'].append(module.resolve_name_to_id('notification_templates', item))
+        association_fields['notification_templates_started'] = module.resolve_names_to_ids('notification_templates', notifications_start)
 
     notifications_success = module.params.get('notification_templates_success')
     if notifications_success is not None:
-        association_fields['notification_templates_success'] = []
-        for item in notifications_success:
-            association_fields['notification_templates_success'].append(module.resolve_name_to_id('notification_templates', item))
+        association_fields['notification_templates_success'] = module.resolve_names_to_ids('notification_templates', notifications_success)
 
     notifications_error = module.params.get('notification_templates_error')
     if notifications_error is not None:
-        association_fields['notification_templates_error'] = []
-        for item in notifications_error:
-            association_fields['notification_templates_error'].append(module.resolve_name_to_id('notification_templates', item))
+        association_fields['notification_templates_error'] = module.resolve_names_to_ids('notification_templates', notifications_error)
 
     notifications_approval = module.params.get('notification_templates_approvals')
     if notifications_approval is not None:
-        association_fields['notification_templates_approvals'] = []
-        for item in notifications_approval:
-            association_fields['notification_templates_approvals'].append(module.resolve_name_to_id('notification_templates', item))
+        association_fields['notification_templates_approvals'] = module.resolve_names_to_ids('notification_templates', notifications_approval)
 
     labels = module.params.get('labels')
     if labels is not None:
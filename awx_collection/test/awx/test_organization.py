@@ -4,8 +4,10 @@ __metaclass__ = type
 
 import pytest
 import random
+from unittest import mock
 
-from awx.main.models import Organization, Credential, CredentialType
+from awx.main.models import Organization, Credential, CredentialType, InstanceGroup
+from awx.main.models.organization import OrganizationGalaxyCredentialMembership
 
 
 @pytest.mark.django_db
@@ -91,3 +93,48 @@ def test_galaxy_credential_order(run_module, admin_user):
         cred_order_in_org.append(a_cred.id)
 
     assert cred_order_in_org == cred_ids
+
+
+@pytest.mark.django_db
+def test_galaxy_credentials_kept_in_place(run_module, admin_user):
+    org = Organization.objects.create(name='foo')
+    cred_type = CredentialType.defaults['galaxy_api_token']()
+    cred_type.save()
+    creds = [
+        Credential.objects.create(name=f"Galaxy Credential {number}", credential_type=cred_type, organization=org, inputs={'url': 'www.redhat.com'})
+        for number in range(4)
+    ]
+    for cred in creds[:3]:
+        org.galaxy_credentials.add(cred)
+    kept = set(OrganizationGalaxyCredentialMembership.objects.filter(organization=org, credential__in=creds[:2]).values_list('id', flat=True))
+
+    result = run_module('organization', {'name': 'foo', 'galaxy_credentials': [creds[0].name, creds[1].name, creds[3].name, creds[2].name]}, admin_user)
+    assert result['changed'] is True, result
+
+    assert [cred.id for cred in org.galaxy_credentials.all()] == [creds[0].id, creds[1].id, creds[3].id, creds[2].id]
+    # the credentials already in place were not removed and added again
+    assert kept <= set(OrganizationGalaxyCredentialMembership.objects.filter(organization=org).values_list('id', flat=True))
+
+
+@pytest.mark.django_db
+def test_instance_groups_resolved_together(run_module, admin_user, collection_import):
+    ControllerAPIModule = collection_import('plugins.module_utils.controller_api').ControllerAPIModule
+    groups = [InstanceGroup.objects.create(name=f'group{number}') for number in range(3)]
+    # a name that is the id of another group, which is preferred
+    InstanceGroup.objects.create(name=str(groups[0].id))
+
+    lookups = []
+    get_one = ControllerAPIModule.get_one
+
+    def counted_get_one(self, endpoint, *args, **kwargs):
+        lookups.append(endpoint)
+        return get_one(self, endpoint, *args, **kwargs)
+
+    with mock.patch.object(ControllerAPIModule, 'get_one', new=counted_get_one):
+        result = run_module('organization', {'name': 'foo', 'instance_groups': ['group2', str(groups[0].id), 'group1']}, admin_user)
+    assert result['changed'] is True, result
+    # only the organization itself was looked up on its own
+    assert lookups == ['organizations']
+
+    org = Organization.objects.get(name='foo')
+    assert [group.id for group in org.instance_groups.all()] == [groups[2].id, groups[0].id, groups[1].id]
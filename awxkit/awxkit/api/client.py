@@ -41,6 +41,10 @@ class Connection(object):
             requests.packages.urllib3.disable_warnings()
 
         self.session = requests.Session()
+        # enough connections for the concurrent requests of import, export and paged reads
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(config.client_concurrency, requests.adapters.DEFAULT_POOLSIZE))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.uses_session_cookie = False
 
     def get_session_requirements(self, next=config.api_base_path):
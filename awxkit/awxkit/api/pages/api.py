@@ -1,8 +1,10 @@
 from collections import defaultdict
-import itertools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 import logging
 
 from awxkit.api.resources import resources
+from awxkit.config import config
 import awxkit.exceptions as exc
 from . import base
 from . import page
@@ -73,6 +75,27 @@ page.register_page(resources.api, Api)
 
 
 class ApiV2(base.Base):
+    _executor = None
+
+    @contextmanager
+    def _concurrent(self):
+        """Run the requests of an export or import over config.client_concurrency connections"""
+        with ThreadPoolExecutor(max_workers=max(1, config.client_concurrency)) as executor:
+            self._executor = executor
+            try:
+                yield
+            finally:
+                self._executor = None
+
+    def _map(self, func, items):
+        """
+        Call func on every item, concurrently when inside of _concurrent(),
+        and return the results in the order of items.
+        """
+        if self._executor is None:
+            return [func(item) for item in items]
+        return page.map_concurrently(func, items, executor=self._executor)
+
     # Export methods
 
     def _export(self, _page, post_fields):
@@ -211,7 +234,7 @@ class ApiV2(base.Base):
             if endpoint is None:
                 return None
 
-        assets = (self._export(asset, post_fields) for asset in endpoint.results)
+        assets = self._map(lambda asset: self._export(asset, post_fields), endpoint.results)
         return [asset for asset in assets if asset is not None]
 
     def _check_for_int(self, value):
@@ -239,20 +262,33 @@ class ApiV2(base.Base):
         # If no resource kwargs are explicitly used, export everything.
         all_resources = all(kwargs.get(resource) is None for resource in EXPORTABLE_RESOURCES)
 
-        data = {}
-        for resource in EXPORTABLE_RESOURCES:
-            value = kwargs.get(resource)
-            if all_resources or value is not None:
-                endpoint = getattr(self, resource)
-                if value:
-                    endpoint = self._filtered_list(endpoint, value)
+        with self._concurrent():
+            endpoints = {}
+            for resource in EXPORTABLE_RESOURCES:
+                value = kwargs.get(resource)
+                if all_resources or value is not None:
+                    endpoint = getattr(self, resource)
+                    if value:
+                        endpoint = self._filtered_list(endpoint, value)
+                    endpoints[resource] = endpoint
+
+            # Read the options and the objects of every resource at once
+            self._map(lambda endpoint: utils.get_post_fields(endpoint, self._cache), endpoints.values())
+            self._map(self._cache.get_page, [endpoint for endpoint in endpoints.values() if isinstance(endpoint, page.TentativePage)])
+
+            data = {}
+            for resource, endpoint in endpoints.items():
                 data[resource] = self._export_list(endpoint)
 
         return data
 
     # Import methods
 
-    def _dependent_resources(self):
+    def _dependent_resource_groups(self):
+        """
+        Yield the exportable resources in groups, the resources of a group
+        only depend on resources of earlier groups.
+        """
         page_resource = {}
         for resource in self.json:
             # The /api/v2/constructed_inventories endpoint is for the UI but will register as an Inventory endpoint
@@ -262,87 +298,104 @@ class ApiV2(base.Base):
             page_resource[getattr(self, resource)._create().__item_class__] = resource
         data_pages = [getattr(self, resource)._create().__item_class__ for resource in EXPORTABLE_RESOURCES]
 
-        for page_cls in itertools.chain(*has_create.page_creation_order(*data_pages)):
-            yield page_resource[page_cls]
+        for group in has_create.page_creation_order(*data_pages):
+            yield sorted(page_resource[page_cls] for page_cls in group)
 
     def _import_list(self, endpoint, assets):
-        log.debug("_import_list -- endpoint: %s, assets: %s", endpoint.endpoint, repr(assets))
-        post_fields = utils.get_post_fields(endpoint, self._cache)
-
-        changed = False
-
-        for asset in assets:
-            post_data = {}
-            for field, value in asset.items():
-                if field not in post_fields:
-                    continue
-                if post_fields[field]['type'] in ('id', 'integer') and isinstance(value, dict):
-                    _page = self._cache.get_by_natural_key(value)
-                    post_data[field] = _page['id'] if _page is not None else None
-                else:
-                    post_data[field] = utils.remove_encrypted(value)
-
-            _page = self._cache.get_by_natural_key(asset['natural_key'])
-            try:
-                if _page is None:
-                    if asset['natural_key']['type'] == 'user':
-                        # We should only impose a default password if the resource doesn't exist.
-                        post_data.setdefault('password', 'abc123')
-                    try:
-                        _page = endpoint.post(post_data)
-                    except exc.NoContent:
-                        # desired exception under some circumstances, e.g. labels that already exist
-                        if _page is None and 'name' in post_data:
-                            results = endpoint.get(all_pages=True).results
-                            for item in results:
-                                if item['name'] == post_data['name']:
-                                    _page = item.get()
-                                    break
-                            else:
-                                raise
-                    changed = True
-                    if asset['natural_key']['type'] == 'project':
-                        # When creating a project, we need to wait for its
-                        # first project update to finish so that associated
-                        # JTs have valid options for playbook names
-                        try:
-                            _page.wait_until_completed(timeout=300)
-                        except AssertionError:
-                            # If the project update times out, try to
-                            # carry on in the hopes that it will
-                            # finish before it is needed.
-                            pass
-                else:
-                    # If we are an existing project and our scm_tpye is not changing don't try and import the local_path setting
-                    if asset['natural_key']['type'] == 'project' and 'local_path' in post_data and _page['scm_type'] == post_data['scm_type']:
-                        del post_data['local_path']
-
-                    _page = _page.put(post_data)
-                    changed = True
-            except (exc.Common, AssertionError) as e:
-                identifier = asset.get("name", None) or asset.get("username", None) or asset.get("hostname", None)
-                log.error(f'{endpoint} "{identifier}": {e}.')
-                self._has_error = True
-                log.debug("post_data: %r", post_data)
+        return self._import_lists([(endpoint, assets)])
+
+    def _import_lists(self, endpoint_assets):
+        """
+        Create or update the assets of several endpoints concurrently, the
+        assets must not depend on each other.
+        """
+        endpoint_assets = [(endpoint, assets) for endpoint, assets in endpoint_assets if assets]
+        post_fields = self._map(lambda endpoint_asset: utils.get_post_fields(endpoint_asset[0], self._cache), endpoint_assets)
+
+        work = []
+        for (endpoint, assets), fields in zip(endpoint_assets, post_fields):
+            log.debug("_import_list -- endpoint: %s, assets: %s", endpoint.endpoint, repr(assets))
+            work.extend((endpoint, fields, asset) for asset in assets)
+
+        pages = self._map(lambda item: self._import_asset(*item), work)
+
+        # Queue up everything related to be either created or assigned, in the order of the assets.
+        for (endpoint, fields, asset), _page in zip(work, pages):
+            if _page is not None:
+                self._queue_related(_page, asset)
+
+        return any(_page is not None for _page in pages)
+
+    def _import_asset(self, endpoint, post_fields, asset):
+        """Create or update one asset, returns its page or None when that failed"""
+        post_data = {}
+        for field, value in asset.items():
+            if field not in post_fields:
                 continue
+            if post_fields[field]['type'] in ('id', 'integer') and isinstance(value, dict):
+                _page = self._cache.get_by_natural_key(value)
+                post_data[field] = _page['id'] if _page is not None else None
+            else:
+                post_data[field] = utils.remove_encrypted(value)
 
-            self._cache.set_page(_page)
+        _page = self._cache.get_by_natural_key(asset['natural_key'])
+        try:
+            if _page is None:
+                if asset['natural_key']['type'] == 'user':
+                    # We should only impose a default password if the resource doesn't exist.
+                    post_data.setdefault('password', 'abc123')
+                try:
+                    _page = endpoint.post(post_data)
+                except exc.NoContent:
+                    # desired exception under some circumstances, e.g. labels that already exist
+                    if _page is None and 'name' in post_data:
+                        results = endpoint.get(all_pages=True).results
+                        for item in results:
+                            if item['name'] == post_data['name']:
+                                _page = item.get()
+                                break
+                        else:
+                            raise
+                if asset['natural_key']['type'] == 'project':
+                    # When creating a project, we need to wait for its
+                    # first project update to finish so that associated
+                    # JTs have valid options for playbook names
+                    try:
+                        _page.wait_until_completed(timeout=300)
+                    except AssertionError:
+                        # If the project update times out, try to
+                        # carry on in the hopes that it will
+                        # finish before it is needed.
+                        pass
+            else:
+                # If we are an existing project and our scm_tpye is not changing don't try and import the local_path setting
+                if asset['natural_key']['type'] == 'project' and 'local_path' in post_data and _page['scm_type'] == post_data['scm_type']:
+                    del post_data['local_path']
+
+                _page = _page.put(post_data)
+        except (exc.Common, AssertionError) as e:
+            identifier = asset.get("name", None) or asset.get("username", None) or asset.get("hostname", None)
+            log.error(f'{endpoint} "{identifier}": {e}.')
+            self._has_error = True
+            log.debug("post_data: %r", post_data)
+            return None
 
-            # Queue up everything related to be either created or assigned.
-            for name, S in asset.get('related', {}).items():
-                if not S:
-                    continue
-                if name == 'roles':
-                    indexed_roles = defaultdict(list)
-                    for role in S:
-                        if 'content_object' not in role:
-                            continue
-                        indexed_roles[role['content_object']['type']].append(role)
-                    self._roles.append((_page, indexed_roles))
-                else:
-                    self._related.append((_page, name, S))
+        self._cache.set_page(_page)
+        return _page
 
-        return changed
+    def _queue_related(self, _page, asset):
+        for name, S in asset.get('related', {}).items():
+            if not S:
+                continue
+            if name == 'roles':
+                indexed_roles = defaultdict(list)
+                for role in S:
+                    if 'content_object' not in role:
+                        continue
+                    indexed_roles[role['content_object']['type']].append(role)
+                self._roles.append((_page, indexed_roles))
+            else:
+                self._related.append((_page, name, S))
 
     def _assign_role(self, endpoint, role):
         if 'content_object' not in role:
@@ -417,18 +470,19 @@ class ApiV2(base.Base):
 
         changed = False
 
-        for resource in self._dependent_resources():
-            endpoint = getattr(self, resource)
+        with self._concurrent():
+            for group in self._dependent_resource_groups():
+                endpoints = [getattr(self, resource) for resource in group]
 
-            # Load up existing objects, so that we can try to update or link to them
-            self._cache.get_page(endpoint)
-            imported = self._import_list(endpoint, data.get(resource) or [])
-            changed = changed or imported
-            # FIXME: should we delete existing unpatched assets?
+                # Load up existing objects, so that we can try to update or link to them
+                self._map(self._cache.get_page, endpoints)
+                imported = self._import_lists([(endpoint, data.get(resource) or []) for resource, endpoint in zip(group, endpoints)])
+                changed = changed or imported
+                # FIXME: should we delete existing unpatched assets?
 
-        self._assign_related()
-        self._assign_membership()
-        self._assign_roles()
+            self._assign_related()
+            self._assign_membership()
+            self._assign_roles()
 
         return changed
 
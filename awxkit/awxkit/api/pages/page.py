@@ -1,8 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 import inspect
 import logging
 import json
 import re
+import threading
 
 from requests import Response
 import http.client as http
@@ -51,6 +54,38 @@ def is_duplicate_error(response):
         return True
 
 
+_pool = threading.local()
+
+
+def map_concurrently(func, items, executor=None):
+    """
+    Call func on every item over the executor, or over a new pool of
+    config.client_concurrency threads, and return the results in the order
+    of items. Calls made from within a pool run serially, so that nested
+    reads do not multiply the connections in use.
+    """
+    items = list(items)
+    if len(items) < 2 or config.client_concurrency < 2 or getattr(_pool, 'worker', False):
+        return [func(item) for item in items]
+
+    def work(item):
+        _pool.worker = True
+        return func(item)
+
+    if executor is not None:
+        return list(executor.map(work, items))
+    with ThreadPoolExecutor(max_workers=min(config.client_concurrency, len(items))) as executor:
+        return list(executor.map(work, items))
+
+
+def page_url(url, number):
+    """The url of page `number` of the list that `url` is a page of"""
+    split = urlsplit(url)
+    query = [(key, value) for key, value in parse_qsl(split.query, keep_blank_values=True) if key != 'page']
+    query.append(('page', number))
+    return urlunsplit(split._replace(query=urlencode(query)))
+
+
 def register_page(urls, page_cls):
     if not _page_registry.default:
         from awxkit.api.pages import Base
@@ -252,18 +287,65 @@ class Page(object):
         r = self.connection.get(self.endpoint, query_parameters)
         page = self.page_identity(r)
         if all_pages and getattr(page, 'next', None):
-            paged_results = [r.json()['results']]
-            while page.next:
-                r = self.connection.get(self.next)
-                page = self.page_identity(r)
-                paged_results.append(r.json()['results'])
             json = r.json()
-            json['results'] = []
-            for page in paged_results:
-                json['results'].extend(page)
+            json['results'] = self._get_all_results(json, query_parameters)
+            json['next'] = None
             page = self.__class__.from_json(json, connection=self.connection)
         return page
 
+    def _get_json(self, endpoint, query_parameters=None):
+        r = self.connection.get(endpoint, query_parameters)
+        # a page of its own, this may run on several threads
+        self.__class__(self.connection, endpoint=endpoint).page_identity(r)
+        return r.json()
+
+    def _get_all_results(self, first, query_parameters):
+        """
+        The results of every page of a list, given its first page. The urls
+        of the other pages follow from the count, and the pages are fetched
+        concurrently. If the list changed while it was read, the pages no
+        longer line up and items are missed or read twice; the list is then
+        read again as a range scan over ids, when its order allows it.
+        """
+        results = list(first['results'])
+        count, page_size = first.get('count'), len(results)
+        if count is None:  # count_disabled
+            next_url = first['next']
+            while next_url:
+                json = self._get_json(next_url)
+                results.extend(json['results'])
+                next_url = json['next']
+            return results
+
+        def get_page(url):
+            try:
+                return self._get_json(url)
+            except exc.NotFound:  # the list got shorter
+                return None
+
+        urls = [page_url(first['next'], number) for number in range(2, -(-count // page_size) + 1)]
+        changed = False
+        for json in map_concurrently(get_page, urls):
+            changed = changed or json is None or json['count'] != count
+            results.extend(json['results'] if json else [])
+        ids = [result['id'] for result in results if 'id' in result]
+        if not changed and len(results) == count and len(set(ids)) == len(ids):
+            return results
+
+        if query_parameters.get('order_by', 'id') not in ('id', 'pk'):
+            log.warning("%s changed while it was read, the results may be incomplete", self.endpoint)
+            return results
+        log.debug("%s changed while it was read, reading it again by id", self.endpoint)
+        query = dict(query_parameters, order_by='id', page_size=page_size)
+        query.pop('page', None)
+        results = []
+        while True:
+            json = self._get_json(self.endpoint, query)
+            results.extend(json['results'])
+            if not json['next']:
+                return results
+            query['id__gt'] = json['results'][-1]['id']
+
     def head(self):
         r = self.connection.head(self.endpoint)
         return self.page_identity(r)
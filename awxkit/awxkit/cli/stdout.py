@@ -1,13 +1,19 @@
 # -*- coding: utf-8 -*-
 from __future__ import print_function
 
+import logging
 import sys
-
 import time
+import uuid
 
 from .utils import cprint, color_enabled, STATUS_COLORS
+from awxkit.api.client import Token_Auth
 from awxkit.config import config
 from awxkit.utils import to_str
+from awxkit.ws import WSClient, status_changed as ws_status_changed, summary as ws_summary
+
+
+log = logging.getLogger(__name__)
 
 
 def monitor_workflow(response, session, print_stdout=True, action_timeout=None, interval=5):
@@ -69,48 +75,175 @@ def monitor_workflow(response, session, print_stdout=True, action_timeout=None,
     return get().json.status
 
 
+# the websocket group of the events of each type of job
+EVENT_GROUPS = {
+    'job': 'job_events',
+    'ad_hoc_command': 'ad_hoc_command_events',
+    'project_update': 'project_update_events',
+    'inventory_update': 'inventory_update_events',
+    'system_job': 'system_job_events',
+}
+
+
+class StdoutFollower(object):
+    """Prints the stdout of the events of a job in order, whichever way and
+    order the events arrive in"""
+
+    page_size = 200
+
+    def __init__(self, events, print_stdout=True):
+        self.events = events
+        self.print_stdout = print_stdout
+        self.next_line = 0
+        self.pending = {}
+
+    @property
+    def gap(self):
+        """The first line of the events waiting on earlier lines, if any"""
+        return min(self.pending) if self.pending else None
+
+    def add(self, event):
+        start_line, end_line = event['start_line'], event['end_line']
+        if end_line <= start_line or start_line < self.next_line:
+            # no stdout, or printed already
+            return
+        self.pending[start_line] = event
+        while self.next_line in self.pending:
+            event = self.pending.pop(self.next_line)
+            stdout = to_str(event.get('stdout'))
+            if stdout and self.print_stdout:
+                print(stdout)
+            self.next_line = event['end_line']
+
+    def fill(self, until=None):
+        """Fetch the events from the next line to print on, up to the line `until`"""
+        query = {'order_by': 'start_line', 'no_truncate': True, 'page_size': self.page_size}
+        if until is not None:
+            query['start_line__lt'] = until
+        while True:
+            query['start_line__gte'] = self.next_line
+            results = self.events(**query).json.results
+            next_line = self.next_line
+            for result in results:
+                self.add(result)
+            if len(results) < self.page_size or self.next_line == next_line:
+                return
+
+
+def websocket_client(connection):
+    """A WSClient authenticated like the connection, or None when the
+    websocket is not available"""
+    token = connection.session.auth.token if isinstance(connection.session.auth, Token_Auth) else None
+    session_id = connection.session.cookies.get(connection.session_cookie_name)
+    if not (token or session_id):
+        return None
+    # any value does, as long as the cookie and the subscriptions agree
+    csrftoken = connection.session.cookies.get('csrftoken') or uuid.uuid4().hex
+    try:
+        # websocket-client is an optional dependency of awxkit
+        return WSClient(token=token, session_id=session_id, csrftoken=csrftoken, session_cookie_name=connection.session_cookie_name).connect(
+            timeout=5, verify=connection.verify
+        )
+    except Exception:
+        log.debug('Unable to connect to the websocket, polling for events instead.', exc_info=True)
+        return None
+
+
+def finished(json):
+    return json.event_processing_finished is True or json.status in ('error', 'canceled')
+
+
+def poll_events(get, follower, timed_out, interval):
+    while True:
+        if timed_out():
+            return False
+        if follower.print_stdout:
+            follower.fill()
+        time.sleep(max(2.5, interval))
+        if finished(get().json):
+            if follower.print_stdout:
+                follower.fill()
+            return True
+
+
+def stream_events(ws, response, follower, timed_out, interval):
+    """
+    Print the events of the job as they are emitted on the websocket. The
+    events the websocket did not deliver, e.g. those emitted before the
+    subscription or left out when UI_LIVE_UPDATES_ENABLED is off, are fetched
+    with one range query per gap. Returns None if the websocket is lost.
+    """
+    event_group = EVENT_GROUPS[response.type]
+    if follower.print_stdout:
+        ws.subscribe(jobs=[ws_status_changed, ws_summary], **{event_group: [response.id]})
+        follower.fill()
+    else:
+        ws.subscribe(jobs=[ws_status_changed, ws_summary])
+
+    job_done = False
+    checked, gap_since = time.time(), None
+    while True:
+        if timed_out():
+            return False
+        message = ws._recv(wait=True, timeout=1)
+        if message is None and ws._ws_closed:
+            return None
+        if message and 'error' in message:
+            log.debug('Websocket subscription failed: {}'.format(message['error']))
+            return None
+        if message and message.get('group_name') == event_group:
+            follower.add(message)
+        elif message and message.get('group_name') == 'jobs' and message.get('unified_job_id') == response.id:
+            if message.get('status') in ('successful', 'failed', 'error', 'canceled') or 'final_counter' in message:
+                job_done = True
+
+        now = time.time()
+        if follower.gap is None:
+            gap_since = None
+        elif gap_since is None:
+            gap_since = now
+        elif now - gap_since >= 1:
+            # the earlier lines did not come over the websocket in time
+            follower.fill(until=follower.gap)
+            gap_since = now
+        # the status is checked every interval in case its change was missed,
+        # and right away once the job is done
+        if job_done or now - checked >= max(2.5, interval):
+            checked = now
+            if finished(response.url.get().json):
+                if follower.print_stdout:
+                    follower.fill()
+                return True
+
+
 def monitor(response, session, print_stdout=True, action_timeout=None, interval=5):
     get = response.url.get
-    payload = {'order_by': 'start_line', 'no_truncate': True}
     if response.type == 'job':
         events = response.related.job_events.get
     else:
         events = response.related.events.get
+    follower = StdoutFollower(events, print_stdout=print_stdout)
 
-    next_line = 0
-
-    def fetch(next_line):
-        for result in events(**payload).json.results:
-            if result['start_line'] != next_line:
-                # If this event is a line from _later_ in the stdout,
-                # it means that the events didn't arrive in order;
-                # skip it for now and wait until the prior lines arrive and are
-                # printed
-                continue
-            stdout = to_str(result.get('stdout'))
-            if stdout and print_stdout:
-                print(stdout)
-            next_line = result['end_line']
-        return next_line
+    started = time.time()
+
+    def timed_out():
+        return bool(action_timeout and time.time() - started > action_timeout)
 
     if print_stdout:
         cprint('------Starting Standard Out Stream------', 'red')
 
-    started = time.time()
-    while True:
-        if action_timeout and time.time() - started > action_timeout:
-            if print_stdout:
-                cprint('Monitoring aborted due to action-timeout.', 'red')
-            break
-        next_line = fetch(next_line)
-        if next_line:
-            payload['start_line__gte'] = next_line
-
-        time.sleep(max(2.5, interval))
-        json = get().json
-        if json.event_processing_finished is True or json.status in ('error', 'canceled'):
-            fetch(next_line)
-            break
+    done = None
+    ws = websocket_client(response.connection) if response.type in EVENT_GROUPS else None
+    if ws is not None:
+        try:
+            done = stream_events(ws, response, follower, timed_out, interval or 5)
+        finally:
+            ws.close()
+    if done is None:
+        done = poll_events(get, follower, timed_out, interval or 5)
+
+    if not done and print_stdout:
+        cprint('Monitoring aborted due to action-timeout.', 'red')
     if print_stdout:
         cprint('------End of Standard Out Stream--------\n', 'red')
     return get().json.status
@@ -30,6 +30,7 @@ config.getvalue = types.MethodType(getvalue, config)
 config.assume_untrusted = config.get('assume_untrusted', True)
 
 config.client_connection_attempts = int(os.getenv('AWXKIT_CLIENT_CONNECTION_ATTEMPTS', 5))
+config.client_concurrency = int(os.getenv('AWXKIT_CLIENT_CONCURRENCY', 8))
 config.prevent_teardown = to_bool(os.getenv('AWXKIT_PREVENT_TEARDOWN', False))
 config.use_sessions = to_bool(os.getenv('AWXKIT_SESSIONS', False))
 config.api_base_path = os.getenv('AWXKIT_API_BASE_PATH', '/api/')
@@ -2,6 +2,7 @@ import threading
 import logging
 import atexit
 import json
+import os
 import ssl
 import datetime
 
@@ -86,33 +87,50 @@ class WSClient(object):
         self._recv_queue = Queue()
         self._ws_closed = False
         self._ws_connected_flag = threading.Event()
+        header = None
         if self.token is not None:
             auth_cookie = 'token="{0.token}";'.format(self)
+            header = ['Authorization: Bearer {0.token}'.format(self)]
         elif self.session_id is not None:
-            auth_cookie = '{1}="{0.session_id}"'.format(self, session_cookie_name)
-            if self.csrftoken:
-                auth_cookie += ';csrftoken={0.csrftoken}'.format(self)
+            auth_cookie = '{1}="{0.session_id}";'.format(self, session_cookie_name)
         else:
             auth_cookie = ''
+        if self.csrftoken:
+            # subscriptions are only accepted with the csrftoken of the cookie as their xrftoken
+            auth_cookie += 'csrftoken={0.csrftoken}'.format(self)
         pref = 'wss://' if self._use_ssl else 'ws://'
         url = '{0}{1.hostname}:{1.port}/{1.suffix}'.format(pref, self)
         self.ws = websocket.WebSocketApp(
-            url, on_open=self._on_open, on_message=self._on_message, on_error=self._on_error, on_close=self._on_close, cookie=auth_cookie
+            url, header=header, on_open=self._on_open, on_message=self._on_message, on_error=self._on_error, on_close=self._on_close, cookie=auth_cookie
         )
         self._message_cache = []
         self._should_subscribe_to_pending_job = False
         self._pending_unsubscribe = threading.Event()
         self._add_received_time = add_received_time
 
-    def connect(self):
-        wst = threading.Thread(target=self._ws_run_forever, args=(self.ws, {"cert_reqs": ssl.CERT_NONE}))
+    def connect(self, timeout=20, verify=None):
+        """verify works like the verify of requests, the certificate of AWX is
+        only checked when it is set or when assume_untrusted is off"""
+        wst = threading.Thread(target=self._ws_run_forever, args=(self.ws, self._sslopt(verify)))
         wst.daemon = True
         wst.start()
         atexit.register(self.close)
-        if not self._ws_connected_flag.wait(20):
+        if not self._ws_connected_flag.wait(timeout):
             raise WSClientException('Failed to establish channel connection w/ AWX.')
         return self
 
+    @staticmethod
+    def _sslopt(verify):
+        if verify is None:
+            verify = not config.assume_untrusted
+        if not verify:
+            return {"cert_reqs": ssl.CERT_NONE}
+        sslopt = {"cert_reqs": ssl.CERT_REQUIRED}
+        if isinstance(verify, str):
+            # a CA bundle, or a directory of CA certificates
+            sslopt["ca_cert_path" if os.path.isdir(verify) else "ca_certs"] = verify
+        return sslopt
+
     def close(self):
         log.info('close method was called, but ignoring')
         if not self._ws_closed:
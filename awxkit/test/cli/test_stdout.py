@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+from awxkit.cli import stdout
+from awxkit.cli.stdout import StdoutFollower, stream_events
+
+
+def event(start_line, end_line=None, stdout=None):
+    end_line = start_line + 1 if end_line is None else end_line
+    return {'group_name': 'job_events', 'start_line': start_line, 'end_line': end_line, 'stdout': stdout or 'line {}'.format(start_line)}
+
+
+class Events(object):
+    def __init__(self, saved):
+        self.saved = saved
+        self.queries = []
+
+    def __call__(self, **query):
+        self.queries.append(dict(query))
+        results = sorted(
+            (e for e in self.saved if e['start_line'] >= query['start_line__gte'] and e['start_line'] < query.get('start_line__lt', float('inf'))),
+            key=lambda e: e['start_line'],
+        )
+        return SimpleNamespace(json=SimpleNamespace(results=results[: query['page_size']]))
+
+
+class WS(object):
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.subscriptions = []
+        self._ws_closed = False
+
+    def subscribe(self, **groups):
+        self.subscriptions.append(groups)
+
+    def _recv(self, wait=False, timeout=10):
+        message = self.messages.pop(0) if self.messages else None
+        return message() if callable(message) else message
+
+
+def job(status='running', event_processing_finished=False):
+    json = SimpleNamespace(status=status, event_processing_finished=event_processing_finished)
+    return SimpleNamespace(type='job', id=5, url=SimpleNamespace(get=lambda: SimpleNamespace(json=json)), json=json)
+
+
+def test_follower_prints_in_order(capsys):
+    follower = StdoutFollower(Events([]))
+    for e in (event(0, 0, ''), event(2), event(1), event(0), event(1), event(3, 3, '')):
+        follower.add(e)
+    assert capsys.readouterr().out == 'line 0\nline 1\nline 2\n'
+    assert follower.next_line == 3
+    assert follower.gap is None
+
+
+def test_follower_fill_pages(capsys, monkeypatch):
+    monkeypatch.setattr(StdoutFollower, 'page_size', 2)
+    events = Events([event(i) for i in range(5)])
+    follower = StdoutFollower(events)
+    follower.fill()
+    assert follower.next_line == 5
+    assert [q['start_line__gte'] for q in events.queries] == [0, 2, 4]
+    assert capsys.readouterr().out.splitlines() == ['line {}'.format(i) for i in range(5)]
+
+
+def test_stream_fills_gaps_with_range_fetch(capsys, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(stdout.time, 'time', lambda: next(clock))
+    events = Events([event(0)])
+    response = job()
+
+    def saved_later():
+        events.saved.extend([event(1), event(2), event(3)])
+
+    def finished():
+        response.json.status = 'successful'
+        response.json.event_processing_finished = True
+        return {'group_name': 'jobs', 'unified_job_id': 5, 'status': 'successful'}
+
+    # lines 1 and 2 are not sent over the websocket
+    ws = WS([event(3), saved_later, finished])
+    assert stream_events(ws, response, StdoutFollower(events), lambda: False, 5) is True
+
+    assert ws.subscriptions == [{'jobs': ['status_changed', 'summary'], 'job_events': [5]}]
+    assert [(q['start_line__gte'], q.get('start_line__lt')) for q in events.queries] == [(0, None), (1, 3), (4, None)]
+    assert capsys.readouterr().out.splitlines() == ['line {}'.format(i) for i in range(4)]
+
+
+def test_stream_gives_up_when_websocket_closes():
+    ws = WS([])
+    ws._ws_closed = True
+    assert stream_events(ws, job(), StdoutFollower(Events([])), lambda: False, 5) is None
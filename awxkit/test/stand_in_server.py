@@ -0,0 +1,155 @@
+"""
+A small in-memory stand-in for the AWX API, enough of it for awxkit to read
+and write organizations and teams and to read everything else as empty
+lists. Every request takes `latency` seconds, so that concurrency shows up
+in the wall clock time the way it does against a remote server.
+"""
+
+import json
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+
+from awxkit.api.client import Connection
+from awxkit.api.pages.api import EXPORTABLE_RESOURCES
+
+SERVER = 'http://awx.example'
+
+# resource of the api root -> url path
+RESOURCE_PATHS = {resource: resource for resource in EXPORTABLE_RESOURCES}
+RESOURCE_PATHS['inventory'] = 'inventories'
+# schedules may belong to these
+RESOURCE_PATHS['system_job_templates'] = 'system_job_templates'
+
+POST_FIELDS = {
+    'organizations': {
+        'name': {'type': 'string', 'required': True},
+        'description': {'type': 'string'},
+    },
+    'teams': {
+        'name': {'type': 'string', 'required': True},
+        'description': {'type': 'string'},
+        'organization': {'type': 'id', 'required': True},
+    },
+}
+
+OBJECT_TYPES = {'organizations': 'organization', 'teams': 'team'}
+
+
+class StandInServer:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.objects = {path: {} for path in RESOURCE_PATHS.values()}
+        self.lock = threading.RLock()
+        self.next_id = 1
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def add(self, path, **fields):
+        with self.lock:
+            pk = self.next_id
+            self.next_id += 1
+        obj = {'id': pk, 'type': OBJECT_TYPES[path], 'url': f'/api/v2/{path}/{pk}/', 'related': {}, 'description': ''}
+        obj.update(fields)
+        if 'organization' in obj:
+            obj['related']['organization'] = f'/api/v2/organizations/{obj["organization"]}/'
+        self.objects[path][pk] = obj
+        return obj
+
+    def find(self, path, **fields):
+        return [obj for obj in self.objects[path].values() if all(obj.get(k) == v for k, v in fields.items())]
+
+    def list_page(self, path, query):
+        objects = sorted(self.objects[path].values(), key=lambda obj: obj['id'])
+        for key, value in query.items():
+            if key == 'id__gt':
+                objects = [obj for obj in objects if obj['id'] > int(value)]
+            elif key in ('name', 'id'):
+                objects = [obj for obj in objects if str(obj[key]) == value]
+        page_number, page_size = int(query.get('page', 1)), int(query.get('page_size', 25))
+        start = (page_number - 1) * page_size
+        if page_number > 1 and start >= len(objects):
+            return None
+
+        def link(number):
+            return f'/api/v2/{path}/?' + urlencode(dict(query, page=number))
+
+        return {
+            'count': len(objects),
+            'next': link(page_number + 1) if start + page_size < len(objects) else None,
+            'previous': link(page_number - 1) if page_number > 1 else None,
+            'results': objects[start : start + page_size],
+        }
+
+    def handle(self, method, path, query, body):
+        parts = [part for part in path.split('/') if part][2:]  # drop api/v2
+        if not parts:
+            if method == 'get':
+                return 200, {resource: f'/api/v2/{path}/' for resource, path in RESOURCE_PATHS.items()}, {}
+            return 405, {}, {}
+        resource_path, pk = parts[0], int(parts[1]) if len(parts) > 1 else None
+        if resource_path not in self.objects:
+            return 404, {'detail': 'Not found.'}, {}
+        if method == 'options':
+            return 200, {'actions': {'POST': POST_FIELDS.get(resource_path, {})}, 'search_fields': ['name']}, {'Allow': 'GET, POST, HEAD, OPTIONS'}
+        if pk is None:
+            if method == 'get':
+                page = self.list_page(resource_path, query)
+                if page is None:
+                    return 404, {'detail': 'Invalid page.'}, {}
+                return 200, page, {}
+            if method == 'post':
+                if self.find(resource_path, **{k: body[k] for k in ('name', 'organization') if k in body}):
+                    return 400, {'__all__': ['already exists']}, {}
+                return 201, self.add(resource_path, **body), {}
+            return 405, {}, {}
+        obj = self.objects[resource_path].get(pk)
+        if obj is None:
+            return 404, {'detail': 'Not found.'}, {}
+        if method == 'get':
+            return 200, obj, {}
+        if method in ('put', 'patch'):
+            obj.update(body)
+            return 200, obj, {}
+        return 405, {}, {}
+
+
+def encode(body):
+    return json.dumps(body).encode('utf-8')
+
+
+class StandInConnection(Connection):
+    def __init__(self, stand_in):
+        super().__init__(SERVER)
+        self.stand_in = stand_in
+
+    def request(self, relative_endpoint, method='get', json=None, data=None, query_parameters=None, headers=None):
+        url = SERVER + relative_endpoint
+        prepared = requests.Request(method.upper(), url, params=query_parameters).prepare()
+        split = urlsplit(prepared.url)
+
+        server = self.stand_in
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            server.requests.append((method, prepared.path_url))
+        try:
+            time.sleep(server.latency)
+            with server.lock:
+                status, body, response_headers = server.handle(method, split.path, dict(parse_qsl(split.query)), json)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+        response = requests.Response()
+        response.status_code = status
+        response._content = encode(body)
+        response.headers.update(response_headers)
+        response.headers['Content-Type'] = 'application/json'
+        response.request = prepared
+        response.url = prepared.url
+        response.encoding = 'utf-8'
+        return response
@@ -0,0 +1,64 @@
+import pytest
+
+from awxkit.api.pages.api import ApiV2
+from awxkit.config import config
+
+from .stand_in_server import StandInConnection, StandInServer
+
+
+def org_key(i):
+    return {'name': f'org{i}', 'type': 'organization'}
+
+
+ASSETS = {
+    'organizations': [{'name': f'org{i}', 'description': '', 'natural_key': org_key(i)} for i in range(10)],
+    'teams': [
+        {
+            'name': f'team{i}',
+            'description': '',
+            'organization': org_key(i % 10),
+            'natural_key': {'name': f'team{i}', 'organization': org_key(i % 10), 'type': 'team'},
+        }
+        for i in range(30)
+    ],
+}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(config, 'client_concurrency', 4)
+    return StandInServer(latency=0.002)
+
+
+def get_api(server):
+    return ApiV2(StandInConnection(server), endpoint='/api/v2/').get()
+
+
+def test_import_concurrently(server):
+    api = get_api(server)
+    assert api.import_assets(ASSETS) is True
+    assert not getattr(api, '_has_error', False)
+    assert 1 < server.max_in_flight <= 4
+
+    assert len(server.objects['organizations']) == 10
+    assert len(server.objects['teams']) == 30
+    for team in server.objects['teams'].values():
+        org = server.objects['organizations'][team['organization']]
+        assert org['name'] == 'org{}'.format(int(team['name'][len('team') :]) % 10)
+
+    # the existing objects are found by natural key and updated
+    server.requests.clear()
+    api = get_api(server)
+    assert api.import_assets(ASSETS) is True
+    assert len(server.objects['teams']) == 30
+    methods = [method for method, path in server.requests]
+    assert methods.count('put') == 40
+    assert 'post' not in methods
+
+
+def test_export_round_trip(server):
+    get_api(server).import_assets(ASSETS)
+    data = get_api(server).export_assets(organizations='', teams='')
+    # concurrent imports create the objects of a level in any order
+    for resource in ('organizations', 'teams'):
+        assert sorted(data[resource], key=lambda asset: asset['name']) == sorted(ASSETS[resource], key=lambda asset: asset['name'])
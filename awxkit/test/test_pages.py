@@ -0,0 +1,56 @@
+import pytest
+
+from awxkit.api.pages.api import ApiV2
+from awxkit.api.pages.page import page_url
+from awxkit.config import config
+
+from .stand_in_server import StandInConnection, StandInServer
+
+
+class ChangingServer(StandInServer):
+    """Deletes the first organization when the third page is read"""
+
+    def list_page(self, path, query):
+        if query.get('page') == '3':
+            self.objects[path].pop(min(self.objects[path]), None)
+        return super().list_page(path, query)
+
+
+def organizations(server, count):
+    for i in range(count):
+        server.add('organizations', name=f'org{i}')
+    return ApiV2(StandInConnection(server), endpoint='/api/v2/').get().organizations
+
+
+@pytest.fixture(autouse=True)
+def concurrency(monkeypatch):
+    monkeypatch.setattr(config, 'client_concurrency', 4)
+
+
+def test_page_url():
+    assert page_url('/api/v2/teams/?page_size=10&page=2&name=a', 7) == '/api/v2/teams/?page_size=10&name=a&page=7'
+    assert page_url('/api/v2/teams/', 2) == '/api/v2/teams/?page=2'
+
+
+def test_all_pages_fetched_concurrently_in_order():
+    server = StandInServer(latency=0.002)
+    endpoint = organizations(server, 95)
+    server.requests.clear()
+
+    page = endpoint.get(all_pages=True, page_size=10)
+    assert [org.name for org in page.results] == [f'org{i}' for i in range(95)]
+    assert page.count == 95
+    assert page.next is None
+    assert len(server.requests) == 10
+    assert server.max_in_flight > 1
+
+
+def test_changed_list_read_again_by_id():
+    server = ChangingServer(latency=0.002)
+    endpoint = organizations(server, 45)
+    server.requests.clear()
+
+    page = endpoint.get(all_pages=True, page_size=10)
+    # the list shifted by one while it was read, nothing is skipped or duplicated
+    assert [org.name for org in page.results] == [f'org{i}' for i in range(1, 45)]
+    assert any('id__gt' in path for method, path in server.requests)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from collections import namedtuple
 
+import ssl
 from unittest.mock import patch
 import pytest
 
@@ -39,3 +40,19 @@ def test_urlparsing(url, result):
         assert client.port == result.port
         assert client.hostname == result.hostname
         assert client._use_ssl == result.secure
+
+
+@pytest.mark.parametrize(
+    'verify, assume_untrusted, sslopt',
+    [
+        [None, True, {'cert_reqs': ssl.CERT_NONE}],
+        [None, False, {'cert_reqs': ssl.CERT_REQUIRED}],
+        [False, False, {'cert_reqs': ssl.CERT_NONE}],
+        [True, True, {'cert_reqs': ssl.CERT_REQUIRED}],
+        ['/etc/ssl/ca.pem', True, {'cert_reqs': ssl.CERT_REQUIRED, 'ca_certs': '/etc/ssl/ca.pem'}],
+    ],
+)
+def test_certificate_verified(verify, assume_untrusted, sslopt):
+    with patch("awxkit.ws.config") as mock_config:
+        mock_config.assume_untrusted = assume_untrusted
+        assert WSClient._sslopt(verify) == sslopt
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import threading
+import time
+
+import click
+import requests
+import urllib3
+
+
+def make_session(username, password, insecure):
+    session = requests.Session()
+    session.auth = (username, password)
+    session.verify = not insecure
+    session.headers['Content-Type'] = 'application/json'
+    return session
+
+
+def run(label, launches, concurrency, launch, new_session):
+    """
+    Call launch(session) `launches` times from `concurrency` threads, launch
+    returns the number of jobs it launched
+    """
+    local = threading.local()
+    latencies = []
+    errors = []
+
+    def call(i):
+        if not hasattr(local, 'session'):
+            local.session = new_session()
+        start = time.perf_counter()
+        try:
+            jobs = launch(local.session)
+        except requests.exceptions.RequestException as e:
+            errors.append(e)
+            return 0
+        latencies.append(time.perf_counter() - start)
+        return jobs
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        jobs = sum(executor.map(call, range(launches)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    click.echo(f'{label}: {jobs} jobs in {elapsed:.2f}s, {jobs / elapsed:.1f} launches/sec, {len(errors)} errors')
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        click.echo(f'{label}: request latency p50 {p50 * 1000:.0f}ms, p95 {p95 * 1000:.0f}ms, max {latencies[-1] * 1000:.0f}ms')
+    for error in errors[:5]:
+        click.echo(f'{label}: {error}', err=True)
+
+
+@click.command()
+@click.option('--url', default='https://localhost:8043', help='Base url of the AWX API.')
+@click.option('--username', default='admin')
+@click.option('--password', required=True)
+@click.option('--job-template', 'job_template', required=True, type=int, help='Id of the job template to launch.')
+@click.option('--launches', default=200, help='Number of requests to send to each endpoint.')
+@click.option('--concurrency', default=8, help='Number of requests in flight.')
+@click.option('--bulk-size', default=50, help='Number of jobs in each bulk launch request.')
+@click.option('--endpoint', type=click.Choice(['single', 'bulk', 'both']), default='both')
+@click.option('--insecure', is_flag=True, help='Ignore SSL certs if true')
+def launch_benchmark(url, username, password, job_template, launches, concurrency, bulk_size, endpoint, insecure):
+    """
+    Measure how many jobs per second the launch endpoints of AWX accept.
+
+    \b
+    The single endpoint is /api/v2/job_templates/N/launch/, one job per
+    request. The bulk endpoint is /api/v2/bulk/job_launch/ with --bulk-size
+    jobs per request, the jobs of a bulk launch are created by the workflow
+    manager afterwards, so its rate counts the jobs accepted by the API.
+
+    \b
+    Every launched job stays pending or runs, use a job template with a
+    cheap playbook and an inventory with few hosts, and cancel or delete
+    the jobs afterwards.
+
+    \b
+    Example usage:
+      ./launch_benchmark.py \\
+        --url https://localhost:8043 \\
+        --password password \\
+        --job-template 7 \\
+        --launches 500 \\
+        --concurrency 16 \\
+        --insecure
+    """
+    if insecure:
+        urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    api = url.rstrip('/') + '/api/v2'
+    new_session = partial(make_session, username, password, insecure)
+
+    def launch_single(session):
+        response = session.post(f'{api}/job_templates/{job_template}/launch/', json={})
+        response.raise_for_status()
+        return 1
+
+    def launch_bulk(session):
+        jobs = [{'unified_job_template': job_template} for i in range(bulk_size)]
+        response = session.post(f'{api}/bulk/job_launch/', json={'name': 'launch benchmark', 'jobs': jobs})
+        response.raise_for_status()
+        return bulk_size
+
+    if endpoint in ('single', 'both'):
+        run('single', launches, concurrency, launch_single, new_session)
+    if endpoint in ('bulk', 'both'):
+        run('bulk', max(1, launches // bulk_size), concurrency, launch_bulk, new_session)
+
+
+if __name__ == '__main__':
+    launch_benchmark()